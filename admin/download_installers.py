@@ -117,10 +117,18 @@ PATTERNS = {
     (EE_MASTER, ),
     'tests/test_dcos_e2e/backends/docker/test_docker.py':
     (),
+    'tests/test_dcos_e2e/backends/docker/test_genconf_cache.py':
+    (),
+    'tests/test_dcos_e2e/backends/docker/test_snapshots.py':
+    (OSS_MASTER, ),
     'tests/test_dcos_e2e/backends/vagrant':
     (),
     'tests/test_dcos_e2e/docker_utils/test_loopback.py':
     (),
+    'tests/test_dcos_e2e/test_artifact_cache.py':
+    (),
+    'tests/test_dcos_e2e/test_bootstrap.py':
+    (),
     'tests/test_dcos_e2e/test_cluster.py::TestClusterFromNodes':
     (OSS_MASTER, ),
     'tests/test_dcos_e2e/test_cluster.py::TestClusterSize':
@@ -136,10 +144,18 @@ PATTERNS = {
     (),
     'tests/test_dcos_e2e/test_cluster.py::TestDestroyNode':
     (),
+    'tests/test_dcos_e2e/test_cluster.py::TestStreamOutput':
+    (),
     'tests/test_dcos_e2e/test_cluster.py::TestUpgrade::test_upgrade_from_path':
     (OSS_2_0, OSS_2_1),
     'tests/test_dcos_e2e/test_cluster.py::TestUpgrade::test_upgrade_from_url':
     (OSS_2_0, ),
+    'tests/test_dcos_e2e/test_cluster_pool.py':
+    (OSS_MASTER, ),
+    'tests/test_dcos_e2e/test_distribution.py':
+    (),
+    'tests/test_dcos_e2e/test_docker_api_transport.py':
+    (),
     'tests/test_dcos_e2e/test_enterprise.py::TestCopyFiles::test_copy_directory_to_installer':  # noqa: E501
     (EE_MASTER, ),
     'tests/test_dcos_e2e/test_enterprise.py::TestCopyFiles::test_copy_files_to_installer':  # noqa: E501
@@ -150,6 +166,10 @@ PATTERNS = {
     (EE_MASTER, ),
     'tests/test_dcos_e2e/test_enterprise.py::TestWaitForDCOS':
     (EE_MASTER, ),
+    'tests/test_dcos_e2e/test_file_lock.py':
+    (),
+    'tests/test_dcos_e2e/test_installers.py':
+    (),
     'tests/test_dcos_e2e/test_legacy.py::Test113::test_enterprise':
     (EE_1_13, ),
     'tests/test_dcos_e2e/test_legacy.py::Test113::test_oss':
@@ -171,6 +191,16 @@ PATTERNS = {
     'tests/test_dcos_e2e/test_node_install.py::TestCopyFiles::test_install_from_path_with_genconf_files':  # noqa: E501
     (OSS_MASTER, ),
     'tests/test_dcos_e2e/test_node_upgrade.py': (OSS_2_0, OSS_2_1),
+    'tests/test_dcos_e2e/test_readiness.py':
+    (),
+    'tests/test_dcos_e2e/test_rollout.py':
+    (),
+    'tests/test_dcos_e2e/test_rollout_policies.py':
+    (),
+    'tests/test_dcos_e2e/test_ssh_connections.py':
+    (),
+    'tests/test_dcos_e2e/test_subprocess_tools.py':
+    (),
 }  # type: Dict[str, Tuple]
 
 
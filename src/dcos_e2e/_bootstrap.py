@@ -0,0 +1,906 @@
+"""
+Helpers for installing and upgrading DC/OS on many nodes with a bootstrap
+node.
+
+This follows the advanced installation method as described at
+https://docs.d2iq.com/mesosphere/dcos/2.1/installing/production/deploying-dcos/installation/.
+The installer is put on one "bootstrap" node and ``--genconf`` is run there
+once.
+The ``genconf/serve`` directory is then served over HTTP from the bootstrap
+node and every node in the cluster runs ``dcos_install.sh`` from it.
+
+Upgrades follow
+https://docs.d2iq.com/mesosphere/dcos/2.1/installing/production/upgrading/
+in the same way: ``--generate-node-upgrade-script`` is run once on the
+bootstrap node, and every node runs the node upgrade script served from it.
+"""
+
+import logging
+import subprocess
+import uuid
+from pathlib import Path
+from textwrap import dedent
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from retry import retry
+
+from . import _rollout
+from .node import (
+    _UPGRADE_SCRIPT_OUTPUT,
+    Node,
+    Output,
+    Role,
+    Transport,
+    _download_installer_to_node,
+    _node_installer_path,
+    _prepare_installer,
+    _upgrade_script_location,
+)
+from .rollout_policies import RolloutPolicy
+
+LOGGER = logging.getLogger(__name__)
+
+# This works with both Python 2 and Python 3 as we cannot rely on DC/OS's
+# Python 3 being available on a node before DC/OS is installed.
+_PYTHON_TO_FIND_OPEN_PORT = dedent(
+    """\
+    import socket
+
+    new = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    new.bind(('', 0))
+    print(int(new.getsockname()[1]))
+    new.close()
+    """,
+)
+
+# Nodes with DC/OS installed have DC/OS's Python 3, even if they have no other
+# Python.
+_USE_DCOS_PYTHON = '. /opt/mesosphere/environment.export'
+
+
+def _find_open_port(
+    node: Node,
+    user: Optional[str],
+    transport: Optional[Transport],
+) -> int:
+    """
+    Return a port which is free on the given node.
+    """
+    script = dedent(
+        """\
+        if command -v python3 >/dev/null 2>&1; then
+            python3 -c "$PROGRAM"
+        elif command -v python >/dev/null 2>&1; then
+            python -c "$PROGRAM"
+        else
+            {use_dcos_python}
+            python -c "$PROGRAM"
+        fi
+        """,
+    ).format(use_dcos_python=_USE_DCOS_PYTHON)
+    result = node.run(
+        args=['/bin/sh', '-c', script],
+        env={'PROGRAM': _PYTHON_TO_FIND_OPEN_PORT},
+        user=user,
+        transport=transport,
+        output=Output.CAPTURE,
+    )
+    return int(result.stdout.decode())
+
+
+def _start_bootstrap_server(
+    node: Node,
+    serve_dir: Path,
+    port: int,
+    user: Optional[str],
+    transport: Optional[Transport],
+) -> int:
+    """
+    Serve ``serve_dir`` over HTTP on the given ``port`` on ``node``.
+
+    The server is left running in the background.
+    After an install, it must keep running as ``dcos-setup`` on each node
+    fetches cluster packages from the bootstrap URL after
+    ``dcos_install.sh --no-block-dcos-setup`` has returned.
+
+    Returns:
+        The ID of the server process.
+    """
+    script = dedent(
+        """\
+        cd "$SERVE_DIR" || exit 1
+        if command -v python3 >/dev/null 2>&1; then
+            set -- python3 -m http.server "$PORT"
+        elif command -v python >/dev/null 2>&1; then
+            set -- python -m SimpleHTTPServer "$PORT"
+        else
+            {use_dcos_python}
+            set -- python -m http.server "$PORT"
+        fi
+        nohup "$@" >/dev/null 2>&1 </dev/null &
+        echo "$!"
+        """,
+    ).format(use_dcos_python=_USE_DCOS_PYTHON)
+    result = node.run(
+        args=['/bin/sh', '-c', script],
+        env={
+            'SERVE_DIR': str(serve_dir),
+            'PORT': str(port),
+        },
+        user=user,
+        transport=transport,
+        output=Output.CAPTURE,
+    )
+    return int(result.stdout.decode())
+
+
+@retry(
+    exceptions=(subprocess.CalledProcessError),
+    tries=30,
+    delay=1,
+)
+def _wait_for_bootstrap_server(
+    node: Node,
+    url: str,
+    user: Optional[str],
+    transport: Optional[Transport],
+) -> None:
+    """
+    Retry until the bootstrap server serves the file at ``url``.
+    """
+    node.run(
+        args=[
+            'curl',
+            '--fail',
+            '--silent',
+            '--output',
+            '/dev/null',
+            url,
+        ],
+        user=user,
+        transport=transport,
+        output=Output.CAPTURE,
+    )
+
+
+class BootstrapServer:
+    """
+    A server for DC/OS installation files on a bootstrap node.
+    """
+
+    def __init__(
+        self,
+        node: Node,
+        pid: int,
+        workspace_dir: Path,
+        user: Optional[str],
+        transport: Optional[Transport],
+    ) -> None:
+        """
+        Args:
+            node: The bootstrap node.
+            pid: The ID of the server process.
+            workspace_dir: The directory on the node which holds the files
+                which are served.
+            user: The username to communicate with the node as.
+            transport: The transport to use for communicating with the node.
+        """
+        self.node = node
+        self.pid = pid
+        self.workspace_dir = workspace_dir
+        self.user = user
+        self.transport = transport
+
+
+def stop_bootstrap_server(server: BootstrapServer) -> None:
+    """
+    Stop a bootstrap server and remove the files which it serves.
+
+    Errors are logged rather than raised, so that they do not hide an error
+    which caused the server to be stopped.
+    """
+    commands = (
+        (['kill', str(server.pid)], False),
+        (['rm', '-rf', str(server.workspace_dir)], True),
+    )
+    for args, sudo in commands:
+        try:
+            server.node.run(
+                args=args,
+                user=server.user,
+                transport=server.transport,
+                output=Output.CAPTURE,
+                sudo=sudo,
+            )
+        except subprocess.CalledProcessError as exc:
+            message = (
+                'Failed to clean up the bootstrap server on {node}: {exc}'
+            ).format(node=server.node, exc=exc)
+            LOGGER.warning(message)
+
+
+def _install_dcos_from_bootstrap_url(
+    node: Node,
+    bootstrap_url: str,
+    role: Role,
+    user: Optional[str],
+    output: Output,
+    transport: Optional[Transport],
+) -> None:
+    """
+    Install DC/OS on a node using ``dcos_install.sh`` served from a bootstrap
+    node.
+
+    Args:
+        node: The node to install DC/OS on.
+        bootstrap_url: The URL of the bootstrap node's ``genconf/serve``
+            directory.
+        role: The desired DC/OS role for the installation.
+        user: The username to communicate as. If ``None`` then the
+            ``default_user`` is used instead.
+        output: What happens with stdout and stderr.
+        transport: The transport to use for communicating with nodes. If
+            ``None``, the ``Node``'s ``default_transport`` is used.
+    """
+    workspace_dir = Path('/dcos-install-dir') / uuid.uuid4().hex
+    dcos_install_path = workspace_dir / 'dcos_install.sh'
+    setup_args = [
+        'mkdir',
+        '--parents',
+        str(workspace_dir),
+        '&&',
+        'cd',
+        str(workspace_dir),
+        '&&',
+        'curl',
+        '--fail',
+        '--silent',
+        '--show-error',
+        '--output',
+        str(dcos_install_path),
+        bootstrap_url + '/dcos_install.sh',
+        '&&',
+        'bash',
+        str(dcos_install_path),
+        '--no-block-dcos-setup',
+        role.value,
+    ]
+
+    node.run(
+        args=setup_args,
+        shell=True,
+        output=output,
+        transport=transport,
+        user=user,
+        sudo=True,
+    )
+
+
+def _install_dcos_from_bootstrap_node_path(
+    bootstrap_node: Node,
+    remote_dcos_installer: Path,
+    masters: Set[Node],
+    agents: Set[Node],
+    public_agents: Set[Node],
+    dcos_config: Dict[str, Any],
+    ip_detect_path: Path,
+    files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]],
+    output: Output,
+    user: Optional[str],
+    transport: Optional[Transport],
+) -> BootstrapServer:
+    """
+    Run ``--genconf`` once on the bootstrap node, serve the result and
+    install DC/OS on all nodes from it.
+
+    ``dcos_install.sh`` is run on all nodes at the same time.
+
+    Returns:
+        The server for the installation files. This must be kept running
+        until ``dcos-setup`` has fetched cluster packages on every node,
+        and then stopped with ``stop_bootstrap_server``. It is stopped if
+        the installation fails.
+    """
+    port = _find_open_port(
+        node=bootstrap_node,
+        user=user,
+        transport=transport,
+    )
+    bootstrap_url = 'http://{ip_address}:{port}'.format(
+        ip_address=bootstrap_node.private_ip_address,
+        port=port,
+    )
+
+    _prepare_installer(
+        node=bootstrap_node,
+        dcos_config=dcos_config,
+        files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+        ip_detect_path=ip_detect_path,
+        remote_dcos_installer=remote_dcos_installer,
+        transport=transport,
+        user=user,
+        bootstrap_url=bootstrap_url,
+    )
+
+    genconf_args = [
+        'cd',
+        str(remote_dcos_installer.parent),
+        '&&',
+        'bash',
+        str(remote_dcos_installer),
+        '-v',
+        '--genconf',
+    ]
+
+    bootstrap_node.run(
+        args=genconf_args,
+        output=output,
+        shell=True,
+        transport=transport,
+        user=user,
+        sudo=True,
+    )
+
+    bootstrap_node.run(
+        args=['rm', str(remote_dcos_installer)],
+        output=output,
+        transport=transport,
+        user=user,
+        sudo=True,
+    )
+
+    server = BootstrapServer(
+        node=bootstrap_node,
+        pid=_start_bootstrap_server(
+            node=bootstrap_node,
+            serve_dir=remote_dcos_installer.parent / 'genconf' / 'serve',
+            port=port,
+            user=user,
+            transport=transport,
+        ),
+        workspace_dir=remote_dcos_installer.parent,
+        user=user,
+        transport=transport,
+    )
+    try:
+        _wait_for_bootstrap_server(
+            node=bootstrap_node,
+            url=bootstrap_url + '/dcos_install.sh',
+            user=user,
+            transport=transport,
+        )
+        LOGGER.debug(
+            'Serving DC/OS installation files from `{url}`'.format(
+                url=bootstrap_url,
+            ),
+        )
+
+        def install(node: Node, role: Role) -> None:
+            _install_dcos_from_bootstrap_url(
+                node=node,
+                bootstrap_url=bootstrap_url,
+                role=role,
+                user=user,
+                output=output,
+                transport=transport,
+            )
+
+        _rollout.run_on_nodes(
+            operation=install,
+            masters=masters,
+            agents=agents,
+            public_agents=public_agents,
+            rollout_policy=RolloutPolicy.concurrent(),
+        )
+    except BaseException:
+        stop_bootstrap_server(server=server)
+        raise
+
+    return server
+
+
+def install_dcos_from_path(
+    bootstrap_node: Node,
+    masters: Set[Node],
+    agents: Set[Node],
+    public_agents: Set[Node],
+    dcos_installer: Path,
+    dcos_config: Dict[str, Any],
+    ip_detect_path: Path,
+    files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]],
+    output: Output,
+    user: Optional[str] = None,
+    transport: Optional[Transport] = None,
+) -> BootstrapServer:
+    """
+    Install DC/OS on all given nodes with a bootstrap node, from a local
+    installer.
+
+    The installer is sent only to the bootstrap node.
+
+    Args:
+        bootstrap_node: The node to run ``--genconf`` on and to serve the
+            installation files from. This may be one of the cluster nodes.
+            It must be reachable from all cluster nodes on its private IP
+            address.
+        masters: Master nodes to install DC/OS on.
+        agents: Agent nodes to install DC/OS on.
+        public_agents: Public agent nodes to install DC/OS on.
+        dcos_installer: The ``Path`` to a local installer to install DC/OS
+            from.
+        dcos_config: The contents of the DC/OS ``config.yaml``.
+        ip_detect_path: The path to the ``ip-detect`` script to use for
+            installing DC/OS.
+        files_to_copy_to_genconf_dir: Pairs of host paths to paths on
+            the installer node. These are files to copy from the host to
+            the installer node before installing DC/OS.
+        output: What happens with stdout and stderr.
+        user: The username to communicate as. If ``None`` then each node's
+            ``default_user`` is used instead.
+        transport: The transport to use for communicating with nodes. If
+            ``None``, each ``Node``'s ``default_transport`` is used.
+
+    Returns:
+        The server for the installation files on the bootstrap node. This
+        must be stopped with ``stop_bootstrap_server`` once DC/OS has started
+        on every node.
+    """
+    remote_dcos_installer = _node_installer_path(
+        node=bootstrap_node,
+        user=user,
+        transport=transport,
+        output=output,
+    )
+    bootstrap_node.send_file(
+        local_path=dcos_installer,
+        remote_path=remote_dcos_installer,
+        transport=transport,
+        user=user,
+        sudo=True,
+    )
+    return _install_dcos_from_bootstrap_node_path(
+        bootstrap_node=bootstrap_node,
+        remote_dcos_installer=remote_dcos_installer,
+        masters=masters,
+        agents=agents,
+        public_agents=public_agents,
+        dcos_config=dcos_config,
+        ip_detect_path=ip_detect_path,
+        files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+        output=output,
+        user=user,
+        transport=transport,
+    )
+
+
+def install_dcos_from_url(
+    bootstrap_node: Node,
+    masters: Set[Node],
+    agents: Set[Node],
+    public_agents: Set[Node],
+    dcos_installer: str,
+    dcos_config: Dict[str, Any],
+    ip_detect_path: Path,
+    files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]],
+    output: Output,
+    user: Optional[str] = None,
+    transport: Optional[Transport] = None,
+    dcos_installer_sha256: Optional[str] = None,
+) -> BootstrapServer:
+    """
+    Install DC/OS on all given nodes with a bootstrap node, from an installer
+    URL.
+
+    The installer is downloaded only by the bootstrap node.
+
+    Args:
+        bootstrap_node: The node to run ``--genconf`` on and to serve the
+            installation files from. This may be one of the cluster nodes.
+            It must be reachable from all cluster nodes on its private IP
+            address.
+        masters: Master nodes to install DC/OS on.
+        agents: Agent nodes to install DC/OS on.
+        public_agents: Public agent nodes to install DC/OS on.
+        dcos_installer: A URL pointing to an installer to install DC/OS
+            from.
+        dcos_config: The contents of the DC/OS ``config.yaml``.
+        ip_detect_path: The path to the ``ip-detect`` script to use for
+            installing DC/OS.
+        files_to_copy_to_genconf_dir: Pairs of host paths to paths on
+            the installer node. These are files to copy from the host to
+            the installer node before installing DC/OS.
+        output: What happens with stdout and stderr.
+        user: The username to communicate as. If ``None`` then each node's
+            ``default_user`` is used instead.
+        transport: The transport to use for communicating with nodes. If
+            ``None``, each ``Node``'s ``default_transport`` is used.
+        dcos_installer_sha256: The expected SHA-256 hash of the installer,
+            in hexadecimal. If this is given, the downloaded installer is not
+            used unless it has this hash.
+
+    Returns:
+        The server for the installation files on the bootstrap node. This
+        must be stopped with ``stop_bootstrap_server`` once DC/OS has started
+        on every node.
+    """
+    remote_dcos_installer = _node_installer_path(
+        node=bootstrap_node,
+        user=user,
+        transport=transport,
+        output=output,
+    )
+    _download_installer_to_node(
+        node=bootstrap_node,
+        dcos_installer_url=dcos_installer,
+        output=output,
+        transport=transport,
+        user=user,
+        node_path=remote_dcos_installer,
+        sha256=dcos_installer_sha256,
+    )
+    return _install_dcos_from_bootstrap_node_path(
+        bootstrap_node=bootstrap_node,
+        remote_dcos_installer=remote_dcos_installer,
+        masters=masters,
+        agents=agents,
+        public_agents=public_agents,
+        dcos_config=dcos_config,
+        ip_detect_path=ip_detect_path,
+        files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+        output=output,
+        user=user,
+        transport=transport,
+    )
+
+
+def _upgrade_dcos_from_bootstrap_url(
+    node: Node,
+    upgrade_script_url: str,
+    role: Role,
+    user: Optional[str],
+    output: Output,
+    transport: Optional[Transport],
+) -> None:
+    """
+    Upgrade DC/OS on a node using a node upgrade script served from a
+    bootstrap node.
+
+    Args:
+        node: The node to upgrade DC/OS on.
+        upgrade_script_url: The URL of the node upgrade script.
+        role: The DC/OS role of the node.
+        user: The username to communicate as. If ``None`` then the
+            ``default_user`` is used instead.
+        output: What happens with stdout and stderr.
+        transport: The transport to use for communicating with nodes. If
+            ``None``, the ``Node``'s ``default_transport`` is used.
+    """
+    if role in (Role.AGENT, Role.PUBLIC_AGENT):
+        node.run(
+            args=['rm', '-f', '/opt/mesosphere/lib/libltdl.so.7'],
+            output=output,
+            transport=transport,
+            user=user,
+            sudo=True,
+        )
+
+    workspace_dir = Path('/dcos-install-dir') / uuid.uuid4().hex
+    upgrade_script_path = workspace_dir / 'dcos_node_upgrade.sh'
+    setup_args = [
+        'mkdir',
+        '--parents',
+        str(workspace_dir),
+        '&&',
+        'cd',
+        str(workspace_dir),
+        '&&',
+        'curl',
+        '--fail',
+        '--silent',
+        '--show-error',
+        '--output',
+        str(upgrade_script_path),
+        upgrade_script_url,
+        '&&',
+        'bash',
+        str(upgrade_script_path),
+    ]
+
+    node.run(
+        args=setup_args,
+        shell=True,
+        output=output,
+        transport=transport,
+        user=user,
+        sudo=True,
+    )
+
+
+def _upgrade_dcos_from_bootstrap_node_path(
+    bootstrap_node: Node,
+    remote_dcos_installer: Path,
+    masters: Set[Node],
+    agents: Set[Node],
+    public_agents: Set[Node],
+    dcos_config: Dict[str, Any],
+    ip_detect_path: Path,
+    files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]],
+    output: Output,
+    rollout_policy: RolloutPolicy,
+    user: Optional[str],
+    transport: Optional[Transport],
+) -> None:
+    """
+    Run ``--generate-node-upgrade-script`` once on the bootstrap node, serve
+    the result and upgrade DC/OS on all nodes from it.
+
+    The bootstrap node must have DC/OS installed, as the script upgrades
+    from the version of DC/OS installed on it.
+    The server is stopped and the files which it serves are removed once
+    every node is upgraded, or if the upgrade fails.
+    """
+    port = _find_open_port(
+        node=bootstrap_node,
+        user=user,
+        transport=transport,
+    )
+    bootstrap_url = 'http://{ip_address}:{port}'.format(
+        ip_address=bootstrap_node.private_ip_address,
+        port=port,
+    )
+    serve_dir = remote_dcos_installer.parent / 'genconf' / 'serve'
+
+    _prepare_installer(
+        node=bootstrap_node,
+        dcos_config=dcos_config,
+        files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+        ip_detect_path=ip_detect_path,
+        remote_dcos_installer=remote_dcos_installer,
+        transport=transport,
+        user=user,
+        bootstrap_url=bootstrap_url,
+    )
+
+    # ``PORT`` is a port which the installer's container may listen on.
+    # The default port may be in use on a node with DC/OS installed.
+    genconf_port = _find_open_port(
+        node=bootstrap_node,
+        user=user,
+        transport=transport,
+    )
+    genconf_args = [
+        'cd',
+        str(remote_dcos_installer.parent),
+        '&&',
+        'PORT={port}'.format(port=genconf_port),
+        'bash',
+        str(remote_dcos_installer),
+        '-v',
+        '--generate-node-upgrade-script',
+        bootstrap_node.dcos_build_info().version,
+    ]
+    result = bootstrap_node.run(
+        args=genconf_args,
+        output=_UPGRADE_SCRIPT_OUTPUT[output],
+        shell=True,
+        transport=transport,
+        user=user,
+        sudo=True,
+    )
+
+    # The script is given as a URL under the ``bootstrap_url``.
+    # Older installers may give it as a path in the ``genconf/serve``
+    # directory.
+    location = _upgrade_script_location(result=result)
+    if location.startswith('http'):
+        upgrade_script_url = location
+    else:
+        upgrade_script_url = '{bootstrap_url}/{path}'.format(
+            bootstrap_url=bootstrap_url,
+            path=Path(location).relative_to(serve_dir),
+        )
+
+    bootstrap_node.run(
+        args=['rm', str(remote_dcos_installer)],
+        output=output,
+        transport=transport,
+        user=user,
+        sudo=True,
+    )
+
+    server = BootstrapServer(
+        node=bootstrap_node,
+        pid=_start_bootstrap_server(
+            node=bootstrap_node,
+            serve_dir=serve_dir,
+            port=port,
+            user=user,
+            transport=transport,
+        ),
+        workspace_dir=remote_dcos_installer.parent,
+        user=user,
+        transport=transport,
+    )
+    try:
+        _wait_for_bootstrap_server(
+            node=bootstrap_node,
+            url=upgrade_script_url,
+            user=user,
+            transport=transport,
+        )
+
+        def upgrade(node: Node, role: Role) -> None:
+            _upgrade_dcos_from_bootstrap_url(
+                node=node,
+                upgrade_script_url=upgrade_script_url,
+                role=role,
+                user=user,
+                output=output,
+                transport=transport,
+            )
+
+        _rollout.run_on_nodes(
+            operation=upgrade,
+            masters=masters,
+            agents=agents,
+            public_agents=public_agents,
+            rollout_policy=rollout_policy,
+        )
+    finally:
+        # Unlike after an install, nothing fetches from the bootstrap URL
+        # once every node upgrade script has finished.
+        stop_bootstrap_server(server=server)
+
+
+def upgrade_dcos_from_path(
+    bootstrap_node: Node,
+    masters: Set[Node],
+    agents: Set[Node],
+    public_agents: Set[Node],
+    dcos_installer: Path,
+    dcos_config: Dict[str, Any],
+    ip_detect_path: Path,
+    files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]],
+    output: Output,
+    rollout_policy: RolloutPolicy,
+    user: Optional[str] = None,
+    transport: Optional[Transport] = None,
+) -> None:
+    """
+    Upgrade DC/OS on all given nodes with a bootstrap node, from a local
+    installer.
+
+    The installer is sent only to the bootstrap node, and the node upgrade
+    script is generated only once.
+
+    Args:
+        bootstrap_node: The node to run ``--generate-node-upgrade-script`` on
+            and to serve the upgrade files from. This must have DC/OS
+            installed. It must be reachable from all cluster nodes on its
+            private IP address.
+        masters: Master nodes to upgrade DC/OS on.
+        agents: Agent nodes to upgrade DC/OS on.
+        public_agents: Public agent nodes to upgrade DC/OS on.
+        dcos_installer: The ``Path`` to a local installer to upgrade DC/OS
+            from.
+        dcos_config: The contents of the DC/OS ``config.yaml``.
+        ip_detect_path: The path to the ``ip-detect`` script to use for
+            upgrading DC/OS.
+        files_to_copy_to_genconf_dir: Pairs of host paths to paths on
+            the installer node. These are files to copy from the host to
+            the installer node before upgrading DC/OS.
+        output: What happens with stdout and stderr.
+        rollout_policy: The order in which to upgrade nodes, and how many
+            nodes to upgrade at the same time.
+        user: The username to communicate as. If ``None`` then each node's
+            ``default_user`` is used instead.
+        transport: The transport to use for communicating with nodes. If
+            ``None``, each ``Node``'s ``default_transport`` is used.
+    """
+    remote_dcos_installer = _node_installer_path(
+        node=bootstrap_node,
+        user=user,
+        transport=transport,
+        output=output,
+    )
+    bootstrap_node.send_file(
+        local_path=dcos_installer,
+        remote_path=remote_dcos_installer,
+        transport=transport,
+        user=user,
+        sudo=True,
+    )
+    _upgrade_dcos_from_bootstrap_node_path(
+        bootstrap_node=bootstrap_node,
+        remote_dcos_installer=remote_dcos_installer,
+        masters=masters,
+        agents=agents,
+        public_agents=public_agents,
+        dcos_config=dcos_config,
+        ip_detect_path=ip_detect_path,
+        files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+        output=output,
+        rollout_policy=rollout_policy,
+        user=user,
+        transport=transport,
+    )
+
+
+def upgrade_dcos_from_url(
+    bootstrap_node: Node,
+    masters: Set[Node],
+    agents: Set[Node],
+    public_agents: Set[Node],
+    dcos_installer: str,
+    dcos_config: Dict[str, Any],
+    ip_detect_path: Path,
+    files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]],
+    output: Output,
+    rollout_policy: RolloutPolicy,
+    user: Optional[str] = None,
+    transport: Optional[Transport] = None,
+    dcos_installer_sha256: Optional[str] = None,
+) -> None:
+    """
+    Upgrade DC/OS on all given nodes with a bootstrap node, from an
+    installer URL.
+
+    The installer is downloaded only by the bootstrap node, and the node
+    upgrade script is generated only once.
+
+    Args:
+        bootstrap_node: The node to run ``--generate-node-upgrade-script`` on
+            and to serve the upgrade files from. This must have DC/OS
+            installed. It must be reachable from all cluster nodes on its
+            private IP address.
+        masters: Master nodes to upgrade DC/OS on.
+        agents: Agent nodes to upgrade DC/OS on.
+        public_agents: Public agent nodes to upgrade DC/OS on.
+        dcos_installer: A URL pointing to an installer to upgrade DC/OS
+            from.
+        dcos_config: The contents of the DC/OS ``config.yaml``.
+        ip_detect_path: The path to the ``ip-detect`` script to use for
+            upgrading DC/OS.
+        files_to_copy_to_genconf_dir: Pairs of host paths to paths on
+            the installer node. These are files to copy from the host to
+            the installer node before upgrading DC/OS.
+        output: What happens with stdout and stderr.
+        rollout_policy: The order in which to upgrade nodes, and how many
+            nodes to upgrade at the same time.
+        user: The username to communicate as. If ``None`` then each node's
+            ``default_user`` is used instead.
+        transport: The transport to use for communicating with nodes. If
+            ``None``, each ``Node``'s ``default_transport`` is used.
+        dcos_installer_sha256: The expected SHA-256 hash of the installer,
+            in hexadecimal. If this is given, the downloaded installer is not
+            used unless it has this hash.
+    """
+    remote_dcos_installer = _node_installer_path(
+        node=bootstrap_node,
+        user=user,
+        transport=transport,
+        output=output,
+    )
+    _download_installer_to_node(
+        node=bootstrap_node,
+        dcos_installer_url=dcos_installer,
+        output=output,
+        transport=transport,
+        user=user,
+        node_path=remote_dcos_installer,
+        sha256=dcos_installer_sha256,
+    )
+    _upgrade_dcos_from_bootstrap_node_path(
+        bootstrap_node=bootstrap_node,
+        remote_dcos_installer=remote_dcos_installer,
+        masters=masters,
+        agents=agents,
+        public_agents=public_agents,
+        dcos_config=dcos_config,
+        ip_detect_path=ip_detect_path,
+        files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+        output=output,
+        rollout_policy=rollout_policy,
+        user=user,
+        transport=transport,
+    )
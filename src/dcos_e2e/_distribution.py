@@ -0,0 +1,342 @@
+"""
+Helpers for sending a file to many nodes.
+
+The file is sent from the host to one node only.
+Every node which has the file then serves it over HTTP to a node which does
+not, so the number of nodes with the file doubles each round and the host
+sends the file once however many nodes there are.
+Each copy is checked against the SHA-256 hash of the file on the host.
+"""
+
+import hashlib
+import logging
+import shlex
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from textwrap import dedent
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ._bootstrap import _find_open_port, _start_bootstrap_server
+from .node import Node, Output, Transport
+
+LOGGER = logging.getLogger(__name__)
+
+# A node downloading from a peer tries this many times, a second apart, as
+# the peer's server may not be listening yet.
+_DOWNLOAD_ATTEMPTS = 30
+
+
+def _sha256(path: Path) -> str:
+    """
+    Return the SHA-256 hash of the contents of a file.
+    """
+    digest = hashlib.sha256()
+    with path.open('rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _rounds(nodes: List[Node]) -> List[List[Tuple[Node, Node]]]:
+    """
+    Return the rounds in which a file on the first of the given nodes is
+    copied to the other nodes.
+
+    Each round is a list of pairs of a node which has the file and a node
+    which gets the file from it.
+    Each node which has the file is in at most one pair in each round.
+    """
+    holders = nodes[:1]
+    pending = nodes[1:]
+    rounds = []
+    while pending:
+        pairs = list(zip(holders, pending))
+        pending = pending[len(pairs):]
+        holders = holders + [target for _, target in pairs]
+        rounds.append(pairs)
+    return rounds
+
+
+def _check_sha256(
+    node: Node,
+    remote_path: Path,
+    sha256: str,
+    user: Optional[str],
+    transport: Optional[Transport],
+) -> None:
+    """
+    Check that a file on a node has the given SHA-256 hash.
+
+    Raises:
+        subprocess.CalledProcessError: The file does not have the given hash.
+    """
+    script = 'echo {expected} | sha256sum --check --status'.format(
+        expected=shlex.quote('{sha256}  {path}'.format(
+            sha256=sha256,
+            path=remote_path,
+        )),
+    )
+    node.run(
+        args=['/bin/sh', '-c', script],
+        user=user,
+        transport=transport,
+        output=Output.CAPTURE,
+    )
+
+
+def _download_from_peer(
+    node: Node,
+    url: str,
+    remote_path: Path,
+    sha256: str,
+    user: Optional[str],
+    transport: Optional[Transport],
+    sudo: bool,
+) -> None:
+    """
+    Download a file from a peer to ``remote_path`` on ``node``.
+
+    The file is downloaded next to ``remote_path`` and only moved to
+    ``remote_path`` if it has the given SHA-256 hash.
+
+    Raises:
+        subprocess.CalledProcessError: The file could not be downloaded or
+            the downloaded file does not have the given hash.
+    """
+    sudo_prefix = 'sudo ' if sudo else ''
+    script = dedent(
+        """\
+        set -e
+        parent={parent}
+        target={target}
+        partial="$target.partial"
+        {sudo}mkdir --parents "$parent"
+        attempt=1
+        until {sudo}curl --fail --silent --show-error \\
+            --output "$partial" {url}; do
+            if [ "$attempt" -ge {attempts} ]; then
+                exit 1
+            fi
+            attempt=$((attempt + 1))
+            sleep 1
+        done
+        if ! echo "{sha256}  $partial" | sha256sum --check --status; then
+            {sudo}rm -f "$partial"
+            echo "The file downloaded from {url} has the wrong hash." >&2
+            exit 1
+        fi
+        {sudo}mv "$partial" "$target"
+        """,
+    ).format(
+        parent=shlex.quote(str(remote_path.parent)),
+        target=shlex.quote(str(remote_path)),
+        url=shlex.quote(url),
+        attempts=_DOWNLOAD_ATTEMPTS,
+        sha256=sha256,
+        sudo=sudo_prefix,
+    )
+    node.run(
+        args=['/bin/sh', '-c', script],
+        user=user,
+        transport=transport,
+        output=Output.CAPTURE,
+    )
+
+
+class _PeerServer:
+    """
+    A server for a file on a node.
+    """
+
+    def __init__(self, url: str, pid: int, serve_dir: Path) -> None:
+        """
+        Args:
+            url: The URL of the file.
+            pid: The ID of the server process.
+            serve_dir: The directory on the node which is served.
+        """
+        self.url = url
+        self.pid = pid
+        self.serve_dir = serve_dir
+
+
+def _start_peer_server(
+    node: Node,
+    remote_path: Path,
+    sha256: str,
+    user: Optional[str],
+    transport: Optional[Transport],
+) -> _PeerServer:
+    """
+    Serve a file on a node over HTTP.
+
+    Only a link to the file is served, so that no other files in the
+    directory which holds the file are served.
+    """
+    link_script = dedent(
+        """\
+        set -e
+        serve_dir="$(mktemp -d /tmp/dcos-e2e-distribute-XXXXXX)"
+        ln -s {target} "$serve_dir"/{name}
+        echo "$serve_dir"
+        """,
+    ).format(target=shlex.quote(str(remote_path)), name=sha256)
+    result = node.run(
+        args=['/bin/sh', '-c', link_script],
+        user=user,
+        transport=transport,
+        output=Output.CAPTURE,
+    )
+    serve_dir = Path(result.stdout.decode().strip())
+    port = _find_open_port(node=node, user=user, transport=transport)
+    pid = _start_bootstrap_server(
+        node=node,
+        serve_dir=serve_dir,
+        port=port,
+        user=user,
+        transport=transport,
+    )
+    url = 'http://{host}:{port}/{name}'.format(
+        host=node.private_ip_address,
+        port=port,
+        name=sha256,
+    )
+    return _PeerServer(url=url, pid=pid, serve_dir=serve_dir)
+
+
+def _stop_peer_server(
+    node: Node,
+    server: _PeerServer,
+    user: Optional[str],
+    transport: Optional[Transport],
+) -> None:
+    """
+    Stop a server started with ``_start_peer_server``.
+
+    Errors are logged rather than raised so that every server is stopped.
+    """
+    script = 'kill {pid}; rm -rf {serve_dir}'.format(
+        pid=server.pid,
+        serve_dir=shlex.quote(str(server.serve_dir)),
+    )
+    try:
+        node.run(
+            args=['/bin/sh', '-c', script],
+            user=user,
+            transport=transport,
+            output=Output.CAPTURE,
+        )
+    except subprocess.CalledProcessError as exc:
+        message = 'Failed to stop the file server on {node}: {exc}'.format(
+            node=node,
+            exc=exc,
+        )
+        LOGGER.warning(message)
+
+
+def _copy_from_first_node(
+    nodes: List[Node],
+    remote_path: Path,
+    sha256: str,
+    user: Optional[str],
+    transport: Optional[Transport],
+    sudo: bool,
+) -> None:
+    """
+    Copy a file on the first of the given nodes to the same path on the
+    other nodes, through nodes which already have the file.
+    """
+    servers = {}  # type: Dict[Node, _PeerServer]
+    try:
+        for pairs in _rounds(nodes=nodes):
+            for source, _ in pairs:
+                if source not in servers:
+                    servers[source] = _start_peer_server(
+                        node=source,
+                        remote_path=remote_path,
+                        sha256=sha256,
+                        user=user,
+                        transport=transport,
+                    )
+
+            with ThreadPoolExecutor(max_workers=len(pairs)) as executor:
+                futures = [
+                    executor.submit(
+                        _download_from_peer,
+                        node=target,
+                        url=servers[source].url,
+                        remote_path=remote_path,
+                        sha256=sha256,
+                        user=user,
+                        transport=transport,
+                        sudo=sudo,
+                    ) for source, target in pairs
+                ]
+            for future in futures:
+                future.result()
+    finally:
+        for node, server in servers.items():
+            _stop_peer_server(
+                node=node,
+                server=server,
+                user=user,
+                transport=transport,
+            )
+
+
+def send_file_to_nodes(
+    local_path: Path,
+    remote_path: Path,
+    nodes: Iterable[Node],
+    user: Optional[str],
+    transport: Optional[Transport],
+    sudo: bool,
+) -> None:
+    """
+    Copy a file to the same path on many nodes, sending it from the host
+    to one node only.
+
+    Args:
+        local_path: The path on the host of the file to send.
+        remote_path: The path on each node to place the file.
+        nodes: The nodes to send the file to.
+        user: The name of the remote user to send the file. If ``None``,
+            the ``default_user`` of each node is used instead.
+        transport: The transport to use for communicating with nodes. If
+            ``None``, the ``default_transport`` of each node is used.
+        sudo: Whether to use sudo to create the directory which holds the
+            remote file.
+
+    Raises:
+        subprocess.CalledProcessError: The file could not be copied to a
+            node, or a copy does not have the hash of the file on the host.
+    """
+    node_list = list(nodes)
+    if not node_list:
+        return
+
+    sha256 = _sha256(path=local_path)
+    first_node = node_list[0]
+    first_node.send_file(
+        local_path=local_path,
+        remote_path=remote_path,
+        user=user,
+        transport=transport,
+        sudo=sudo,
+    )
+    _check_sha256(
+        node=first_node,
+        remote_path=remote_path,
+        sha256=sha256,
+        user=user,
+        transport=transport,
+    )
+    _copy_from_first_node(
+        nodes=node_list,
+        remote_path=remote_path,
+        sha256=sha256,
+        user=user,
+        transport=transport,
+        sudo=sudo,
+    )
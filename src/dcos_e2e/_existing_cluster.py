@@ -3,10 +3,11 @@ Helpers for interacting with existing clusters.
 """
 
 from pathlib import Path
-from typing import Any, Dict, Iterable, Set, Tuple, Type
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
 
+from dcos_e2e import _bootstrap
 from dcos_e2e.base_classes import ClusterBackend, ClusterManager
-from dcos_e2e.node import Node, Output, Role
+from dcos_e2e.node import Node, Output
 
 
 class ExistingCluster(ClusterBackend):
@@ -19,14 +20,24 @@ class ExistingCluster(ClusterBackend):
         masters: Set[Node],
         agents: Set[Node],
         public_agents: Set[Node],
+        bootstrap_node: Optional[Node] = None,
     ) -> None:
         """
         Create a record of an existing cluster backend for use by a cluster
         manager.
+
+        Args:
+            masters: The master nodes in an existing cluster.
+            agents: The agent nodes in an existing cluster.
+            public_agents: The public agent nodes in an existing cluster.
+            bootstrap_node: The node to use as a bootstrap node when
+                installing DC/OS. If ``None``, an arbitrary master node is
+                used.
         """
         self.masters = masters
         self.agents = agents
         self.public_agents = public_agents
+        self.bootstrap_node = bootstrap_node
 
     @property
     def cluster_cls(self) -> Type['ExistingClusterManager']:
@@ -84,6 +95,8 @@ class ExistingClusterManager(ClusterManager):
         self._masters = cluster_backend.masters
         self._agents = cluster_backend.agents
         self._public_agents = cluster_backend.public_agents
+        self._bootstrap_node = cluster_backend.bootstrap_node
+        self._bootstrap_servers = []  # type: List[_bootstrap.BootstrapServer]
 
     def install_dcos_from_url(
         self,
@@ -96,6 +109,10 @@ class ExistingClusterManager(ClusterManager):
         """
         Install DC/OS from a URL with a bootstrap node.
 
+        The installer is downloaded only by the bootstrap node.
+        The installation files are served from the bootstrap node until
+        ``stop_bootstrap_servers`` is called.
+
         Args:
             dcos_installer: The URL string to an installer to install DC/OS
                 from.
@@ -107,22 +124,18 @@ class ExistingClusterManager(ClusterManager):
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
         """
-        for nodes, role in (
-            (self.masters, Role.MASTER),
-            (self.agents, Role.AGENT),
-            (self.public_agents, Role.PUBLIC_AGENT),
-        ):
-            for node in nodes:
-                node.install_dcos_from_url(
-                    dcos_installer=dcos_installer,
-                    dcos_config=dcos_config,
-                    ip_detect_path=ip_detect_path,
-                    files_to_copy_to_genconf_dir=(
-                        files_to_copy_to_genconf_dir
-                    ),
-                    role=role,
-                    output=output,
-                )
+        server = _bootstrap.install_dcos_from_url(
+            bootstrap_node=self._get_bootstrap_node(),
+            masters=self.masters,
+            agents=self.agents,
+            public_agents=self.public_agents,
+            dcos_installer=dcos_installer,
+            dcos_config=dcos_config,
+            ip_detect_path=ip_detect_path,
+            files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+            output=output,
+        )
+        self._bootstrap_servers.append(server)
 
     def install_dcos_from_path(
         self,
@@ -133,7 +146,12 @@ class ExistingClusterManager(ClusterManager):
         files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]],
     ) -> None:
         """
-        Install DC/OS from an installer passed as a file system ``Path``.
+        Install DC/OS from an installer passed as a file system ``Path``, with
+        a bootstrap node.
+
+        The installer is sent only to the bootstrap node.
+        The installation files are served from the bootstrap node until
+        ``stop_bootstrap_servers`` is called.
 
         Args:
             dcos_installer: The path to an installer to install DC/OS from.
@@ -145,22 +163,34 @@ class ExistingClusterManager(ClusterManager):
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
         """
-        for nodes, role in (
-            (self.masters, Role.MASTER),
-            (self.agents, Role.AGENT),
-            (self.public_agents, Role.PUBLIC_AGENT),
-        ):
-            for node in nodes:
-                node.install_dcos_from_path(
-                    dcos_installer=dcos_installer,
-                    dcos_config=dcos_config,
-                    ip_detect_path=ip_detect_path,
-                    files_to_copy_to_genconf_dir=(
-                        files_to_copy_to_genconf_dir
-                    ),
-                    role=role,
-                    output=output,
-                )
+        server = _bootstrap.install_dcos_from_path(
+            bootstrap_node=self._get_bootstrap_node(),
+            masters=self.masters,
+            agents=self.agents,
+            public_agents=self.public_agents,
+            dcos_installer=dcos_installer,
+            dcos_config=dcos_config,
+            ip_detect_path=ip_detect_path,
+            files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+            output=output,
+        )
+        self._bootstrap_servers.append(server)
+
+    def stop_bootstrap_servers(self) -> None:
+        """
+        Stop the servers which serve DC/OS installation files from the
+        bootstrap node, and remove the files.
+        """
+        while self._bootstrap_servers:
+            _bootstrap.stop_bootstrap_server(
+                server=self._bootstrap_servers.pop(),
+            )
+
+    def _get_bootstrap_node(self) -> Node:
+        """
+        Return the node to use as a bootstrap node.
+        """
+        return self._bootstrap_node or next(iter(self.masters))
 
     @property
     def masters(self) -> Set[Node]:
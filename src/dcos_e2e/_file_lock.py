@@ -0,0 +1,85 @@
+"""
+Locks which are shared between processes on one host.
+"""
+
+import fcntl
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+class FileLock:
+    """
+    An exclusive lock on a file.
+
+    The lock is released if the process holding it exits.
+    Two ``FileLock`` objects for the same file exclude each other, even in one
+    process.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """
+        Args:
+            path: The path of the file to lock. The file is created if it does
+                not exist, and it is not removed.
+        """
+        self._path = path
+        self._file_descriptor = None  # type: Optional[int]
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Take the lock.
+
+        Args:
+            blocking: Whether to wait until the lock is available.
+
+        Returns:
+            Whether the lock was taken. This is always ``True`` if
+            ``blocking`` is ``True``.
+        """
+        assert self._file_descriptor is None, 'The lock is already held.'
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        file_descriptor = os.open(str(self._path), os.O_RDWR | os.O_CREAT)
+        operation = fcntl.LOCK_EX
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(file_descriptor, operation)
+        except BlockingIOError:
+            os.close(file_descriptor)
+            return False
+        except BaseException:
+            os.close(file_descriptor)
+            raise
+
+        self._file_descriptor = file_descriptor
+        return True
+
+    def release(self) -> None:
+        """
+        Release the lock, if it is held.
+        """
+        if self._file_descriptor is not None:
+            # Closing the file releases the lock.
+            os.close(self._file_descriptor)
+            self._file_descriptor = None
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a file, waiting until it is available.
+
+    The lock is released if the process holding it exits.
+    The file is created if it does not exist, and it is not removed.
+
+    Args:
+        path: The path of the file to lock.
+    """
+    lock = FileLock(path=path)
+    lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
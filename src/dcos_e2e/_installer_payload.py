@@ -0,0 +1,216 @@
+"""
+Tools for reading details of a DC/OS installer without running it.
+
+``dcos_generate_config.sh`` is a shell script, then a line ``#EOF#``, then a
+tar archive.
+The archive holds a ``docker save`` archive of the ``mesosphere/dcos-genconf``
+image, which the script loads into Docker when it is run.
+The installer's variant is in the image's environment, and its version is in
+the ``gen`` package in one of the image's layers.
+
+Archives are read in place, seeking past the contents of members which are not
+needed, so only tar headers and small members are read.
+"""
+
+import json
+import re
+import tarfile
+from pathlib import Path, PurePosixPath
+from typing import IO, Any, Dict, Optional
+
+# The line after which the tar archive starts.
+_PAYLOAD_MARKER = b'#EOF#\n'
+
+# The marker is looked for only in this many bytes at the start of an
+# installer, so that a file which is not an installer is not read in full.
+_MAX_SCRIPT_BYTES = 1024 * 1024
+
+# Members larger than this are not read.
+_MAX_METADATA_BYTES = 1024 * 1024
+
+# The repository of the genconf image.
+_GENCONF_REPOSITORY = 'mesosphere/dcos-genconf'
+
+# The environment variable in the genconf image which holds the variant.
+_VARIANT_VARIABLE = 'BOOTSTRAP_VARIANT'
+
+# The file in the genconf image which defines the DC/OS version, and the
+# definition in that file.
+_VERSION_FILE_SUFFIX = 'gen/calc.py'
+_VERSION_PATTERN = re.compile(
+    rb"""['"]dcos_version['"]\s*:\s*['"]([^'"]+)['"]""",
+)
+
+
+class InstallerFormatError(Exception):
+    """
+    Raised if details cannot be read from an installer without running it.
+    """
+
+
+def _payload_offset(installer_file: IO[bytes]) -> int:
+    """
+    Return the offset of the tar archive in an installer.
+    """
+    while installer_file.tell() < _MAX_SCRIPT_BYTES:
+        # Lines are limited in length so that memory use is bounded even if
+        # this is not a script.
+        line = installer_file.readline(4096)
+        if not line:
+            break
+        if line == _PAYLOAD_MARKER:
+            return installer_file.tell()
+
+    message = 'No "#EOF#" line was found before an archive.'
+    raise InstallerFormatError(message)
+
+
+def _read_member(archive: tarfile.TarFile, name: str) -> bytes:
+    """
+    Return the contents of a small member of an archive.
+    """
+    try:
+        member = archive.getmember(name)
+    except KeyError:
+        message = 'The archive has no member "{name}".'.format(name=name)
+        raise InstallerFormatError(message)
+    return _read_small_file(archive=archive, member=member)
+
+
+def _read_small_file(
+    archive: tarfile.TarFile,
+    member: tarfile.TarInfo,
+) -> bytes:
+    """
+    Return the contents of a file in an archive which is expected to be
+    small.
+    """
+    if member.size > _MAX_METADATA_BYTES:
+        message = '"{name}" is too large to be metadata.'.format(
+            name=member.name,
+        )
+        raise InstallerFormatError(message)
+    member_file = archive.extractfile(member)
+    if member_file is None:
+        message = '"{name}" is not a file.'.format(name=member.name)
+        raise InstallerFormatError(message)
+    return member_file.read()
+
+
+def _layer_version(layer: tarfile.TarFile) -> Optional[str]:
+    """
+    Return the DC/OS version defined in an image layer, if it is defined
+    there.
+    """
+    version = None
+    for member in layer:
+        if member.isfile() and member.name.endswith(_VERSION_FILE_SUFFIX):
+            contents = _read_small_file(archive=layer, member=member)
+            match = _VERSION_PATTERN.search(contents)
+            if match:
+                version = match.group(1).decode()
+    return version
+
+
+def _is_genconf_image(member: tarfile.TarInfo) -> bool:
+    """
+    Return whether a member of an installer's archive is the genconf image.
+    """
+    name = PurePosixPath(member.name).name
+    return bool(
+        member.isfile() and name.startswith('dcos-genconf.')
+        and name.endswith('.tar'),
+    )
+
+
+def _image_details(image: tarfile.TarFile) -> Dict[str, str]:
+    """
+    Return the version and variant of DC/OS in a ``docker save`` archive of a
+    genconf image.
+    """
+    manifest = json.loads(_read_member(archive=image, name='manifest.json'))
+    image_manifest = manifest[0]  # type: Dict[str, Any]
+    config = json.loads(
+        _read_member(archive=image, name=image_manifest['Config']),
+    )
+
+    variant = None
+    for variable in config.get('config', {}).get('Env') or []:
+        name, _, value = variable.partition('=')
+        if name == _VARIANT_VARIABLE:
+            variant = value
+
+    # Later layers override earlier layers.
+    version = None
+    for layer_name in image_manifest['Layers']:
+        layer_file = image.extractfile(image.getmember(layer_name))
+        with tarfile.open(fileobj=layer_file, mode='r:*') as layer:
+            version = _layer_version(layer=layer) or version
+
+    if variant is None or version is None:
+        message = 'The genconf image does not define a variant and version.'
+        raise InstallerFormatError(message)
+
+    return {'version': version, 'variant': variant}
+
+
+def read_installer_details(installer: Path) -> Dict[str, str]:
+    """
+    Return the version and variant of DC/OS which an installer installs, as
+    given by ``dcos_generate_config.sh --version``, without running it.
+
+    Raises:
+        InstallerFormatError: The details cannot be read from the installer.
+    """
+    with installer.open('rb') as installer_file:
+        installer_file.seek(_payload_offset(installer_file=installer_file))
+        try:
+            with tarfile.open(fileobj=installer_file, mode='r:*') as payload:
+                genconf_member = next(
+                    (
+                        member for member in payload
+                        if _is_genconf_image(member=member)
+                    ),
+                    None,
+                )
+                if genconf_member is None:
+                    message = 'The installer has no genconf image archive.'
+                    raise InstallerFormatError(message)
+
+                image_file = payload.extractfile(genconf_member)
+                with tarfile.open(fileobj=image_file, mode='r:') as image:
+                    return _image_details(image=image)
+        except (
+            tarfile.TarError,
+            IndexError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ) as exc:
+            raise InstallerFormatError(str(exc)) from exc
+
+
+def read_genconf_image_name(installer: Path) -> str:
+    """
+    Return the name of the ``mesosphere/dcos-genconf`` image which an
+    installer loads into Docker, without running it.
+
+    Only the headers of the installer's archive are read.
+
+    Raises:
+        InstallerFormatError: The name cannot be read from the installer.
+    """
+    with installer.open('rb') as installer_file:
+        installer_file.seek(_payload_offset(installer_file=installer_file))
+        try:
+            with tarfile.open(fileobj=installer_file, mode='r:*') as payload:
+                for member in payload:
+                    if _is_genconf_image(member=member):
+                        name = PurePosixPath(member.name).name
+                        tag = name[len('dcos-genconf.'):-len('.tar')]
+                        return _GENCONF_REPOSITORY + ':' + tag
+        except tarfile.TarError as exc:
+            raise InstallerFormatError(str(exc)) from exc
+
+    message = 'The installer has no genconf image archive.'
+    raise InstallerFormatError(message)
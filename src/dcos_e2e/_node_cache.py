@@ -0,0 +1,54 @@
+"""
+A cache of the nodes of a cluster.
+"""
+
+import threading
+from typing import Callable, Dict, FrozenSet, Optional, Set
+
+from .node import Node, Role
+
+
+class NodeCache:
+    """
+    The nodes of a cluster, found once and kept until the cache is
+    invalidated.
+
+    The same ``Node`` objects are returned each time, so that state kept by
+    nodes, such as persistent connections, is shared.
+    """
+
+    def __init__(
+        self,
+        find_nodes: Callable[[], Dict[Role, Set[Node]]],
+    ) -> None:
+        """
+        Args:
+            find_nodes: A function which finds all nodes of the cluster, by
+                role. This is called at most once between invalidations.
+        """
+        self._find_nodes = find_nodes
+        self._nodes = None  # type: Optional[Dict[Role, FrozenSet[Node]]]
+        self._lock = threading.Lock()
+
+    def nodes(self, role: Role) -> Set[Node]:
+        """
+        Return the nodes of the cluster with the given role.
+
+        The returned set is a copy, and changing it does not change the cache.
+        """
+        with self._lock:
+            if self._nodes is None:
+                found_nodes = self._find_nodes()
+                self._nodes = {
+                    each_role: frozenset(found_nodes.get(each_role, set()))
+                    for each_role in Role
+                }
+            return set(self._nodes[role])
+
+    def invalidate(self) -> None:
+        """
+        Forget the nodes of the cluster, so that they are found again when
+        they are next needed.
+        """
+        with self._lock:
+            self._nodes = None
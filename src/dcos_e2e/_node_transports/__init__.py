@@ -3,11 +3,13 @@ Classes to communicate with nodes.
 """
 
 from ._base_classes import NodeTransport
+from ._docker_api_transport import DockerAPITransport
 from ._docker_exec_transport import DockerExecTransport
 from ._ssh_transport import SSHTransport
 
 __all__ = [
     'SSHTransport',
     'DockerExecTransport',
+    'DockerAPITransport',
     'NodeTransport',
 ]
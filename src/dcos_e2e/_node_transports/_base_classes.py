@@ -6,7 +6,9 @@ import abc
 import subprocess
 from ipaddress import IPv4Address
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from dcos_e2e._subprocess_tools import OutputBuffer
 
 
 class NodeTransport(abc.ABC):
@@ -25,6 +27,8 @@ class NodeTransport(abc.ABC):
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
         capture_output: bool,
+        stdout_buffer: Optional[OutputBuffer] = None,
+        stderr_buffer: Optional[OutputBuffer] = None,
     ) -> subprocess.CompletedProcess:
         """
         Run a command on this node the given user.
@@ -43,6 +47,10 @@ class NodeTransport(abc.ABC):
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
             capture_output: Whether to capture output in the result.
+            stdout_buffer: Where to put stdout if ``capture_output`` is
+                ``True``. If ``None``, all of stdout is kept in memory.
+            stderr_buffer: Where to put stderr if ``capture_output`` is
+                ``True``. If ``None``, all of stderr is kept in memory.
 
         Returns:
             The representation of the finished process.
@@ -60,6 +68,7 @@ class NodeTransport(abc.ABC):
         env: Dict[str, Any],
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
+        pipe_stdin: bool = False,
     ) -> subprocess.Popen:
         """
         Open a pipe to a command run on a node as the given user.
@@ -72,27 +81,8 @@ class NodeTransport(abc.ABC):
             ssh_key_path: The path to an SSH key which can be used to SSH to
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
-        """
-
-    @abc.abstractmethod
-    def send_file(
-        self,
-        local_path: Path,
-        remote_path: Path,
-        user: str,
-        ssh_key_path: Path,
-        public_ip_address: IPv4Address,
-    ) -> None:
-        """
-        Copy a file to this node.
-
-        Args:
-            local_path: The path on the host of the file to send.
-            remote_path: The path on the node to place the file.
-            user: The name of the remote user to send the file.
-            ssh_key_path: The path to an SSH key which can be used to SSH to
-                the node as the ``user`` user.
-            public_ip_address: The public IP address of the node.
+            pipe_stdin: If ``True``, the returned process has a ``stdin``
+                pipe which is connected to the stdin of the command.
         """
 
     @abc.abstractmethod
@@ -115,3 +105,13 @@ class NodeTransport(abc.ABC):
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
         """
+
+    def close_connections(self, public_ip_address: IPv4Address) -> None:
+        """
+        Close any persistent connections to a node.
+
+        Transports which do not keep connections open do nothing.
+
+        Args:
+            public_ip_address: The public IP address of the node.
+        """
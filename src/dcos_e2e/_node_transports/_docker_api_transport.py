@@ -0,0 +1,575 @@
+"""
+Utilities to connect to nodes with the Docker Engine API.
+
+Commands are run with the exec endpoints of the Docker Engine API, over a
+connection pool which is shared by all commands.
+This avoids starting a ``docker`` CLI process for each command.
+"""
+
+import io
+import shutil
+import socket
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+from collections import deque
+from ipaddress import IPv4Address
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    cast,
+)
+
+import docker
+from docker.utils.socket import STDERR, STDOUT, frames_iter
+
+from dcos_e2e._node_transports._base_classes import NodeTransport
+from dcos_e2e._node_transports._docker_containers import CONTAINER_INDEX
+from dcos_e2e._node_transports._docker_exec_transport import (
+    DockerExecTransport,
+)
+from dcos_e2e._subprocess_tools import (
+    LOGGER,
+    BytesBuffer,
+    LineLogger,
+    OutputBuffer,
+)
+
+# The size of chunks to read from and write to the Docker API.
+_CHUNK_SIZE = 64 * 1024
+
+
+class _OutputStream(io.RawIOBase):
+    """
+    A readable stream of data received from an exec instance.
+
+    Data is buffered in memory so that reading one stream never blocks
+    receiving data for another.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks = deque()  # type: Deque[bytes]
+        self._eof = False
+        self._condition = threading.Condition()
+
+    def readable(self) -> bool:
+        return True
+
+    def feed(self, data: bytes) -> None:
+        """
+        Add data to the stream.
+        """
+        with self._condition:
+            self._chunks.append(data)
+            self._condition.notify_all()
+
+    def feed_eof(self) -> None:
+        """
+        Mark that no more data will be added to the stream.
+        """
+        with self._condition:
+            self._eof = True
+            self._condition.notify_all()
+
+    def readinto(self, buffer: Any) -> int:
+        """
+        Read data into a buffer, blocking until data is available or the
+        stream has ended.
+        """
+        with self._condition:
+            while not self._chunks and not self._eof:
+                self._condition.wait()
+            if not self._chunks:
+                return 0
+            chunk = self._chunks.popleft()
+            size = min(len(buffer), len(chunk))
+            buffer[:size] = chunk[:size]
+            if size < len(chunk):
+                self._chunks.appendleft(chunk[size:])
+            return size
+
+
+class _InputStream(io.RawIOBase):
+    """
+    A writable stream which sends data to the stdin of an exec instance.
+    """
+
+    def __init__(self, sock: socket.socket) -> None:
+        super().__init__()
+        self._sock = sock
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._sock.sendall(data)
+        return len(data)
+
+    def close(self) -> None:
+        """
+        Close stdin of the exec instance, but keep receiving output.
+        """
+        if not self.closed:
+            try:
+                self._sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                # The connection may already be closed.
+                pass
+        super().close()
+
+
+def _raw_socket(exec_socket: Any) -> socket.socket:
+    """
+    Return the underlying socket of a socket returned by the Docker client.
+    """
+    # On Unix sockets, the Docker client returns a ``socket.SocketIO``.
+    return cast(socket.socket, getattr(exec_socket, '_sock', exec_socket))
+
+
+class _DockerAPIProcess:
+    """
+    A command run in a container, with the interface of
+    ``subprocess.Popen``.
+
+    Output is received on a background thread.
+    Stopping the command is not supported by the Docker Engine API, so the
+    command can only be detached from, as when a ``docker exec`` process is
+    killed.
+    ``terminate`` and ``kill`` detach from the command so that this can be
+    used where a ``subprocess.Popen`` is expected.
+    """
+
+    def __init__(
+        self,
+        args: List[str],
+        client: docker.DockerClient,
+        exec_id: str,
+        exec_socket: Any,
+        pipe_stdin: bool,
+    ) -> None:
+        self.args = args
+        self.returncode = None  # type: Optional[int]
+        self._client = client
+        self._exec_id = exec_id
+        self._exec_socket = exec_socket
+        self._stdout = _OutputStream()
+        self._stderr = _OutputStream()
+        stdout = io.BufferedReader(self._stdout)  # type: io.BufferedReader
+        stderr = io.BufferedReader(self._stderr)  # type: io.BufferedReader
+        self.stdout = stdout
+        self.stderr = stderr
+        self.stdin = None  # type: Optional[io.BufferedWriter]
+        if pipe_stdin:
+            self.stdin = io.BufferedWriter(
+                _InputStream(sock=_raw_socket(exec_socket)),
+            )
+        self._thread = threading.Thread(target=self._receive, daemon=True)
+        self._thread.start()
+
+    def _receive(self) -> None:
+        """
+        Receive output until the command exits, and then get its exit code.
+        """
+        streams = {STDOUT: self._stdout, STDERR: self._stderr}
+        try:
+            for stream, data in frames_iter(self._exec_socket, tty=False):
+                streams[stream].feed(data)
+        except OSError:
+            # The connection was closed by ``detach``.
+            pass
+        finally:
+            self._stdout.feed_eof()
+            self._stderr.feed_eof()
+            self._exec_socket.close()
+
+        while True:
+            exec_info = self._client.api.exec_inspect(self._exec_id)
+            if not exec_info['Running']:
+                self.returncode = exec_info['ExitCode']
+                return
+            # The output can end just before the command is seen to exit.
+            time.sleep(0.01)
+
+    def poll(self) -> Optional[int]:
+        """
+        Return the exit code, or ``None`` if the command is running.
+        """
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """
+        Wait for the command to exit and return its exit code.
+
+        Raises:
+            subprocess.TimeoutExpired: The command did not exit in time.
+        """
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise subprocess.TimeoutExpired(
+                cmd=self.args,
+                timeout=cast(float, timeout),
+            )
+        return cast(int, self.returncode)
+
+    def communicate(
+        self,
+        input: Optional[bytes] = None,  # pylint: disable=redefined-builtin
+        timeout: Optional[float] = None,
+    ) -> Tuple[bytes, bytes]:
+        """
+        Send ``input`` to stdin, wait for the command to exit and return its
+        stdout and stderr.
+
+        Raises:
+            subprocess.TimeoutExpired: The command did not exit in time.
+        """
+        if self.stdin is not None and not self.stdin.closed:
+            try:
+                if input:
+                    self.stdin.write(input)
+                self.stdin.close()
+            except BrokenPipeError:
+                # The command exited without reading all input.
+                pass
+
+        self.wait(timeout=timeout)
+        return self.stdout.read(), self.stderr.read()
+
+    def detach(self) -> None:
+        """
+        Stop receiving output and close stdin.
+
+        The command keeps running in the container.
+        """
+        _raw_socket(self._exec_socket).shutdown(socket.SHUT_RDWR)
+
+    def terminate(self) -> None:
+        """
+        Detach from the command. See ``detach``.
+        """
+        self.detach()
+
+    def kill(self) -> None:
+        """
+        Detach from the command. See ``detach``.
+        """
+        self.detach()
+
+    def __enter__(self) -> '_DockerAPIProcess':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self.stdin is not None:
+            self.stdin.close()
+        self.wait()
+
+
+def _start_exec(
+    container_id: str,
+    args: List[str],
+    user: str,
+    env: Dict[str, Any],
+    pipe_stdin: bool,
+) -> _DockerAPIProcess:
+    """
+    Start a command in a container.
+    """
+    client = CONTAINER_INDEX.client()
+    exec_instance = client.api.exec_create(
+        container=container_id,
+        cmd=args,
+        stdout=True,
+        stderr=True,
+        stdin=pipe_stdin,
+        tty=False,
+        user=user,
+        environment={key: str(value) for key, value in env.items()},
+    )
+    exec_id = exec_instance['Id']
+    exec_socket = client.api.exec_start(exec_id=exec_id, socket=True)
+    # Commands may not output anything for longer than the client timeout.
+    _raw_socket(exec_socket).settimeout(None)
+    return _DockerAPIProcess(
+        args=args,
+        client=client,
+        exec_id=exec_id,
+        exec_socket=exec_socket,
+        pipe_stdin=pipe_stdin,
+    )
+
+
+class _ChunkReader(io.RawIOBase):
+    """
+    A readable stream of chunks from an iterator.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        super().__init__()
+        self._chunks = chunks
+        self._chunk = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._chunk:
+            self._chunk = next(self._chunks, b'')
+            if not self._chunk:
+                return 0
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+
+class DockerAPITransport(NodeTransport):
+    """
+    A transport for nodes which uses the Docker Engine API.
+    """
+
+    def __init__(self, container_id: Optional[str] = None) -> None:
+        """
+        Args:
+            container_id: The ID of the container of the node. If ``None``,
+                the container is found by the public IP address of the node.
+        """
+        self._container_id = container_id
+
+    def _get_container_id(self, public_ip_address: IPv4Address) -> str:
+        """
+        Return the ID of the container of the node.
+        """
+        if self._container_id is not None:
+            return self._container_id
+        return CONTAINER_INDEX.container_id(ip_address=public_ip_address)
+
+    def run(
+        self,
+        args: List[str],
+        user: str,
+        log_output_live: bool,
+        env: Dict[str, Any],
+        tty: bool,
+        ssh_key_path: Path,
+        public_ip_address: IPv4Address,
+        capture_output: bool,
+        stdout_buffer: Optional[OutputBuffer] = None,
+        stderr_buffer: Optional[OutputBuffer] = None,
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a command on this node the given user.
+
+        Args:
+            args: The command to run on the node.
+            user: The username to communicate as.
+            log_output_live: If ``True``, log output live. If ``True``, stderr
+                is merged into stdout in the return value.
+            env: Environment variables to be set on the node before running
+                the command. A mapping of environment variable names to
+                values.
+            tty: If ``True``, allocate a pseudo-tty. This means that the users
+                terminal is attached to the streams of the process.
+                This uses the ``docker`` CLI, as it attaches the terminal.
+            ssh_key_path: The path to an SSH key which can be used to SSH to
+                the node as the ``user`` user.
+            public_ip_address: The public IP address of the node.
+            capture_output: Whether to capture output in the result.
+            stdout_buffer: Where to put stdout if ``capture_output`` is
+                ``True``. If ``None``, all of stdout is kept in memory.
+            stderr_buffer: Where to put stderr if ``capture_output`` is
+                ``True``. If ``None``, all of stderr is kept in memory.
+
+        Returns:
+            The representation of the finished process.
+
+        Raises:
+            subprocess.CalledProcessError: The process exited with a non-zero
+                code.
+        """
+        if tty:
+            docker_exec_transport = DockerExecTransport(
+                container_id=self._container_id,
+            )
+            return docker_exec_transport.run(
+                args=args,
+                user=user,
+                log_output_live=log_output_live,
+                env=env,
+                tty=tty,
+                ssh_key_path=ssh_key_path,
+                public_ip_address=public_ip_address,
+                capture_output=capture_output,
+                stdout_buffer=stdout_buffer,
+                stderr_buffer=stderr_buffer,
+            )
+
+        process = _start_exec(
+            container_id=self._get_container_id(
+                public_ip_address=public_ip_address,
+            ),
+            args=args,
+            user=user,
+            env=env,
+            pipe_stdin=False,
+        )
+
+        stdout_buffer = stdout_buffer or BytesBuffer()
+        stderr_buffer = stderr_buffer or BytesBuffer()
+
+        def read_output(
+            stream: io.BufferedReader,
+            output_buffer: OutputBuffer,
+            logger: LineLogger,
+            terminal: Any,
+        ) -> None:
+            """
+            Read a stream until it ends, buffering and logging it or writing
+            it to the terminal as data arrives.
+            """
+            for chunk in iter(lambda: stream.read1(_CHUNK_SIZE), b''):
+                if not capture_output:
+                    terminal.buffer.write(chunk)
+                    terminal.buffer.flush()
+                    continue
+                output_buffer.write(chunk)
+                if log_output_live:
+                    logger.log(chunk)
+            logger.flush()
+
+        stderr_thread = threading.Thread(
+            target=read_output,
+            kwargs={
+                'stream': process.stderr,
+                'output_buffer': stderr_buffer,
+                'logger': LineLogger(LOGGER.warning),
+                'terminal': sys.stderr,
+            },
+            daemon=True,
+        )
+        stderr_thread.start()
+        read_output(
+            stream=process.stdout,
+            output_buffer=stdout_buffer,
+            logger=LineLogger(LOGGER.debug),
+            terminal=sys.stdout,
+        )
+        stderr_thread.join()
+        returncode = process.wait()
+
+        stdout_value = stdout_buffer.value() if capture_output else None
+        stderr_value = stderr_buffer.value() if capture_output else None
+        if returncode != 0:
+            raise subprocess.CalledProcessError(
+                returncode=returncode,
+                cmd=args,
+                output=stdout_value,
+                stderr=stderr_value,
+            )
+        return subprocess.CompletedProcess(
+            args,
+            returncode,
+            stdout_value,
+            stderr_value,
+        )
+
+    def popen(
+        self,
+        args: List[str],
+        user: str,
+        env: Dict[str, Any],
+        ssh_key_path: Path,
+        public_ip_address: IPv4Address,
+        pipe_stdin: bool = False,
+    ) -> subprocess.Popen:
+        """
+        Open a pipe to a command run on a node as the given user.
+
+        Args:
+            args: The command to run on the node.
+            user: The user to open a pipe for a command for over.
+            env: Environment variables to be set on the node before running
+                the command. A mapping of environment variable names to values.
+            ssh_key_path: The path to an SSH key which can be used to SSH to
+                the node as the ``user`` user.
+            public_ip_address: The public IP address of the node.
+            pipe_stdin: If ``True``, the returned process has a ``stdin``
+                pipe which is connected to the stdin of the command.
+
+        Returns:
+            An object with the interface of ``subprocess.Popen`` which is
+            attached to the specified process. ``terminate`` and ``kill``
+            only stop receiving output, as the Docker Engine API cannot stop
+            the process.
+        """
+        process = _start_exec(
+            container_id=self._get_container_id(
+                public_ip_address=public_ip_address,
+            ),
+            args=args,
+            user=user,
+            env=env,
+            pipe_stdin=pipe_stdin,
+        )
+        return cast(subprocess.Popen, process)
+
+    def download_file(
+        self,
+        remote_path: Path,
+        local_path: Path,
+        user: str,
+        ssh_key_path: Path,
+        public_ip_address: IPv4Address,
+    ) -> None:
+        """
+        Download a file from this node.
+
+        The file is streamed from the Docker Engine API as a tar archive.
+
+        Args:
+            remote_path: The path on the node to download the file from.
+            local_path: The path on the host to download the file to.
+            user: The name of the remote user to send the file.
+            ssh_key_path: The path to an SSH key which can be used to SSH to
+                the node as the ``user`` user.
+            public_ip_address: The public IP address of the node.
+
+        Raises:
+            ValueError: The ``remote_path`` is not a regular file.
+        """
+        container_id = self._get_container_id(
+            public_ip_address=public_ip_address,
+        )
+        client = CONTAINER_INDEX.client()
+        chunks, _ = client.api.get_archive(
+            container=container_id,
+            path=str(remote_path),
+            chunk_size=_CHUNK_SIZE,
+        )
+        archive = io.BufferedReader(_ChunkReader(chunks=iter(chunks)))
+        message = 'Failed to download "{path}". It is not a regular file.'
+        not_a_file_error = ValueError(message.format(path=remote_path))
+        with tarfile.open(fileobj=archive, mode='r|') as tar:
+            # The archive of a regular file contains only that file.
+            # Members are not extracted, as the names and types of members
+            # which are not expected could write outside ``local_path``.
+            member = tar.next()
+            if member is None or not member.isfile():
+                raise not_a_file_error
+
+            remote_file = cast(BinaryIO, tar.extractfile(member))
+            with local_path.open('wb') as local_file:
+                shutil.copyfileobj(remote_file, local_file, _CHUNK_SIZE)
+
+            if tar.next() is not None:
+                local_path.unlink()
+                raise not_a_file_error
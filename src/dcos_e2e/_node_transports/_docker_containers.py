@@ -0,0 +1,158 @@
+"""
+A shared Docker client, and an index of containers by IP address.
+"""
+
+import threading
+import time
+from ipaddress import IPv4Address
+from typing import Dict, List, Optional
+
+import docker
+
+# Events which may change which container has an IP address.
+_INDEX_INVALIDATING_EVENTS = ['start', 'die', 'connect', 'disconnect']
+
+# The index is rebuilt after this many seconds even if no events are seen.
+# This is short if the Docker events stream cannot be followed.
+_INDEX_TTL_SECONDS = 60
+_INDEX_TTL_SECONDS_WITHOUT_EVENTS = 2
+
+
+def _single_container_id(container_ids: List[str]) -> str:
+    """
+    Return the only ID in ``container_ids``.
+    """
+    assert len(container_ids) == 1
+    return container_ids[0]
+
+
+class ContainerIndex:
+    """
+    An index of the IDs of running containers by IP address.
+
+    The index is rebuilt with a single Docker API request when it does not
+    include an IP address, or when it has expired.
+    It is cleared whenever a container starts, stops, or is connected to or
+    disconnected from a network, as seen on the Docker events stream.
+
+    A single Docker client is shared by all lookups.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._client = None  # type: Optional[docker.DockerClient]
+        self._container_ids = {}  # type: Dict[str, List[str]]
+        self._generation = 0
+        self._built_at = 0.0
+        self._following_events = False
+
+    def _get_client(self) -> docker.DockerClient:
+        """
+        Return the shared Docker client.
+
+        This must be called with the lock held.
+        """
+        if self._client is None:
+            self._client = docker.from_env(version='auto')
+        return self._client
+
+    def client(self) -> docker.DockerClient:
+        """
+        Return the shared Docker client.
+        """
+        with self._lock:
+            return self._get_client()
+
+    def _invalidate(self) -> None:
+        """
+        Clear the index.
+        """
+        with self._lock:
+            self._generation += 1
+            self._container_ids = {}
+
+    def _follow_events(self, client: docker.DockerClient, since: int) -> None:
+        """
+        Clear the index whenever a container may have changed IP address.
+
+        This runs until the Docker events stream ends.
+        """
+        events = client.events(
+            since=since,
+            filters={
+                'type': ['container', 'network'],
+                'event': _INDEX_INVALIDATING_EVENTS,
+            },
+            decode=True,
+        )
+        try:
+            for _ in events:
+                self._invalidate()
+        except Exception:  # pragma: no cover pylint: disable=broad-except
+            # The index then expires after a shorter time.
+            pass
+        finally:
+            with self._lock:
+                self._following_events = False
+            self._invalidate()
+
+    def _is_expired(self, now: float) -> bool:
+        """
+        Return whether the index has expired.
+
+        This must be called with the lock held.
+        """
+        ttl_seconds = {
+            True: _INDEX_TTL_SECONDS,
+            False: _INDEX_TTL_SECONDS_WITHOUT_EVENTS,
+        }[self._following_events]
+        return now - self._built_at > ttl_seconds
+
+    def container_id(self, ip_address: IPv4Address) -> str:
+        """
+        Return the ID of the running container with the given IP address.
+        """
+        key = str(ip_address)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._container_ids and not self._is_expired(now=now):
+                return _single_container_id(
+                    container_ids=self._container_ids[key],
+                )
+
+            generation = self._generation
+            client = self._get_client()
+            if not self._following_events:
+                self._following_events = True
+                # Events since just before the index is built are replayed,
+                # so that none are missed.
+                thread = threading.Thread(
+                    target=self._follow_events,
+                    kwargs={
+                        'client': client,
+                        'since': int(time.time()) - 1,
+                    },
+                    daemon=True,
+                )
+                thread.start()
+
+        container_ids = {}  # type: Dict[str, List[str]]
+        for container in client.api.containers():
+            networks = container['NetworkSettings']['Networks']
+            for network in networks.values():
+                ip_address_container_ids = container_ids.setdefault(
+                    network['IPAddress'],
+                    [],
+                )
+                ip_address_container_ids.append(container['Id'])
+
+        with self._lock:
+            # Do not store an index which may have been built before a change.
+            if self._generation == generation:
+                self._container_ids = container_ids
+                self._built_at = now
+
+        return _single_container_id(container_ids=container_ids.get(key, []))
+
+
+CONTAINER_INDEX = ContainerIndex()
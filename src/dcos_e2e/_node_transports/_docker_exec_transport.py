@@ -6,13 +6,11 @@ import subprocess
 import sys
 from ipaddress import IPv4Address
 from pathlib import Path
-from typing import Any, Dict, List
-
-import docker
-from docker.models.containers import Container
+from typing import Any, Dict, List, Optional
 
 from dcos_e2e._node_transports._base_classes import NodeTransport
-from dcos_e2e._subprocess_tools import run_subprocess
+from dcos_e2e._node_transports._docker_containers import CONTAINER_INDEX
+from dcos_e2e._subprocess_tools import OutputBuffer, run_subprocess
 
 
 def _compose_docker_command(
@@ -20,7 +18,8 @@ def _compose_docker_command(
     user: str,
     env: Dict[str, Any],
     tty: bool,
-    public_ip_address: IPv4Address,
+    container_id: str,
+    interactive: bool = False,
 ) -> List[str]:
     """
     Return a command to run ``args`` on a node using ``docker exec``.
@@ -38,13 +37,13 @@ def _compose_docker_command(
             values.
         tty: If ``True``, allocate a pseudo-tty. This means that the users
             terminal is attached to the streams of the process.
-        public_ip_address: The public IP address of the node.
+        container_id: The ID of the container of the node.
+        interactive: If ``True``, keep stdin open even if it is not attached
+            to a terminal.
 
     Returns:
         The full ``docker exec`` command to be run.
     """
-    container = _container_from_ip_address(ip_address=public_ip_address)
-
     docker_exec_args = [
         'docker',
         'exec',
@@ -54,7 +53,7 @@ def _compose_docker_command(
 
     # Do not cover this because there is currently no test for
     # using this in a terminal in the CI.
-    if sys.stdin.isatty():  # pragma: no cover
+    if interactive or sys.stdin.isatty():  # pragma: no cover
         docker_exec_args.append('--interactive')
 
     if tty:
@@ -64,7 +63,7 @@ def _compose_docker_command(
         set_env = ['--env', '{key}={value}'.format(key=key, value=str(value))]
         docker_exec_args += set_env
 
-    docker_exec_args.append(container.id)
+    docker_exec_args.append(container_id)
     docker_exec_args += args
 
     return docker_exec_args
@@ -75,6 +74,22 @@ class DockerExecTransport(NodeTransport):
     A Docker exec transport for nodes.
     """
 
+    def __init__(self, container_id: Optional[str] = None) -> None:
+        """
+        Args:
+            container_id: The ID of the container of the node. If ``None``,
+                the container is found by the public IP address of the node.
+        """
+        self._container_id = container_id
+
+    def _get_container_id(self, public_ip_address: IPv4Address) -> str:
+        """
+        Return the ID of the container of the node.
+        """
+        if self._container_id is not None:
+            return self._container_id
+        return CONTAINER_INDEX.container_id(ip_address=public_ip_address)
+
     def run(
         self,
         args: List[str],
@@ -85,6 +100,8 @@ class DockerExecTransport(NodeTransport):
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
         capture_output: bool,
+        stdout_buffer: Optional[OutputBuffer] = None,
+        stderr_buffer: Optional[OutputBuffer] = None,
     ) -> subprocess.CompletedProcess:
         """
         Run a command on this node the given user.
@@ -103,6 +120,10 @@ class DockerExecTransport(NodeTransport):
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
             capture_output: Whether to capture output in the result.
+            stdout_buffer: Where to put stdout if ``capture_output`` is
+                ``True``. If ``None``, all of stdout is kept in memory.
+            stderr_buffer: Where to put stderr if ``capture_output`` is
+                ``True``. If ``None``, all of stderr is kept in memory.
 
         Returns:
             The representation of the finished process.
@@ -115,7 +136,9 @@ class DockerExecTransport(NodeTransport):
             args=args,
             user=user,
             env=env,
-            public_ip_address=public_ip_address,
+            container_id=self._get_container_id(
+                public_ip_address=public_ip_address,
+            ),
             tty=tty,
         )
 
@@ -123,6 +146,8 @@ class DockerExecTransport(NodeTransport):
             args=docker_exec_args,
             log_output_live=log_output_live,
             pipe_output=capture_output,
+            stdout_buffer=stdout_buffer,
+            stderr_buffer=stderr_buffer,
         )
 
     def popen(
@@ -132,6 +157,7 @@ class DockerExecTransport(NodeTransport):
         env: Dict[str, Any],
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
+        pipe_stdin: bool = False,
     ) -> subprocess.Popen:
         """
         Open a pipe to a command run on a node as the given user.
@@ -144,6 +170,8 @@ class DockerExecTransport(NodeTransport):
             ssh_key_path: The path to an SSH key which can be used to SSH to
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
+            pipe_stdin: If ``True``, the returned process has a ``stdin``
+                pipe which is connected to the stdin of the command.
 
         Returns:
             The pipe object attached to the specified process.
@@ -152,48 +180,20 @@ class DockerExecTransport(NodeTransport):
             args=args,
             user=user,
             env=env,
-            public_ip_address=public_ip_address,
+            container_id=self._get_container_id(
+                public_ip_address=public_ip_address,
+            ),
             tty=False,
+            interactive=pipe_stdin,
         )
 
         return subprocess.Popen(
             args=docker_exec_args,
+            stdin=subprocess.PIPE if pipe_stdin else None,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
         )
 
-    def send_file(
-        self,
-        local_path: Path,
-        remote_path: Path,
-        user: str,
-        ssh_key_path: Path,
-        public_ip_address: IPv4Address,
-    ) -> None:
-        """
-        Copy a file to this node.
-
-        Args:
-            local_path: The path on the host of the file to send.
-            remote_path: The path on the node to place the file.
-            user: The name of the remote user to send the file.
-            ssh_key_path: The path to an SSH key which can be used to SSH to
-                the node as the ``user`` user.
-            public_ip_address: The public IP address of the node.
-        """
-        container = _container_from_ip_address(ip_address=public_ip_address)
-        args = [
-            'docker',
-            'cp',
-            str(local_path),
-            container.id + ':' + str(remote_path),
-        ]
-        run_subprocess(
-            args=args,
-            log_output_live=False,
-            pipe_output=True,
-        )
-
     def download_file(
         self,
         remote_path: Path,
@@ -213,11 +213,13 @@ class DockerExecTransport(NodeTransport):
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
         """
-        container = _container_from_ip_address(ip_address=public_ip_address)
+        container_id = self._get_container_id(
+            public_ip_address=public_ip_address,
+        )
         args = [
             'docker',
             'cp',
-            container.id + ':' + str(remote_path),
+            container_id + ':' + str(remote_path),
             str(local_path),
         ]
         run_subprocess(
@@ -225,20 +227,3 @@ class DockerExecTransport(NodeTransport):
             log_output_live=False,
             pipe_output=True,
         )
-
-
-def _container_from_ip_address(ip_address: IPv4Address) -> Container:
-    """
-    Return the ``Container`` with the given ``ip_address``.
-    """
-    client = docker.from_env(version='auto')
-    containers = client.containers.list()
-    matching_containers = []
-    for container in containers:
-        networks = container.attrs['NetworkSettings']['Networks']
-        for net in networks:
-            if networks[net]['IPAddress'] == str(ip_address):
-                matching_containers.append(container)
-
-    assert len(matching_containers) == 1
-    return matching_containers[0]
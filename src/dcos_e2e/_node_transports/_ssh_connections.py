@@ -0,0 +1,284 @@
+"""
+A pool of persistent SSH connections to nodes.
+
+Each connection is an OpenSSH "ControlMaster" process which is started by the
+first ``ssh`` command to a node.
+Later ``ssh`` commands with the same host, user and key multiplex over the
+master connection rather than each doing a full key exchange.
+"""
+
+import atexit
+import hashlib
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+from ipaddress import IPv4Address
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# A connection is kept open for this long after it was last used.
+_IDLE_TIMEOUT_SECONDS = 60
+
+# At most this many idle connections are kept open at once.
+# When this is exceeded, the least recently used idle connection is closed.
+_MAX_CONNECTIONS = 64
+
+_ConnectionKey = Tuple[str, str, str]
+
+
+def _exit_master(host: str, control_path: Path) -> None:
+    """
+    Ask the master process for a connection to exit.
+    """
+    args = [
+        'ssh',
+        '-o',
+        'ControlPath={path}'.format(path=control_path),
+        '-O',
+        'exit',
+        host,
+    ]
+    # The master process may have already exited after being idle.
+    subprocess.run(
+        args=args,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+class SSHSession:
+    """
+    The use of a shared connection by one ``ssh`` command.
+
+    A connection is not closed to make room for others while it has
+    sessions which have not been released.
+    """
+
+    def __init__(
+        self,
+        release: Callable[[], None],
+        options: List[str],
+    ) -> None:
+        """
+        Args:
+            release: A function which records that the session has finished.
+            options: ``ssh`` options which use the connection.
+
+        Attributes:
+            options: ``ssh`` options which use the connection.
+        """
+        self._release = release
+        self._released = False
+        self.options = options
+
+    def release(self) -> None:
+        """
+        Record that the ``ssh`` command has finished.
+
+        This may be called more than once.
+        """
+        if not self._released:
+            self._released = True
+            self._release()
+
+
+class SSHConnectionPool:
+    """
+    A pool of OpenSSH master connections keyed by host, user and key.
+    """
+
+    def __init__(
+        self,
+        idle_timeout_seconds: int = _IDLE_TIMEOUT_SECONDS,
+        max_connections: int = _MAX_CONNECTIONS,
+    ) -> None:
+        """
+        Args:
+            idle_timeout_seconds: The number of seconds to keep a connection
+                open after it was last used.
+            max_connections: The maximum number of connections to keep open.
+                Connections with sessions which have not been released are
+                never closed to make room, so more connections than this
+                may be open while many commands run at once.
+        """
+        self._idle_timeout_seconds = idle_timeout_seconds
+        self._max_connections = max_connections
+        self._lock = threading.Lock()
+        # Keys in order of last use, least recently used first.
+        last_used = OrderedDict()  # type: OrderedDict[_ConnectionKey, float]
+        self._last_used = last_used
+        # The number of sessions of each connection which have not been
+        # released.
+        self._sessions = {}  # type: Dict[_ConnectionKey, int]
+        self._control_dir = None  # type: Optional[Path]
+
+    def _control_path(self, key: _ConnectionKey) -> Path:
+        """
+        Return the path of the control socket for a connection.
+
+        UNIX socket paths are limited to around 100 characters, so a short
+        hash of the key is used as the name.
+        """
+        if self._control_dir is None:
+            self._control_dir = Path(mkdtemp(prefix='dcos-e2e-ssh-'))
+        name = hashlib.sha256('\0'.join(key).encode()).hexdigest()[:16]
+        return self._control_dir / name
+
+    def _evict(self, now: float) -> List[Tuple[str, Path]]:
+        """
+        Forget idle connections which have exited, and choose the least
+        recently used idle connections to close while there are too many.
+
+        This must be called with the lock held.
+        Connections with sessions which have not been released are not
+        chosen.
+
+        Returns:
+            The host and control path of each connection to close. These are
+            closed after the lock is released, as closing a connection runs
+            a command.
+        """
+        for key, last_used in list(self._last_used.items()):
+            idle = key not in self._sessions
+            if idle and now - last_used > self._idle_timeout_seconds:
+                # OpenSSH closes the master itself with ``ControlPersist``.
+                del self._last_used[key]
+
+        to_close = []  # type: List[Tuple[str, Path]]
+        idle_keys = [
+            key for key in self._last_used if key not in self._sessions
+        ]
+        while len(self._last_used) >= self._max_connections and idle_keys:
+            key = idle_keys.pop(0)
+            del self._last_used[key]
+            to_close.append((key[0], self._control_path(key=key)))
+        return to_close
+
+    def _release(self, key: _ConnectionKey) -> None:
+        """
+        Record that a session of a connection has finished.
+        """
+        with self._lock:
+            remaining = self._sessions.get(key, 0) - 1
+            if remaining > 0:
+                self._sessions[key] = remaining
+            else:
+                self._sessions.pop(key, None)
+            if key in self._last_used:
+                # A connection is idle from when its last session ended.
+                self._last_used[key] = time.monotonic()
+                self._last_used.move_to_end(key)
+
+    def acquire(
+        self,
+        public_ip_address: IPv4Address,
+        user: str,
+        ssh_key_path: Path,
+    ) -> SSHSession:
+        """
+        Start a session of a shared connection to a node.
+
+        The session must be released when the ``ssh`` command which uses it
+        has finished.
+
+        Args:
+            public_ip_address: The public IP address of the node.
+            user: The user to connect as.
+            ssh_key_path: The path to an SSH key which can be used to SSH to
+                the node as the ``user`` user.
+
+        Returns:
+            A session with ``ssh`` options which use the connection.
+        """
+        key = (str(public_ip_address), user, str(ssh_key_path))
+        now = time.monotonic()
+        to_close = []  # type: List[Tuple[str, Path]]
+        with self._lock:
+            if key not in self._last_used:
+                to_close = self._evict(now=now)
+            self._last_used[key] = now
+            self._last_used.move_to_end(key)
+            self._sessions[key] = self._sessions.get(key, 0) + 1
+            control_path = self._control_path(key=key)
+
+        for host, path in to_close:
+            _exit_master(host=host, control_path=path)
+
+        options = [
+            '-o',
+            'ControlMaster=auto',
+            '-o',
+            'ControlPath={path}'.format(path=control_path),
+            '-o',
+            'ControlPersist={seconds}s'.format(
+                seconds=self._idle_timeout_seconds,
+            ),
+        ]
+        return SSHSession(
+            release=partial(self._release, key=key),
+            options=options,
+        )
+
+    @contextmanager
+    def session(
+        self,
+        public_ip_address: IPv4Address,
+        user: str,
+        ssh_key_path: Path,
+    ) -> Iterator[List[str]]:
+        """
+        Use a shared connection to a node for the duration of a ``with``
+        block.
+
+        See ``acquire`` for the arguments.
+
+        Yields:
+            ``ssh`` options which use the connection.
+        """
+        ssh_session = self.acquire(
+            public_ip_address=public_ip_address,
+            user=user,
+            ssh_key_path=ssh_key_path,
+        )
+        try:
+            yield ssh_session.options
+        finally:
+            ssh_session.release()
+
+    def close(self, public_ip_address: Optional[IPv4Address] = None) -> None:
+        """
+        Close connections.
+
+        Args:
+            public_ip_address: The node to close connections to. If ``None``,
+                all connections are closed.
+        """
+        control_dir = None  # type: Optional[Path]
+        with self._lock:
+            keys = [
+                key for key in self._last_used if public_ip_address is None
+                or key[0] == str(public_ip_address)
+            ]
+            to_close = []  # type: List[Tuple[str, Path]]
+            for key in keys:
+                del self._last_used[key]
+                to_close.append((key[0], self._control_path(key=key)))
+
+            if public_ip_address is None:
+                control_dir = self._control_dir
+                self._control_dir = None
+
+        for host, path in to_close:
+            _exit_master(host=host, control_path=path)
+
+        if control_dir is not None:
+            rmtree(path=str(control_dir), ignore_errors=True)
+
+
+SSH_CONNECTION_POOL = SSHConnectionPool()
+atexit.register(SSH_CONNECTION_POOL.close)
@@ -3,15 +3,15 @@ Utilities to connect to nodes with SSH.
 """
 
 import subprocess
+import weakref
 from ipaddress import IPv4Address
 from pathlib import Path
 from shlex import quote
-from typing import Any, Dict, List
-
-import paramiko
+from typing import Any, Dict, List, Optional
 
 from dcos_e2e._node_transports._base_classes import NodeTransport
-from dcos_e2e._subprocess_tools import run_subprocess
+from dcos_e2e._node_transports._ssh_connections import SSH_CONNECTION_POOL
+from dcos_e2e._subprocess_tools import OutputBuffer, run_subprocess
 
 
 def _compose_ssh_command(
@@ -21,6 +21,7 @@ def _compose_ssh_command(
     tty: bool,
     ssh_key_path: Path,
     public_ip_address: IPv4Address,
+    connection_options: List[str],
 ) -> List[str]:
     """
     Return a command to run ``args`` on a node over SSH.
@@ -36,6 +37,9 @@ def _compose_ssh_command(
         public_ip_address: The public IP address of the node.
         ssh_key_path: The path to an SSH key which can be used to SSH to
             the node as the ``user`` user.
+        connection_options: ``ssh`` options which use a persistent
+            connection which is shared by all commands for the same node,
+            user and key.
 
     Returns:
         The full SSH command to be run.
@@ -72,6 +76,7 @@ def _compose_ssh_command(
         # Also ignore "Connection to <IP-ADDRESS> closed".
         '-o',
         'LogLevel=QUIET',
+        *connection_options,
         str(public_ip_address),
     ] + [
         '{key}={value}'.format(key=k, value=quote(str(v)))
@@ -96,6 +101,8 @@ class SSHTransport(NodeTransport):
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
         capture_output: bool,
+        stdout_buffer: Optional[OutputBuffer] = None,
+        stderr_buffer: Optional[OutputBuffer] = None,
     ) -> subprocess.CompletedProcess:
         """
         Run a command on this node the given user.
@@ -116,6 +123,10 @@ class SSHTransport(NodeTransport):
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
             capture_output: Whether to capture output in the result.
+            stdout_buffer: Where to put stdout if ``capture_output`` is
+                ``True``. If ``None``, all of stdout is kept in memory.
+            stderr_buffer: Where to put stderr if ``capture_output`` is
+                ``True``. If ``None``, all of stderr is kept in memory.
 
         Returns:
             The representation of the finished process.
@@ -124,20 +135,28 @@ class SSHTransport(NodeTransport):
             subprocess.CalledProcessError: The process exited with a non-zero
                 code.
         """
-        ssh_args = _compose_ssh_command(
-            args=args,
+        with SSH_CONNECTION_POOL.session(
+            public_ip_address=public_ip_address,
             user=user,
-            env=env,
-            tty=tty,
             ssh_key_path=ssh_key_path,
-            public_ip_address=public_ip_address,
-        )
+        ) as connection_options:
+            ssh_args = _compose_ssh_command(
+                args=args,
+                user=user,
+                env=env,
+                tty=tty,
+                ssh_key_path=ssh_key_path,
+                public_ip_address=public_ip_address,
+                connection_options=connection_options,
+            )
 
-        return run_subprocess(
-            args=ssh_args,
-            log_output_live=log_output_live,
-            pipe_output=capture_output,
-        )
+            return run_subprocess(
+                args=ssh_args,
+                log_output_live=log_output_live,
+                pipe_output=capture_output,
+                stdout_buffer=stdout_buffer,
+                stderr_buffer=stderr_buffer,
+            )
 
     def popen(
         self,
@@ -146,6 +165,7 @@ class SSHTransport(NodeTransport):
         env: Dict[str, Any],
         ssh_key_path: Path,
         public_ip_address: IPv4Address,
+        pipe_stdin: bool = False,
     ) -> subprocess.Popen:
         """
         Open a pipe to a command run on a node as the given user.
@@ -158,10 +178,17 @@ class SSHTransport(NodeTransport):
             ssh_key_path: The path to an SSH key which can be used to SSH to
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
+            pipe_stdin: If ``True``, the returned process has a ``stdin``
+                pipe which is connected to the stdin of the command.
 
         Returns:
             The pipe object attached to the specified process.
         """
+        ssh_session = SSH_CONNECTION_POOL.acquire(
+            public_ip_address=public_ip_address,
+            user=user,
+            ssh_key_path=ssh_key_path,
+        )
         ssh_args = _compose_ssh_command(
             args=args,
             user=user,
@@ -169,45 +196,24 @@ class SSHTransport(NodeTransport):
             tty=False,
             ssh_key_path=ssh_key_path,
             public_ip_address=public_ip_address,
+            connection_options=ssh_session.options,
         )
-        return subprocess.Popen(
-            args=ssh_args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-
-    def send_file(
-        self,
-        local_path: Path,
-        remote_path: Path,
-        user: str,
-        ssh_key_path: Path,
-        public_ip_address: IPv4Address,
-    ) -> None:
-        """
-        Copy a file to this node.
-
-        Args:
-            local_path: The path on the host of the file to send.
-            remote_path: The path on the node to place the file.
-            user: The name of the remote user to send the file.
-            ssh_key_path: The path to an SSH key which can be used to SSH to
-                the node as the ``user`` user.
-            public_ip_address: The public IP address of the node.
-        """
-        with paramiko.SSHClient() as ssh_client:
-            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh_client.connect(
-                str(public_ip_address),
-                username=user,
-                key_filename=str(ssh_key_path),
+        try:
+            process = subprocess.Popen(
+                args=ssh_args,
+                stdin=subprocess.PIPE if pipe_stdin else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
             )
+        except BaseException:
+            ssh_session.release()
+            raise
 
-            with ssh_client.open_sftp() as sftp:
-                sftp.put(
-                    localpath=str(local_path),
-                    remotepath=str(remote_path),
-                )
+        # The caller owns the process, so we cannot tell when the command
+        # finishes.
+        # The session is released when the process object is discarded.
+        weakref.finalize(process, ssh_session.release)
+        return process
 
     def download_file(
         self,
@@ -228,16 +234,38 @@ class SSHTransport(NodeTransport):
                 the node as the ``user`` user.
             public_ip_address: The public IP address of the node.
         """
-        with paramiko.SSHClient() as ssh_client:
-            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh_client.connect(
-                str(public_ip_address),
-                username=user,
-                key_filename=str(ssh_key_path),
+        with SSH_CONNECTION_POOL.session(
+            public_ip_address=public_ip_address,
+            user=user,
+            ssh_key_path=ssh_key_path,
+        ) as connection_options:
+            ssh_args = _compose_ssh_command(
+                args=['cat', str(remote_path)],
+                user=user,
+                env={},
+                tty=False,
+                ssh_key_path=ssh_key_path,
+                public_ip_address=public_ip_address,
+                connection_options=connection_options,
             )
 
-            with ssh_client.open_sftp() as sftp:
-                sftp.get(
-                    remotepath=str(remote_path),
-                    localpath=str(local_path),
-                )
+            try:
+                with local_path.open('wb') as local_file:
+                    subprocess.run(
+                        args=ssh_args,
+                        stdout=local_file,
+                        stderr=subprocess.PIPE,
+                        check=True,
+                    )
+            except subprocess.CalledProcessError:
+                local_path.unlink()
+                raise
+
+    def close_connections(self, public_ip_address: IPv4Address) -> None:
+        """
+        Close persistent SSH connections to a node.
+
+        Args:
+            public_ip_address: The public IP address of the node.
+        """
+        SSH_CONNECTION_POOL.close(public_ip_address=public_ip_address)
@@ -0,0 +1,273 @@
+"""
+Tools for waiting until nodes are ready.
+"""
+
+import functools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import (
+    FIRST_EXCEPTION,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
+
+from .node import Node
+from .readiness import PhaseTiming
+
+LOGGER = logging.getLogger(__name__)
+
+# Delays grow up to ``initial_delay_seconds * 2 ** _MAX_BACKOFF_EXPONENT``
+# before they are limited by ``max_delay_seconds``.
+_MAX_BACKOFF_EXPONENT = 16
+
+
+def _retry_until_ready(
+    check: Callable[[], None],
+    description: str,
+    exceptions: Tuple[Type[Exception], ...],
+    deadline: Optional[float],
+    stop: threading.Event,
+    initial_delay_seconds: float,
+    max_delay_seconds: float,
+) -> int:
+    """
+    Run ``check`` until it does not raise one of ``exceptions``, with "full
+    jitter" exponential backoff: the longest possible delay doubles after each
+    attempt, up to ``max_delay_seconds``.
+
+    Returns:
+        The number of attempts.
+
+    Raises:
+        Exception: The last error raised by ``check`` if ``deadline`` passes
+            or ``stop`` is set, or an error which is not one of
+            ``exceptions``.
+    """
+    attempt = 0
+    while True:
+        try:
+            check()
+            return attempt + 1
+        except exceptions:
+            exponent = min(attempt, _MAX_BACKOFF_EXPONENT)
+            longest_delay = min(
+                max_delay_seconds,
+                initial_delay_seconds * 2**exponent,
+            )
+            delay = random.uniform(0, longest_delay)
+            attempt += 1
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise
+                delay = min(delay, remaining)
+
+            message = (
+                '{description} is not ready after {attempt} attempts. '
+                'Retrying in {delay:.1f} seconds.'
+            ).format(description=description, attempt=attempt, delay=delay)
+            LOGGER.debug(message)
+            if stop.wait(timeout=delay):
+                raise
+
+
+def wait_until_ready(
+    nodes: Iterable[Node],
+    probe: Callable[[Node], None],
+    exceptions: Tuple[Type[Exception], ...],
+    timeout_seconds: Optional[float] = None,
+    initial_delay_seconds: float = 0.5,
+    max_delay_seconds: float = 10,
+) -> None:
+    """
+    Probe all nodes at the same time until each node is ready.
+
+    A probe which raises one of ``exceptions`` is retried on that node after a
+    random delay, with "full jitter" exponential backoff: the longest possible
+    delay doubles after each attempt, up to ``max_delay_seconds``.
+    This returns as soon as the probe has succeeded once on every node.
+
+    Args:
+        nodes: The nodes to probe.
+        probe: A function which takes a node and raises an exception if the
+            node is not ready.
+        exceptions: Exceptions which mean that a node is not ready yet.
+        timeout_seconds: How long to wait for all nodes to be ready, from
+            when this is called. If ``None``, there is no deadline.
+        initial_delay_seconds: The longest possible delay after the first
+            failed attempt on a node.
+        max_delay_seconds: The longest possible delay between attempts on a
+            node.
+
+    Raises:
+        Exception: The last error raised by a probe on a node which was not
+            ready before the deadline, or an error raised by a probe which is
+            not one of ``exceptions``. Probes on other nodes are stopped.
+    """
+    nodes = list(nodes)
+    if not nodes:
+        return
+
+    deadline = None  # type: Optional[float]
+    if timeout_seconds is not None:
+        deadline = time.monotonic() + timeout_seconds
+    stop = threading.Event()
+
+    def probe_until_ready(node: Node) -> None:
+        _retry_until_ready(
+            check=functools.partial(probe, node),
+            description=str(node),
+            exceptions=exceptions,
+            deadline=deadline,
+            stop=stop,
+            initial_delay_seconds=initial_delay_seconds,
+            max_delay_seconds=max_delay_seconds,
+        )
+
+    with ThreadPoolExecutor(max_workers=len(nodes)) as executor:
+        futures = [executor.submit(probe_until_ready, node) for node in nodes]
+        try:
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        finally:
+            # Probes which are still running stop at their next delay,
+            # including when this thread is interrupted by an outer timeout.
+            stop.set()
+
+    for future in done:
+        future.result()
+
+
+class Phase:
+    """
+    A check which is retried until it passes, once the phases it depends on
+    are ready.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        check: Callable[[], None],
+        exceptions: Tuple[Type[Exception], ...],
+        depends_on: Iterable[str] = (),
+    ) -> None:
+        """
+        Args:
+            name: The name of the phase.
+            check: A function which raises an exception if the phase is not
+                ready.
+            exceptions: Exceptions which mean that the phase is not ready yet.
+            depends_on: The names of phases which must be ready before this
+                phase starts.
+        """
+        self.name = name
+        self.check = check
+        self.exceptions = exceptions
+        self.depends_on = tuple(depends_on)
+
+
+def run_phases(
+    phases: Sequence[Phase],
+    start: float,
+    deadline: Optional[float] = None,
+    initial_delay_seconds: float = 0.5,
+    max_delay_seconds: float = 10,
+) -> List[PhaseTiming]:
+    """
+    Run the checks of all phases until each phase is ready.
+
+    Each phase starts as soon as the phases it depends on are ready, so
+    independent phases are checked at the same time.
+    Checks are retried as in ``wait_until_ready``.
+
+    Args:
+        phases: The phases to run. Each phase must come after the phases it
+            depends on.
+        start: The ``time.monotonic()`` time which timings are relative to.
+        deadline: The ``time.monotonic()`` time by which all phases must be
+            ready. If ``None``, there is no deadline.
+        initial_delay_seconds: The longest possible delay after the first
+            failed check of a phase.
+        max_delay_seconds: The longest possible delay between checks of a
+            phase.
+
+    Returns:
+        The timing of each phase, in the order of ``phases``.
+
+    Raises:
+        ValueError: A phase depends on a phase which does not come before it.
+        Exception: The last error raised by a check of a phase which was not
+            ready before the deadline, or an error raised by a check which is
+            not one of its phase's ``exceptions``. Checks of other phases are
+            stopped.
+    """
+    seen = set()  # type: Set[str]
+    for phase in phases:
+        for dependency in phase.depends_on:
+            if dependency not in seen:
+                message = (
+                    'Phase "{name}" depends on "{dependency}", which is not '
+                    'an earlier phase.'
+                ).format(name=phase.name, dependency=dependency)
+                raise ValueError(message)
+        seen.add(phase.name)
+
+    if not phases:
+        return []
+
+    stop = threading.Event()
+    futures = {}  # type: Dict[str, Future]
+
+    def run_phase(phase: Phase) -> PhaseTiming:
+        for dependency in phase.depends_on:
+            futures[dependency].result()
+
+        started = time.monotonic()
+        attempts = _retry_until_ready(
+            check=phase.check,
+            description=phase.name,
+            exceptions=phase.exceptions,
+            deadline=deadline,
+            stop=stop,
+            initial_delay_seconds=initial_delay_seconds,
+            max_delay_seconds=max_delay_seconds,
+        )
+        timing = PhaseTiming(
+            name=phase.name,
+            started_after_seconds=started - start,
+            ready_after_seconds=time.monotonic() - start,
+            attempts=attempts,
+        )
+        message = '{name} is ready after {seconds:.1f} seconds.'.format(
+            name=phase.name,
+            seconds=timing.ready_after_seconds,
+        )
+        LOGGER.info(message)
+        return timing
+
+    with ThreadPoolExecutor(max_workers=len(phases)) as executor:
+        for phase in phases:
+            futures[phase.name] = executor.submit(run_phase, phase)
+        try:
+            done, _ = wait(futures.values(), return_when=FIRST_EXCEPTION)
+        finally:
+            stop.set()
+
+    # Raise the error which stopped the other phases, rather than the error
+    # of a phase which was stopped.
+    for future in done:
+        future.result()
+    return [futures[phase.name].result() for phase in phases]
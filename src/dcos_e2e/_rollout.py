@@ -0,0 +1,108 @@
+"""
+Helpers for running an operation on many nodes, following a rollout policy.
+"""
+
+import logging
+import subprocess
+from concurrent.futures import (
+    FIRST_EXCEPTION,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Callable, Dict, List, Set, Tuple
+
+from .exceptions import MultiNodeCalledProcessError
+from .node import Node, Role
+from .rollout_policies import RolloutPolicy
+
+LOGGER = logging.getLogger(__name__)
+
+
+def run_on_nodes(
+    operation: Callable[[Node, Role], None],
+    masters: Set[Node],
+    agents: Set[Node],
+    public_agents: Set[Node],
+    rollout_policy: RolloutPolicy,
+) -> None:
+    """
+    Run ``operation`` on every given node, following ``rollout_policy``.
+
+    If the operation fails on a node, no more nodes are started on, but nodes
+    which have already been started on are allowed to finish.
+
+    Args:
+        operation: A callable which takes a node and the node's role.
+        masters: Master nodes to run the operation on.
+        agents: Agent nodes to run the operation on.
+        public_agents: Public agent nodes to run the operation on.
+        rollout_policy: The order in which to operate on nodes, and how many
+            nodes to operate on at the same time.
+
+    Raises:
+        MultiNodeCalledProcessError: A command failed on one or more nodes.
+            This includes the errors from every node on which a command failed.
+        Exception: The operation raised an unexpected error on a node.
+    """
+    nodes_by_role = {
+        Role.MASTER: masters,
+        Role.AGENT: agents,
+        Role.PUBLIC_AGENT: public_agents,
+    }
+
+    for roles in rollout_policy.role_order:
+        futures = {}  # type: Dict[Future, Node]
+        executors = []  # type: List[ThreadPoolExecutor]
+        for role in roles:
+            nodes = nodes_by_role[role]
+            if not nodes:
+                continue
+
+            max_workers = rollout_policy.parallelism.get(role, len(nodes))
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            executors.append(executor)
+            for node in nodes:
+                future = executor.submit(operation, node, role)
+                futures[future] = node
+
+        try:
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            if any(future.exception() for future in done):
+                for future in futures:
+                    future.cancel()
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+
+        _raise_failures(
+            results=[
+                (node, future) for future, node in futures.items()
+                if not future.cancelled()
+            ],
+        )
+
+
+def _raise_failures(results: List[Tuple[Node, Future]]) -> None:
+    """
+    Raise an error if any of the given futures failed.
+    """
+    errors = {}  # type: Dict[Node, subprocess.CalledProcessError]
+    for node, future in results:
+        exception = future.exception()
+        if exception is None:
+            continue
+
+        if not isinstance(exception, subprocess.CalledProcessError):
+            raise exception
+
+        LOGGER.error(
+            'Command failed on `{node}`: {error}'.format(
+                node=str(node),
+                error=str(exception),
+            ),
+        )
+        errors[node] = exception
+
+    if errors:
+        raise MultiNodeCalledProcessError(errors=errors)
@@ -2,16 +2,37 @@
 Utilities for running subprocesses.
 """
 
+import abc
 import logging
+import os
+import selectors
 import subprocess
-import time
+import threading
+from collections import deque
 from subprocess import CompletedProcess
-from typing import Callable, Dict, List, Optional, Union
-
-import sarge
+from tempfile import SpooledTemporaryFile
+from typing import (
+    IO,
+    Any,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
 LOGGER = logging.getLogger(__name__)
 
+# The maximum number of bytes to read from a pipe at once.
+_READ_SIZE = 64 * 1024
+
+# Longer lines are logged in parts.
+_MAX_LINE_BYTES = 64 * 1024
+
 
 def _safe_decode(output_bytes: bytes) -> str:
     """
@@ -29,28 +50,223 @@ def _safe_decode(output_bytes: bytes) -> str:
         )
 
 
-class _LineLogger:
+class LineLogger:
     """
     A logger which logs full lines.
+
+    Each byte given is looked at once, so logging is linear in the size of
+    the output.
+    Lines longer than ``max_line_bytes`` are logged in parts, so memory use
+    is bounded even if output never contains a newline.
     """
 
-    def __init__(self, logger: Callable[[str], None]) -> None:
-        self._buffer = b''
+    def __init__(
+        self,
+        logger: Callable[[str], None],
+        max_line_bytes: int = _MAX_LINE_BYTES,
+    ) -> None:
+        self._buffer = bytearray()
         self._logger = logger
+        self._max_line_bytes = max_line_bytes
 
     def log(self, data: bytes) -> None:
-        self._buffer += data
+        start = 0
+        while True:
+            end = data.find(b'\n', start)
+            if end == -1:
+                break
+            self._buffer += data[start:end]
+            self._log_buffer()
+            start = end + 1
 
-        lines = self._buffer.split(b'\n')
-        self._buffer = lines.pop()
+        self._buffer += data[start:]
+        while len(self._buffer) >= self._max_line_bytes:
+            part = bytes(self._buffer[:self._max_line_bytes])
+            del self._buffer[:self._max_line_bytes]
+            self._logger(_safe_decode(part))
 
-        for line in lines:
-            self._logger(_safe_decode(line))
+    def _log_buffer(self) -> None:
+        self._logger(_safe_decode(bytes(self._buffer)))
+        del self._buffer[:]
 
     def flush(self) -> None:
         if self._buffer:
-            self._logger(_safe_decode(self._buffer))
-            self._buffer = b''
+            self._log_buffer()
+
+
+class OutputBuffer(abc.ABC):
+    """
+    Somewhere to put the output of one stream of a command as it arrives.
+    """
+
+    @abc.abstractmethod
+    def write(self, data: bytes) -> None:
+        """
+        Add output.
+        """
+
+    @abc.abstractmethod
+    def value(self) -> Any:
+        """
+        Return the output to put in a ``subprocess.CompletedProcess``.
+        """
+
+
+class BytesBuffer(OutputBuffer):
+    """
+    Keep all output in memory.
+    """
+
+    def __init__(self) -> None:
+        self._chunks = []  # type: List[bytes]
+
+    def write(self, data: bytes) -> None:
+        self._chunks.append(data)
+
+    def value(self) -> bytes:
+        return b''.join(self._chunks)
+
+
+class TailBuffer(OutputBuffer):
+    """
+    Keep only the end of the output in memory.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        Args:
+            max_bytes: The number of bytes at the end of the output to keep.
+        """
+        self._max_bytes = max_bytes
+        self._chunks = deque()  # type: Deque[bytes]
+        self._size = 0
+
+    def write(self, data: bytes) -> None:
+        self._chunks.append(data)
+        self._size += len(data)
+        # Whole chunks are dropped once they are not needed, so that each
+        # write does not copy the kept output.
+        while (
+            len(self._chunks) > 1
+            and self._size - len(self._chunks[0]) >= self._max_bytes
+        ):
+            self._size -= len(self._chunks.popleft())
+
+    def value(self) -> bytes:
+        output = b''.join(self._chunks)
+        return output[max(len(output) - self._max_bytes, 0):]
+
+
+class SpoolBuffer(OutputBuffer):
+    """
+    Keep output in memory until it is too large, and then in a temporary
+    file.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        Args:
+            max_bytes: The number of bytes to keep in memory before moving
+                the output to a temporary file.
+        """
+        self._file = SpooledTemporaryFile(max_size=max_bytes)
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+
+    def value(self) -> BinaryIO:
+        """
+        Return a binary file object, positioned at the start of the output.
+        """
+        self._file.seek(0)
+        return cast(BinaryIO, self._file)
+
+
+class SinkBuffer(OutputBuffer):
+    """
+    Write output to a binary file object as it arrives, keeping none of it.
+    """
+
+    def __init__(self, sink: BinaryIO, lock: threading.Lock) -> None:
+        """
+        Args:
+            sink: The binary file object to write output to.
+            lock: A lock to hold while writing, shared by buffers which
+                write to the same sink.
+        """
+        self._sink = sink
+        self._lock = lock
+
+    def write(self, data: bytes) -> None:
+        with self._lock:
+            self._sink.write(data)
+            self._sink.flush()
+
+    def value(self) -> None:
+        return None
+
+
+def _read_pipes(
+    process: subprocess.Popen,
+    outputs: Dict[IO[bytes], Tuple[OutputBuffer, Optional[LineLogger]]],
+) -> None:
+    """
+    Read from the given pipes of a process as soon as data is available,
+    until they are closed or the process has exited.
+
+    Args:
+        process: The process to read the output of.
+        outputs: A mapping of pipes to a buffer to add data to and a logger
+            to log data with, if any.
+    """
+    # A background thread waits for the process and then closes this pipe,
+    # so that the exit of the process wakes up the selector.
+    exit_read_fd, exit_write_fd = os.pipe()
+
+    def _notify_exit() -> None:
+        process.wait()
+        os.close(exit_write_fd)
+
+    thread = threading.Thread(target=_notify_exit, daemon=True)
+    thread.start()
+
+    try:
+        with selectors.DefaultSelector() as selector:
+            for pipe, output in outputs.items():
+                selector.register(pipe, selectors.EVENT_READ, data=output)
+            selector.register(exit_read_fd, selectors.EVENT_READ)
+
+            open_pipes = {pipe.fileno() for pipe in outputs}
+            exited = False
+            while open_pipes:
+                # After the process has exited, only read data which is
+                # already available. Processes started by the process, such
+                # as an SSH control master, may keep the pipes open.
+                timeout = 0 if exited else None
+                events = selector.select(timeout=timeout)
+                if not events:
+                    break
+
+                for key, _ in events:
+                    if key.fd == exit_read_fd:
+                        selector.unregister(exit_read_fd)
+                        exited = True
+                        continue
+
+                    data = os.read(key.fd, _READ_SIZE)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        open_pipes.remove(key.fd)
+                        continue
+
+                    output_buffer, logger = key.data
+                    output_buffer.write(data)
+                    if logger is not None:
+                        logger.log(data)
+
+        thread.join()
+    finally:
+        os.close(exit_read_fd)
 
 
 def run_subprocess(
@@ -59,10 +275,15 @@ def run_subprocess(
     cwd: Optional[Union[bytes, str]] = None,
     env: Optional[Dict[str, str]] = None,
     pipe_output: bool = True,
+    stdout_buffer: Optional[OutputBuffer] = None,
+    stderr_buffer: Optional[OutputBuffer] = None,
 ) -> CompletedProcess:
     """
     Run a command in a subprocess.
 
+    Output is read as soon as it is available, and this returns as soon as
+    the process exits.
+
     Args:
         args: See :py:func:`subprocess.run`.
         log_output_live: If `True`, log output live.
@@ -74,6 +295,10 @@ def run_subprocess(
             sent to a logger, given ``log_output_live``.
             If ``False``, no output is sent to a logger and the values are
             not returned.
+        stdout_buffer: Where to put stdout if ``pipe_output`` is ``True``.
+            If ``None``, all of stdout is kept in memory.
+        stderr_buffer: Where to put stderr if ``pipe_output`` is ``True``.
+            If ``None``, all of stderr is kept in memory.
 
     Returns:
         See :py:func:`subprocess.run`.
@@ -82,62 +307,57 @@ def run_subprocess(
         subprocess.CalledProcessError: See :py:func:`subprocess.run`.
         Exception: An exception was raised in getting the output from the call.
     """
-    stdout_list = []  # type: List[bytes]
-    stderr_list = []  # type: List[bytes]
-    stdout_logger = _LineLogger(LOGGER.debug)
-    stderr_logger = _LineLogger(LOGGER.warning)
-
-    def _read_output(process: sarge.Pipeline, block: bool) -> None:
-        stdout_line = process.stdout.read(block=block)
-        stderr_line = process.stderr.read(block=block)
-        if stdout_line:
-            stdout_list.append(stdout_line)
-            if log_output_live:
-                stdout_logger.log(stdout_line)
-        if stderr_line:
-            stderr_list.append(stderr_line)
-            if log_output_live:
-                stderr_logger.log(stderr_line)
+    stdout_buffer = stdout_buffer or BytesBuffer()
+    stderr_buffer = stderr_buffer or BytesBuffer()
+    stdout_logger = LineLogger(LOGGER.debug)
+    stderr_logger = LineLogger(LOGGER.warning)
+    pipe = subprocess.PIPE if pipe_output else None
 
+    process = subprocess.Popen(
+        args=args,
+        cwd=cwd,
+        env=env,
+        stdout=pipe,
+        stderr=pipe,
+    )
     try:
         if pipe_output:
-            process = sarge.capture_both(args, cwd=cwd, env=env, async_=True)
-            while all(
-                command.returncode is None for command in process.commands
-            ):
-                _read_output(process=process, block=False)
-                process.poll_all()
-                time.sleep(0.05)
-
-            # block on final read to ensure all data read.
-            _read_output(process=process, block=True)
-        else:
-            process = sarge.run(args, cwd=cwd, env=env, async_=True)
+            assert process.stdout is not None
+            assert process.stderr is not None
+            _read_pipes(
+                process=process,
+                outputs={
+                    process.stdout: (
+                        stdout_buffer,
+                        stdout_logger if log_output_live else None,
+                    ),
+                    process.stderr: (
+                        stderr_buffer,
+                        stderr_logger if log_output_live else None,
+                    ),
+                },
+            )
+            process.stdout.close()
+            process.stderr.close()
 
         stdout_logger.flush()
         stderr_logger.flush()
-        # stderr/stdout are not readable anymore which usually means
-        # that the child process has exited. However, the child
-        # process has not been wait()ed for yet, i.e. it has not yet
-        # been reaped. That is, its exit status is unknown. Read its
-        # exit status
         process.wait()
     except Exception:  # pragma: no cover pylint: disable=broad-except
-        for popen_process in process.processes:
-            # We clean up if there is an error while getting the output.
-            # This may not happen while running tests so we ignore coverage.
-
-            # Attempt to give the subprocess(es) a chance to terminate.
-            popen_process.terminate()
-            try:
-                popen_process.wait(1)
-            except subprocess.TimeoutExpired:
-                # If the process cannot terminate cleanly, we just kill it.
-                popen_process.kill()
-            raise
-
-    stdout = b''.join(stdout_list) if pipe_output else None
-    stderr = b''.join(stderr_list) if pipe_output else None
+        # We clean up if there is an error while getting the output.
+        # This may not happen while running tests so we ignore coverage.
+
+        # Attempt to give the subprocess a chance to terminate.
+        process.terminate()
+        try:
+            process.wait(1)
+        except subprocess.TimeoutExpired:
+            # If the process cannot terminate cleanly, we just kill it.
+            process.kill()
+        raise
+
+    stdout = stdout_buffer.value() if pipe_output else None
+    stderr = stderr_buffer.value() if pipe_output else None
     if process.returncode != 0:
         raise subprocess.CalledProcessError(
             returncode=process.returncode,
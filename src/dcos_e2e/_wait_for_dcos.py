@@ -5,43 +5,423 @@ Helpers for waiting for DC/OS.
 import json
 import logging
 import subprocess
-from typing import Set, Union
-
-import retrying
-import timeout_decorator
-from retry import retry
-
-from ._vendor.dcos_test_utils.dcos_api import DcosApiSession, DcosUser
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Set, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ._readiness import Phase, run_phases, wait_until_ready
+from ._vendor.dcos_test_utils.dcos_api import (
+    DcosApiSession,
+    DcosAuth,
+    DcosUser,
+)
 from ._vendor.dcos_test_utils.enterprise import EnterpriseApiSession
 from ._vendor.dcos_test_utils.helpers import CI_CREDENTIALS
 from .base_classes import ClusterManager  # noqa: F401
 from .exceptions import DCOSTimeoutError
 from .node import Node, Output
+from .readiness import PhaseTiming, ReadinessReport
 
 LOGGER = logging.getLogger(__name__)
 
+# We choose a one hour timeout based on experience that the cluster will almost
+# certainly not start up after this time.
+#
+# In the future we may want to increase this or make it customizable.
+#
+# The timeout is a deadline which each check is given rather than a signal,
+# so that clusters can be waited for from any thread.
+_TIMEOUT_SECONDS = 60 * 60
+
+# Each HTTP request made while waiting is given up on after this time, so that
+# a request to an unresponsive component is retried rather than blocking.
+_HTTP_TIMEOUT_SECONDS = 30
+
+# Logging in is retried for at most this long after the login endpoint first
+# rejects the credentials, rather than until the timeout.
+# The endpoint may reject credentials while it is not yet routable, but
+# credentials which are wrong are rejected for good.
+_LOGIN_REJECTED_SECONDS = 2 * 60
+
+# Status codes from an agent's endpoint while the agent is starting.
+_AGENT_IN_PROGRESS_STATUS_CODES = (
+    # Admin Router uses cached Mesos state, so it returns 404 for agents
+    # which have only just joined.
+    404,
+    # During a node restart or a DC/OS upgrade, Admin Router returns 502 until
+    # the Mesos agent HTTP server can be reached.
+    502,
+    # We have seen this endpoint return 503 with body
+    # b'Agent has not finished recovery' on a cluster which later became
+    # healthy.
+    503,
+)
+
 
-@retry(exceptions=(retrying.RetryError, ))
-def _test_utils_wait_for_dcos(
+class _NotReady(Exception):
+    """
+    Raised by a check if a DC/OS component is not ready yet.
+    """
+
+
+class _LoginRejected(Exception):
+    """
+    Raised if DC/OS keeps rejecting the credentials of the session's user.
+    """
+
+
+# Exceptions which mean that an HTTP check should be retried.
+# Other errors, such as failed assertions about responses, are raised.
+_HTTP_NOT_READY = (_NotReady, requests.RequestException, ValueError)
+
+
+def _get(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+    path: str,
+    **kwargs: str,
+) -> requests.Response:
+    """
+    Make one GET request through Admin Router.
+
+    DC/OS Test Utils retries connection errors for a minute with a fixed
+    delay by default. We disable that so that checks are retried with
+    backoff by ``run_phases``.
+    """
+    return session.get(  # type: ignore
+        path,
+        retry_timeout=0,
+        timeout=_HTTP_TIMEOUT_SECONDS,
+        **kwargs,
+    )
+
+
+def _check_admin_router(
     session: Union[DcosApiSession, EnterpriseApiSession],
 ) -> None:
     """
-    Wait for DC/OS using DC/OS Test Utils.
+    Raise ``requests.ConnectionError`` if Admin Router cannot be reached.
+    """
+    _get(session=session, path='/')
+
 
-    DC/OS Test Utils raises its own timeout, a ``retrying.RetryError``.
-    We want to ignore this error and use our own timeouts, so we wrap this in
-    our own retried function.
+class _LoginCheck:
     """
-    session.wait_for_dcos()  # type: ignore
+    A check that the session's user can log in, which uses the token for all
+    later requests.
 
+    The login endpoint may reject credentials for a short time after Admin
+    Router is up.
+    Logins which are rejected for longer than that are not retried.
+    """
 
-@retry(
-    exceptions=(subprocess.CalledProcessError),
-    delay=10,
-)
-def _wait_for_node_poststart(masters: Set[Node]) -> None:
+    def __init__(
+        self,
+        session: Union[DcosApiSession, EnterpriseApiSession],
+    ) -> None:
+        self._session = session
+        self._first_rejection = None  # type: Optional[float]
+
+    def __call__(self) -> None:
+        """
+        Log in as the session's user.
+
+        Raises:
+            _NotReady: The login was rejected with a client error status
+                code, and logins have been rejected for less than
+                ``_LOGIN_REJECTED_SECONDS``.
+            _LoginRejected: Logins have been rejected with a client error
+                status code for ``_LOGIN_REJECTED_SECONDS``.
+        """
+        session = self._session
+        auth_user = session.auth_user
+        assert auth_user is not None
+        if auth_user.auth_token is None:
+            response = session.post(  # type: ignore
+                '/acs/api/v1/auth/login',
+                json=auth_user.credentials,
+                auth=None,
+                retry_timeout=0,
+                timeout=_HTTP_TIMEOUT_SECONDS,
+            )
+            if 400 <= response.status_code < 500:
+                message = (
+                    'Logging in to DC/OS failed with status code '
+                    '{status_code}: {text}'
+                ).format(status_code=response.status_code, text=response.text)
+                now = time.monotonic()
+                if self._first_rejection is None:
+                    self._first_rejection = now
+                if now - self._first_rejection < _LOGIN_REJECTED_SECONDS:
+                    raise _NotReady(message)
+                raise _LoginRejected(message)
+            response.raise_for_status()
+            auth_user.auth_token = response.json()['token']
+            auth_user.auth_cookie = response.cookies.get(
+                'dcos-acs-auth-cookie',
+            )
+        session.session.auth = DcosAuth(auth_user.auth_token)
+
+
+def _check_marathon(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+) -> None:
+    """
+    Raise ``_NotReady`` if Marathon is not up.
+    """
+    response = _get(session=session, path='/marathon/v2/info')
+    if response.status_code != 200:
+        message = 'Marathon returned status code {status_code}.'.format(
+            status_code=response.status_code,
+        )
+        raise _NotReady(message)
+
+
+def _check_zookeeper_quorum(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+) -> None:
+    """
+    Raise ``_NotReady`` if ZooKeeper on every master has not joined the
+    quorum.
+    """
+    response = _get(
+        session=session,
+        path='/exhibitor/exhibitor/v1/cluster/status',
+    )
+    response.raise_for_status()
+    zookeeper_nodes = response.json()
+    if len(zookeeper_nodes) != len(session.masters):
+        message = 'ZooKeeper has not formed the expected quorum.'
+        raise _NotReady(message)
+
+
+def _registered_agent_ids(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+) -> List[str]:
+    """
+    Return the IDs of the expected agents which are registered with Mesos.
+    """
+    response = _get(session=session, path='/mesos/master/slaves')
+    if response.status_code != 200:
+        # If an agent has restarted, this endpoint can give 502 for a brief
+        # moment.
+        message = 'Mesos returned status code {status_code}.'.format(
+            status_code=response.status_code,
+        )
+        raise _NotReady(message)
+
+    # Only agents which we expect to be in the cluster are counted, so that
+    # this works when a cluster comes back after a failure with new agents
+    # and dead agents.
+    expected_agents = set(session.all_slaves)
+    return sorted(
+        agent['id'] for agent in response.json()['slaves']
+        if agent['hostname'] in expected_agents
+    )
+
+
+def _check_agents_joined(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+) -> None:
+    """
+    Raise ``_NotReady`` if any expected agent is not registered with Mesos.
+    """
+    agent_ids = _registered_agent_ids(session=session)
+    if len(agent_ids) < len(session.all_slaves):
+        message = '{joined} of {expected} agents have joined.'.format(
+            joined=len(agent_ids),
+            expected=len(session.all_slaves),
+        )
+        raise _NotReady(message)
+
+
+class _AgentEndpointsCheck:
+    """
+    A check that Admin Router can reach every registered agent.
+
+    Agents are probed at the same time.
+    Agents which have been reached are not probed again.
     """
-    Wait until all DC/OS node-poststart checks are healthy.
+
+    def __init__(
+        self,
+        session: Union[DcosApiSession, EnterpriseApiSession],
+    ) -> None:
+        self._session = session
+        self._ready_agent_ids = set()  # type: Set[str]
+
+    def _agent_ready(self, agent_id: str) -> bool:
+        """
+        Return whether Admin Router can reach the agent with the given ID.
+        """
+        path = '/slave/{agent_id}/slave%281%29/state'.format(agent_id=agent_id)
+        response = _get(session=self._session, path=path)
+        if response.status_code in _AGENT_IN_PROGRESS_STATUS_CODES:
+            return False
+        assert response.status_code == 200, (
+            'Expecting status code 200 for GET request to {path} but got '
+            '{status_code} with body {content}'
+        ).format(
+            path=path,
+            status_code=response.status_code,
+            content=response.content,
+        )
+        assert response.json()['id'] == agent_id
+        return True
+
+    def __call__(self) -> None:
+        """
+        Raise ``_NotReady`` if Admin Router cannot reach any registered agent.
+        """
+        pending = [
+            agent_id
+            for agent_id in _registered_agent_ids(session=self._session)
+            if agent_id not in self._ready_agent_ids
+        ]
+        if not pending:
+            return
+
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            results = list(executor.map(self._agent_ready, pending))
+
+        for agent_id, ready in zip(pending, results):
+            if ready:
+                self._ready_agent_ids.add(agent_id)
+
+        if not all(results):
+            message = 'Admin Router cannot reach {count} agents.'.format(
+                count=results.count(False),
+            )
+            raise _NotReady(message)
+
+
+def _check_metronome(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+) -> None:
+    """
+    Raise ``_NotReady`` if Metronome is not up.
+
+    Some of this waiting is, implicitly, for Admin Router.
+    Admin Router may return a 404 despite the Metronome service existing
+    because it uses a cache, and Metronome returns a Gateway Timeout Error
+    while it is starting.
+    """
+    response = _get(session=session, path='/service/metronome/v1/jobs')
+    if response.status_code == 404 or response.status_code >= 500:
+        message = 'Metronome returned status code {status_code}.'.format(
+            status_code=response.status_code,
+        )
+        raise _NotReady(message)
+
+    assert response.status_code == 200, (
+        'Expecting status code 200 for Metronome but got {status_code} with '
+        'body {content}'
+    ).format(status_code=response.status_code, content=response.content)
+
+
+def _check_healthy_units(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+) -> None:
+    """
+    Raise ``_NotReady`` if any DC/OS unit is not healthy.
+    """
+    response = _get(
+        session=session,
+        path='/system/health/v1/units',
+        query='cache=0',
+    )
+    response.raise_for_status()
+    unhealthy = [
+        unit['id'] for unit in response.json()['units']
+        if unit['health'] != 0
+    ]
+    if unhealthy:
+        message = 'Units are not healthy: {units}.'.format(
+            units=', '.join(unhealthy),
+        )
+        raise _NotReady(message)
+
+
+def _wait_for_http_phases(
+    session: Union[DcosApiSession, EnterpriseApiSession],
+    start: float,
+    deadline: float,
+) -> List[PhaseTiming]:
+    """
+    Wait until DC/OS components which are checked over HTTP are ready.
+
+    This replaces ``DcosApiSession.wait_for_dcos``, which checks one component
+    at a time with fixed delays.
+    Here, components which do not depend on each other are checked at the
+    same time over one pool of connections.
+    """
+    phases = [
+        Phase(
+            name='admin-router',
+            check=lambda: _check_admin_router(session=session),
+            exceptions=_HTTP_NOT_READY,
+        ),
+        Phase(
+            name='login',
+            check=_LoginCheck(session=session),
+            exceptions=_HTTP_NOT_READY + (KeyError, ),
+            depends_on=['admin-router'],
+        ),
+        Phase(
+            name='marathon',
+            check=lambda: _check_marathon(session=session),
+            exceptions=_HTTP_NOT_READY,
+            depends_on=['login'],
+        ),
+        Phase(
+            name='zookeeper-quorum',
+            check=lambda: _check_zookeeper_quorum(session=session),
+            exceptions=_HTTP_NOT_READY,
+            depends_on=['login'],
+        ),
+        Phase(
+            name='agents-joined',
+            check=lambda: _check_agents_joined(session=session),
+            exceptions=_HTTP_NOT_READY,
+            depends_on=['login'],
+        ),
+        Phase(
+            name='agent-endpoints',
+            check=_AgentEndpointsCheck(session=session),
+            exceptions=_HTTP_NOT_READY,
+            depends_on=['agents-joined'],
+        ),
+        Phase(
+            name='metronome',
+            check=lambda: _check_metronome(session=session),
+            exceptions=_HTTP_NOT_READY,
+            depends_on=['login'],
+        ),
+        Phase(
+            name='healthy-units',
+            check=lambda: _check_healthy_units(session=session),
+            exceptions=_HTTP_NOT_READY,
+            depends_on=['login'],
+        ),
+    ]
+
+    # Allow a connection for each phase and for each agent probe.
+    adapter = HTTPAdapter(
+        pool_maxsize=len(phases) + len(session.all_slaves),
+    )
+    session.session.mount('http://', adapter)
+    session.session.mount('https://', adapter)
+
+    return run_phases(phases=phases, start=start, deadline=deadline)
+
+
+def _check_node_poststart(node: Node) -> None:
+    """
+    Raise ``subprocess.CalledProcessError`` if any DC/OS node-poststart check
+    is not healthy on the given node.
 
     The execution will differ for different version of DC/OS.
     ``dcos-check-runner`` only exists on DC/OS 1.12+. ``dcos-diagnostics
@@ -49,29 +429,86 @@ def _wait_for_node_poststart(masters: Set[Node]) -> None:
     exists on DC/OS 1.9. ``node-poststart`` requires ``sudo`` to allow
     reading the CA certificate used by certain checks.
     """
-    for node in masters:
-        log_msg = 'Running a poststart check on `{}`'.format(str(node))
-        LOGGER.debug(log_msg)
-        node.run(
-            args=[
-                'sudo',
-                '/opt/mesosphere/bin/dcos-check-runner',
-                'check',
-                'node-poststart',
-                '||',
-                'sudo',
-                '/opt/mesosphere/bin/dcos-diagnostics',
-                'check',
-                'node-poststart',
-                '||',
-                '/opt/mesosphere/bin/3dt',
-                '--diag',
-            ],
-            # We capture output because else we would see a lot of output
-            # in a normal start up, for example during tests.
-            output=Output.CAPTURE,
-            shell=True,
-        )
+    log_msg = 'Running a poststart check on `{}`'.format(str(node))
+    LOGGER.debug(log_msg)
+    node.run(
+        args=[
+            'sudo',
+            '/opt/mesosphere/bin/dcos-check-runner',
+            'check',
+            'node-poststart',
+            '||',
+            'sudo',
+            '/opt/mesosphere/bin/dcos-diagnostics',
+            'check',
+            'node-poststart',
+            '||',
+            '/opt/mesosphere/bin/3dt',
+            '--diag',
+        ],
+        # We capture output because else we would see a lot of output
+        # in a normal start up, for example during tests.
+        output=Output.CAPTURE,
+        shell=True,
+    )
+
+
+def _wait_for_node_poststart(masters: Set[Node], deadline: float) -> None:
+    """
+    Wait until all DC/OS node-poststart checks are healthy on all masters.
+
+    Masters are checked at the same time, and each master is checked until
+    its checks are healthy or the ``time.monotonic()`` time ``deadline`` has
+    passed.
+    """
+    wait_until_ready(
+        nodes=masters,
+        probe=_check_node_poststart,
+        exceptions=(subprocess.CalledProcessError, ),
+        timeout_seconds=max(deadline - time.monotonic(), 0),
+        max_delay_seconds=10,
+    )
+
+
+def _wait_for_node_poststart_phase(
+    masters: Set[Node],
+    start: float,
+    deadline: float,
+) -> List[PhaseTiming]:
+    """
+    Wait until all DC/OS node-poststart checks are healthy on all masters, and
+    return the timing of this as a phase.
+    """
+    phase = Phase(
+        name='node-poststart',
+        check=lambda: _wait_for_node_poststart(
+            masters=masters,
+            deadline=deadline,
+        ),
+        # Masters are retried by ``_wait_for_node_poststart``.
+        exceptions=(),
+    )
+    return run_phases(phases=[phase], start=start)
+
+
+@contextmanager
+def _timeout_after(deadline: float) -> Iterator[None]:
+    """
+    Raise a ``DCOSTimeoutError`` in place of any error which is raised after
+    the ``time.monotonic()`` time ``deadline``.
+
+    Checks which are not ready by the deadline raise their last error, and
+    that error is chained to the ``DCOSTimeoutError``.
+    """
+    try:
+        yield
+    except Exception as exc:
+        if time.monotonic() < deadline:
+            raise
+        message = 'DC/OS did not become ready within {seconds} seconds.'
+        raise DCOSTimeoutError(
+            message.format(seconds=_TIMEOUT_SECONDS),
+        ) from exc
 
 
 def wait_for_dcos_oss(
@@ -79,7 +516,7 @@ def wait_for_dcos_oss(
     agents: Set[Node],
     public_agents: Set[Node],
     http_checks: bool,
-) -> None:
+) -> ReadinessReport:
     """
     Wait until the DC/OS OSS boot process has completed.
 
@@ -93,28 +530,28 @@ def wait_for_dcos_oss(
             cannot be made to the  For example, this is useful on
             macOS without a VPN set up.
 
+    Returns:
+        When each phase of waiting became ready.
+
     Raises:
         dcos_e2e.exceptions.DCOSTimeoutError: Raised if components
             did not become ready within one hour.
     """
 
-    @timeout_decorator.timeout(
-        # We choose a one hour timeout based on experience that the cluster
-        # will almost certainly not start up after this time.
-        #
-        # In the future we may want to increase this or make it
-        # customizable.
-        60 * 60,
-        timeout_exception=DCOSTimeoutError,
-    )
-    def wait_for_dcos_oss_until_timeout() -> None:
+    start = time.monotonic()
+    deadline = start + _TIMEOUT_SECONDS
+
+    def wait_for_dcos_oss_until_timeout() -> ReadinessReport:
         """
         Wait until DC/OS OSS is up or timeout hits.
         """
-
-        _wait_for_node_poststart(masters=masters)
+        timings = _wait_for_node_poststart_phase(
+            masters=masters,
+            start=start,
+            deadline=deadline,
+        )
         if not http_checks:
-            return
+            return ReadinessReport(phases=timings)
 
         email = 'albert@bekstil.net'
         curl_url = 'http://localhost:8101/acs/api/v1/users/{email}'.format(
@@ -186,7 +623,11 @@ def wait_for_dcos_oss(
             auth_user=DcosUser(credentials=credentials),
         )
 
-        _test_utils_wait_for_dcos(session=api_session)
+        timings += _wait_for_http_phases(
+            session=api_session,
+            start=start,
+            deadline=deadline,
+        )
 
         # Only the first user can log in with SSO, before granting others
         # access.
@@ -195,8 +636,10 @@ def wait_for_dcos_oss(
             args=delete_user_args,
             output=Output.LOG_AND_CAPTURE,
         )
+        return ReadinessReport(phases=timings)
 
-    wait_for_dcos_oss_until_timeout()
+    with _timeout_after(deadline=deadline):
+        return wait_for_dcos_oss_until_timeout()
 
 
 def wait_for_dcos_ee(
@@ -206,7 +649,7 @@ def wait_for_dcos_ee(
     superuser_username: str,
     superuser_password: str,
     http_checks: bool,
-) -> None:
+) -> ReadinessReport:
     """
     Wait until the DC/OS Enterprise boot process has completed.
 
@@ -222,27 +665,28 @@ def wait_for_dcos_ee(
             cannot be made to the  For example, this is useful on
             macOS without a VPN set up.
 
+    Returns:
+        When each phase of waiting became ready.
+
     Raises:
         dcos_e2e.exceptions.DCOSTimeoutError: Raised if components
             did not become ready within one hour.
     """
 
-    @timeout_decorator.timeout(
-        # will almost certainly not start up after this time.
-        #
-        # In the future we may want to increase this or make it
-        # customizable.
-        60 * 60,
-        timeout_exception=DCOSTimeoutError,
-    )
-    def wait_for_dcos_ee_until_timeout() -> None:
+    start = time.monotonic()
+    deadline = start + _TIMEOUT_SECONDS
+
+    def wait_for_dcos_ee_until_timeout() -> ReadinessReport:
         """
         Wait until DC/OS Enterprise is up or timeout hits.
         """
-
-        _wait_for_node_poststart(masters=masters)
+        timings = _wait_for_node_poststart_phase(
+            masters=masters,
+            start=start,
+            deadline=deadline,
+        )
         if not http_checks:
-            return
+            return ReadinessReport(phases=timings)
 
         # The dcos-diagnostics check is not yet sufficient to determine
         # when a CLI login would be possible with Enterprise DC/OS. It only
@@ -292,17 +736,22 @@ def wait_for_dcos_ee(
 
         if ssl_enabled:
             response = enterprise_session.get(
-                # Avoid hitting a RetryError in the get function.
-                # Waiting a year is considered equivalent to an
-                # infinite timeout.
+                # Retry until the deadline, after which the last error is
+                # raised.
                 '/ca/dcos-ca.crt',
-                retry_timeout=60 * 60 * 24 * 365,
+                retry_timeout=max(int(deadline - time.monotonic()), 0),
                 verify=False,
             )
             response.raise_for_status()
             # This is already done in enterprise_session.wait_for_dcos()
             enterprise_session.set_ca_cert()
 
-        _test_utils_wait_for_dcos(session=enterprise_session)
+        timings += _wait_for_http_phases(
+            session=enterprise_session,
+            start=start,
+            deadline=deadline,
+        )
+        return ReadinessReport(phases=timings)
 
-    wait_for_dcos_ee_until_timeout()
+    with _timeout_after(deadline=deadline):
+        return wait_for_dcos_ee_until_timeout()
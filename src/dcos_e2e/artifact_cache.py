@@ -0,0 +1,452 @@
+"""
+A cache on the host of files, such as DC/OS installers, downloaded from URLs.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+
+from ._file_lock import file_lock
+
+LOGGER = logging.getLogger(__name__)
+
+# The default maximum total size of the files in a cache.
+_DEFAULT_MAX_BYTES = 20 * 1024 * 1024 * 1024
+
+# How long to wait for a server to connect or to send data.
+_TIMEOUT_SECONDS = 60
+
+# Data received before a download is interrupted is kept in chunks of this
+# size, so that the download can be resumed from there.
+_CHUNK_BYTES = 64 * 1024
+
+
+def _default_cache_dir() -> Path:
+    """
+    Return the directory in which files are cached by default.
+    """
+    return Path(tempfile.gettempdir()) / 'dcos-e2e-artifact-cache'
+
+
+def _url_key(url: str) -> str:
+    """
+    Return a name for files which relate to a URL.
+    """
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _validators(response: requests.Response) -> Dict[str, Optional[str]]:
+    """
+    Return the headers of a response which change when the file at a URL
+    changes.
+    """
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    """
+    Replace a JSON file.
+
+    We write to a temporary file and then rename it so that readers never see
+    a partially written file.
+    """
+    with tempfile.NamedTemporaryFile(
+        mode='w',
+        dir=str(path.parent),
+        delete=False,
+    ) as json_file:
+        json.dump(data, json_file)
+    os.replace(json_file.name, str(path))
+
+
+def _link_or_copy(source: Path, destination: Path) -> None:
+    """
+    Replace ``destination`` with a hard link to ``source``, or with a copy of
+    ``source`` if a hard link cannot be made, for example because the paths
+    are on different filesystems.
+
+    We link or copy to a temporary path and then rename it so that a partial
+    file is never left at ``destination``.
+    """
+    temporary_path = destination.parent / '.{name}.{random}'.format(
+        name=destination.name,
+        random=uuid.uuid4().hex,
+    )
+    try:
+        try:
+            os.link(str(source), str(temporary_path))
+        except OSError:
+            shutil.copyfile(str(source), str(temporary_path))
+        os.replace(str(temporary_path), str(destination))
+    except BaseException:
+        try:
+            temporary_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class ArtifactCache:
+    """
+    A size-bounded cache on the host of files downloaded from URLs.
+
+    Files are stored by the SHA-256 hash of their contents, so a file which
+    is served at many URLs is stored once.
+    Each URL is recorded with the ``ETag`` and ``Last-Modified`` headers sent
+    with the file, and a cached file is used only while the server sends the
+    same headers for the URL.
+    When the files in the cache are larger than ``max_bytes`` in total, the
+    files which were used least recently are removed.
+
+    Many processes can use one cache directory at the same time.
+    Each file is downloaded to a partial file which is renamed into place
+    only when it is complete and its hash is known.
+    A download which is interrupted is resumed by the next request for the
+    same URL, if the server supports it.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_bytes: int = _DEFAULT_MAX_BYTES,
+    ) -> None:
+        """
+        Args:
+            cache_dir: The directory to cache files in. If ``None``, a
+                directory in the system's temporary directory is used.
+            max_bytes: The maximum total size of the files in the cache. The
+                most recently used file is kept even if it is larger than
+                this.
+
+        Attributes:
+            cache_dir: The directory which files are cached in.
+            max_bytes: The maximum total size of the files in the cache.
+        """
+        self.cache_dir = cache_dir or _default_cache_dir()
+        self.max_bytes = max_bytes
+        self._index_path = self.cache_dir / 'index.json'
+        self._index_lock_path = self.cache_dir / 'index.lock'
+        self._files_dir = self.cache_dir / 'files'
+        self._partial_dir = self.cache_dir / 'partial'
+        self._locks_dir = self.cache_dir / 'locks'
+        for directory in (self._files_dir, self._partial_dir, self._locks_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def _read_index(self) -> Dict[str, Any]:
+        """
+        Return the index of the cache, or an empty index if the index does
+        not exist or cannot be read.
+        """
+        try:
+            index_text = self._index_path.read_text()
+            index = json.loads(index_text)  # type: Dict[str, Any]
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault('urls', {})
+        index.setdefault('files', {})
+        return index
+
+    def _cached_path(self, url: str) -> Optional[Path]:
+        """
+        Return the path to the file cached for a URL, if there is one.
+        """
+        record = self._read_index()['urls'].get(url)
+        if record is None:
+            return None
+        path = self._files_dir / record['sha256']
+        return path if path.exists() else None
+
+    def _record_use(
+        self,
+        url: str,
+        sha256: str,
+        validators: Dict[str, Optional[str]],
+    ) -> None:
+        """
+        Record that the file with the given hash is used for a URL, and
+        remove the least recently used files if the cache is too large.
+        """
+        with file_lock(path=self._index_lock_path):
+            index = self._read_index()
+            index['urls'][url] = {'sha256': sha256, **validators}
+            index['files'][sha256] = {
+                'size': (self._files_dir / sha256).stat().st_size,
+                'last_used': time.time(),
+            }
+
+            total_bytes = sum(
+                record['size'] for record in index['files'].values()
+            )
+            least_recently_used = sorted(
+                index['files'].items(),
+                key=lambda item: item[1]['last_used'],
+            )
+            for evicted, record in least_recently_used:
+                if total_bytes <= self.max_bytes:
+                    break
+                if evicted == sha256:
+                    continue
+                LOGGER.debug('Removing %s from the artifact cache.', evicted)
+                try:
+                    (self._files_dir / evicted).unlink()
+                except FileNotFoundError:
+                    pass
+                total_bytes -= record['size']
+                del index['files'][evicted]
+                index['urls'] = {
+                    cached_url: url_record
+                    for cached_url, url_record in index['urls'].items()
+                    if url_record['sha256'] != evicted
+                }
+
+            _write_json(path=self._index_path, data=index)
+
+    def _check(
+        self,
+        url: str,
+        record: Dict[str, Any],
+    ) -> Tuple[bool, Dict[str, Optional[str]]]:
+        """
+        Ask the server whether the file at a URL has changed since it was
+        cached.
+
+        A ``HEAD`` request is sent.
+        Some servers reject ``HEAD`` requests, for example with pre-signed
+        URLs which are only valid for ``GET`` requests.
+        If the ``HEAD`` request is rejected, a conditional ``GET`` request is
+        sent instead, and its body is not read.
+
+        Args:
+            url: The URL of the file.
+            record: The index record for the URL, or an empty record if the
+                URL has not been cached.
+
+        Returns:
+            Whether the file is the one in ``record``, and the ``ETag`` and
+            ``Last-Modified`` headers which the server currently sends for the
+            URL.
+
+        Raises:
+            requests.RequestException: The server could not be reached or it
+                returned an error.
+        """
+        try:
+            response = requests.head(
+                url,
+                allow_redirects=True,
+                timeout=_TIMEOUT_SECONDS,
+            )
+            response.raise_for_status()
+        except requests.HTTPError:
+            headers = {}  # type: Dict[str, str]
+            if record.get('etag'):
+                headers['If-None-Match'] = record['etag']
+            if record.get('last_modified'):
+                headers['If-Modified-Since'] = record['last_modified']
+            response = requests.get(
+                url,
+                headers=headers,
+                stream=True,
+                timeout=_TIMEOUT_SECONDS,
+            )
+            # The file is downloaded later, only if it has changed.
+            response.close()
+            if response.status_code == requests.codes.not_modified:
+                return True, {
+                    'etag': record.get('etag'),
+                    'last_modified': record.get('last_modified'),
+                }
+            response.raise_for_status()
+
+        validators = _validators(response)
+        # Without either header, we cannot tell whether the file has changed.
+        unchanged = any(validators.values()) and all(
+            record.get(key) == value for key, value in validators.items()
+        )
+        return unchanged, validators
+
+    def _download(
+        self,
+        url: str,
+        validators: Dict[str, Optional[str]],
+        progress: Optional[Callable[[int, Optional[int]], None]],
+    ) -> Tuple[str, Dict[str, Optional[str]]]:
+        """
+        Download the file at a URL into the cache, resuming an earlier
+        partial download if possible.
+
+        Args:
+            url: The URL of the file.
+            validators: The ``ETag`` and ``Last-Modified`` headers which the
+                server currently sends for the URL.
+            progress: See ``get``.
+
+        Returns:
+            The SHA-256 hash of the file, and the ``ETag`` and
+            ``Last-Modified`` headers which were sent with it.
+        """
+        partial_path = self._partial_dir / _url_key(url)
+        partial_record_path = partial_path.with_suffix('.json')
+        headers = {}  # type: Dict[str, str]
+        digest = hashlib.sha256()
+        downloaded = 0
+
+        # A partial download is only resumed if it is of the same version of
+        # the file, as shown by its ``ETag``.
+        try:
+            partial_record = json.loads(partial_record_path.read_text())
+        except (OSError, ValueError):
+            partial_record = {}
+        etag = validators['etag']
+        if partial_path.exists() and etag and partial_record == validators:
+            downloaded = partial_path.stat().st_size
+            headers = {
+                'Range': 'bytes={start}-'.format(start=downloaded),
+                'If-Range': etag,
+            }
+
+        response = requests.get(
+            url,
+            headers=headers,
+            stream=True,
+            timeout=_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        if response.status_code == requests.codes.partial_content:
+            with partial_path.open('rb') as partial_file:
+                for chunk in iter(
+                    lambda: partial_file.read(_CHUNK_BYTES),
+                    b'',
+                ):
+                    digest.update(chunk)
+            mode = 'ab'
+        else:
+            downloaded = 0
+            mode = 'wb'
+
+        response_validators = _validators(response)
+        _write_json(path=partial_record_path, data=response_validators)
+        content_length = response.headers.get('Content-Length')
+        total = None
+        if content_length is not None:
+            total = downloaded + int(content_length)
+
+        with partial_path.open(mode) as partial_file:
+            for chunk in response.iter_content(chunk_size=_CHUNK_BYTES):
+                partial_file.write(chunk)
+                digest.update(chunk)
+                downloaded += len(chunk)
+                if progress is not None:
+                    progress(downloaded, total)
+
+        if total is not None and downloaded != total:
+            message = (
+                'Downloaded {downloaded} bytes of {total} bytes from {url}.'
+            ).format(downloaded=downloaded, total=total, url=url)
+            raise requests.exceptions.ConnectionError(message)
+
+        sha256 = digest.hexdigest()
+        os.replace(str(partial_path), str(self._files_dir / sha256))
+        partial_record_path.unlink()
+        return sha256, response_validators
+
+    def get(
+        self,
+        url: str,
+        progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> Path:
+        """
+        Return the path to a cached copy of the file at a URL, downloading
+        the file if it is not cached or if it has changed.
+
+        If the server cannot be reached or returns an error when asked whether
+        the file has changed, and a copy of the file is cached, the cached copy
+        is returned.
+
+        The returned file must not be changed.
+        It may be removed from the cache after later calls to ``get``, even
+        by other processes.
+        Use ``copy`` for a file which is kept.
+
+        Args:
+            url: The URL of the file.
+            progress: A function which is called with the number of bytes
+                downloaded so far and the total number of bytes, if known,
+                while the file is downloaded.
+
+        Raises:
+            requests.RequestException: The file could not be downloaded.
+        """
+        # Only one process downloads a URL at a time, and others wait for
+        # it and then use the file it downloaded.
+        with file_lock(path=self._locks_dir / (_url_key(url) + '.lock')):
+            cached_path = self._cached_path(url=url)
+            record = self._read_index()['urls'].get(url, {})
+            try:
+                unchanged, validators = self._check(url=url, record=record)
+            except requests.RequestException as exc:
+                if cached_path is None:
+                    raise
+                message = (
+                    'Cannot check {url} for changes, using the cached copy: '
+                    '{exc}'
+                ).format(url=url, exc=exc)
+                LOGGER.warning(message)
+                return cached_path
+
+            if cached_path is not None and unchanged:
+                sha256 = cached_path.name
+            else:
+                sha256, validators = self._download(
+                    url=url,
+                    validators=validators,
+                    progress=progress,
+                )
+
+            self._record_use(url=url, sha256=sha256, validators=validators)
+            return self._files_dir / sha256
+
+    def copy(
+        self,
+        url: str,
+        path: Path,
+        progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> None:
+        """
+        Put a copy of the file at a URL at ``path``, using a cached copy as in
+        ``get``.
+
+        The copy is a hard link to the cached file if possible, so it takes no
+        more space, and it is kept when the file is removed from the cache.
+
+        Args:
+            url: The URL of the file.
+            path: The path to put the copy at. Any file at this path is
+                replaced.
+            progress: See ``get``.
+
+        Raises:
+            requests.RequestException: The file could not be downloaded.
+        """
+        # Files are only removed from the cache while the index lock is held,
+        # so a cached file cannot be removed while we link or copy it.
+        # Another process may remove it after ``get`` returns and before we
+        # take the lock, and then we get the file again.
+        while True:
+            cached_path = self.get(url=url, progress=progress)
+            with file_lock(path=self._index_lock_path):
+                if cached_path.exists():
+                    _link_or_copy(source=cached_path, destination=path)
+                    return
@@ -7,11 +7,23 @@ import socket
 import stat
 import subprocess
 import uuid
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from functools import partial
 from ipaddress import IPv4Address
 from pathlib import Path
 from shutil import copyfile, copytree, rmtree
 from tempfile import gettempdir
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
 
 import docker
 import yaml
@@ -20,19 +32,35 @@ from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 from docker.types import Mount
 
+from dcos_e2e._node_cache import NodeCache
+from dcos_e2e._rollout import run_on_nodes
 from dcos_e2e._subprocess_tools import run_subprocess
+from dcos_e2e.artifact_cache import ArtifactCache
 from dcos_e2e.base_classes import ClusterBackend, ClusterManager
-from dcos_e2e.cluster import Cluster
 from dcos_e2e.distributions import Distribution
 from dcos_e2e.docker_storage_drivers import DockerStorageDriver
 from dcos_e2e.docker_versions import DockerVersion
-from dcos_e2e.node import Node, Output, Transport
+from dcos_e2e.node import (
+    Node,
+    Output,
+    Role,
+    Transport,
+    _output_buffers,
+)
+from dcos_e2e.rollout_policies import RolloutPolicy
 
 from ._containers import start_dcos_container
 from ._docker_build import build_docker_image
+from ._genconf_cache import cached_genconf_output
+from ._snapshots import SnapshotNode, get_snapshot_nodes
 
 LOGGER = logging.getLogger(__name__)
 
+# At most this many node containers are created and started at once.
+# Each start waits on systemd and Docker in the container, so starting too
+# many at once on one host only makes each start slower.
+_MAX_CONCURRENT_CONTAINER_STARTS = 8
+
 
 def _write_key_pair(public_key_path: Path, private_key_path: Path) -> None:
     """
@@ -107,6 +135,62 @@ def _get_fallback_storage_driver() -> DockerStorageDriver:
         return DockerStorageDriver.AUFS
 
 
+def _run_concurrently(functions: List[Callable[[], None]]) -> None:
+    """
+    Call the given functions, at most ``_MAX_CONCURRENT_CONTAINER_STARTS`` at
+    a time.
+
+    If a function raises an exception, no more functions are called, but
+    functions which have already been called are allowed to finish.
+
+    Raises:
+        Exception: The first exception raised by a function.
+    """
+    if not functions:
+        return
+
+    max_workers = min(len(functions), _MAX_CONCURRENT_CONTAINER_STARTS)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(function) for function in functions]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        if any(future.exception() for future in done):
+            for future in futures:
+                future.cancel()
+
+    for future in futures:
+        exception = None if future.cancelled() else future.exception()
+        if exception is not None:
+            raise exception
+
+
+def _container_ip_address(
+    container: docker.models.containers.Container,
+) -> IPv4Address:
+    """
+    Return the IP address of a node container.
+
+    This is the address on the network which the container was connected to,
+    or on the default bridge network if it was not connected to another
+    network.
+    """
+    networks = container.attrs['NetworkSettings']['Networks']
+    network_name = 'bridge'
+    if len(networks) != 1:
+        [network_name] = list(networks.keys() - set(['bridge']))
+    return IPv4Address(networks[network_name]['IPAddress'])
+
+
+def _remove_containers(name_filter: str) -> None:
+    """
+    Remove all containers, running or not, with names which match the given
+    filter.
+    """
+    client = docker.from_env(version='auto')
+    filters = {'name': name_filter}
+    for container in client.containers.list(all=True, filters=filters):
+        container.remove(v=True, force=True)
+
+
 class Docker(ClusterBackend):
     """
     A record of a Docker backend which can be used to create clusters.
@@ -131,6 +215,7 @@ class Docker(ClusterBackend):
         network: Optional[docker.models.networks.Network] = None,
         one_master_host_port_map: Optional[Dict[str, int]] = None,
         mount_sys_fs_cgroup: bool = True,
+        snapshot: Optional[str] = None,
     ) -> None:
         """
         Create a configuration for a Docker cluster backend.
@@ -183,6 +268,14 @@ class Docker(ClusterBackend):
             mount_sys_fs_cgroup: Whether to mount ``/sys/fs/cgroup`` from the
                 host. This is required to run applications which require
                 cgroup isolation.
+            snapshot: The name of a snapshot made with
+                :py:func:`~dcos_e2e.docker_snapshots.create_snapshot` to create
+                clusters from. DC/OS is installed and started on clusters
+                created from a snapshot, and these clusters must have the same
+                number of each type of node as the snapshotted cluster.
+                The Docker version and storage driver must be the same as
+                those of the snapshotted cluster.
+                The Linux distribution is ignored.
 
         Attributes:
             default_user: A user which can be used to SSH into nodes.
@@ -227,6 +320,8 @@ class Docker(ClusterBackend):
                 start with. This is useful, for example, for later finding all
                 containers started with this backend.
             cgroup_mounts: Mounts to use for cgroups.
+            snapshot: The name of a snapshot to create clusters from, or
+                ``None``.
 
         .. _Containers.run:
             http://docker-py.readthedocs.io/en/stable/containers.html#docker.models.containers.ContainerCollection.run
@@ -250,6 +345,7 @@ class Docker(ClusterBackend):
         self.network = network
         self.one_master_host_port_map = one_master_host_port_map or {}
         self.container_name_prefix = container_name_prefix
+        self.snapshot = snapshot
 
         # Deploying some applications, such as Kafka, read from the cgroups
         # isolator to know their CPU quota.
@@ -330,11 +426,38 @@ class DockerCluster(ClusterManager):
             agents: The number of agent nodes to create.
             public_agents: The number of public agent nodes to create.
             cluster_backend: Details of the specific Docker backend to use.
+
+        Raises:
+            ValueError: The backend has a snapshot which does not exist, or
+                which has a different number of nodes of a type than given.
         """
         self._default_user = cluster_backend.default_user
         self._default_transport = cluster_backend.transport
         self._bootstrap_tmp_path = cluster_backend.bootstrap_tmp_path
 
+        snapshot_nodes = {}  # type: Dict[Role, List[SnapshotNode]]
+        if cluster_backend.snapshot is not None:
+            snapshot_nodes = get_snapshot_nodes(
+                name=cluster_backend.snapshot,
+            )
+            sizes = {
+                Role.MASTER: masters,
+                Role.AGENT: agents,
+                Role.PUBLIC_AGENT: public_agents,
+            }
+            for role, role_snapshot_nodes in snapshot_nodes.items():
+                if len(role_snapshot_nodes) != sizes[role]:
+                    message = (
+                        'The snapshot "{snapshot}" has {snapshot_size} '
+                        '{role} nodes, but {size} were requested.'
+                    ).format(
+                        snapshot=cluster_backend.snapshot,
+                        snapshot_size=len(role_snapshot_nodes),
+                        role=role.name.lower().replace('_', ' '),
+                        size=sizes[role],
+                    )
+                    raise ValueError(message)
+
         # To avoid conflicts, we use random container names.
         # We use the same random string for each container in a cluster so
         # that they can be associated easily.
@@ -377,6 +500,7 @@ class DockerCluster(ClusterManager):
         self._master_prefix = self._cluster_id + '-master-'
         self._agent_prefix = self._cluster_id + '-agent-'
         self._public_agent_prefix = self._cluster_id + '-public-agent-'
+        self._node_cache = NodeCache(find_nodes=self._find_nodes)
 
         bootstrap_genconf_path = self._genconf_dir / 'serve'
         bootstrap_genconf_path.mkdir()
@@ -388,12 +512,32 @@ class DockerCluster(ClusterManager):
             '/tmp': 'rw,exec,nosuid,size=2097152k',
         }
 
-        docker_image_tag = 'mesosphere/dcos-docker'
-        build_docker_image(
-            tag=docker_image_tag,
-            linux_distribution=cluster_backend.linux_distribution,
-            docker_version=cluster_backend.docker_version,
-        )
+        docker_image_tag = None  # type: Optional[str]
+        if cluster_backend.snapshot is None:
+            docker_image_tag = build_docker_image(
+                linux_distribution=cluster_backend.linux_distribution,
+                docker_version=cluster_backend.docker_version,
+            )
+
+        def image_settings(
+            role: Role,
+            container_number: int,
+        ) -> Dict[str, Any]:
+            """
+            Return the settings for starting a node container which depend on
+            whether the cluster is created from a snapshot.
+            """
+            if docker_image_tag is not None:
+                return {'docker_image': docker_image_tag}
+
+            snapshot_node = snapshot_nodes[role][container_number]
+            return {
+                'docker_image': snapshot_node.image,
+                'volume_sources': snapshot_node.volumes,
+                # DC/OS is started once its configuration has been changed
+                # for the new nodes.
+                'systemd_unit': 'basic.target',
+            }
 
         certs_mount = Mount(
             source=str(certs_dir.resolve()),
@@ -467,35 +611,46 @@ class DockerCluster(ClusterManager):
             *cluster_backend.custom_master_mounts,
         ]
 
+        container_starts = []  # type: List[Callable[[], None]]
         for master_container_number in range(masters):
             ports = {}  # type: Dict[str, int]
             if master_container_number == 0:
                 ports = cluster_backend.one_master_host_port_map
-            start_dcos_container(
-                container_base_name=self._master_prefix,
-                container_number=master_container_number,
-                mounts=master_mounts,
-                tmpfs=node_tmpfs_mounts,
-                docker_image=docker_image_tag,
-                labels={
-                    **cluster_backend.docker_container_labels,
-                    **cluster_backend.docker_master_labels,
-                },
-                public_key_path=public_key_path,
-                docker_storage_driver=(cluster_backend.docker_storage_driver),
-                docker_version=cluster_backend.docker_version,
-                network=cluster_backend.network,
-                ports=ports,
+            container_starts.append(
+                partial(
+                    start_dcos_container,
+                    container_base_name=self._master_prefix,
+                    container_number=master_container_number,
+                    mounts=master_mounts,
+                    tmpfs=node_tmpfs_mounts,
+                    labels={
+                        **cluster_backend.docker_container_labels,
+                        **cluster_backend.docker_master_labels,
+                    },
+                    public_key_path=public_key_path,
+                    docker_storage_driver=(
+                        cluster_backend.docker_storage_driver
+                    ),
+                    docker_version=cluster_backend.docker_version,
+                    network=cluster_backend.network,
+                    ports=ports,
+                    **image_settings(
+                        role=Role.MASTER,
+                        container_number=master_container_number,
+                    ),
+                ),
             )
 
-        for nodes, prefix, labels, mounts in (
+        for role, nodes, prefix, labels, mounts in (
             (
+                Role.AGENT,
                 agents,
                 self._agent_prefix,
                 cluster_backend.docker_agent_labels,
                 agent_mounts + cluster_backend.custom_agent_mounts,
             ),
             (
+                Role.PUBLIC_AGENT,
                 public_agents,
                 self._public_agent_prefix,
                 cluster_backend.docker_public_agent_labels,
@@ -503,24 +658,103 @@ class DockerCluster(ClusterManager):
             ),
         ):
             for agent_container_number in range(nodes):
-                start_dcos_container(
-                    container_base_name=prefix,
-                    container_number=agent_container_number,
-                    mounts=mounts,
-                    tmpfs=node_tmpfs_mounts,
-                    docker_image=docker_image_tag,
-                    labels={
-                        **cluster_backend.docker_container_labels,
-                        **labels,
-                    },
-                    public_key_path=public_key_path,
-                    docker_storage_driver=(
-                        cluster_backend.docker_storage_driver
+                container_starts.append(
+                    partial(
+                        start_dcos_container,
+                        container_base_name=prefix,
+                        container_number=agent_container_number,
+                        mounts=mounts,
+                        tmpfs=node_tmpfs_mounts,
+                        labels={
+                            **cluster_backend.docker_container_labels,
+                            **labels,
+                        },
+                        public_key_path=public_key_path,
+                        docker_storage_driver=(
+                            cluster_backend.docker_storage_driver
+                        ),
+                        docker_version=cluster_backend.docker_version,
+                        network=cluster_backend.network,
+                        **image_settings(
+                            role=role,
+                            container_number=agent_container_number,
+                        ),
                     ),
-                    docker_version=cluster_backend.docker_version,
-                    network=cluster_backend.network,
                 )
 
+        try:
+            _run_concurrently(functions=container_starts)
+            if snapshot_nodes:
+                self._start_dcos_from_snapshot(snapshot_nodes=snapshot_nodes)
+        except Exception:
+            # Containers which were created are removed, even if they were
+            # not fully started.
+            _remove_containers(name_filter=self._cluster_id)
+            rmtree(path=str(self._path), ignore_errors=True)
+            raise
+
+    def _start_dcos_from_snapshot(
+        self,
+        snapshot_nodes: Dict[Role, List[SnapshotNode]],
+    ) -> None:
+        """
+        Start DC/OS on node containers created from a snapshot.
+
+        The IP addresses of the snapshotted cluster's nodes are replaced with
+        the IP addresses of this cluster's nodes first.
+
+        Args:
+            snapshot_nodes: The nodes of the snapshot, by role, in the order
+                of the numbers of the containers created from them.
+
+        Raises:
+            subprocess.CalledProcessError: DC/OS could not be started on a
+                node.
+        """
+        client = docker.from_env(version='auto')
+        prefixes = {
+            Role.MASTER: self._master_prefix,
+            Role.AGENT: self._agent_prefix,
+            Role.PUBLIC_AGENT: self._public_agent_prefix,
+        }
+        containers = []  # type: List[docker.models.containers.Container]
+        ip_addresses = []  # type: List[str]
+        for role, nodes in snapshot_nodes.items():
+            for container_number, snapshot_node in enumerate(nodes):
+                container = client.containers.get(
+                    prefixes[role] + str(container_number),
+                )
+                containers.append(container)
+                ip_addresses.append(
+                    '{old} {new}'.format(
+                        old=snapshot_node.ip_address,
+                        new=_container_ip_address(container=container),
+                    ),
+                )
+
+        script_path = Path(__file__).parent / 'resources' / 'snapshot-restore'
+        args = ['/bin/bash', '-c', script_path.read_text()]
+        environment = {'DCOS_E2E_IP_ADDRESSES': '\n'.join(ip_addresses)}
+
+        def start_dcos(container: docker.models.containers.Container) -> None:
+            exit_code, output = container.exec_run(
+                cmd=args,
+                environment=environment,
+            )
+            if exit_code != 0:
+                raise subprocess.CalledProcessError(
+                    returncode=exit_code,
+                    cmd=[str(script_path)],
+                    output=output,
+                )
+
+        _run_concurrently(
+            functions=[
+                partial(start_dcos, container=container)
+                for container in containers
+            ],
+        )
+
     def install_dcos_from_url(
         self,
         dcos_installer: str,
@@ -530,7 +764,7 @@ class DockerCluster(ClusterManager):
         files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]],
     ) -> None:
         """
-        Install DC/OS from a URL with a bootstrap node.
+        Install DC/OS from a URL.
 
         Args:
             dcos_installer: The URL string to an installer to install DC/OS
@@ -543,19 +777,24 @@ class DockerCluster(ClusterManager):
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
         """
-        cluster = Cluster.from_nodes(
-            masters=self.masters,
-            agents=self.agents,
-            public_agents=self.public_agents,
-        )
-
-        cluster.install_dcos_from_url(
-            dcos_installer=dcos_installer,
-            dcos_config=dcos_config,
-            ip_detect_path=ip_detect_path,
-            output=output,
-            files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
-        )
+        # The nodes of this backend run on the host, so the installer is
+        # downloaded to a cache on the host and sent to the nodes from there.
+        # This means that an installer is downloaded once for many clusters.
+        #
+        # The installer is linked into this cluster's workspace so that it is
+        # kept while it is used, even if it is removed from the cache.
+        installer = self._path / 'dcos_generate_config.sh'
+        ArtifactCache().copy(url=dcos_installer, path=installer)
+        try:
+            self.install_dcos_from_path(
+                dcos_installer=installer,
+                dcos_config=dcos_config,
+                ip_detect_path=ip_detect_path,
+                output=output,
+                files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+            )
+        finally:
+            installer.unlink()
 
     def install_dcos_from_path(
         self,
@@ -581,6 +820,9 @@ class DockerCluster(ClusterManager):
 
         Raises:
             CalledProcessError: There was an error installing DC/OS on a node.
+                This is a
+                :py:class:`~dcos_e2e.exceptions.MultiNodeCalledProcessError`
+                if ``dcos_install.sh`` failed on one or more nodes.
         """
         copyfile(
             src=str(ip_detect_path),
@@ -612,54 +854,67 @@ class DockerCluster(ClusterManager):
         )
         installer_port = _get_open_port()
 
-        log_output_live = {
-            Output.CAPTURE: False,
-            Output.LOG_AND_CAPTURE: True,
-            Output.NO_CAPTURE: False,
-        }[output]
-
-        capture_output = {
-            Output.CAPTURE: True,
-            Output.LOG_AND_CAPTURE: True,
-            Output.NO_CAPTURE: False,
-        }[output]
-
-        run_subprocess(
-            args=genconf_args,
-            env={
-                'PORT': str(installer_port),
-                'DCOS_INSTALLER_CONTAINER_NAME': installer_ctr,
-            },
-            log_output_live=log_output_live,
-            cwd=str(self._path),
-            pipe_output=capture_output,
-        )
+        log_output_live = bool(output == Output.LOG_AND_CAPTURE)
+        capture_output = bool(output != Output.NO_CAPTURE)
+        stdout_buffer, stderr_buffer = _output_buffers(output=output)
+
+        # The installer is not run if an earlier cluster ran the same
+        # installer with the same files in the ``genconf`` directory.
+        with cached_genconf_output(
+            installer=dcos_installer,
+            genconf_dir=self._genconf_dir,
+        ) as cached:
+            if not cached:
+                run_subprocess(
+                    args=genconf_args,
+                    env={
+                        'PORT': str(installer_port),
+                        'DCOS_INSTALLER_CONTAINER_NAME': installer_ctr,
+                    },
+                    log_output_live=log_output_live,
+                    cwd=str(self._path),
+                    pipe_output=capture_output,
+                    stdout_buffer=stdout_buffer,
+                    stderr_buffer=stderr_buffer,
+                )
 
-        for role, nodes in [
-            ('master', self.masters),
-            ('slave', self.agents),
-            ('slave_public', self.public_agents),
-        ]:
+        def install(node: Node, role: Role) -> None:
             dcos_install_args = [
                 '/bin/bash',
                 str(self._bootstrap_tmp_path / 'dcos_install.sh'),
                 '--no-block-dcos-setup',
-                role,
+                role.value,
             ]
+            node.run(args=dcos_install_args)
 
-            for node in nodes:
-                try:
-                    node.run(args=dcos_install_args)
-                except subprocess.CalledProcessError as ex:  # pragma: no cover
-                    LOGGER.error(ex.stdout)
-                    LOGGER.error(ex.stderr)
-                    raise
+        run_on_nodes(
+            operation=install,
+            masters=self.masters,
+            agents=self.agents,
+            public_agents=self.public_agents,
+            rollout_policy=RolloutPolicy.concurrent(),
+        )
 
     def destroy_node(self, node: Node) -> None:
         """
         Destroy a node in the cluster.
         """
+        try:
+            self._destroy_container(node=node)
+        finally:
+            self._node_cache.invalidate()
+
+    def _destroy_container(self, node: Node) -> None:
+        """
+        Stop and remove the container of a node.
+        """
         client = docker.from_env(version='auto')
+        if node.docker_container_id is not None:
+            container = client.containers.get(node.docker_container_id)
+            container.stop()
+            container.remove(v=True)
+            return
+
         containers = client.containers.list()
         for container in containers:
             networks = container.attrs['NetworkSettings']['Networks']
@@ -677,55 +932,70 @@ class DockerCluster(ClusterManager):
 
         rmtree(path=str(self._path), ignore_errors=True)
 
-    def _nodes(self, container_base_name: str) -> Set[Node]:
+    def _find_nodes(self) -> Dict[Role, Set[Node]]:
         """
-        Args:
-            container_base_name: The start of the container names.
+        Return ``Node``s corresponding to the containers of the cluster, by
+        role.
 
-        Returns: ``Node``s corresponding to containers with names starting
-            with ``container_base_name``.
+        All containers are found with one request to Docker.
         """
         client = docker.from_env(version='auto')
-        filters = {'name': container_base_name}
+        # The name filter matches containers with names which include the
+        # cluster ID.
+        filters = {'name': self._cluster_id}
         containers = client.containers.list(filters=filters)
 
-        nodes = set([])
+        prefixes = {
+            Role.MASTER: self._master_prefix,
+            Role.AGENT: self._agent_prefix,
+            Role.PUBLIC_AGENT: self._public_agent_prefix,
+        }
+        nodes = {role: set() for role in Role}  # type: Dict[Role, Set[Node]]
         for container in containers:
-            networks = container.attrs['NetworkSettings']['Networks']
-            network_name = 'bridge'
-            if len(networks) != 1:
-                [network_name] = list(networks.keys() - set(['bridge']))
-            container_ip_address = IPv4Address(
-                networks[network_name]['IPAddress'],
-            )
-            nodes.add(
+            roles = [
+                role for role, prefix in prefixes.items()
+                if container.name.startswith(prefix)
+            ]
+            if not roles:
+                continue
+
+            container_ip_address = _container_ip_address(container=container)
+            (role, ) = roles
+            nodes[role].add(
                 Node(
                     public_ip_address=container_ip_address,
                     private_ip_address=container_ip_address,
                     default_user=self._default_user,
                     ssh_key_path=self._path / 'include' / 'ssh' / 'id_rsa',
                     default_transport=self._default_transport,
+                    docker_container_id=container.id,
                 ),
             )
         return nodes
 
+    def invalidate_node_cache(self) -> None:
+        """
+        Find the cluster's containers again when nodes are next needed.
+        """
+        self._node_cache.invalidate()
+
     @property
     def masters(self) -> Set[Node]:
         """
         Return all DC/OS master :class:`.node.Node` s.
         """
-        return self._nodes(container_base_name=self._master_prefix)
+        return self._node_cache.nodes(role=Role.MASTER)
 
     @property
     def agents(self) -> Set[Node]:
         """
         Return all DC/OS agent :class:`.node.Node` s.
         """
-        return self._nodes(container_base_name=self._agent_prefix)
+        return self._node_cache.nodes(role=Role.AGENT)
 
     @property
     def public_agents(self) -> Set[Node]:
         """
         Return all DC/OS public agent :class:`.node.Node` s.
         """
-        return self._nodes(container_base_name=self._public_agent_prefix)
+        return self._node_cache.nodes(role=Role.PUBLIC_AGENT)
@@ -4,7 +4,7 @@ Helpers for starting DC/OS containers.
 
 import configparser
 import io
-import shlex
+import subprocess
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -13,6 +13,11 @@ import docker
 from dcos_e2e.docker_storage_drivers import DockerStorageDriver
 from dcos_e2e.docker_versions import DockerVersion
 
+from ._snapshots import copy_volume
+
+# The path in node containers of a script which starts Docker and ``sshd``.
+_BOOT_SCRIPT_PATH = '/usr/local/bin/dcos-e2e-node-boot'
+
 
 def _docker_service_file(
     storage_driver: DockerStorageDriver,
@@ -90,13 +95,15 @@ def start_dcos_container(
     docker_version: DockerVersion,
     network: Optional[docker.models.networks.Network] = None,
     ports: Optional[Dict[str, int]] = None,
+    systemd_unit: Optional[str] = None,
+    volume_sources: Optional[Dict[str, str]] = None,
 ) -> None:
     """
     Start a master, agent or public agent container.
     In this container, start Docker and `sshd`.
 
-    Run Mesos without `systemd` support. This is not supported by DC/OS.
-    See https://jira.d2iq.com/browse/DCOS_OSS-1131.
+    This is done by one boot script in the node image, which also configures
+    Mesos to run without `systemd` support.
 
     Args:
         container_base_name: The start of the container name.
@@ -116,10 +123,23 @@ def start_dcos_container(
         network: The network to connect the container to other than the default
         ``docker0`` bridge network.
         ports: The ports to expose on the host.
+        systemd_unit: The unit for ``systemd`` to start when the container
+            boots. If ``None``, the default target is started.
+        volume_sources: A mapping of paths of volumes in ``mounts`` to names
+            of volumes to copy the contents of into those volumes before the
+            container starts.
+
+    Raises:
+        subprocess.CalledProcessError: The script which starts Docker and
+            `sshd` in the container failed.
     """
     hostname = container_base_name + str(container_number)
     environment = {'container': hostname}
 
+    command = ['/sbin/init']
+    if systemd_unit is not None:
+        command.append('--unit=' + systemd_unit)
+
     client = docker.from_env(version='auto')
     container = client.containers.create(
         name=hostname,
@@ -133,67 +153,45 @@ def start_dcos_container(
         tmpfs=tmpfs,
         labels=labels,
         stop_signal='SIGRTMIN+3',
-        command=['/sbin/init'],
+        command=command,
         ports=ports or {},
     )
+
+    volume_sources = volume_sources or {}
+    for mount in container.attrs['Mounts']:
+        source = volume_sources.get(mount['Destination'])
+        if mount['Type'] == 'volume' and source is not None:
+            copy_volume(
+                image=docker_image,
+                source=source,
+                target=mount['Name'],
+            )
+
     if network:
         network.connect(container)
     container.start()
 
-    disable_systemd_support_cmd = (
-        "echo 'MESOS_SYSTEMD_ENABLE_SUPPORT=false' >> "
-        '/var/lib/dcos/mesos-slave-common'
-    )
-
-    setup_mesos_cgroup_root = (
-        'MESOS_CGROUPS_ROOT=`grep memory /proc/1/cgroup | cut -d: -f3`/mesos; '
-        'MESOS_CGROUPS_ROOT=${MESOS_CGROUPS_ROOT:1}; '
-        'echo "MESOS_CGROUPS_ROOT=$MESOS_CGROUPS_ROOT" >> '
-        '/var/lib/dcos/mesos-slave-common'
-    )
-
-    docker_service_name = 'docker.service'
-    docker_service_text = _docker_service_file(
-        storage_driver=docker_storage_driver,
-        docker_version=docker_version,
-    )
-    docker_service_dst = '/lib/systemd/system/' + docker_service_name
-    echo_docker = [
-        'echo',
-        '-e',
-        shlex.quote(docker_service_text),
-        '>',
-        docker_service_dst,
-    ]
-    docker_env_setup = (
-        'CGROUP=`grep memory /proc/1/cgroup | cut -d: -f3`; '
-        'echo "CGROUP_PARENT=$CGROUP/docker" >> '
-        '/etc/docker/env'
+    # The boot script is added to the node image in the ``base-docker``
+    # Dockerfile.
+    # All settings are given to it so that the node is ready after one
+    # command.
+    boot_environment = {
+        'DCOS_E2E_DOCKER_SERVICE': _docker_service_file(
+            storage_driver=docker_storage_driver,
+            docker_version=docker_version,
+        ),
+        'DCOS_E2E_SSH_PUBLIC_KEY': public_key_path.read_text().strip(),
+    }
+    # The script is run with ``bash`` so that it does not need to be
+    # executable in the image.
+    boot_args = ['/bin/bash', _BOOT_SCRIPT_PATH]
+    exit_code, output = container.exec_run(
+        cmd=boot_args,
+        environment=boot_environment,
     )
-
-    public_key = public_key_path.read_text()
-    echo_key = ['echo', public_key, '>>', '/root/.ssh/authorized_keys']
-
-    for cmd in [
-        ['mkdir', '-p', '/var/lib/dcos'],
-        ['/bin/bash', '-c', docker_env_setup],
-        ['mkdir', '-p', '/lib/systemd/system'],
-        ['/bin/bash', '-c', '{cmd}'.format(cmd=' '.join(echo_docker))],
-        [  # Retry in case D-Bus is not ready yet
-            'timeout', '120', '/bin/bash', '-c',
-            'until systemctl daemon-reload; do sleep 1; done',
-        ],
-        ['systemctl', 'enable', docker_service_name],
-        ['systemctl', 'start', docker_service_name],
-        ['/bin/bash', '-c', disable_systemd_support_cmd],
-        ['/bin/bash', '-c', setup_mesos_cgroup_root],
-        ['mkdir', '--parents', '/root/.ssh'],
-        ['/bin/bash', '-c', '{cmd}'.format(cmd=' '.join(echo_key))],
-        ['rm', '-f', '/run/nologin', '||', 'true'],
-        ['systemctl', 'start', 'sshd'],
-        # Work around https://jira.d2iq.com/browse/DCOS_OSS-1361.
-        ['systemd-tmpfiles', '--create', '--prefix', '/var/log/journal'],
-        ['systemd-tmpfiles', '--create', '--prefix', '/run/log/journal'],
-    ]:
-        exit_code, output = container.exec_run(cmd=cmd)
-        assert exit_code == 0, ' '.join(cmd) + ': ' + output.decode()
+    if exit_code != 0:
+        raise subprocess.CalledProcessError(
+            returncode=exit_code,
+            cmd=boot_args,
+            output=output,
+        )
@@ -2,13 +2,21 @@
 Helpers for building Docker images.
 """
 
+import hashlib
 from pathlib import Path
+from tempfile import gettempdir
 
 import docker
 
+from dcos_e2e._file_lock import file_lock
 from dcos_e2e.distributions import Distribution
 from dcos_e2e.docker_versions import DockerVersion
 
+_IMAGE_REPOSITORY = 'mesosphere/dcos-docker'
+
+# Image tags include this many characters of a hash of the build inputs.
+_TAG_HASH_LENGTH = 16
+
 
 def _base_dockerfile(linux_distribution: Distribution) -> Path:
     """
@@ -36,17 +44,50 @@ def _docker_dockerfile() -> Path:
     return current_parent / 'resources' / 'dockerfiles' / 'base-docker'
 
 
+def _directory_hash(directory: Path) -> bytes:
+    """
+    Return a hash of the names and contents of all files in a directory.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(directory.rglob('*')):
+        if not path.is_file():
+            continue
+        relative_path = path.relative_to(directory).as_posix()
+        digest.update(relative_path.encode() + b'\0')
+        digest.update(path.read_bytes() + b'\0')
+    return digest.digest()
+
+
+def image_exists(client: docker.DockerClient, tag: str) -> bool:
+    """
+    Return whether an image with the given tag exists.
+    """
+    try:
+        client.images.get(tag)
+    except docker.errors.ImageNotFound:
+        return False
+    return True
+
+
 def build_docker_image(
-    tag: str,
     linux_distribution: Distribution,
     docker_version: DockerVersion,
-) -> None:
-    """
-    Build a Docker image to use for node containers.
+) -> str:
     """
-    base_tag = tag + ':base'
+    Build a Docker image to use for node containers, unless it has already
+    been built.
 
-    client = docker.from_env(version='auto')
+    Images are tagged with a hash of everything which is used to build them,
+    so an image is built again only if one of these changes.
+    Only one process on a host builds an image at a time.
+
+    Args:
+        linux_distribution: The Linux distribution to use on nodes.
+        docker_version: The version of Docker to install on nodes.
+
+    Returns:
+        The tag of the image.
+    """
     base_dockerfile = _base_dockerfile(linux_distribution=linux_distribution)
     docker_dockerfile = _docker_dockerfile()
 
@@ -60,18 +101,57 @@ def build_docker_image(
         DockerVersion.v18_06_3_ce:
         'https://download.docker.com/linux/static/stable/x86_64/docker-18.06.3-ce.tgz',  # noqa: E501
     }
+    docker_url = docker_urls[docker_version]
 
-    client.images.build(
-        path=str(base_dockerfile),
-        rm=True,
-        forcerm=True,
-        tag=base_tag,
+    base_inputs = [
+        _directory_hash(directory=base_dockerfile),
+        linux_distribution.name.encode(),
+    ]
+    base_hash = hashlib.sha256(b'\0'.join(base_inputs)).hexdigest()
+    base_hash = base_hash[:_TAG_HASH_LENGTH]
+    image_inputs = [
+        base_hash.encode(),
+        _directory_hash(directory=docker_dockerfile),
+        docker_version.name.encode(),
+        docker_url.encode(),
+    ]
+    image_hash = hashlib.sha256(b'\0'.join(image_inputs)).hexdigest()
+    image_hash = image_hash[:_TAG_HASH_LENGTH]
+    base_tag = '{repository}:base-{hash}'.format(
+        repository=_IMAGE_REPOSITORY,
+        hash=base_hash,
     )
-
-    client.images.build(
-        path=str(docker_dockerfile),
-        rm=True,
-        forcerm=True,
-        tag=tag,
-        buildargs={'DOCKER_URL': docker_urls[docker_version]},
+    tag = '{repository}:{hash}'.format(
+        repository=_IMAGE_REPOSITORY,
+        hash=image_hash,
     )
+
+    client = docker.from_env(version='auto')
+    if image_exists(client=client, tag=tag):
+        return tag
+
+    lock_path = Path(gettempdir()) / 'dcos-e2e-docker-build.lock'
+    with file_lock(path=lock_path):
+        # Another process may have built the image while this one waited.
+        if image_exists(client=client, tag=tag):
+            return tag
+
+        client.images.build(
+            path=str(base_dockerfile),
+            rm=True,
+            forcerm=True,
+            tag=base_tag,
+        )
+
+        client.images.build(
+            path=str(docker_dockerfile),
+            rm=True,
+            forcerm=True,
+            tag=tag,
+            buildargs={
+                'BASE_IMAGE': base_tag,
+                'DOCKER_URL': docker_url,
+            },
+        )
+
+    return tag
@@ -0,0 +1,256 @@
+"""
+Helpers for reusing the output of ``dcos_generate_config.sh --genconf``
+between clusters.
+
+The ``genconf/serve`` directory which the installer creates depends only on
+the installer and on the files in ``genconf`` which are given to it, such as
+``config.yaml`` and ``ip-detect``.
+It is cached on the host by a hash of these, so that a cluster with the same
+installer and configuration as an earlier cluster is installed without
+running the installer.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import docker
+
+from dcos_e2e._file_lock import FileLock, file_lock
+from dcos_e2e._installer_payload import (
+    InstallerFormatError,
+    read_genconf_image_name,
+)
+from dcos_e2e.installers import installer_sha256
+
+from ._docker_build import image_exists
+
+LOGGER = logging.getLogger(__name__)
+
+# The default maximum number of ``genconf/serve`` directories to cache.
+_DEFAULT_MAX_ENTRIES = 5
+
+
+def _default_cache_dir() -> Path:
+    """
+    Return the directory in which installer output is cached by default.
+    """
+    return Path(tempfile.gettempdir()) / 'dcos-e2e-genconf-cache'
+
+
+def _inputs_hash(genconf_dir: Path) -> bytes:
+    """
+    Return a hash of the names and contents of the files in a ``genconf``
+    directory which are given to the installer.
+    """
+    serve_dir = genconf_dir / 'serve'
+    digest = hashlib.sha256()
+    for path in sorted(genconf_dir.rglob('*')):
+        if not path.is_file() or serve_dir in path.parents:
+            continue
+        relative_path = path.relative_to(genconf_dir).as_posix()
+        digest.update(relative_path.encode() + b'\0')
+        digest.update(path.read_bytes() + b'\0')
+    return digest.digest()
+
+
+def _link_tree(src: Path, dst: Path) -> None:
+    """
+    Recreate the files in ``src`` in the existing directory ``dst``.
+
+    Files are hard linked where possible, as ``genconf/serve`` directories
+    are large, and copied otherwise.
+    """
+    for path in sorted(src.rglob('*')):
+        target = dst / path.relative_to(src)
+        if path.is_dir():
+            target.mkdir(exist_ok=True)
+            continue
+        try:
+            os.link(str(path), str(target))
+        except OSError:
+            shutil.copy2(src=str(path), dst=str(target))
+
+
+def _genconf_image_name(
+    installer: Path,
+    sha256: str,
+    cache_dir: Path,
+) -> Optional[str]:
+    """
+    Return the name of the genconf image which an installer loads, if it
+    can be read from the installer.
+
+    Names are cached by the SHA-256 hash of the installer.
+    """
+    images_path = cache_dir / 'images.json'
+    try:
+        images = json.loads(images_path.read_text())  # type: Dict[str, str]
+    except (OSError, ValueError):
+        images = {}
+
+    if sha256 in images:
+        return images[sha256]
+
+    try:
+        image_name = read_genconf_image_name(installer=installer)
+    except InstallerFormatError as exc:
+        message = 'Cannot read the genconf image name from {installer}: {exc}'
+        LOGGER.debug(message.format(installer=installer, exc=exc))
+        return None
+
+    with file_lock(path=cache_dir / 'images.lock'):
+        try:
+            images = json.loads(images_path.read_text())
+        except (OSError, ValueError):
+            images = {}
+        images[sha256] = image_name
+        with tempfile.NamedTemporaryFile(
+            mode='w',
+            dir=str(cache_dir),
+            delete=False,
+        ) as images_file:
+            json.dump(images, images_file)
+        os.replace(images_file.name, str(images_path))
+    return image_name
+
+
+@contextmanager
+def _image_load_lock(
+    installer: Path,
+    sha256: str,
+    cache_dir: Path,
+) -> Iterator[None]:
+    """
+    Hold a lock on loading an installer's genconf image into Docker, unless
+    the image is already loaded.
+
+    An installer does not extract its image if the image is already loaded.
+    This lock stops many clusters which are created at once from each
+    extracting and loading the same image.
+    """
+    image_name = _genconf_image_name(
+        installer=installer,
+        sha256=sha256,
+        cache_dir=cache_dir,
+    )
+    if image_name is not None:
+        client = docker.from_env(version='auto')
+        if image_exists(client=client, tag=image_name):
+            yield
+            return
+
+    lock_path = cache_dir / 'locks' / ('image-' + sha256 + '.lock')
+    with file_lock(path=lock_path):
+        yield
+
+
+def _evict(entries_dir: Path, locks_dir: Path, max_entries: int) -> None:
+    """
+    Remove the least recently used cached directories so that at most
+    ``max_entries`` are left.
+
+    Directories which are in use by another process are not removed.
+    """
+    entries = sorted(
+        (
+            path for path in entries_dir.iterdir()
+            if not path.name.startswith('.')
+        ),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in entries[max_entries:]:
+        lock = FileLock(path=locks_dir / (entry.name + '.lock'))
+        if not lock.acquire(blocking=False):
+            continue
+        try:
+            LOGGER.debug('Removing %s from the genconf cache.', entry.name)
+            shutil.rmtree(path=str(entry), ignore_errors=True)
+        finally:
+            lock.release()
+
+
+@contextmanager
+def cached_genconf_output(
+    installer: Path,
+    genconf_dir: Path,
+    cache_dir: Optional[Path] = None,
+    max_entries: int = _DEFAULT_MAX_ENTRIES,
+) -> Iterator[bool]:
+    """
+    Fill ``genconf/serve`` from the cache if the installer has been run with
+    the same files in ``genconf`` before.
+
+    This yields whether ``genconf/serve`` was filled from the cache.
+    If it was not, the installer must be run with ``--genconf`` in the
+    ``with`` block, and the ``genconf/serve`` directory which it creates is
+    cached if the block does not raise an exception.
+
+    Only one process runs the installer for a given installer and
+    configuration at a time, and others wait for it and then use its output.
+
+    Args:
+        installer: The path to a DC/OS installer.
+        genconf_dir: The ``genconf`` directory which the installer is run
+            with. It must include an empty ``serve`` directory.
+        cache_dir: The directory to cache output in. If ``None``, a directory
+            in the system's temporary directory is used.
+        max_entries: The maximum number of ``genconf/serve`` directories to
+            cache.
+    """
+    cache_dir = cache_dir or _default_cache_dir()
+    entries_dir = cache_dir / 'serve'
+    locks_dir = cache_dir / 'locks'
+    for directory in (entries_dir, locks_dir):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    serve_dir = genconf_dir / 'serve'
+    sha256 = installer_sha256(installer=installer)
+    key = hashlib.sha256(
+        sha256.encode() + b'\0' + _inputs_hash(genconf_dir=genconf_dir),
+    ).hexdigest()
+    entry = entries_dir / key
+
+    with file_lock(path=locks_dir / (key + '.lock')):
+        if entry.is_dir():
+            LOGGER.debug('Using installer output %s from the cache.', key)
+            # The modification time records when an entry was last used.
+            os.utime(str(entry))
+            _link_tree(src=entry, dst=serve_dir)
+            yield True
+            return
+
+        with _image_load_lock(
+            installer=installer,
+            sha256=sha256,
+            cache_dir=cache_dir,
+        ):
+            yield False
+
+        # Output is linked into a hidden directory which is renamed into
+        # place only when it is complete.
+        # The installation does not depend on the cache, so a failure to
+        # cache the output is not raised.
+        partial_entry = Path(
+            tempfile.mkdtemp(dir=str(entries_dir), prefix='.'),
+        )
+        try:
+            _link_tree(src=serve_dir, dst=partial_entry)
+            os.rename(str(partial_entry), str(entry))
+        except OSError as exc:
+            shutil.rmtree(path=str(partial_entry), ignore_errors=True)
+            message = 'Failed to cache installer output: {exc}'.format(exc=exc)
+            LOGGER.warning(message)
+
+    _evict(
+        entries_dir=entries_dir,
+        locks_dir=locks_dir,
+        max_entries=max_entries,
+    )
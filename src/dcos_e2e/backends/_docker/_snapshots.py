@@ -0,0 +1,131 @@
+"""
+Helpers for snapshots of DC/OS clusters on Docker.
+
+These are shared by :py:mod:`dcos_e2e.docker_snapshots`, which creates
+snapshots, and the Docker backend, which creates clusters from snapshots.
+"""
+
+from ipaddress import IPv4Address
+from typing import Dict, List, Tuple
+
+import docker
+from docker.types import Mount
+
+from dcos_e2e.node import Role
+
+IMAGE_REPOSITORY = 'dcos-e2e-snapshot'
+SNAPSHOT_LABEL_KEY = 'dcos_e2e.snapshot'
+ROLE_LABEL_KEY = 'dcos_e2e.snapshot.role'
+NODE_NUMBER_LABEL_KEY = 'dcos_e2e.snapshot.node_number'
+IP_ADDRESS_LABEL_KEY = 'dcos_e2e.snapshot.ip_address'
+TARGET_LABEL_KEY = 'dcos_e2e.snapshot.target'
+
+
+class SnapshotNode:
+    """
+    A node in a snapshot.
+    """
+
+    def __init__(
+        self,
+        image: str,
+        ip_address: IPv4Address,
+        volumes: Dict[str, str],
+    ) -> None:
+        """
+        Args:
+            image: The Docker image of the node.
+            ip_address: The IP address of the node in the snapshotted
+                cluster.
+            volumes: A mapping of paths on the node to the names of volumes
+                which have the contents of the node's volumes at those paths.
+
+        Attributes:
+            image: The Docker image of the node.
+            ip_address: The IP address of the node in the snapshotted
+                cluster.
+            volumes: A mapping of paths on the node to the names of volumes
+                which have the contents of the node's volumes at those paths.
+        """
+        self.image = image
+        self.ip_address = ip_address
+        self.volumes = volumes
+
+
+def copy_volume(image: str, source: str, target: str) -> None:
+    """
+    Replace the contents of a volume with the contents of another volume.
+
+    Ownership, permissions, extended attributes and special files such as
+    overlay file system whiteouts are copied.
+
+    Args:
+        image: The Docker image to copy the contents with. This must have
+            ``find`` and ``cp``.
+        source: The name of the volume to copy from.
+        target: The name of the volume to copy to.
+    """
+    client = docker.from_env(version='auto')
+    client.containers.run(
+        image=image,
+        entrypoint=['/bin/sh', '-c'],
+        command=[
+            'find /target -mindepth 1 -delete && cp -a /source/. /target',
+        ],
+        mounts=[
+            Mount(source=source, target='/source', read_only=True),
+            Mount(source=target, target='/target'),
+        ],
+        # This allows copying extended attributes in the ``trusted``
+        # namespace, which are used by overlay file systems.
+        privileged=True,
+        remove=True,
+    )
+
+
+def get_snapshot_nodes(name: str) -> Dict[Role, List[SnapshotNode]]:
+    """
+    Return the nodes of a snapshot, by role.
+
+    Nodes of each role are in the order in which they were numbered when the
+    snapshot was created.
+
+    Raises:
+        ValueError: There is no snapshot with the given name.
+    """
+    client = docker.from_env(version='auto')
+    label_filter = SNAPSHOT_LABEL_KEY + '=' + name
+    images = client.images.list(filters={'label': label_filter})
+    if not images:
+        message = 'There is no snapshot named "{name}".'.format(name=name)
+        raise ValueError(message)
+
+    volumes = client.volumes.list(filters={'label': label_filter})
+    volumes_by_node = {}  # type: Dict[Tuple[str, str], Dict[str, str]]
+    for volume in volumes:
+        labels = volume.attrs['Labels']
+        key = (labels[ROLE_LABEL_KEY], labels[NODE_NUMBER_LABEL_KEY])
+        volume_targets = volumes_by_node.setdefault(key, {})
+        volume_targets[labels[TARGET_LABEL_KEY]] = volume.name
+
+    numbered_nodes = {
+        role: {}
+        for role in Role
+    }  # type: Dict[Role, Dict[int, SnapshotNode]]
+    for image in images:
+        labels = image.labels
+        role = Role(labels[ROLE_LABEL_KEY])
+        node_number = labels[NODE_NUMBER_LABEL_KEY]
+        [image_tag] = [
+            tag for tag in image.tags if tag.startswith(IMAGE_REPOSITORY)
+        ]
+        numbered_nodes[role][int(node_number)] = SnapshotNode(
+            image=image_tag,
+            ip_address=IPv4Address(labels[IP_ADDRESS_LABEL_KEY]),
+            volumes=volumes_by_node.get((role.value, node_number), {}),
+        )
+
+    return {
+        role: [nodes[number] for number in sorted(nodes)]
+        for role, nodes in numbered_nodes.items()
+    }
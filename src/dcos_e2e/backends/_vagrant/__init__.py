@@ -10,9 +10,11 @@ from pathlib import Path
 from tempfile import gettempdir
 from typing import Any, Dict, Iterable, Optional, Set, Tuple, Type
 
+from dcos_e2e._node_cache import NodeCache
+from dcos_e2e.artifact_cache import ArtifactCache
 from dcos_e2e.base_classes import ClusterBackend, ClusterManager
 from dcos_e2e.cluster import Cluster
-from dcos_e2e.node import Node, Output
+from dcos_e2e.node import Node, Output, Role
 
 
 class Vagrant(ClusterBackend):
@@ -124,6 +126,7 @@ class VagrantCluster(ClusterManager):
         self._master_prefix = cluster_id + '-master-'
         self._agent_prefix = cluster_id + '-agent-'
         self._public_agent_prefix = cluster_id + '-public-agent-'
+        self._node_cache = NodeCache(find_nodes=self._find_nodes)
 
         # We work in a new directory.
         # This helps running tests in parallel without conflicts and it
@@ -192,19 +195,24 @@ class VagrantCluster(ClusterManager):
                 installer node. This must be empty as it is not currently
                 supported.
         """
-        cluster = Cluster.from_nodes(
-            masters=self.masters,
-            agents=self.agents,
-            public_agents=self.public_agents,
-        )
-
-        cluster.install_dcos_from_url(
-            dcos_installer=dcos_installer,
-            dcos_config=dcos_config,
-            ip_detect_path=ip_detect_path,
-            output=output,
-            files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
-        )
+        # The nodes of this backend run on the host, so the installer is
+        # downloaded to a cache on the host and sent to the nodes from there.
+        # This means that an installer is downloaded once for many clusters.
+        #
+        # The installer is linked into this cluster's workspace so that it is
+        # kept while it is used, even if it is removed from the cache.
+        installer = Path(self._vagrant_client.root) / 'dcos_generate_config.sh'
+        ArtifactCache().copy(url=dcos_installer, path=installer)
+        try:
+            self.install_dcos_from_path(
+                dcos_installer=installer,
+                dcos_config=dcos_config,
+                ip_detect_path=ip_detect_path,
+                output=output,
+                files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+            )
+        finally:
+            installer.unlink()
 
     def install_dcos_from_path(
         self,
@@ -245,6 +253,15 @@ class VagrantCluster(ClusterManager):
         """
         Destroy a node in the cluster.
         """
+        try:
+            self._destroy_virtual_machine(node=node)
+        finally:
+            self._node_cache.invalidate()
+
+    def _destroy_virtual_machine(self, node: Node) -> None:
+        """
+        Destroy the VM of a node.
+        """
         client = self._vagrant_client
         hostname_command = "hostname -I | cut -d' ' -f2"
         virtual_machines = [
@@ -270,22 +287,30 @@ class VagrantCluster(ClusterManager):
 
         shutil.rmtree(path=client.root, ignore_errors=True)
 
-    def _nodes(self, node_base_name: str) -> Set[Node]:
+    def _find_nodes(self) -> Dict[Role, Set[Node]]:
         """
-        Args:
-            node_base_name: The start of node names.
+        Return ``Node``s corresponding to the running VMs of the cluster, by
+        role.
 
-        Returns: ``Node``s corresponding to VMs with names starting with
-            ``node_base_name``.
+        The status of all VMs is found with one ``vagrant status`` command.
         """
         client = self._vagrant_client
-        vagrant_nodes = [
-            vm for vm in client.status()
-            if vm.name.startswith(node_base_name) and vm.state == 'running'
-        ]
+        prefixes = {
+            Role.MASTER: self._master_prefix,
+            Role.AGENT: self._agent_prefix,
+            Role.PUBLIC_AGENT: self._public_agent_prefix,
+        }
+        running_vms = [vm for vm in client.status() if vm.state == 'running']
         hostname_command = "hostname -I | cut -d' ' -f2"
-        nodes = set([])
-        for node in vagrant_nodes:
+        nodes = {role: set() for role in Role}  # type: Dict[Role, Set[Node]]
+        for node in running_vms:
+            roles = [
+                role for role, prefix in prefixes.items()
+                if node.name.startswith(prefix)
+            ]
+            if not roles:
+                continue
+
             default_user = client.user(vm_name=node.name)
             ssh_key_path = Path(client.keyfile(vm_name=node.name))
 
@@ -301,7 +326,8 @@ class VagrantCluster(ClusterManager):
 
             node_ip_address = IPv4Address(node_ip_str)
 
-            nodes.add(
+            (role, ) = roles
+            nodes[role].add(
                 Node(
                     public_ip_address=node_ip_address,
                     private_ip_address=node_ip_address,
@@ -311,23 +337,29 @@ class VagrantCluster(ClusterManager):
             )
         return nodes
 
+    def invalidate_node_cache(self) -> None:
+        """
+        Find the cluster's VMs again when nodes are next needed.
+        """
+        self._node_cache.invalidate()
+
     @property
     def masters(self) -> Set[Node]:
         """
         Return all DC/OS master :class:`.node.Node` s.
         """
-        return self._nodes(node_base_name=self._master_prefix)
+        return self._node_cache.nodes(role=Role.MASTER)
 
     @property
     def agents(self) -> Set[Node]:
         """
         Return all DC/OS agent :class:`.node.Node` s.
         """
-        return self._nodes(node_base_name=self._agent_prefix)
+        return self._node_cache.nodes(role=Role.AGENT)
 
     @property
     def public_agents(self) -> Set[Node]:
         """
         Return all DC/OS public agent :class:`.node.Node` s.
         """
-        return self._nodes(node_base_name=self._public_agent_prefix)
+        return self._node_cache.nodes(role=Role.PUBLIC_AGENT)
@@ -92,6 +92,26 @@ class ClusterManager(abc.ABC):
         Destroy all nodes in the cluster.
         """
 
+    def invalidate_node_cache(self) -> None:
+        """
+        Find the nodes of the cluster again when they are next needed, if
+        they are cached.
+
+        Managers which cache nodes must invalidate the cache when a node is
+        destroyed.
+        By default, nodes are not cached and this does nothing.
+        """
+
+    def stop_bootstrap_servers(self) -> None:
+        """
+        Stop any servers which were started on nodes to serve DC/OS
+        installation files.
+
+        This is called once DC/OS has started on every node, and when the
+        cluster is destroyed.
+        By default, no servers are started and this does nothing.
+        """
+
     @property
     @abc.abstractmethod
     def masters(self) -> Set[Node]:
@@ -8,26 +8,26 @@ from contextlib import ContextDecorator
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
-from retry import retry
-
-from . import _wait_for_dcos
+from . import _bootstrap, _distribution, _wait_for_dcos
 from ._existing_cluster import ExistingCluster as _ExistingCluster
+from ._readiness import wait_until_ready
 from .base_classes import ClusterManager  # noqa: F401
 from .base_classes import ClusterBackend
-from .node import Node, Output, Role, Transport
+from .node import Node, Output, Transport, _reject_stream_output
+from .readiness import ReadinessReport
+from .rollout_policies import RolloutPolicy
 
 LOGGER = logging.getLogger(__name__)
 
 
-@retry(
-    exceptions=(subprocess.CalledProcessError),
-    tries=5,
-    delay=2,
-)
-def _wait_for_ssh(node: Node) -> None:
+# How long to wait for SSH to be available on all nodes of a new cluster.
+_SSH_TIMEOUT_SECONDS = 30
+
+
+def _check_ssh(node: Node) -> None:
     """
-    Retry up to five times (arbitrary) until SSH is available on the given
-    node.
+    Raise ``subprocess.CalledProcessError`` if SSH is not available on the
+    given node.
     """
     # In theory we could just use any args and specify the transport as SSH.
     # However, this would not work on macOS without a special network set up.
@@ -78,12 +78,12 @@ class Cluster(ContextDecorator):
         )  # type: ClusterManager
         self._base_config = cluster_backend.base_config
 
-        for node in {
-            *self.masters,
-            *self.agents,
-            *self.public_agents,
-        }:
-            _wait_for_ssh(node=node)
+        wait_until_ready(
+            nodes={*self.masters, *self.agents, *self.public_agents},
+            probe=_check_ssh,
+            exceptions=(subprocess.CalledProcessError, ),
+            timeout_seconds=_SSH_TIMEOUT_SECONDS,
+        )
 
     @classmethod
     def from_nodes(
@@ -91,6 +91,7 @@ class Cluster(ContextDecorator):
         masters: Set[Node],
         agents: Set[Node],
         public_agents: Set[Node],
+        bootstrap_node: Optional[Node] = None,
     ) -> 'Cluster':
         """
         Create a cluster from existing nodes.
@@ -99,6 +100,16 @@ class Cluster(ContextDecorator):
             masters: The master nodes in an existing cluster.
             agents: The agent nodes in an existing cluster.
             public_agents: The public agent nodes in an existing cluster.
+            bootstrap_node: The node to use as a bootstrap node when
+                installing DC/OS. The installer is put on this node only,
+                ``--genconf`` is run on it once and the installation files are
+                served from it to all other nodes. This may be one of the
+                cluster nodes, and it must be reachable from all cluster nodes
+                on its private IP address. If ``None``, an arbitrary master
+                node is used. Installation files are served from this node
+                until :py:meth:`wait_for_dcos_oss` or
+                :py:meth:`wait_for_dcos_ee` returns, or until the cluster is
+                destroyed or its context manager exits.
 
         Returns:
             A cluster object with the nodes of an existing cluster.
@@ -107,6 +118,7 @@ class Cluster(ContextDecorator):
             masters=masters,
             agents=agents,
             public_agents=public_agents,
+            bootstrap_node=bootstrap_node,
         )
 
         return cls(
@@ -119,7 +131,7 @@ class Cluster(ContextDecorator):
     def wait_for_dcos_oss(
         self,
         http_checks: bool = True,
-    ) -> None:
+    ) -> ReadinessReport:
         """
         Wait until the DC/OS OSS boot process has completed.
 
@@ -130,23 +142,31 @@ class Cluster(ContextDecorator):
                 cannot be made to the cluster. For example, this is useful on
                 macOS without a VPN set up.
 
+        Returns:
+            When each phase of waiting became ready, to show which DC/OS
+            components took longest to start.
+
         Raises:
             dcos_e2e.exceptions.DCOSTimeoutError: Raised if cluster components
                 did not become ready within one hour.
         """
-        _wait_for_dcos.wait_for_dcos_oss(
+        report = _wait_for_dcos.wait_for_dcos_oss(
             masters=self.masters,
             agents=self.agents,
             public_agents=self.public_agents,
             http_checks=http_checks,
         )
+        # Every node has fetched its cluster packages once DC/OS has
+        # started, so installation files no longer need to be served.
+        self._cluster.stop_bootstrap_servers()
+        return report
 
     def wait_for_dcos_ee(
         self,
         superuser_username: str,
         superuser_password: str,
         http_checks: bool = True,
-    ) -> None:
+    ) -> ReadinessReport:
         """
         Wait until the DC/OS Enterprise boot process has completed.
 
@@ -159,11 +179,15 @@ class Cluster(ContextDecorator):
                 cannot be made to the cluster. For example, this is useful on
                 macOS without a VPN set up.
 
+        Returns:
+            When each phase of waiting became ready, to show which DC/OS
+            components took longest to start.
+
         Raises:
             dcos_e2e.exceptions.DCOSTimeoutError: Raised if cluster components
                 did not become ready within one hour.
         """
-        _wait_for_dcos.wait_for_dcos_ee(
+        report = _wait_for_dcos.wait_for_dcos_ee(
             masters=self.masters,
             agents=self.agents,
             public_agents=self.public_agents,
@@ -171,6 +195,8 @@ class Cluster(ContextDecorator):
             superuser_password=superuser_password,
             http_checks=http_checks,
         )
+        self._cluster.stop_bootstrap_servers()
+        return report
 
     def install_dcos_from_url(
         self,
@@ -193,7 +219,11 @@ class Cluster(ContextDecorator):
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
             output: What happens with stdout and stderr.
+
+        Raises:
+            ValueError: ``output`` is ``Output.STREAM``.
         """
+        _reject_stream_output(output=output)
         self._cluster.install_dcos_from_url(
             dcos_installer=dcos_installer,
             dcos_config=dcos_config,
@@ -223,7 +253,11 @@ class Cluster(ContextDecorator):
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
             output: What happens with stdout and stderr.
+
+        Raises:
+            ValueError: ``output`` is ``Output.STREAM``.
         """
+        _reject_stream_output(output=output)
         self._cluster.install_dcos_from_path(
             dcos_installer=dcos_installer,
             dcos_config=dcos_config,
@@ -239,10 +273,16 @@ class Cluster(ContextDecorator):
         ip_detect_path: Path,
         output: Output = Output.CAPTURE,
         files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]] = (),
+        rollout_policy: Optional[RolloutPolicy] = None,
+        dcos_installer_sha256: Optional[str] = None,
     ) -> None:
         """
         Upgrade DC/OS.
 
+        The installer is downloaded on one master only, and the node upgrade
+        script is generated there once.
+        Every node then runs the upgrade script, served from that master.
+
         Args:
             dcos_installer: A URL pointing to an installer to upgrade DC/OS
                 from.
@@ -253,23 +293,37 @@ class Cluster(ContextDecorator):
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
             output: What happens with stdout and stderr.
+            rollout_policy: The order in which to upgrade nodes, and how many
+                nodes to upgrade at the same time. By default, nodes are
+                upgraded one at a time; masters first, then agents, then
+                public agents.
+            dcos_installer_sha256: The expected SHA-256 hash of the
+                installer, in hexadecimal. If this is given, the downloaded
+                installer is not used unless it has this hash.
+
+        Raises:
+            subprocess.CalledProcessError: The installer could not be
+                downloaded, it does not have the expected hash, or generating
+                the node upgrade script failed.
+            dcos_e2e.exceptions.MultiNodeCalledProcessError: Upgrading DC/OS
+                failed on one or more nodes.
+            ValueError: ``output`` is ``Output.STREAM``.
         """
-        for nodes, role in (
-            (self.masters, Role.MASTER),
-            (self.agents, Role.AGENT),
-            (self.public_agents, Role.PUBLIC_AGENT),
-        ):
-            for node in nodes:
-                node.upgrade_dcos_from_url(
-                    dcos_installer=dcos_installer,
-                    dcos_config=dcos_config,
-                    ip_detect_path=ip_detect_path,
-                    role=role,
-                    files_to_copy_to_genconf_dir=(
-                        files_to_copy_to_genconf_dir
-                    ),
-                    output=output,
-                )
+        _reject_stream_output(output=output)
+
+        _bootstrap.upgrade_dcos_from_url(
+            bootstrap_node=self._upgrade_bootstrap_node(),
+            masters=self.masters,
+            agents=self.agents,
+            public_agents=self.public_agents,
+            dcos_installer=dcos_installer,
+            dcos_config=dcos_config,
+            ip_detect_path=ip_detect_path,
+            files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+            output=output,
+            rollout_policy=rollout_policy or RolloutPolicy.serial(),
+            dcos_installer_sha256=dcos_installer_sha256,
+        )
 
     def upgrade_dcos_from_path(
         self,
@@ -278,10 +332,15 @@ class Cluster(ContextDecorator):
         ip_detect_path: Path,
         output: Output = Output.CAPTURE,
         files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]] = (),
+        rollout_policy: Optional[RolloutPolicy] = None,
     ) -> None:
         """
         Upgrade DC/OS.
 
+        The installer is sent to one master only, and the node upgrade script
+        is generated there once.
+        Every node then runs the upgrade script, served from that master.
+
         Args:
             dcos_installer: The ``Path`` to a local installer or a ``str`` to
                 which is a URL pointing to an installer to install DC/OS from.
@@ -292,23 +351,39 @@ class Cluster(ContextDecorator):
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
             output: What happens with stdout and stderr.
+            rollout_policy: The order in which to upgrade nodes, and how many
+                nodes to upgrade at the same time. By default, nodes are
+                upgraded one at a time; masters first, then agents, then
+                public agents.
+
+        Raises:
+            subprocess.CalledProcessError: Generating the node upgrade script
+                failed.
+            dcos_e2e.exceptions.MultiNodeCalledProcessError: Upgrading DC/OS
+                failed on one or more nodes.
+            ValueError: ``output`` is ``Output.STREAM``.
+        """
+        _reject_stream_output(output=output)
+        _bootstrap.upgrade_dcos_from_path(
+            bootstrap_node=self._upgrade_bootstrap_node(),
+            masters=self.masters,
+            agents=self.agents,
+            public_agents=self.public_agents,
+            dcos_installer=dcos_installer,
+            dcos_config=dcos_config,
+            ip_detect_path=ip_detect_path,
+            files_to_copy_to_genconf_dir=files_to_copy_to_genconf_dir,
+            output=output,
+            rollout_policy=rollout_policy or RolloutPolicy.serial(),
+        )
+
+    def _upgrade_bootstrap_node(self) -> Node:
         """
-        for nodes, role in (
-            (self.masters, Role.MASTER),
-            (self.agents, Role.AGENT),
-            (self.public_agents, Role.PUBLIC_AGENT),
-        ):
-            for node in nodes:
-                node.upgrade_dcos_from_path(
-                    dcos_installer=dcos_installer,
-                    dcos_config=dcos_config,
-                    ip_detect_path=ip_detect_path,
-                    role=role,
-                    files_to_copy_to_genconf_dir=(
-                        files_to_copy_to_genconf_dir
-                    ),
-                    output=output,
-                )
+        Return the node to generate the node upgrade script on.
+
+        This must have DC/OS installed, so a master is used.
+        """
+        return next(iter(self.masters))
 
     def __enter__(self) -> 'Cluster':
         """
@@ -389,7 +464,9 @@ class Cluster(ContextDecorator):
 
         Raises:
             subprocess.CalledProcessError: If the command fails.
+            ValueError: ``output`` is ``Output.STREAM``.
         """
+        _reject_stream_output(output=output)
         args = [
             '.',
             '/opt/mesosphere/environment.export',
@@ -432,18 +509,81 @@ class Cluster(ContextDecorator):
             transport=transport,
         )
 
+    def send_file(
+        self,
+        local_path: Path,
+        remote_path: Path,
+        user: Optional[str] = None,
+        transport: Optional[Transport] = None,
+        sudo: bool = False,
+    ) -> None:
+        """
+        Copy a file to every node in the cluster.
+
+        The file is sent from the host to one node only.
+        Other nodes download the file over HTTP from nodes which already have
+        it, so the number of nodes with the file doubles at each step.
+        Each copy is checked against the SHA-256 hash of the local file.
+
+        Args:
+            local_path: The path on the host of the file to send.
+            remote_path: The path on each node to place the file.
+            user: The name of the remote user to send the file. If ``None``,
+                the ``default_user`` of each node is used instead.
+            transport: The transport to use for communicating with nodes. If
+                ``None``, the ``default_transport`` of each node is used.
+            sudo: Whether to use sudo to create the directory which holds the
+                remote file.
+
+        Raises:
+            subprocess.CalledProcessError: The file could not be copied to a
+                node, or a copy does not match the local file.
+        """
+        _distribution.send_file_to_nodes(
+            local_path=local_path,
+            remote_path=remote_path,
+            nodes=[*self.masters, *self.agents, *self.public_agents],
+            user=user,
+            transport=transport,
+            sudo=sudo,
+        )
+
+    def close_connections(self) -> None:
+        """
+        Close any persistent connections to the nodes in the cluster.
+
+        See :py:meth:`dcos_e2e.node.Node.close_connections`.
+        """
+        for node in {*self.masters, *self.agents, *self.public_agents}:
+            node.close_connections()
+
     def destroy(self) -> None:
         """
         Destroy all nodes in the cluster.
         """
+        self._cluster.stop_bootstrap_servers()
+        self.close_connections()
         self._cluster.destroy()
 
     def destroy_node(self, node: Node) -> None:
         """
         Destroy a node in the cluster.
         """
+        node.close_connections()
         self._cluster.destroy_node(node=node)
 
+    def invalidate_node_cache(self) -> None:
+        """
+        Find the nodes of the cluster again when they are next needed.
+
+        Some backends find the nodes of a cluster once and keep them, so that
+        the same :class:`.node.Node` objects are returned each time.
+        Nodes are found again after :py:meth:`destroy_node`.
+        Call this after changing the nodes of a cluster in another way, such
+        as by removing a node outside of DC/OS E2E.
+        """
+        self._cluster.invalidate_node_cache()
+
     def __exit__(
         self,
         exc_type: Optional[type],
@@ -462,6 +602,6 @@ class Cluster(ContextDecorator):
         try:
             self.destroy()
         except NotImplementedError:
-            pass
+            self.close_connections()
 
         return False
@@ -0,0 +1,510 @@
+"""
+Pools of clusters which are created ahead of time and leased to users, such
+as tests.
+"""
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from enum import Enum
+from pathlib import Path
+from tempfile import gettempdir
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ._file_lock import FileLock
+from .base_classes import ClusterBackend
+from .cluster import Cluster
+
+LOGGER = logging.getLogger(__name__)
+
+# How long to wait between attempts to take a slot for a new cluster when
+# every slot is taken.
+_SLOT_RETRY_SECONDS = 1
+
+
+class ReleasePolicy(Enum):
+    """
+    What happens to a cluster when a lease of it ends.
+
+    Attributes:
+        DESTROY: Destroy the cluster, and create a new cluster in the
+            background to replace it.
+        RESET: Call the pool's ``reset`` function on the cluster in the
+            background, and then lease it again. If ``reset`` raises an
+            exception, the cluster is destroyed and replaced.
+        RECYCLE: Lease the cluster again as it is.
+    """
+
+    DESTROY = 1
+    RESET = 2
+    RECYCLE = 3
+
+
+class _PoolClosedError(Exception):
+    """
+    Raised in the background when the pool is closed before a cluster could be
+    created.
+    """
+
+
+class _ClusterSet:
+    """
+    The clusters of a pool which are created in the same way.
+    """
+
+    def __init__(self, create: Callable[[], Cluster]) -> None:
+        """
+        Args:
+            create: A function which creates a cluster.
+
+        Attributes:
+            create: A function which creates a cluster.
+            available: Clusters which are not leased.
+            count: The number of clusters which exist or are being created,
+                including leased clusters.
+            errors: Errors raised when creating clusters, which are yet to be
+                raised to a user.
+        """
+        self.create = create
+        self.available = []  # type: List[Cluster]
+        self.count = 0
+        self.errors = []  # type: List[Exception]
+
+
+class ClusterPool:
+    """
+    A pool of clusters which are created in the background and leased.
+
+    A pool keeps ``size`` clusters of each kind which has been leased or
+    provisioned.
+    Clusters are of the same kind if they are created with the same backend
+    object, the same number of each type of node, and the same DC/OS
+    installer, configuration and wait function.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        release_policy: ReleasePolicy = ReleasePolicy.DESTROY,
+        reset: Optional[Callable[[Cluster], None]] = None,
+        max_clusters: Optional[int] = None,
+        lock_dir: Optional[Path] = None,
+    ) -> None:
+        """
+        Create a pool of clusters.
+
+        Args:
+            size: The number of clusters of each kind to keep, including
+                leased clusters.
+            release_policy: What happens to a cluster when a lease of it ends.
+            reset: A function which takes a cluster which has been leased and
+                makes it ready to be leased again. This is required with
+                :py:attr:`ReleasePolicy.RESET`.
+            max_clusters: The maximum number of clusters which can exist at
+                the same time, for all pools which share ``lock_dir``,
+                including pools in other processes such as other
+                ``pytest-xdist`` workers. If ``None``, there is no maximum.
+            lock_dir: A directory for files which are locked to share
+                ``max_clusters`` between pools. By default this is a directory
+                in the system's temporary directory.
+
+        Raises:
+            ValueError: ``size`` or ``max_clusters`` is less than one, or
+                ``reset`` is not given with :py:attr:`ReleasePolicy.RESET`.
+        """
+        if size < 1:
+            raise ValueError('The size of a pool must be at least 1.')
+
+        if max_clusters is not None and max_clusters < 1:
+            message = 'The maximum number of clusters must be at least 1.'
+            raise ValueError(message)
+
+        if release_policy == ReleasePolicy.RESET and reset is None:
+            message = 'A reset function is required to reset clusters.'
+            raise ValueError(message)
+
+        self._size = size
+        self._release_policy = release_policy
+        self._reset = reset
+        self._max_clusters = max_clusters
+        default_lock_dir = Path(gettempdir()) / 'dcos-e2e-cluster-pool'
+        self._lock_dir = lock_dir or default_lock_dir
+        self._cluster_sets = {}  # type: Dict[Tuple[Any, ...], _ClusterSet]
+        self._slots = {}  # type: Dict[Cluster, FileLock]
+        self._condition = threading.Condition()
+        self._closed = False
+        self._executor = ThreadPoolExecutor()
+        # Clusters which are yet to be created, by the set they are for.
+        self._creations = {}  # type: Dict[Future, _ClusterSet]
+
+    def _acquire_slot(self) -> Optional[FileLock]:
+        """
+        Wait until a new cluster can be created without exceeding
+        ``max_clusters``, and return a held lock for the new cluster.
+
+        Returns:
+            A held lock which must be released when the new cluster is
+            destroyed, or ``None`` if there is no maximum.
+
+        Raises:
+            _PoolClosedError: The pool was closed while waiting.
+        """
+        if self._max_clusters is None:
+            return None
+
+        while not self._closed:
+            for slot_number in range(self._max_clusters):
+                lock_path = self._lock_dir / 'slot-{number}.lock'.format(
+                    number=slot_number,
+                )
+                lock = FileLock(path=lock_path)
+                if lock.acquire(blocking=False):
+                    return lock
+            time.sleep(_SLOT_RETRY_SECONDS)
+
+        raise _PoolClosedError
+
+    def _fill(self, cluster_set: _ClusterSet) -> None:
+        """
+        Start creating clusters until the set has ``size`` clusters.
+
+        The pool's condition must be held.
+        """
+        while not self._closed and cluster_set.count < self._size:
+            cluster_set.count += 1
+            future = self._executor.submit(self._add_cluster, cluster_set)
+            self._creations[future] = cluster_set
+            future.add_done_callback(self._creation_done)
+
+    def _creation_done(self, future: Future) -> None:
+        """
+        Stop tracking a cluster creation which has finished or been cancelled.
+        """
+        with self._condition:
+            self._creations.pop(future, None)
+
+    def _add_cluster(self, cluster_set: _ClusterSet) -> None:
+        """
+        Create a cluster and make it available to lease.
+        """
+        try:
+            slot = self._acquire_slot()
+            try:
+                with self._condition:
+                    if self._closed:
+                        raise _PoolClosedError
+                cluster = cluster_set.create()
+            except BaseException:
+                if slot is not None:
+                    slot.release()
+                raise
+        except _PoolClosedError:
+            with self._condition:
+                cluster_set.count -= 1
+            return
+        except Exception as exc:  # pylint: disable=broad-except
+            LOGGER.exception('Error creating a cluster for a pool.')
+            with self._condition:
+                cluster_set.count -= 1
+                cluster_set.errors.append(exc)
+                self._condition.notify_all()
+            return
+
+        with self._condition:
+            if slot is not None:
+                self._slots[cluster] = slot
+            closed = self._closed
+            if not closed:
+                cluster_set.available.append(cluster)
+                self._condition.notify_all()
+
+        if closed:
+            self._destroy(cluster=cluster)
+
+    def _destroy(self, cluster: Cluster) -> None:
+        """
+        Destroy a cluster and release its slot.
+        """
+        try:
+            cluster.destroy()
+        finally:
+            with self._condition:
+                slot = self._slots.pop(cluster, None)
+            if slot is not None:
+                slot.release()
+
+    def _replace(self, cluster_set: _ClusterSet, cluster: Cluster) -> None:
+        """
+        Destroy a cluster and start creating a cluster to replace it.
+        """
+        try:
+            self._destroy(cluster=cluster)
+        finally:
+            with self._condition:
+                cluster_set.count -= 1
+                self._fill(cluster_set=cluster_set)
+
+    def _reset_cluster(
+        self,
+        cluster_set: _ClusterSet,
+        cluster: Cluster,
+    ) -> None:
+        """
+        Reset a cluster and make it available to lease, or replace it if it
+        cannot be reset.
+        """
+        assert self._reset is not None
+        try:
+            self._reset(cluster)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception('Error resetting a cluster. It will be replaced.')
+            self._replace(cluster_set=cluster_set, cluster=cluster)
+            return
+
+        self._return(cluster_set=cluster_set, cluster=cluster)
+
+    def _return(self, cluster_set: _ClusterSet, cluster: Cluster) -> None:
+        """
+        Make a cluster available to lease, or destroy it if the pool is
+        closed.
+        """
+        with self._condition:
+            closed = self._closed
+            if not closed:
+                cluster_set.available.append(cluster)
+                self._condition.notify_all()
+
+        if closed:
+            self._destroy(cluster=cluster)
+
+    def _release(self, cluster_set: _ClusterSet, cluster: Cluster) -> None:
+        """
+        Handle the end of a lease of a cluster following the release policy.
+        """
+        if self._release_policy == ReleasePolicy.RECYCLE:
+            self._return(cluster_set=cluster_set, cluster=cluster)
+            return
+
+        handlers = {
+            ReleasePolicy.DESTROY: self._replace,
+            ReleasePolicy.RESET: self._reset_cluster,
+        }
+        handler = handlers[self._release_policy]
+        with self._condition:
+            if not self._closed:
+                self._executor.submit(handler, cluster_set, cluster)
+                return
+
+        self._destroy(cluster=cluster)
+
+    def _cluster_set(
+        self,
+        cluster_backend: ClusterBackend,
+        masters: int,
+        agents: int,
+        public_agents: int,
+        dcos_installer: Optional[Path],
+        dcos_config: Optional[Dict[str, Any]],
+        wait_for_dcos: Callable[[Cluster], Any],
+    ) -> _ClusterSet:
+        """
+        Return the set of clusters of the given kind, creating the set and
+        starting to create its clusters if needed.
+
+        The pool's condition must be held.
+
+        Raises:
+            ValueError: The pool is closed.
+        """
+        if self._closed:
+            raise ValueError('The pool is closed.')
+
+        extra_config = dcos_config or {}
+        key = (
+            cluster_backend,
+            masters,
+            agents,
+            public_agents,
+            dcos_installer,
+            json.dumps(extra_config, sort_keys=True, default=str),
+            wait_for_dcos,
+        )
+
+        def create() -> Cluster:
+            """
+            Create a cluster and install DC/OS on it if an installer is
+            given.
+            """
+            cluster = Cluster(
+                cluster_backend=cluster_backend,
+                masters=masters,
+                agents=agents,
+                public_agents=public_agents,
+            )
+            if dcos_installer is None:
+                return cluster
+
+            try:
+                cluster.install_dcos_from_path(
+                    dcos_installer=dcos_installer,
+                    dcos_config={**cluster.base_config, **extra_config},
+                    ip_detect_path=cluster_backend.ip_detect_path,
+                )
+                wait_for_dcos(cluster)
+            except BaseException:
+                cluster.destroy()
+                raise
+            return cluster
+
+        if key not in self._cluster_sets:
+            self._cluster_sets[key] = _ClusterSet(create=create)
+        cluster_set = self._cluster_sets[key]
+        self._fill(cluster_set=cluster_set)
+        return cluster_set
+
+    def provision(
+        self,
+        cluster_backend: ClusterBackend,
+        masters: int = 1,
+        agents: int = 1,
+        public_agents: int = 1,
+        dcos_installer: Optional[Path] = None,
+        dcos_config: Optional[Dict[str, Any]] = None,
+        wait_for_dcos: Callable[[Cluster], Any] = Cluster.wait_for_dcos_oss,
+    ) -> None:
+        """
+        Start creating clusters of a kind in the background, so that they are
+        ready before they are leased.
+
+        This returns immediately.
+        Clusters of a kind are also created when they are first leased.
+
+        Args:
+            cluster_backend: The backend to create clusters with.
+            masters: The number of master nodes of each cluster.
+            agents: The number of agent nodes of each cluster.
+            public_agents: The number of public agent nodes of each cluster.
+            dcos_installer: An installer to install DC/OS from on each
+                cluster. If ``None``, DC/OS is not installed.
+            dcos_config: DC/OS configuration to install DC/OS with, in
+                addition to the backend's base configuration.
+            wait_for_dcos: A function which takes a cluster and waits for
+                DC/OS to be ready on it, after DC/OS is installed.
+
+        Raises:
+            ValueError: The pool is closed.
+        """
+        with self._condition:
+            self._cluster_set(
+                cluster_backend=cluster_backend,
+                masters=masters,
+                agents=agents,
+                public_agents=public_agents,
+                dcos_installer=dcos_installer,
+                dcos_config=dcos_config,
+                wait_for_dcos=wait_for_dcos,
+            )
+
+    @contextmanager
+    def lease(
+        self,
+        cluster_backend: ClusterBackend,
+        masters: int = 1,
+        agents: int = 1,
+        public_agents: int = 1,
+        dcos_installer: Optional[Path] = None,
+        dcos_config: Optional[Dict[str, Any]] = None,
+        wait_for_dcos: Callable[[Cluster], Any] = Cluster.wait_for_dcos_oss,
+    ) -> Iterator[Cluster]:
+        """
+        Lease a cluster, waiting until one of the given kind is available.
+
+        The lease ends when the context manager exits, and then the pool's
+        release policy is followed.
+
+        Args:
+            cluster_backend: The backend to create clusters with.
+            masters: The number of master nodes of each cluster.
+            agents: The number of agent nodes of each cluster.
+            public_agents: The number of public agent nodes of each cluster.
+            dcos_installer: An installer to install DC/OS from on each
+                cluster. If ``None``, DC/OS is not installed.
+            dcos_config: DC/OS configuration to install DC/OS with, in
+                addition to the backend's base configuration.
+            wait_for_dcos: A function which takes a cluster and waits for
+                DC/OS to be ready on it, after DC/OS is installed.
+
+        Yields:
+            A cluster which is not leased by anyone else.
+
+        Raises:
+            ValueError: The pool is closed.
+            Exception: An error raised while creating a cluster of the given
+                kind in the background. Each such error is raised once.
+        """
+        with self._condition:
+            cluster_set = self._cluster_set(
+                cluster_backend=cluster_backend,
+                masters=masters,
+                agents=agents,
+                public_agents=public_agents,
+                dcos_installer=dcos_installer,
+                dcos_config=dcos_config,
+                wait_for_dcos=wait_for_dcos,
+            )
+            while not cluster_set.available:
+                if cluster_set.errors:
+                    raise cluster_set.errors.pop(0)
+                if self._closed:
+                    raise ValueError('The pool is closed.')
+                # Clusters which could not be created are replaced.
+                self._fill(cluster_set=cluster_set)
+                self._condition.wait()
+            cluster = cluster_set.available.pop(0)
+
+        try:
+            yield cluster
+        finally:
+            self._release(cluster_set=cluster_set, cluster=cluster)
+
+    def close(self) -> None:
+        """
+        Destroy all clusters which are not leased, and stop creating clusters.
+
+        Clusters which are leased are destroyed when their leases end.
+        """
+        with self._condition:
+            self._closed = True
+            clusters = [
+                cluster for cluster_set in self._cluster_sets.values()
+                for cluster in cluster_set.available
+            ]
+            for cluster_set in self._cluster_sets.values():
+                cluster_set.available = []
+            # Clusters which are waiting for a worker are never created.
+            for future, cluster_set in list(self._creations.items()):
+                if future.cancel():
+                    cluster_set.count -= 1
+            self._condition.notify_all()
+
+        # Clusters which are being created are destroyed once they are
+        # created.
+        self._executor.shutdown(wait=True)
+        for cluster in clusters:
+            self._destroy(cluster=cluster)
+
+    def __enter__(self) -> 'ClusterPool':
+        """
+        Enter a context manager.
+        The context manager receives this ``ClusterPool`` instance.
+        """
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """
+        On exiting, close the pool.
+        """
+        self.close()
@@ -0,0 +1,201 @@
+"""
+Snapshots of DC/OS clusters on Docker.
+
+A snapshot of a cluster is a Docker image for each node and a Docker volume
+for each anonymous volume of each node.
+New clusters can be created from a snapshot with the ``snapshot`` parameter
+of :py:class:`~dcos_e2e.backends.Docker`.
+"""
+
+import re
+from typing import Dict, List, Set
+
+import docker
+
+from ._rollout import run_on_nodes
+from .backends._docker._snapshots import (
+    IMAGE_REPOSITORY,
+    IP_ADDRESS_LABEL_KEY,
+    NODE_NUMBER_LABEL_KEY,
+    ROLE_LABEL_KEY,
+    SNAPSHOT_LABEL_KEY,
+    TARGET_LABEL_KEY,
+    copy_volume,
+)
+from .cluster import Cluster
+from .node import Node, Role
+from .rollout_policies import RolloutPolicy
+
+# Snapshot names are used in Docker image tags and volume names.
+# Image tags are at most 128 characters long, and the role and node number
+# are added to the name in tags.
+_NAME_PATTERN = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9_.-]{0,99}$')
+
+# Docker gives anonymous volumes random names of this form.
+_ANONYMOUS_VOLUME_NAME_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _validate_name(name: str) -> None:
+    """
+    Raise a ``ValueError`` if the given snapshot name cannot be used.
+    """
+    if not _NAME_PATTERN.match(name):
+        message = (
+            'Snapshot names must start with a letter or a digit, contain only '
+            'letters, digits, "_", "." and "-", and be at most 100 '
+            'characters long. "{name}" is not a valid snapshot name.'
+        ).format(name=name)
+        raise ValueError(message)
+
+
+def create_snapshot(cluster: Cluster, name: str) -> None:
+    """
+    Create a snapshot of a cluster on Docker.
+
+    The cluster's node containers are paused while the snapshot is created,
+    so that the snapshot has the state of every node at the same moment.
+    The cluster keeps running afterwards.
+
+    Each node container is committed to an image, and each anonymous volume
+    of each node container, such as the volumes at ``/opt``,
+    ``/var/lib/docker`` and ``/var/log/journal``, is copied to a new volume.
+    Named volumes and bind mounts, such as custom mounts, are not part of the
+    snapshot.
+
+    Args:
+        cluster: A cluster with nodes which have a ``docker_container_id``.
+            This is usually a cluster created with the Docker backend, after
+            DC/OS has been installed.
+        name: The name of the snapshot. This must start with a letter or a
+            digit, contain only letters, digits, ``_``, ``.`` and ``-``, and be
+            at most 100 characters long.
+
+    Raises:
+        ValueError: The name is not valid, a snapshot with the given name
+            already exists, or a node of the cluster is not a Docker
+            container.
+    """
+    _validate_name(name=name)
+    if name in snapshot_names():
+        message = 'A snapshot named "{name}" already exists.'.format(
+            name=name,
+        )
+        raise ValueError(message)
+
+    # Each of these properties may list containers, so each is read once.
+    masters = cluster.masters
+    agents = cluster.agents
+    public_agents = cluster.public_agents
+    nodes = {*masters, *agents, *public_agents}
+    if any(node.docker_container_id is None for node in nodes):
+        message = 'Only clusters with nodes on Docker can be snapshotted.'
+        raise ValueError(message)
+
+    node_numbers = {}  # type: Dict[Node, int]
+    for role_nodes in (masters, agents, public_agents):
+        ordered_nodes = sorted(
+            role_nodes,
+            key=lambda node: node.private_ip_address,
+        )
+        for node_number, node in enumerate(ordered_nodes):
+            node_numbers[node] = node_number
+
+    client = docker.from_env(version='auto')
+    containers = {
+        node: client.containers.get(node.docker_container_id)
+        for node in nodes
+    }
+
+    def snapshot_node(node: Node, role: Role) -> None:
+        container = containers[node]
+        node_number = str(node_numbers[node])
+        labels = {
+            SNAPSHOT_LABEL_KEY: name,
+            ROLE_LABEL_KEY: role.value,
+            NODE_NUMBER_LABEL_KEY: node_number,
+        }
+        tag = '{name}-{role}-{node_number}'.format(
+            name=name,
+            role=role.value,
+            node_number=node_number,
+        )
+        container.commit(
+            repository=IMAGE_REPOSITORY,
+            tag=tag,
+            # All containers are already paused.
+            pause=False,
+            conf={
+                'Labels': {
+                    **labels,
+                    IP_ADDRESS_LABEL_KEY: str(node.private_ip_address),
+                },
+            },
+        )
+
+        volume_mounts = [
+            mount for mount in container.attrs['Mounts']
+            if mount['Type'] == 'volume'
+            and _ANONYMOUS_VOLUME_NAME_PATTERN.match(mount['Name'])
+        ]
+        for volume_number, mount in enumerate(volume_mounts):
+            volume = client.volumes.create(
+                name='{repository}-{tag}-{volume_number}'.format(
+                    repository=IMAGE_REPOSITORY,
+                    tag=tag,
+                    volume_number=volume_number,
+                ),
+                labels={**labels, TARGET_LABEL_KEY: mount['Destination']},
+            )
+            copy_volume(
+                image=IMAGE_REPOSITORY + ':' + tag,
+                source=mount['Name'],
+                target=volume.name,
+            )
+
+    paused_containers = []  # type: List[docker.models.containers.Container]
+    try:
+        for container in containers.values():
+            container.pause()
+            paused_containers.append(container)
+
+        run_on_nodes(
+            operation=snapshot_node,
+            masters=masters,
+            agents=agents,
+            public_agents=public_agents,
+            rollout_policy=RolloutPolicy.concurrent(),
+        )
+    except Exception:
+        remove_snapshot(name=name)
+        raise
+    finally:
+        for container in paused_containers:
+            container.unpause()
+
+
+def remove_snapshot(name: str) -> None:
+    """
+    Remove the images and volumes of a snapshot.
+
+    Clusters created from the snapshot are not affected.
+
+    Args:
+        name: The name of the snapshot.
+    """
+    client = docker.from_env(version='auto')
+    filters = {'label': SNAPSHOT_LABEL_KEY + '=' + name}
+    for image in client.images.list(filters=filters):
+        # Containers created from the snapshot may use these images.
+        # Removing an image used by a container only removes its tags.
+        client.images.remove(image=image.id, force=True)
+    for volume in client.volumes.list(filters=filters):
+        volume.remove(force=True)
+
+
+def snapshot_names() -> Set[str]:
+    """
+    Return the names of all snapshots.
+    """
+    client = docker.from_env(version='auto')
+    images = client.images.list(filters={'label': SNAPSHOT_LABEL_KEY})
+    return set(image.labels[SNAPSHOT_LABEL_KEY] for image in images)
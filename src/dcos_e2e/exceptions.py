@@ -2,6 +2,9 @@
 Custom exceptions.
 """
 
+import subprocess
+from typing import Any, Dict, Optional
+
 
 class DCOSNotInstalledError(Exception):
     """
@@ -13,3 +16,69 @@ class DCOSTimeoutError(Exception):
     """
     Raised if DC/OS does not become ready within a given time boundary.
     """
+
+
+def _labelled_output(
+    errors: Dict[Any, subprocess.CalledProcessError],
+    stream: str,
+) -> bytes:
+    """
+    Join the output of the given errors, with each labelled by its node.
+    """
+    output = b''
+    for node, error in errors.items():
+        data = getattr(error, stream)  # type: Optional[bytes]
+        header = '--- {node} ---\n'.format(node=str(node))
+        output += header.encode() + (data or b'')
+        if not output.endswith(b'\n'):
+            output += b'\n'
+    return output
+
+
+class MultiNodeCalledProcessError(subprocess.CalledProcessError):
+    """
+    Raised if a command fails on one or more nodes while running an operation
+    on many nodes.
+
+    This is a ``subprocess.CalledProcessError``.
+    The ``returncode`` and ``cmd`` are those of an arbitrary failed node.
+    The ``stdout`` and ``stderr`` contain the output of every failed node,
+    with each labelled by its node.
+    """
+
+    def __init__(
+        self,
+        errors: Dict[Any, subprocess.CalledProcessError],
+    ) -> None:
+        """
+        Args:
+            errors: A mapping of :class:`~dcos_e2e.node.Node` s to the errors
+                raised when running commands on them.
+
+        Attributes:
+            errors: A mapping of :class:`~dcos_e2e.node.Node` s to the errors
+                raised when running commands on them.
+        """
+        first_error = next(iter(errors.values()))
+        super().__init__(
+            returncode=first_error.returncode,
+            cmd=first_error.cmd,
+            output=_labelled_output(errors=errors, stream='stdout'),
+            stderr=_labelled_output(errors=errors, stream='stderr'),
+        )
+        self.errors = errors
+
+    def __str__(self) -> str:
+        """
+        Describe the failure on each node.
+        """
+        lines = [
+            'Command failed on {count} node(s).'.format(
+                count=len(self.errors),
+            ),
+        ]
+        for node, error in self.errors.items():
+            lines.append(
+                '{node}: {error}'.format(node=str(node), error=str(error)),
+            )
+        return '\n'.join(lines)
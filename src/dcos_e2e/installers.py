@@ -0,0 +1,249 @@
+"""
+Tools for getting details of DC/OS installers.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ._file_lock import file_lock
+from ._installer_payload import InstallerFormatError, read_installer_details
+from .node import DCOSVariant
+
+LOGGER = logging.getLogger(__name__)
+
+# DC/OS variants by the ``variant`` given by
+# ``dcos_generate_config.sh --version``.
+_VARIANTS = {
+    '': DCOSVariant.OSS,
+    'ee': DCOSVariant.ENTERPRISE,
+}
+
+
+class InstallerDetails:
+    """
+    Details of a DC/OS installer.
+    """
+
+    def __init__(self, variant: DCOSVariant, version: str) -> None:
+        """
+        Args:
+            variant: The DC/OS variant which the installer installs.
+            version: The version of DC/OS which the installer installs.
+
+        Attributes:
+            variant: The DC/OS variant which the installer installs.
+            version: The version of DC/OS which the installer installs.
+        """
+        self.variant = variant
+        self.version = version
+
+
+def _default_cache_dir() -> Path:
+    """
+    Return the directory in which details of installers are cached by
+    default.
+    """
+    return Path(tempfile.gettempdir()) / 'dcos-e2e-installer-cache'
+
+
+def _sha256(path: Path) -> str:
+    """
+    Return the SHA-256 hash of the contents of a file.
+    """
+    digest = hashlib.sha256()
+    with path.open('rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_cache(cache_path: Path) -> Dict[str, Any]:
+    """
+    Return the contents of a cache file, or an empty cache if the file does
+    not exist or cannot be read.
+    """
+    try:
+        cache = json.loads(cache_path.read_text())  # type: Dict[str, Any]
+    except (OSError, ValueError):
+        cache = {}
+    cache.setdefault('files', {})
+    cache.setdefault('details', {})
+    return cache
+
+
+def _write_cache(cache_path: Path, cache: Dict[str, Any]) -> None:
+    """
+    Replace a cache file.
+
+    We write to a temporary file and then rename it so that readers never see
+    a partially written cache.
+    """
+    with tempfile.NamedTemporaryFile(
+        mode='w',
+        dir=str(cache_path.parent),
+        delete=False,
+    ) as cache_file:
+        json.dump(cache, cache_file)
+    os.replace(cache_file.name, str(cache_path))
+
+
+def installer_sha256(installer: Path, cache_dir: Optional[Path] = None) -> str:
+    """
+    Return the SHA-256 hash of the contents of an installer.
+
+    Hashes are cached on disk, and an installer is only read if its inode,
+    size or modification time has changed since its hash was cached.
+
+    Args:
+        installer: The path to a DC/OS installer.
+        cache_dir: The directory in which to cache hashes. If ``None``, a
+            directory in the system's temporary directory is used.
+    """
+    cache_dir = cache_dir or _default_cache_dir()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cache_path = cache_dir / 'installers.json'
+    stat = installer.stat()
+    key = str(installer.resolve())
+    file_record = [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    cached = _read_cache(cache_path=cache_path)['files'].get(key)
+    if cached and cached[:3] == file_record:
+        return str(cached[3])
+
+    sha256 = _sha256(path=installer)
+    with file_lock(path=cache_dir / 'installers.lock'):
+        cache = _read_cache(cache_path=cache_path)
+        cache['files'][key] = file_record + [sha256]
+        _write_cache(cache_path=cache_path, cache=cache)
+    return sha256
+
+
+def _run_installer_version(
+    installer: Path,
+    workspace_dir: Path,
+) -> Dict[str, str]:
+    """
+    Return the version details printed by an installer.
+    """
+    # The installer interface is as follows:
+    #
+    # ```
+    # $ bash dcos_generate_config.sh --version
+    # Extracting image from this script and loading into docker daemon, this \
+    # step can take a few minutes
+    # x dcos-genconf.75af9b2571de95e074-c74aa914537fa9f81b.tar
+    # Loaded image: mesosphere/dcos-genconf: \
+    # 75af9b2571de95e074-c74aa914537fa9f81b
+    # {
+    #     "variant": "",
+    #     "version": "1.12.0-rc3"
+    # }
+    # $ bash dcos_generate_config.sh --version
+    # {
+    #     "variant": "",
+    #     "version": "1.12.0-rc3"
+    # }
+    # ```
+    #
+    # Therefore we use the installer twice to eliminate all non-JSON text.
+    version_args = ['bash', str(installer), '--version']
+    subprocess.check_output(
+        args=version_args,
+        cwd=str(workspace_dir),
+        stderr=subprocess.PIPE,
+    )
+    result = subprocess.check_output(
+        args=version_args,
+        cwd=str(workspace_dir),
+        stderr=subprocess.PIPE,
+    )
+    version_info = json.loads(result.decode())
+    return {
+        'version': version_info['version'],
+        'variant': version_info['variant'],
+    }
+
+
+def get_installer_details(
+    installer: Path,
+    workspace_dir: Optional[Path] = None,
+    cache_dir: Optional[Path] = None,
+) -> InstallerDetails:
+    """
+    Get details of a DC/OS installer.
+
+    Details of an installer which has not been seen before are read from the
+    archive inside the installer, without extracting it.
+    If they cannot be read, the installer is run, which extracts a large
+    Docker image and loads it into Docker.
+    This can take minutes.
+    Details are then cached on disk by the SHA-256 hash of the installer, so
+    the installer is not run again for the same installer, even at another
+    path.
+
+    Args:
+        installer: The path to a DC/OS installer. This cannot include a
+            space.
+        workspace_dir: The directory in which large temporary files will be
+            created. If ``None``, the system's temporary directory is used.
+        cache_dir: The directory in which to cache details. If ``None``, a
+            directory in the system's temporary directory is used.
+
+    Raises:
+        ValueError: A space is in the installer path.
+        subprocess.CalledProcessError: There was an error extracting the given
+            installer.
+    """
+    if ' ' in str(installer):
+        message = (
+            'No spaces allowed in path to the installer. '
+            'See https://jira.d2iq.com/browse/DCOS_OSS-4429.'
+        )
+        raise ValueError(message)
+
+    cache_dir = cache_dir or _default_cache_dir()
+    cache_path = cache_dir / 'installers.json'
+    sha256 = installer_sha256(installer=installer, cache_dir=cache_dir)
+    details = _read_cache(cache_path=cache_path)['details'].get(sha256)
+    cached = details is not None
+
+    if details is None:
+        try:
+            details = read_installer_details(installer=installer)
+        except InstallerFormatError as exc:
+            message = (
+                'Cannot read details from {installer} without running it: '
+                '{error}'
+            ).format(installer=installer, error=exc)
+            LOGGER.debug(message)
+
+    if details is None or details['variant'] not in _VARIANTS:
+        base_workspace_dir = workspace_dir or Path(tempfile.gettempdir())
+        run_dir = base_workspace_dir / uuid.uuid4().hex
+        run_dir.mkdir(parents=True)
+        try:
+            details = _run_installer_version(
+                installer=installer,
+                workspace_dir=run_dir,
+            )
+        finally:
+            shutil.rmtree(path=str(run_dir), ignore_errors=True)
+
+    if not cached:
+        with file_lock(path=cache_dir / 'installers.lock'):
+            cache = _read_cache(cache_path=cache_path)
+            cache['details'][sha256] = details
+            _write_cache(cache_path=cache_path, cache=cache)
+
+    return InstallerDetails(
+        variant=_VARIANTS[details['variant']],
+        version=details['version'],
+    )
@@ -7,21 +7,51 @@ import logging
 import shlex
 import subprocess
 import tarfile
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from ipaddress import IPv4Address
 from pathlib import Path
 from tempfile import gettempdir
 from textwrap import dedent
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
 
 import yaml
 
-from ._node_transports import DockerExecTransport, NodeTransport, SSHTransport
+from ._node_transports import (
+    DockerAPITransport,
+    DockerExecTransport,
+    NodeTransport,
+    SSHTransport,
+)
+from ._subprocess_tools import (
+    BytesBuffer,
+    OutputBuffer,
+    SinkBuffer,
+    SpoolBuffer,
+    TailBuffer,
+)
 from .exceptions import DCOSNotInstalledError
 
 LOGGER = logging.getLogger(__name__)
 
+# The default for ``output_max_bytes``.
+_OUTPUT_MAX_BYTES = 1024 * 1024
+
+# A download of an installer to a node is tried this many times, resuming
+# from where the last attempt stopped.
+_INSTALLER_DOWNLOAD_ATTEMPTS = 5
+
 
 class Role(Enum):
     """
@@ -78,6 +108,7 @@ class Transport(Enum):
 
     SSH = 1
     DOCKER_EXEC = 2
+    DOCKER_API = 3
 
 
 class Output(Enum):
@@ -96,11 +127,142 @@ class Output(Enum):
             ``subprocess.CompletedProcess``, the stdout and stderr will be
             contained in the return value.
         NO_CAPTURE: Do not capture stdout or stderr.
+        CAPTURE_TAIL: Capture only the last ``output_max_bytes`` bytes of
+            each of stdout and stderr. This bounds memory use for commands
+            with a lot of output.
+        CAPTURE_SPOOLED: Capture stdout and stderr, keeping up to
+            ``output_max_bytes`` bytes of each in memory and the rest in
+            temporary files. If the code returns a
+            ``subprocess.CompletedProcess``, the stdout and stderr will be
+            binary file objects positioned at the start of the output.
+        STREAM: Write stdout and stderr to ``output_sink`` as they arrive.
+            Neither is kept, so they are not in the return value.
+            This is only supported by :py:meth:`~dcos_e2e.node.Node.run`, as
+            other methods do not take an ``output_sink``.
+            Other methods raise a ``ValueError`` before doing anything if
+            it is given.
     """
 
     LOG_AND_CAPTURE = 1
     CAPTURE = 2
     NO_CAPTURE = 3
+    CAPTURE_TAIL = 4
+    CAPTURE_SPOOLED = 5
+    STREAM = 6
+
+
+def _output_buffers(
+    output: Output,
+    output_max_bytes: int = _OUTPUT_MAX_BYTES,
+    output_sink: Optional[BinaryIO] = None,
+) -> Tuple[OutputBuffer, OutputBuffer]:
+    """
+    Return buffers for the stdout and stderr of a command.
+
+    Raises:
+        ValueError: ``output`` is ``Output.STREAM`` and ``output_sink`` is
+            ``None``.
+    """
+    if output == Output.CAPTURE_TAIL:
+        return (
+            TailBuffer(max_bytes=output_max_bytes),
+            TailBuffer(max_bytes=output_max_bytes),
+        )
+
+    if output == Output.CAPTURE_SPOOLED:
+        return (
+            SpoolBuffer(max_bytes=output_max_bytes),
+            SpoolBuffer(max_bytes=output_max_bytes),
+        )
+
+    if output == Output.STREAM:
+        if output_sink is None:
+            message = 'An output sink is required to stream output.'
+            raise ValueError(message)
+        lock = threading.Lock()
+        return (
+            SinkBuffer(sink=output_sink, lock=lock),
+            SinkBuffer(sink=output_sink, lock=lock),
+        )
+
+    return BytesBuffer(), BytesBuffer()
+
+
+def _reject_stream_output(output: Output) -> None:
+    """
+    Check that ``output`` can be used by a method which does not take an
+    ``output_sink``.
+
+    This is called before any work is done, so that a method does not fail
+    part way through.
+
+    Raises:
+        ValueError: ``output`` is ``Output.STREAM``.
+    """
+    if output == Output.STREAM:
+        message = (
+            'Output.STREAM is only supported by Node.run, as other methods do '
+            'not take an output sink.'
+        )
+        raise ValueError(message)
+
+
+def _send_file_script(
+    local_path: Path,
+    remote_path: Path,
+    user: str,
+    sudo: bool,
+) -> str:
+    """
+    Return a shell script which extracts a tar stream, read from stdin, to
+    ``remote_path``.
+
+    The tar stream must contain ``local_path`` with the name of
+    ``local_path``.
+    If ``remote_path`` is an existing directory, ``local_path`` is placed
+    inside it.
+
+    The parent directory of ``remote_path`` is created if it does not exist.
+    It is owned by ``user`` while the tar stream is extracted so that
+    ``user`` can write to it, and its owner is restored afterwards.
+
+    Args:
+        local_path: The path on the host of the file to send.
+        remote_path: The path on the node to place the file.
+        user: The name of the remote user which runs the script.
+        sudo: Whether to use sudo to create and change the owner of the
+            directory which holds the remote file.
+    """
+    sudo_prefix = 'sudo ' if sudo else ''
+    return dedent(
+        """\
+        set -e
+        parent={parent}
+        target={target}
+        staging=
+        {sudo}mkdir --parents "$parent"
+        original_owner="$({sudo}stat -c %U "$parent")"
+        cleanup() {{
+            if [ -n "$staging" ]; then rm -rf "$staging"; fi
+            {sudo}chown "$original_owner" "$parent"
+        }}
+        trap cleanup EXIT
+        {sudo}chown {user} "$parent"
+        if [ -d "$target" ]; then
+            tar -C "$target" -xf -
+        else
+            staging="$(mktemp -d "$parent/.send-file-XXXXXX")"
+            tar -C "$staging" -xf -
+            mv "$staging"/{name} "$target"
+        fi
+        """,
+    ).format(
+        parent=shlex.quote(str(remote_path.parent)),
+        target=shlex.quote(str(remote_path)),
+        name=shlex.quote(local_path.name),
+        user=shlex.quote(user),
+        sudo=sudo_prefix,
+    )
 
 
 class Node:
@@ -115,6 +277,7 @@ class Node:
         default_user: str,
         ssh_key_path: Path,
         default_transport: Transport = Transport.SSH,
+        docker_container_id: Optional[str] = None,
     ) -> None:
         """
         Args:
@@ -128,6 +291,10 @@ class Node:
                 owner.
             default_transport: The transport to use for communicating with
                 nodes.
+            docker_container_id: The ID of the Docker container of the node,
+                if the node is a Docker container. This is used by the Docker
+                exec transport. If ``None``, the container is found by the
+                public IP address of the node.
 
         Attributes:
             public_ip_address: The public IP address of the node.
@@ -135,12 +302,15 @@ class Node:
                 running on this node.
             default_user: The default username to use for connections.
             default_transport: The transport used to communicate with the node.
+            docker_container_id: The ID of the Docker container of the node,
+                or ``None`` if it is not known.
         """
         self.public_ip_address = public_ip_address
         self.private_ip_address = private_ip_address
         self.default_user = default_user
         self._ssh_key_path = ssh_key_path
         self.default_transport = default_transport
+        self.docker_container_id = docker_container_id
 
     def __eq__(self, other: Any) -> bool:
         """
@@ -173,12 +343,32 @@ class Node:
         """
         transport_dict = {
             Transport.SSH: SSHTransport,
-            Transport.DOCKER_EXEC: DockerExecTransport,
-        }
+            Transport.DOCKER_EXEC: lambda: DockerExecTransport(
+                container_id=self.docker_container_id,
+            ),
+            Transport.DOCKER_API: lambda: DockerAPITransport(
+                container_id=self.docker_container_id,
+            ),
+        }  # type: Dict[Transport, Callable[[], NodeTransport]]
 
-        transport_cls = transport_dict[transport]
-        # See https://github.com/python/mypy/issues/5135.
-        return transport_cls()  # type: ignore
+        return transport_dict[transport]()
+
+    def close_connections(self) -> None:
+        """
+        Close any persistent connections to this node.
+
+        Connections, such as SSH connections, are kept open between commands
+        to avoid the cost of connecting for each command.
+        They are closed automatically after being idle for a while, and when
+        the Python process exits.
+        Closing them is useful, for example, before the node is shut down.
+        Connections are opened again as needed.
+        """
+        for transport in Transport:
+            node_transport = self._get_node_transport(transport=transport)
+            node_transport.close_connections(
+                public_ip_address=self.public_ip_address,
+            )
 
     def install_dcos_from_url(
         self,
@@ -190,6 +380,7 @@ class Node:
         user: Optional[str] = None,
         output: Output = Output.CAPTURE,
         transport: Optional[Transport] = None,
+        dcos_installer_sha256: Optional[str] = None,
     ) -> None:
         """
         Install DC/OS in a platform-independent way by using
@@ -202,6 +393,8 @@ class Node:
         as it does not use a bootstrap node.
         Instead, the installer is put on this node and then extracted on this
         node, and then DC/OS is installed.
+        :py:class:`~dcos_e2e.cluster.Cluster` installation methods use a
+        bootstrap node.
 
         This creates a folder in ``/dcos-install-dir`` on this node which
         contains the DC/OS installation files that can be removed safely after
@@ -222,7 +415,16 @@ class Node:
             files_to_copy_to_genconf_dir: Pairs of host paths to paths on
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
+            dcos_installer_sha256: The expected SHA-256 hash of the
+                installer, in hexadecimal. If this is given, the downloaded
+                installer is not used unless it has this hash.
+
+        Raises:
+            subprocess.CalledProcessError: The installer could not be
+                downloaded, or it does not have the expected hash.
+            ValueError: ``output`` is ``Output.STREAM``.
         """
+        _reject_stream_output(output=output)
         node_dcos_installer = _node_installer_path(
             node=self,
             user=user,
@@ -236,6 +438,7 @@ class Node:
             transport=transport,
             user=user,
             node_path=node_dcos_installer,
+            sha256=dcos_installer_sha256,
         )
         _install_dcos_from_node_path(
             node=self,
@@ -271,6 +474,8 @@ class Node:
         as it does not use a bootstrap node.
         Instead, the installer is put on this node and then extracted on this
         node, and then DC/OS is installed.
+        :py:class:`~dcos_e2e.cluster.Cluster` installation methods use a
+        bootstrap node.
 
         This creates a folder in ``/dcos-install-dir`` on this node which
         contains the DC/OS installation files that can be removed safely after
@@ -291,7 +496,11 @@ class Node:
             files_to_copy_to_genconf_dir: Pairs of host paths to paths on
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
+
+        Raises:
+            ValueError: ``output`` is ``Output.STREAM``.
         """
+        _reject_stream_output(output=output)
         node_dcos_installer = _node_installer_path(
             node=self,
             user=user,
@@ -327,6 +536,7 @@ class Node:
         user: Optional[str] = None,
         output: Output = Output.CAPTURE,
         transport: Optional[Transport] = None,
+        dcos_installer_sha256: Optional[str] = None,
     ) -> None:
         """
         Upgrade DC/OS on this node.
@@ -348,7 +558,16 @@ class Node:
             files_to_copy_to_genconf_dir: Pairs of host paths to paths on
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
+            dcos_installer_sha256: The expected SHA-256 hash of the
+                installer, in hexadecimal. If this is given, the downloaded
+                installer is not used unless it has this hash.
+
+        Raises:
+            subprocess.CalledProcessError: The installer could not be
+                downloaded, or it does not have the expected hash.
+            ValueError: ``output`` is ``Output.STREAM``.
         """
+        _reject_stream_output(output=output)
         node_dcos_installer = _node_installer_path(
             node=self,
             user=user,
@@ -362,6 +581,7 @@ class Node:
             transport=transport,
             user=user,
             node_path=node_dcos_installer,
+            sha256=dcos_installer_sha256,
         )
         _upgrade_dcos_from_node_path(
             node=self,
@@ -406,7 +626,11 @@ class Node:
             files_to_copy_to_genconf_dir: Pairs of host paths to paths on
                 the installer node. These are files to copy from the host to
                 the installer node before installing DC/OS.
+
+        Raises:
+            ValueError: ``output`` is ``Output.STREAM``.
         """
+        _reject_stream_output(output=output)
         node_dcos_installer = _node_installer_path(
             node=self,
             user=user,
@@ -442,6 +666,8 @@ class Node:
         tty: bool = False,
         transport: Optional[Transport] = None,
         sudo: bool = False,
+        output_max_bytes: int = _OUTPUT_MAX_BYTES,
+        output_sink: Optional[BinaryIO] = None,
     ) -> subprocess.CompletedProcess:
         """
         Run a command on this node the given user.
@@ -467,6 +693,13 @@ class Node:
             transport: The transport to use for communicating with nodes. If
                 ``None``, the ``Node``'s ``default_transport`` is used.
             sudo: Whether to use "sudo" to run commands.
+            output_max_bytes: With ``Output.CAPTURE_TAIL``, the number of
+                bytes to keep from the end of each of stdout and stderr.
+                With ``Output.CAPTURE_SPOOLED``, the number of bytes of each
+                of stdout and stderr to keep in memory before using
+                temporary files.
+            output_sink: With ``Output.STREAM``, a binary file object to
+                write stdout and stderr to.
 
         Returns:
             The representation of the finished process.
@@ -474,6 +707,8 @@ class Node:
         Raises:
             subprocess.CalledProcessError: The process exited with a non-zero
                 code.
+            ValueError: ``output`` is ``Output.STREAM`` and ``output_sink`` is
+                ``None``.
         """
 
         env = dict(env or {})
@@ -490,17 +725,13 @@ class Node:
         transport = transport or self.default_transport
         node_transport = self._get_node_transport(transport=transport)
 
-        capture_output = {
-            Output.CAPTURE: True,
-            Output.LOG_AND_CAPTURE: True,
-            Output.NO_CAPTURE: False,
-        }[output]
-
-        log_output_live = {
-            Output.CAPTURE: False,
-            Output.LOG_AND_CAPTURE: True,
-            Output.NO_CAPTURE: False,
-        }[output]
+        capture_output = bool(output != Output.NO_CAPTURE)
+        log_output_live = bool(output == Output.LOG_AND_CAPTURE)
+        stdout_buffer, stderr_buffer = _output_buffers(
+            output=output,
+            output_max_bytes=output_max_bytes,
+            output_sink=output_sink,
+        )
 
         if log_output_live:
             log_msg = 'Running command `{cmd}` on a node `{node}`'.format(
@@ -518,6 +749,8 @@ class Node:
             ssh_key_path=self._ssh_key_path,
             public_ip_address=self.public_ip_address,
             capture_output=capture_output,
+            stdout_buffer=stdout_buffer,
+            stderr_buffer=stderr_buffer,
         )
 
     def popen(
@@ -527,6 +760,7 @@ class Node:
         env: Optional[Dict[str, Any]] = None,
         shell: bool = False,
         transport: Optional[Transport] = None,
+        pipe_stdin: bool = False,
     ) -> subprocess.Popen:
         """
         Open a pipe to a command run on a node as the given user.
@@ -546,6 +780,8 @@ class Node:
                 including whitespace.
             transport: The transport to use for communicating with nodes. If
                 ``None``, the ``Node``'s ``default_transport`` is used.
+            pipe_stdin: If ``True``, the returned process has a ``stdin``
+                pipe which is connected to the stdin of the command.
 
         Returns:
             The pipe object attached to the specified process.
@@ -565,6 +801,7 @@ class Node:
             env=env,
             ssh_key_path=self._ssh_key_path,
             public_ip_address=self.public_ip_address,
+            pipe_stdin=pipe_stdin,
         )
 
     def send_file(
@@ -587,115 +824,98 @@ class Node:
                 ``None``, the ``Node``'s ``default_transport`` is used.
             sudo: Whether to use sudo to create the directory which holds the
                 remote file.
+
+        Raises:
+            FileNotFoundError: ``local_path`` does not exist.
+            subprocess.CalledProcessError: The file could not be placed on the
+                node.
         """
+        if not local_path.exists():
+            message = 'No such file or directory: {path}'.format(
+                path=local_path,
+            )
+            raise FileNotFoundError(message)
+
         if user is None:
             user = self.default_user
 
         transport = transport or self.default_transport
         node_transport = self._get_node_transport(transport=transport)
-        mkdir_args = ['mkdir', '--parents', str(remote_path.parent)]
-        self.run(
-            args=mkdir_args,
-            user=user,
-            transport=transport,
-            sudo=sudo,
-        )
-
-        stat_cmd = ['stat', '-c', '"%U"', str(remote_path.parent)]
-        stat_result = self.run(
-            args=stat_cmd,
-            shell=True,
-            user=user,
-            transport=transport,
-            sudo=sudo,
-        )
-
-        original_parent = stat_result.stdout.decode().strip()
 
-        chown_args = ['chown', user, str(remote_path.parent)]
-        self.run(
-            args=chown_args,
-            user=user,
-            transport=transport,
-            sudo=sudo,
-        )
-
-        tempdir = Path(gettempdir())
-        tar_name = '{unique}.tar'.format(unique=uuid.uuid4().hex)
-        local_tar_path = tempdir / tar_name
-
-        is_dir = self.run(
-            args=[
-                'python',
-                '-c',
-                '"import os; print(os.path.isdir(\'{remote_path}\'))"'.format(
-                    remote_path=remote_path,
-                ),
-            ],
-            shell=True,
-        ).stdout.decode().strip()
-
-        with tarfile.open(str(local_tar_path), 'w', dereference=True) as tar:
-            arcname = Path(remote_path.name)
-            if is_dir == 'True':
-                arcname = arcname / local_path.name
-            tar.add(str(local_path), arcname=str(arcname), recursive=True)
-
-        # `remote_path` may be a tmpfs mount.
-        # At the time of writing, for example, `/tmp` is a tmpfs mount
-        # on the Docker backend.
-        # Copying files to tmpfs mounts fails silently.
+        # The file is sent as a tar stream over the stdin of a single remote
+        # script, rather than being copied to the node and then extracted.
+        # This means that there is no temporary file on the host or the node.
+        # It also avoids copying files into tmpfs mounts with ``docker cp``,
+        # which fails silently.
         # See https://github.com/moby/moby/issues/22020.
-        home_path = self.run(
-            args=['echo', '$HOME'],
-            user=user,
-            transport=transport,
-            sudo=False,
-            shell=True,
-        ).stdout.strip().decode()
-        # Therefore, we create a temporary file within our home directory.
-        # We then remove the temporary file at the end of this function.
-
-        remote_tar_path = Path(home_path) / tar_name
-
-        node_transport.send_file(
-            local_path=local_tar_path,
-            remote_path=remote_tar_path,
+        args = [
+            '/bin/sh',
+            '-c',
+            _send_file_script(
+                local_path=local_path,
+                remote_path=remote_path,
+                user=user,
+                sudo=sudo,
+            ),
+        ]
+        process = node_transport.popen(
+            args=args,
             user=user,
+            env={},
             ssh_key_path=self._ssh_key_path,
             public_ip_address=self.public_ip_address,
+            pipe_stdin=True,
         )
 
-        Path(local_tar_path).unlink()
-
-        tar_args = [
-            'tar',
-            '-C',
-            str(remote_path.parent),
-            '-xvf',
-            str(remote_tar_path),
-        ]
-        self.run(
-            args=tar_args,
-            user=user,
-            transport=transport,
-            sudo=False,
-        )
-
-        chown_args = ['chown', original_parent, str(remote_path.parent)]
-        self.run(
-            args=chown_args,
-            user=user,
-            transport=transport,
-            sudo=sudo,
-        )
-
-        self.run(
-            args=['rm', str(remote_tar_path)],
-            user=user,
-            transport=transport,
-            sudo=sudo,
-        )
+        assert process.stdin is not None
+        assert process.stdout is not None
+        assert process.stderr is not None
+
+        # Output is read while the tar is written so that the command cannot
+        # block on a full output pipe.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            stdout_future = executor.submit(process.stdout.read)
+            stderr_future = executor.submit(process.stderr.read)
+            try:
+                with tarfile.open(
+                    fileobj=process.stdin,
+                    mode='w|',
+                    dereference=True,
+                ) as tar:
+                    tar.add(
+                        str(local_path),
+                        arcname=local_path.name,
+                        recursive=True,
+                    )
+            except BrokenPipeError:
+                # The remote command exited early.
+                # Its error is raised below.
+                pass
+            except BaseException:
+                # For example, a local file could not be read.
+                # The remote command is stopped so that reading its output
+                # finishes.
+                process.kill()
+                raise
+            finally:
+                # The remote command reads until stdin is closed.
+                try:
+                    process.stdin.close()
+                except OSError:
+                    # The remote command has exited or has been stopped.
+                    pass
+                returncode = process.wait()
+
+            stdout = stdout_future.result()
+            stderr = stderr_future.result()
+
+        if returncode != 0:
+            raise subprocess.CalledProcessError(
+                returncode=returncode,
+                cmd=args,
+                output=stdout,
+                stderr=stderr,
+            )
 
     def download_file(
         self,
@@ -824,9 +1044,15 @@ def _prepare_installer(
     transport: Optional[Transport],
     files_to_copy_to_genconf_dir: Iterable[Tuple[Path, Path]],
     user: Optional[str],
+    bootstrap_url: Optional[str] = None,
 ) -> None:
     """
     Put files in place for DC/OS to be installed or upgraded.
+
+    Args:
+        bootstrap_url: The ``bootstrap_url`` to put in the DC/OS
+            configuration. If ``None``, the ``genconf/serve`` directory next to
+            the installer is used, which is only available to the given node.
     """
     tempdir = Path(gettempdir())
 
@@ -841,23 +1067,32 @@ def _prepare_installer(
         sudo=True,
     )
 
-    serve_dir_path = remote_genconf_path / 'serve'
-    bootstrap_url = 'file://{serve_dir_path}'.format(
-        serve_dir_path=serve_dir_path,
-    )
+    if bootstrap_url is None:
+        serve_dir_path = remote_genconf_path / 'serve'
+        bootstrap_url = 'file://{serve_dir_path}'.format(
+            serve_dir_path=serve_dir_path,
+        )
+
     extra_config = {'bootstrap_url': bootstrap_url}
     dcos_config = {**dcos_config, **extra_config}
     config_yaml = yaml.dump(data=dcos_config)
-    config_file_path = tempdir / 'config.yaml'
+    # This may be called for many nodes at the same time, so each call uses
+    # its own file.
+    config_file_path = tempdir / '{unique}-config.yaml'.format(
+        unique=uuid.uuid4().hex,
+    )
     Path(config_file_path).write_text(data=config_yaml)
 
-    node.send_file(
-        local_path=config_file_path,
-        remote_path=remote_genconf_path / 'config.yaml',
-        transport=transport,
-        user=user,
-        sudo=True,
-    )
+    try:
+        node.send_file(
+            local_path=config_file_path,
+            remote_path=remote_genconf_path / 'config.yaml',
+            transport=transport,
+            user=user,
+            sudo=True,
+        )
+    finally:
+        config_file_path.unlink()
 
     for host_path, installer_path in files_to_copy_to_genconf_dir:
         relative_installer_path = installer_path.relative_to('/genconf')
@@ -1013,19 +1248,63 @@ def _download_installer_to_node(
     transport: Optional[Transport],
     node_path: Path,
     user: Optional[str],
+    sha256: Optional[str] = None,
 ) -> None:
     """
     Download a DC/OS installer to a node.
+
+    The installer is downloaded to a partial file next to ``node_path`` and
+    moved to ``node_path`` when it is complete.
+    If the download fails part way through, it is resumed from where it
+    stopped, so that a multi-GB installer is not downloaded from the start
+    again.
+
+    Args:
+        sha256: The expected SHA-256 hash of the installer, in hexadecimal.
+            If this is given, the installer is only moved to ``node_path`` if
+            it has this hash.
+
+    Raises:
+        subprocess.CalledProcessError: The installer could not be downloaded
+            or the downloaded installer does not have the expected hash.
     """
-    curl_args = [
-        'curl',
-        '-f',
-        dcos_installer_url,
-        '-o',
-        str(node_path),
-    ]
+    script = dedent(
+        """\
+        set -e
+        target={target}
+        url={url}
+        expected_sha256={sha256}
+        partial="$target.partial"
+        attempt=1
+        until curl --fail --location --continue-at - \\
+            --output "$partial" "$url"; do
+            status=$?
+            # 33 means that the server cannot resume the download.
+            if [ "$status" -eq 33 ]; then
+                rm -f "$partial"
+            fi
+            if [ "$attempt" -ge {attempts} ]; then
+                exit "$status"
+            fi
+            attempt=$((attempt + 1))
+            sleep 1
+        done
+        if [ -n "$expected_sha256" ] && ! echo "$expected_sha256  $partial" \\
+            | sha256sum --check --status; then
+            rm -f "$partial"
+            echo "The installer downloaded from $url has the wrong hash." >&2
+            exit 1
+        fi
+        mv "$partial" "$target"
+        """,
+    ).format(
+        target=shlex.quote(str(node_path)),
+        url=shlex.quote(dcos_installer_url),
+        sha256=shlex.quote(sha256 or ''),
+        attempts=_INSTALLER_DOWNLOAD_ATTEMPTS,
+    )
     node.run(
-        args=curl_args,
+        args=['/bin/sh', '-c', script],
         output=output,
         transport=transport,
         user=user,
@@ -1033,6 +1312,36 @@ def _download_installer_to_node(
     )
 
 
+# The output to use when generating a node upgrade script, for each
+# ``output`` given.
+# We do not respect ``output`` here because we need to capture output for the
+# location of the script.
+# We cannot just use ``Output.CAPTURE`` because then we will have silence in
+# the test output and Travis CI will error.
+# Only the last line of output is needed, so other capture modes only keep the
+# end of the output.
+_UPGRADE_SCRIPT_OUTPUT = {
+    Output.CAPTURE: Output.CAPTURE,
+    Output.LOG_AND_CAPTURE: Output.LOG_AND_CAPTURE,
+    Output.NO_CAPTURE: Output.LOG_AND_CAPTURE,
+    Output.CAPTURE_TAIL: Output.CAPTURE_TAIL,
+    Output.CAPTURE_SPOOLED: Output.CAPTURE_TAIL,
+    Output.STREAM: Output.CAPTURE_TAIL,
+}
+
+
+def _upgrade_script_location(result: subprocess.CompletedProcess) -> str:
+    """
+    Return the location of the node upgrade script given in the output of
+    ``dcos_generate_config.sh --generate-node-upgrade-script``.
+
+    This is a path if the ``bootstrap_url`` is a ``file://`` URL, and a URL
+    otherwise.
+    """
+    last_line = result.stdout.decode().split()[-1]
+    return str(last_line.split('file://')[-1])
+
+
 def _upgrade_dcos_from_node_path(
     remote_dcos_installer: Path,
     node: Node,
@@ -1127,26 +1436,16 @@ def _upgrade_dcos_from_node_path(
         node.dcos_build_info().version,
     ]
 
-    # We do not respect ``output`` here because we need to capture output
-    # for the result.
-    # We cannot just use ``Output.CAPTURE`` because then we will have
-    # silence in the test output and Travis CI will error.
-    output_map = {
-        Output.CAPTURE: Output.CAPTURE,
-        Output.LOG_AND_CAPTURE: Output.LOG_AND_CAPTURE,
-        Output.NO_CAPTURE: Output.LOG_AND_CAPTURE,
-    }
     result = node.run(
         args=genconf_args,
-        output=output_map[output],
+        output=_UPGRADE_SCRIPT_OUTPUT[output],
         shell=True,
         transport=transport,
         user=user,
         sudo=True,
     )
 
-    last_line = result.stdout.decode().split()[-1]
-    upgrade_script_path = Path(last_line.split('file://')[-1])
+    upgrade_script_path = Path(_upgrade_script_location(result=result))
 
     node.run(
         args=['rm', str(remote_dcos_installer)],
@@ -0,0 +1,108 @@
+"""
+Reports of how long each phase of waiting for DC/OS took.
+"""
+
+from typing import Iterable
+
+
+class PhaseTiming:
+    """
+    A record of when one phase of waiting for DC/OS started and when it
+    became ready.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        started_after_seconds: float,
+        ready_after_seconds: float,
+        attempts: int,
+    ) -> None:
+        """
+        Args:
+            name: The name of the phase, for example ``marathon``.
+            started_after_seconds: The number of seconds after waiting started
+                that the phase started.
+            ready_after_seconds: The number of seconds after waiting started
+                that the phase became ready.
+            attempts: The number of times the phase's check was run.
+
+        Attributes:
+            name: The name of the phase, for example ``marathon``.
+            started_after_seconds: The number of seconds after waiting started
+                that the phase started.
+            ready_after_seconds: The number of seconds after waiting started
+                that the phase became ready.
+            attempts: The number of times the phase's check was run.
+        """
+        self.name = name
+        self.started_after_seconds = started_after_seconds
+        self.ready_after_seconds = ready_after_seconds
+        self.attempts = attempts
+
+    @property
+    def duration_seconds(self) -> float:
+        """
+        The number of seconds from when the phase started until it became
+        ready.
+        """
+        return self.ready_after_seconds - self.started_after_seconds
+
+
+class ReadinessReport:
+    """
+    A record of when each phase of waiting for DC/OS became ready.
+    """
+
+    def __init__(self, phases: Iterable[PhaseTiming]) -> None:
+        """
+        Args:
+            phases: The timings of each phase, in the order that the phases
+                were declared.
+
+        Attributes:
+            phases: The timings of each phase, in the order that the phases
+                were declared.
+        """
+        self.phases = tuple(phases)
+
+    @property
+    def total_seconds(self) -> float:
+        """
+        The number of seconds after waiting started that the last phase became
+        ready.
+        """
+        return max(
+            (phase.ready_after_seconds for phase in self.phases),
+            default=0,
+        )
+
+    def phase(self, name: str) -> PhaseTiming:
+        """
+        Return the timing of the phase with the given name.
+
+        Raises:
+            KeyError: There is no phase with the given name.
+        """
+        for phase in self.phases:
+            if phase.name == name:
+                return phase
+        raise KeyError(name)
+
+    def __str__(self) -> str:
+        """
+        Return a table of phase timings.
+        """
+        lines = []
+        for phase in self.phases:
+            line = (
+                '{name}: ready after {ready:.1f}s '
+                '(started after {started:.1f}s, {attempts} attempts)'
+            ).format(
+                name=phase.name,
+                ready=phase.ready_after_seconds,
+                started=phase.started_after_seconds,
+                attempts=phase.attempts,
+            )
+            lines.append(line)
+        return '\n'.join(lines)
@@ -0,0 +1,113 @@
+"""
+Policies for running an operation, such as installing or upgrading DC/OS, on
+many nodes of a cluster.
+"""
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from .node import Role
+
+
+class RolloutPolicy:
+    """
+    A policy for the order in which nodes are operated on, and for how many
+    nodes are operated on at the same time.
+    """
+
+    def __init__(
+        self,
+        role_order: Sequence[Iterable[Role]] = (
+            (Role.MASTER, Role.AGENT, Role.PUBLIC_AGENT),
+        ),
+        parallelism: Optional[Dict[Role, int]] = None,
+    ) -> None:
+        """
+        Create a rollout policy.
+
+        By default, every node is operated on at the same time.
+
+        Args:
+            role_order: Groups of roles. The operation is run on all nodes
+                with the roles in one group, and it must succeed on all of
+                them, before it is run on nodes with the roles in the next
+                group. Each role must be in exactly one group.
+            parallelism: The maximum number of nodes with each role to operate
+                on at the same time. Roles which are not in this mapping have
+                no maximum.
+
+        Attributes:
+            role_order: Groups of roles. The operation is run on all nodes
+                with the roles in one group, and it must succeed on all of
+                them, before it is run on nodes with the roles in the next
+                group.
+            parallelism: The maximum number of nodes with each role to operate
+                on at the same time. Roles which are not in this mapping have
+                no maximum.
+
+        Raises:
+            ValueError: A role is not in exactly one group, or a given
+                parallelism is less than one.
+        """
+        groups = tuple(tuple(roles) for roles in role_order)
+        ordered_roles = [role for roles in groups for role in roles]
+        if sorted(ordered_roles, key=lambda role: role.value) != sorted(
+            Role,
+            key=lambda role: role.value,
+        ):
+            message = 'Each role must be in exactly one group.'
+            raise ValueError(message)
+
+        parallelism = dict(parallelism or {})
+        for role, maximum in parallelism.items():
+            if maximum < 1:
+                message = (
+                    'The parallelism for "{role}" must be at least 1.'
+                ).format(role=role.name)
+                raise ValueError(message)
+
+        self.role_order = groups  # type: Tuple[Tuple[Role, ...], ...]
+        self.parallelism = parallelism
+
+    @classmethod
+    def concurrent(cls) -> 'RolloutPolicy':
+        """
+        Return a policy which operates on every node at the same time.
+        """
+        return cls()
+
+    @classmethod
+    def serial(cls) -> 'RolloutPolicy':
+        """
+        Return a policy which operates on one node at a time.
+        Masters are operated on first, then agents, then public agents.
+        """
+        return cls(
+            role_order=(
+                (Role.MASTER, ),
+                (Role.AGENT, ),
+                (Role.PUBLIC_AGENT, ),
+            ),
+            parallelism={role: 1 for role in Role},
+        )
+
+    @classmethod
+    def rolling(cls, agent_parallelism: int = 1) -> 'RolloutPolicy':
+        """
+        Return a policy which operates on masters one at a time, and then on
+        agents and public agents in parallel.
+
+        Args:
+            agent_parallelism: The maximum number of agents, and the maximum
+                number of public agents, to operate on at the same time.
+        """
+        return cls(
+            role_order=(
+                (Role.MASTER, ),
+                (Role.AGENT, Role.PUBLIC_AGENT),
+            ),
+            parallelism={
+                Role.MASTER: 1,
+                Role.AGENT: agent_parallelism,
+                Role.PUBLIC_AGENT: agent_parallelism,
+            },
+        )
@@ -3,11 +3,14 @@ Common commands and command factories.
 """
 
 from pathlib import Path
+from typing import List, Optional
 
 import click
 import requests
 from tqdm import tqdm
 
+from dcos_e2e.artifact_cache import ArtifactCache
+
 
 @click.command('download-installer')
 @click.option(
@@ -58,56 +61,38 @@ def download_installer(
         base_url = 'https://downloads.dcos.io/dcos/'
         url = base_url + dcos_version + '/dcos_generate_config.sh'
 
-    head_resp = requests.head(url)
-    if not head_resp.ok:
-        message = 'Cannot download installer from {url}.'.format(url=url)
-        ctx.fail(message=message)
-
     if path.is_dir():
         path = path / 'dcos_generate_config.sh'
 
     if not path.exists():
         path.parent.mkdir(parents=True, exist_ok=True)
 
-    # See
-    # https://stackoverflow.com/questions/16694907/how-to-download-large-file-in-python-with-requests-py
+    progress_bars = []  # type: List[tqdm]
 
-    stream = requests.get(url, stream=True)
-    assert stream.ok
-    content_length = int(stream.headers['Content-Length'])
-    total_written = 0
-    chunk_size = 1024
-    # See http://click.pocoo.org/7/arguments/#file-args for parameter
-    # information.
-    content_iter = stream.iter_content(chunk_size=chunk_size)
-    progress_bar = tqdm(
-        iterable=content_iter,
-        total=content_length / chunk_size,
-        dynamic_ncols=True,
-        bar_format='{l_bar}{bar}',
-        unit_scale=None,
-    )
-    with click.open_file(
-        filename=str(path),
-        mode='wb',
-        atomic=True,
-        lazy=True,
-    ) as file_descriptor:
-        for chunk in progress_bar:
-            # Enable at the start of each chunk, disable at the end, to avoid
-            # showing statistics at the end.
-            progress_bar.disable = False
-            # Filter out keep-alive new chunks.
-            if chunk:
-                total_written += len(chunk)
-                file_descriptor.write(chunk)  # type: ignore
-            progress_bar.disable = True
+    def show_progress(downloaded: int, total: Optional[int]) -> None:
+        """
+        Show the progress of downloading the installer.
+        """
+        if not progress_bars:
+            progress_bars.append(
+                tqdm(
+                    total=total,
+                    dynamic_ncols=True,
+                    bar_format='{l_bar}{bar}',
+                    unit_scale=None,
+                ),
+            )
+        progress_bar = progress_bars[0]
+        progress_bar.update(downloaded - progress_bar.n)
 
-    message = (
-        'Downloaded {total_written} bytes. '
-        'Expected {content_length} bytes.'
-    ).format(
-        total_written=total_written,
-        content_length=content_length,
-    )
-    assert total_written == content_length, message
+    # Installers are kept in a cache on the host, so an installer which has
+    # been downloaded before is linked or copied from the cache rather than
+    # downloaded again.
+    try:
+        ArtifactCache().copy(url=url, path=path, progress=show_progress)
+    except requests.RequestException:
+        message = 'Cannot download installer from {url}.'.format(url=url)
+        ctx.fail(message=message)
+    finally:
+        for progress_bar in progress_bars:
+            progress_bar.close()
@@ -301,7 +301,6 @@ def _set_logging(
     # Disable debug output from `docker` and `urllib3` libraries
     logging.getLogger('urllib3.connectionpool').setLevel(logging.WARN)
     logging.getLogger('docker').setLevel(logging.WARN)
-    logging.getLogger('sarge').setLevel(logging.WARN)
 
     # These warnings are overwhelming and not useful.
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -345,6 +344,22 @@ def test_env_run_option(command: Callable[..., None]) -> Callable[..., None]:
     return function
 
 
+def sync_watch_option(command: Callable[..., None]) -> Callable[..., None]:
+    """
+    A decorator for choosing whether to keep syncing code as it changes.
+    """
+    function = click.option(
+        '--watch',
+        is_flag=True,
+        help=(
+            'With this flag set, files are synced again each time they '
+            'change, until this command is interrupted. '
+            'Only changed files are sent.'
+        ),
+    )(command)  # type: Callable[..., None]
+    return function
+
+
 def cluster_id_option(command: Callable[..., None]) -> Callable[..., None]:
     """
     A Click option for choosing a new cluster ID.
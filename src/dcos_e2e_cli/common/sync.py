@@ -2,18 +2,29 @@
 Tools for syncing code to a cluster.
 """
 
+import hashlib
 import io
+import json
+import logging
+import os
+import shlex
+import subprocess
 import sys
 import tarfile
 import tempfile
-from pathlib import Path
-from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from textwrap import dedent
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import click
 
 from dcos_e2e.cluster import Cluster
 from dcos_e2e.node import DCOSVariant, Node
 from dcos_e2e_cli.common.variants import get_cluster_variant
+from dcos_e2e_cli.common.watch import watch_for_changes
+
+LOGGER = logging.getLogger(__name__)
 
 SYNC_HELP = (
     """
@@ -37,66 +48,383 @@ SYNC_HELP = (
 )
 
 
-def _tar_with_filter(
-    path: Path,
-    tar_filter: Callable[[tarfile.TarInfo], Optional[tarfile.TarInfo]],
-) -> io.BytesIO:
+# Hashes of local files, keyed by path, modification time and size.
+# This is shared by all syncs so that unchanged files are not read again.
+_HASH_CACHE_PATH = Path(tempfile.gettempdir()) / 'dcos-e2e-sync-hashes.json'
+
+# The SHA-256 hashes of files on masters, keyed by the master and the remote
+# directory of a sync target, and then by paths relative to that directory.
+_MasterHashes = Dict[Tuple[Node, Path], Dict[PurePosixPath, str]]
+
+# A shell script which prints the SHA-256 hash and relative path of each file
+# in the directory given as the first argument, excluding Python cache files.
+# Nothing is printed if the directory does not exist.
+_REMOTE_MANIFEST_SCRIPT = dedent(
+    """\
+    if [ -d "$1" ]; then
+        cd "$1" && find . -type f ! -path '*/__pycache__/*' ! -name '*.pyc' \\
+            -exec sha256sum {} +
+    fi
+    """,
+)
+
+
+def _is_cache_file(relative_path: PurePosixPath) -> bool:
     """
-    Return a tar of a files in a given directory, which are not filtered out
-    by the ``filter``.
+    Return whether a file is a Python or pytest cache file.
     """
-    tarstream = io.BytesIO()
-    with tarfile.TarFile(fileobj=tarstream, mode='w') as tar:
-        tar.add(name=str(path), arcname='/', filter=tar_filter)
-    tarstream.seek(0)
+    return bool(
+        '__pycache__' in relative_path.parts
+        or relative_path.suffix == '.pyc',
+    )
 
-    return tarstream
+
+def _local_files(path: Path) -> Dict[PurePosixPath, Path]:
+    """
+    Return a mapping of relative paths to paths of the files in the given
+    directory, excluding Python and pytest cache files.
+    """
+    files = {}
+    for file_path in path.rglob('*'):
+        relative_path = PurePosixPath(file_path.relative_to(path).as_posix())
+        if file_path.is_file() and not _is_cache_file(relative_path):
+            files[relative_path] = file_path
+    return files
 
 
-def _cache_filter(tar_info: tarfile.TarInfo) -> Optional[tarfile.TarInfo]:
+def _sha256(path: Path) -> str:
     """
-    Filter for ``tarfile.TarFile.add`` which removes Python and pytest cache
-    files.
+    Return the SHA-256 hash of the contents of a file.
+    """
+    digest = hashlib.sha256()
+    with path.open('rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _local_hashes(paths: Iterable[Path]) -> Dict[Path, str]:
     """
-    if '__pycache__' in tar_info.name:
-        return None
-    if tar_info.name.endswith('.pyc'):
-        return None
-    return tar_info
+    Return the SHA-256 hashes of the contents of the given files.
 
+    Hashes are cached on disk, and a file is only read if its modification
+    time or size has changed since its hash was cached.
 
-def _send_tarstream_to_node_and_extract(
-    tarstream: io.BytesIO,
+    Files which cannot be read, for example because they have been removed
+    since they were found, are left out.
+    """
+    try:
+        cache = json.loads(_HASH_CACHE_PATH.read_text())
+    except (OSError, ValueError):
+        cache = {}
+
+    hashes = {}
+    for path in paths:
+        key = str(path.resolve())
+        try:
+            stat = path.stat()
+            cached = cache.get(key)
+            if cached and cached[:2] == [stat.st_mtime_ns, stat.st_size]:
+                file_hash = cached[2]
+            else:
+                file_hash = _sha256(path=path)
+                cache[key] = [stat.st_mtime_ns, stat.st_size, file_hash]
+        except OSError:
+            continue
+        hashes[path] = file_hash
+
+    # Write to a temporary file and then rename it so that concurrent syncs
+    # never read a partially written cache.
+    with tempfile.NamedTemporaryFile(
+        mode='w',
+        dir=str(_HASH_CACHE_PATH.parent),
+        delete=False,
+    ) as cache_file:
+        json.dump(cache, cache_file)
+    os.replace(cache_file.name, str(_HASH_CACHE_PATH))
+    return hashes
+
+
+def _remote_hashes(
     node: Node,
     remote_path: Path,
     sudo: bool,
+) -> Dict[PurePosixPath, str]:
+    """
+    Return a mapping of relative paths to SHA-256 hashes of the files in a
+    directory on a node, excluding Python and pytest cache files.
+    """
+    result = node.run(
+        args=[
+            '/bin/sh',
+            '-c',
+            _REMOTE_MANIFEST_SCRIPT,
+            'manifest',
+            str(remote_path),
+        ],
+        sudo=sudo,
+    )
+    hashes = {}
+    for line in result.stdout.decode().splitlines():
+        file_hash, _, name = line.partition('  ')
+        hashes[PurePosixPath(name)] = file_hash
+    return hashes
+
+
+def _add_file(
+    tar: tarfile.TarFile,
+    local_path: Path,
+    relative_path: PurePosixPath,
 ) -> None:
     """
-    Given a tarstream, send the contents to a remote path.
+    Add a local file to an archive.
+
+    The file is read before anything is written to the archive, so that a
+    file which changes or is removed while it is added does not leave a
+    partial entry.
+
+    Raises:
+        OSError: The file cannot be read.
+    """
+    tarinfo = tar.gettarinfo(name=str(local_path), arcname=str(relative_path))
+    data = local_path.read_bytes()
+    tarinfo.size = len(data)
+    tar.addfile(tarinfo=tarinfo, fileobj=io.BytesIO(data))
+
+
+def _sync_files(
+    node: Node,
+    local_files: Dict[PurePosixPath, Path],
+    local_hashes: Dict[Path, str],
+    remote_hashes: Dict[PurePosixPath, str],
+    remote_path: Path,
+    is_removable: Callable[[PurePosixPath], bool],
+    sudo: bool,
+) -> Dict[PurePosixPath, str]:
+    """
+    Make files in a directory on a node match local files.
+
+    Only files which are new or have changed are sent.
+    All files are sent, and files are removed, with one command.
+    Local files which cannot be read, for example because they have been
+    removed since they were hashed, are not sent.
+
+    Args:
+        node: The node to sync files to.
+        local_files: A mapping of paths relative to ``remote_path`` to local
+            files to place at those paths.
+        local_hashes: The SHA-256 hashes of the local files.
+        remote_hashes: The SHA-256 hashes of the files on the node, keyed by
+            paths relative to ``remote_path``.
+        remote_path: The directory on the node to sync files to.
+        is_removable: A callable which returns whether a file on the node
+            which is not in ``local_files`` should be removed, given its path
+            relative to ``remote_path``.
+        sudo: Whether to use sudo for commands running on the node.
+
+    Returns:
+        The SHA-256 hashes of the files on the node after syncing.
     """
-    tar_path = Path('/tmp/dcos_e2e_tmp.tar')
-    with tempfile.NamedTemporaryFile() as tmp_file:
-        tmp_file.write(tarstream.getvalue())
-        tmp_file.flush()
-
-        node.send_file(
-            local_path=Path(tmp_file.name),
-            remote_path=tar_path,
-            sudo=sudo,
+    changed_files = {
+        relative_path: local_path
+        for relative_path, local_path in local_files.items()
+        if remote_hashes.get(relative_path) != local_hashes[local_path]
+    }
+    removed_files = sorted(
+        relative_path for relative_path in remote_hashes
+        if relative_path not in local_files and is_removable(relative_path)
+    )
+
+    tarstream = io.BytesIO()
+    sent_files = {}  # type: Dict[PurePosixPath, Path]
+    with tarfile.open(fileobj=tarstream, mode='w', dereference=True) as tar:
+        for relative_path, local_path in sorted(changed_files.items()):
+            try:
+                _add_file(
+                    tar=tar,
+                    local_path=local_path,
+                    relative_path=relative_path,
+                )
+            except OSError as exc:
+                LOGGER.warning('Not syncing %s: %s', local_path, exc)
+                continue
+            sent_files[relative_path] = local_path
+
+    LOGGER.info(
+        'Syncing to %s on %s: %d changed, %d removed, %d unchanged',
+        remote_path,
+        node,
+        len(sent_files),
+        len(removed_files),
+        len(local_files) - len(changed_files),
+    )
+    if not sent_files and not removed_files:
+        return remote_hashes
+
+    script = dedent(
+        """\
+        set -e
+        mkdir --parents {remote_path}
+        cd {remote_path}
+        rm -f -- {removed_files}
+        tar -xf -
+        """,
+    ).format(
+        remote_path=shlex.quote(str(remote_path)),
+        removed_files=' '.join(
+            shlex.quote(str(relative_path)) for relative_path in removed_files
+        ),
+    )
+    args = ['/bin/sh', '-c', script]
+    if sudo:
+        args = ['sudo'] + args
+
+    process = node.popen(args=args, pipe_stdin=True)
+    stdout, stderr = process.communicate(input=tarstream.getvalue())
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(
+            returncode=process.returncode,
+            cmd=args,
+            output=stdout,
+            stderr=stderr,
         )
 
-    tar_args = ['tar', '-C', str(remote_path), '-xvf', str(tar_path)]
-    node.run(args=tar_args, sudo=sudo)
-    node.run(args=['rm', str(tar_path)], sudo=sudo)
+    new_remote_hashes = {
+        relative_path: file_hash
+        for relative_path, file_hash in remote_hashes.items()
+        if relative_path not in removed_files
+    }
+    for relative_path, local_path in sent_files.items():
+        new_remote_hashes[relative_path] = local_hashes[local_path]
+    return new_remote_hashes
 
 
-def _sync_bootstrap_to_masters(
-    cluster: Cluster,
-    dcos_checkout_dir: Path,
+class _SyncTarget:
+    """
+    A directory on masters, and the local files to sync to it.
+    """
+
+    def __init__(
+        self,
+        local_path: Path,
+        remote_path: Path,
+        is_removable: Callable[[PurePosixPath], bool],
+        remote_relative_path: Optional[
+            Callable[[PurePosixPath], Optional[PurePosixPath]]] = None,
+    ) -> None:
+        """
+        Args:
+            local_path: The local directory to sync files from.
+            remote_path: The directory on masters to sync files to.
+            is_removable: A callable which returns whether a file on a master
+                which is not in the local directory should be removed, given
+                its path relative to ``remote_path``.
+            remote_relative_path: A callable which returns the path relative
+                to ``remote_path`` to sync a file to, given its path relative
+                to ``local_path``, or ``None`` if the file is not synced. If
+                ``None``, each file is synced to its path relative to
+                ``local_path``.
+
+        Attributes:
+            local_path: The local directory to sync files from.
+            remote_path: The directory on masters to sync files to.
+            is_removable: A callable which returns whether a file on a master
+                which is not in the local directory should be removed, given
+                its path relative to ``remote_path``.
+        """
+        self.local_path = local_path
+        self.remote_path = remote_path
+        self.is_removable = is_removable
+        self._remote_relative_path = remote_relative_path
+
+    def local_files(self) -> Dict[PurePosixPath, Path]:
+        """
+        Return a mapping of paths relative to ``remote_path`` to the local
+        files to place at those paths.
+        """
+        local_files = _local_files(path=self.local_path)
+        if self._remote_relative_path is None:
+            return local_files
+
+        files = {}
+        for relative_path, local_path in local_files.items():
+            remote_relative_path = self._remote_relative_path(relative_path)
+            if remote_relative_path is not None:
+                files[remote_relative_path] = local_path
+        return files
+
+
+def _sync_targets_to_masters(
+    masters: Set[Node],
+    targets: List[_SyncTarget],
+    remote_hashes: _MasterHashes,
     sudo: bool,
 ) -> None:
     """
-    Sync bootstrap code to all masters in a cluster.
+    Sync local files to all masters at the same time.
+
+    Args:
+        masters: The masters to sync files to.
+        targets: The directories to sync.
+        remote_hashes: The SHA-256 hashes of the files on each master, keyed
+            by the master and the remote path of a target. Hashes which are
+            not in this mapping are fetched from the master. This is updated
+            with the hashes of the files on each master after syncing.
+        sudo: Whether to use sudo for commands running on nodes.
+    """
+    all_target_files = [(target, target.local_files()) for target in targets]
+    local_hashes = _local_hashes(
+        paths=[
+            local_path for _, local_files in all_target_files
+            for local_path in local_files.values()
+        ],
+    )
+    # Files which could not be hashed have been removed since they were
+    # found, so they are treated as removed.
+    target_files = [
+        (
+            target,
+            {
+                relative_path: local_path
+                for relative_path, local_path in local_files.items()
+                if local_path in local_hashes
+            },
+        ) for target, local_files in all_target_files
+    ]
+
+    def sync_to_master(master: Node) -> None:
+        """
+        Sync all targets to a master.
+        """
+        for target, local_files in target_files:
+            key = (master, target.remote_path)
+            if key not in remote_hashes:
+                remote_hashes[key] = _remote_hashes(
+                    node=master,
+                    remote_path=target.remote_path,
+                    sudo=sudo,
+                )
+            remote_hashes[key] = _sync_files(
+                node=master,
+                local_files=local_files,
+                local_hashes=local_hashes,
+                remote_hashes=remote_hashes[key],
+                remote_path=target.remote_path,
+                is_removable=target.is_removable,
+                sudo=sudo,
+            )
+
+    with ThreadPoolExecutor(max_workers=len(masters)) as executor:
+        # Consume the results so that any error is raised.
+        list(executor.map(sync_to_master, masters))
+
+
+def _bootstrap_sync_target(
+    cluster: Cluster,
+    dcos_checkout_dir: Path,
+) -> _SyncTarget:
+    """
+    Return a target for syncing bootstrap code to masters.
     """
     local_packages = dcos_checkout_dir / 'packages'
     local_bootstrap_dir = (
@@ -111,19 +439,14 @@ def _sync_bootstrap_to_masters(
     node_bootstrap_dir = (
         node_python_dir / 'site-packages' / 'dcos_internal_utils'
     )
-    bootstrap_tarstream = _tar_with_filter(
-        path=local_bootstrap_dir,
-        tar_filter=_cache_filter,
+    return _SyncTarget(
+        local_path=local_bootstrap_dir,
+        remote_path=node_bootstrap_dir,
+        # Other files in the bootstrap directory are part of the installed
+        # package.
+        is_removable=lambda relative_path: False,
     )
 
-    for master in cluster.masters:
-        _send_tarstream_to_node_and_extract(
-            tarstream=bootstrap_tarstream,
-            node=master,
-            remote_path=node_bootstrap_dir,
-            sudo=sudo,
-        )
-
 
 def _dcos_checkout_dir_variant(dcos_checkout_dir: Path) -> DCOSVariant:
     """
@@ -137,6 +460,115 @@ def _dcos_checkout_dir_variant(dcos_checkout_dir: Path) -> DCOSVariant:
     }[upstream_json.exists()]
 
 
+def _sync_targets(
+    cluster: Cluster,
+    dcos_checkout_dir: Path,
+) -> List[_SyncTarget]:
+    """
+    Return the targets for syncing files from a DC/OS checkout to masters.
+
+    Raises:
+        click.BadArgumentUsage: If ``DCOS_CHECKOUT_DIR`` is set to something
+            that is not a checkout of a DC/OS repository.
+    """
+    local_packages = dcos_checkout_dir / 'packages'
+    local_test_dir = local_packages / 'dcos-integration-test' / 'extra'
+    if not Path(local_test_dir).exists():
+        message = (
+            'DCOS_CHECKOUT_DIR must be set to the checkout of a DC/OS '
+            'repository.\n'
+            '"{local_test_dir}" does not exist.'
+        ).format(local_test_dir=local_test_dir)
+        raise click.BadArgumentUsage(message=message)
+
+    dcos_checkout_dir_variant = _dcos_checkout_dir_variant(
+        dcos_checkout_dir=dcos_checkout_dir,
+    )
+
+    dcos_variant = get_cluster_variant(cluster=cluster)
+    if dcos_variant is None:
+        message = (
+            'The DC/OS variant cannot yet be determined. '
+            'Therefore, code cannot be synced to the cluster.'
+        )
+        click.echo(message, err=True)
+        sys.exit(1)
+
+    syncing_oss_to_ee = bool(
+        dcos_variant == DCOSVariant.ENTERPRISE
+        and dcos_checkout_dir_variant == DCOSVariant.OSS,
+    )
+
+    node_active_dir = Path('/opt/mesosphere/active')
+    node_test_dir = node_active_dir / 'dcos-integration-test'
+
+    if syncing_oss_to_ee:
+        # This matches part of
+        # https://github.com/mesosphere/dcos-enterprise/blob/master/packages/dcos-integration-test/ee.build
+
+        def remote_relative_path(
+            relative_path: PurePosixPath,
+        ) -> Optional[PurePosixPath]:
+            """
+            Return where to place a file from the OSS checkout in the
+            Enterprise test directory.
+
+            The OSS "util" directory replaces the Enterprise "util"
+            directory, the OSS "conftest.py" is not used, and all other OSS
+            files are placed in the "open_source_tests" directory.
+            """
+            if relative_path.parts[0] == 'util':
+                return relative_path
+            if relative_path == PurePosixPath('conftest.py'):
+                return None
+            return 'open_source_tests' / relative_path
+
+        def is_removable(relative_path: PurePosixPath) -> bool:
+            """
+            Return whether a file which is not in the OSS checkout should be
+            removed from the Enterprise test directory.
+            """
+            # This makes an assumption that all tests are at the top level.
+            parts = relative_path.parts
+            return bool(
+                parts[0] == 'util' or (
+                    parts[0] == 'open_source_tests' and len(parts) == 2
+                    and relative_path.suffix == '.py'
+                ),
+            )
+
+        return [
+            _SyncTarget(
+                local_path=local_test_dir,
+                remote_path=node_test_dir,
+                is_removable=is_removable,
+                remote_relative_path=remote_relative_path,
+            ),
+        ]
+
+    def is_removable_test_file(relative_path: PurePosixPath) -> bool:
+        """
+        Return whether a file which is not in the checkout should be removed
+        from the test directory.
+        """
+        # This makes an assumption that all tests are at the top level.
+        return bool(
+            len(relative_path.parts) == 1 and relative_path.suffix == '.py',
+        )
+
+    return [
+        _bootstrap_sync_target(
+            cluster=cluster,
+            dcos_checkout_dir=dcos_checkout_dir,
+        ),
+        _SyncTarget(
+            local_path=local_test_dir,
+            remote_path=node_test_dir,
+            is_removable=is_removable_test_file,
+        ),
+    ]
+
+
 def sync_code_to_masters(
     cluster: Cluster,
     dcos_checkout_dir: Path,
@@ -146,8 +578,11 @@ def sync_code_to_masters(
     Sync files from a DC/OS checkout to master nodes.
 
     This syncs integration test files and bootstrap files.
+    Only files which are new or have changed since they were last synced are
+    sent to each master.
 
-    This is not covered by automated tests, and it is non-trivial.
+    Syncing to a real cluster is not covered by automated tests, and it is
+    non-trivial.
 
     In the following instructions, running a test might look like:
 
@@ -200,111 +635,81 @@ def sync_code_to_masters(
         click.BadArgumentUsage: If ``DCOS_CHECKOUT_DIR`` is set to something
             that is not a checkout of a DC/OS repository.
     """
-    local_packages = dcos_checkout_dir / 'packages'
-    local_test_dir = local_packages / 'dcos-integration-test' / 'extra'
-    if not Path(local_test_dir).exists():
-        message = (
-            'DCOS_CHECKOUT_DIR must be set to the checkout of a DC/OS '
-            'repository.\n'
-            '"{local_test_dir}" does not exist.'
-        ).format(local_test_dir=local_test_dir)
-        raise click.BadArgumentUsage(message=message)
-
-    dcos_checkout_dir_variant = _dcos_checkout_dir_variant(
+    targets = _sync_targets(
+        cluster=cluster,
         dcos_checkout_dir=dcos_checkout_dir,
     )
-
-    node_test_dir = Path('/opt/mesosphere/active/dcos-integration-test')
-
-    test_tarstream = _tar_with_filter(
-        path=local_test_dir,
-        tar_filter=_cache_filter,
+    _sync_targets_to_masters(
+        masters=cluster.masters,
+        targets=targets,
+        remote_hashes={},
+        sudo=sudo,
     )
 
-    dcos_variant = get_cluster_variant(cluster=cluster)
-    if dcos_variant is None:
-        message = (
-            'The DC/OS variant cannot yet be determined. '
-            'Therefore, code cannot be synced to the cluster.'
-        )
-        click.echo(message, err=True)
-        sys.exit(1)
 
-    syncing_oss_to_ee = bool(
-        dcos_variant == DCOSVariant.ENTERPRISE
-        and dcos_checkout_dir_variant == DCOSVariant.OSS,
-    )
-
-    node_active_dir = Path('/opt/mesosphere/active')
-    node_test_dir = node_active_dir / 'dcos-integration-test'
-
-    if syncing_oss_to_ee:
-        # This matches part of
-        # https://github.com/mesosphere/dcos-enterprise/blob/master/packages/dcos-integration-test/ee.build
-        for master in cluster.masters:
-            master.run(args=['rm', '-rf', str(node_test_dir / 'util')])
-
-            # This makes an assumption that all tests are at the top level.
-            master.run(
-                args=[
-                    'rm',
-                    '-rf',
-                    str(node_test_dir / 'open_source_tests' / '*.py'),
-                ],
-                # We use a wildcard character, `*`, so we need shell expansion.
-                shell=True,
-                sudo=sudo,
-            )
+def watch_and_sync_code_to_masters(
+    cluster: Cluster,
+    dcos_checkout_dir: Path,
+    sudo: bool,
+) -> None:
+    """
+    Sync files from a DC/OS checkout to master nodes, and then sync again
+    each time files in the checkout change, until interrupted.
 
-            master.run(
-                args=[
-                    'mkdir',
-                    '--parents',
-                    str(node_test_dir / 'open_source_tests'),
-                ],
-                sudo=sudo,
-            )
+    After the first sync, the files on masters are not read again.
+    Only local files which have changed are sent.
 
-            _send_tarstream_to_node_and_extract(
-                tarstream=test_tarstream,
-                node=master,
-                remote_path=node_test_dir / 'open_source_tests',
-                sudo=sudo,
-            )
-            master.run(
-                args=[
-                    'rm',
-                    '-rf',
-                    str(node_test_dir / 'open_source_tests' / 'conftest.py'),
-                ],
-                sudo=sudo,
-            )
-            master.run(
-                args=[
-                    'mv',
-                    str(node_test_dir / 'open_source_tests' / 'util'),
-                    str(node_test_dir),
-                ],
-                sudo=sudo,
-            )
-    else:
-        _sync_bootstrap_to_masters(
-            cluster=cluster,
-            dcos_checkout_dir=dcos_checkout_dir,
-            sudo=sudo,
-        )
+    Args:
+        cluster: The cluster to sync code to.
+        dcos_checkout_dir: The path to a DC/OS (Enterprise) checkout to sync
+            code from.
+        sudo: Whether to use sudo for commands running on nodes.
 
-        for master in cluster.masters:
-            # This makes an assumption that all tests are at the top level.
-            master.run(
-                args=['rm', '-rf', str(node_test_dir / '*.py')],
-                # We use a wildcard character, `*`, so we need shell expansion.
-                shell=True,
-                sudo=sudo,
-            )
-            _send_tarstream_to_node_and_extract(
-                tarstream=test_tarstream,
-                node=master,
-                remote_path=node_test_dir,
-                sudo=sudo,
-            )
+    Raises:
+        click.BadArgumentUsage: If ``DCOS_CHECKOUT_DIR`` is set to something
+            that is not a checkout of a DC/OS repository.
+    """
+    targets = _sync_targets(
+        cluster=cluster,
+        dcos_checkout_dir=dcos_checkout_dir,
+    )
+    remote_hashes = {}  # type: _MasterHashes
+    _sync_targets_to_masters(
+        masters=cluster.masters,
+        targets=targets,
+        remote_hashes=remote_hashes,
+        sudo=sudo,
+    )
+    message = (
+        'Synced. Watching "{dcos_checkout_dir}" for changes. '
+        'Press Ctrl+C to stop.'
+    ).format(dcos_checkout_dir=dcos_checkout_dir)
+    click.echo(message)
+
+    changes = watch_for_changes(
+        paths=[target.local_path for target in targets],
+    )
+    try:
+        for _ in changes:
+            try:
+                _sync_targets_to_masters(
+                    masters=cluster.masters,
+                    targets=targets,
+                    remote_hashes=remote_hashes,
+                    sudo=sudo,
+                )
+            except subprocess.CalledProcessError as exc:
+                click.echo('Error syncing changes:', err=True)
+                click.echo(exc.stderr.decode(), err=True)
+                # The files on masters are no longer known.
+                remote_hashes.clear()
+            except OSError as exc:
+                # For example, a directory may have been removed while files
+                # were being found.
+                message = 'Error syncing changes: {exc}'.format(exc=exc)
+                click.echo(message, err=True)
+                remote_hashes.clear()
+            else:
+                click.echo('Synced changes.')
+    except KeyboardInterrupt:
+        pass
@@ -13,8 +13,8 @@ from halo import Halo
 
 from dcos_e2e.cluster import Cluster
 from dcos_e2e.exceptions import DCOSNotInstalledError
+from dcos_e2e.installers import get_installer_details
 from dcos_e2e.node import DCOSVariant
-from dcos_e2e_cli._vendor import dcos_installer_tools as installer_tools
 
 
 def get_install_variant(
@@ -31,6 +31,8 @@ def get_install_variant(
         given_variant: The variant string given by the user to the
             ``variant_option``. One of "auto", "enterprise" and "oss". If
             "auto" is given, use the DC/OS installer to find the variant.
+            The variant of each installer is cached, so an installer is only
+            run the first time its variant is needed.
         installer_path: The path to a DC/OS installer, if available.
         workspace_dir: A directory to work in, given that this function uses
             large files.
@@ -48,7 +50,7 @@ def get_install_variant(
         spinner = Halo(enabled=enable_spinner)
         spinner.start(text='Determining DC/OS variant')
         try:
-            details = installer_tools.get_dcos_installer_details(
+            details = get_installer_details(
                 installer=installer_path,
                 workspace_dir=workspace_dir,
             )
@@ -65,11 +67,7 @@ def get_install_variant(
             sys.exit(1)
 
         spinner.succeed()
-        variant_map = {
-            installer_tools.DCOSVariant.ENTERPRISE: DCOSVariant.ENTERPRISE,
-            installer_tools.DCOSVariant.OSS: DCOSVariant.OSS,
-        }
-        return variant_map[details.variant]
+        return details.variant
 
     return {
         'oss': DCOSVariant.OSS,
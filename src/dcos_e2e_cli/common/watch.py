@@ -0,0 +1,300 @@
+"""
+Tools for watching directories for changes.
+
+On Linux, inotify is used.
+On other platforms, or if inotify is not available, directories are polled.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import (
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+# Python and pytest cache files change when tests are run locally, but they
+# are never synced.
+# Editors such as Vim and Emacs write temporary files when saving, which are
+# usually removed before they could be synced.
+# Vim checks that it can write to a directory by creating a file named
+# "4913".
+_IGNORED_NAMES = ('__pycache__', '.pytest_cache', '4913')
+_IGNORED_PREFIXES = ('.#', )
+_IGNORED_SUFFIXES = ('.pyc', '.swp', '.swo', '.swx', '~')
+
+# See ``man 7 inotify``.
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_MODIFY = 0x2
+_IN_ATTRIB = 0x4
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _is_ignored(name: str) -> bool:
+    """
+    Return whether changes to a file or directory with the given name should
+    be ignored.
+    """
+    return bool(
+        name in _IGNORED_NAMES or name.startswith(_IGNORED_PREFIXES)
+        or name.endswith(_IGNORED_SUFFIXES),
+    )
+
+
+def _directories(path: Path) -> Iterator[Path]:
+    """
+    Yield ``path`` and all directories within it which are not ignored.
+    """
+    for directory, subdirectories, _ in os.walk(str(path)):
+        subdirectories[:] = [
+            name for name in subdirectories if not _is_ignored(name)
+        ]
+        yield Path(directory)
+
+
+class _InotifyWatcher:
+    """
+    A watcher which uses inotify.
+    """
+
+    def __init__(self, paths: Iterable[Path]) -> None:
+        """
+        Args:
+            paths: Directories to watch, recursively.
+
+        Raises:
+            OSError: inotify is not available.
+        """
+        libc_name = ctypes.util.find_library('c')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            error_number = ctypes.get_errno()
+            raise OSError(error_number, os.strerror(error_number))
+
+        self._watched_directories = {}  # type: Dict[int, Path]
+        try:
+            for path in paths:
+                for directory in _directories(path=path):
+                    self._add_watch(directory=directory)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, directory: Path) -> None:
+        """
+        Watch a directory, but not its subdirectories.
+        """
+        watch_descriptor = self._libc.inotify_add_watch(
+            self._fd,
+            os.fsencode(str(directory)),
+            _WATCH_MASK,
+        )
+        if watch_descriptor < 0:
+            error_number = ctypes.get_errno()
+            # The directory may have been removed since it was found.
+            if error_number == errno.ENOENT:
+                return
+            raise OSError(
+                error_number,
+                os.strerror(error_number),
+                str(directory),
+            )
+        self._watched_directories[watch_descriptor] = directory
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """
+        Wait for a change.
+
+        Args:
+            timeout: The maximum number of seconds to wait. If ``None``, wait
+                until there is a change.
+
+        Returns:
+            Whether there was a change.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+
+        data = os.read(self._fd, 64 * 1024)
+        changed = False
+        offset = 0
+        while offset < len(data):
+            watch_descriptor, mask, _, name_length = _EVENT_HEADER.unpack_from(
+                data,
+                offset,
+            )
+            offset += _EVENT_HEADER.size
+            raw_name = data[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+            name = os.fsdecode(raw_name)
+
+            if mask & _IN_Q_OVERFLOW:
+                changed = True
+                continue
+
+            if _is_ignored(name):
+                continue
+
+            changed = True
+            directory = self._watched_directories.get(watch_descriptor)
+            created_directory = bool(
+                mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO),
+            )
+            if directory is not None and created_directory:
+                for new_directory in _directories(path=directory / name):
+                    self._add_watch(directory=new_directory)
+
+        return changed
+
+    def close(self) -> None:
+        """
+        Stop watching.
+        """
+        os.close(self._fd)
+
+
+class _PollingWatcher:
+    """
+    A watcher which compares the modification times and sizes of files.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        interval_seconds: float = 1,
+    ) -> None:
+        """
+        Args:
+            paths: Directories to watch, recursively.
+            interval_seconds: The number of seconds between checks.
+        """
+        self._paths = list(paths)
+        self._interval_seconds = interval_seconds
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        """
+        Return the modification time and size of each file.
+        """
+        snapshot = {}
+        for path in self._paths:
+            for directory in _directories(path=path):
+                try:
+                    children = list(directory.iterdir())
+                except OSError:
+                    # The directory may have been removed since it was found.
+                    continue
+                for child in children:
+                    if _is_ignored(child.name):
+                        continue
+                    try:
+                        stat = child.stat()
+                    except OSError:
+                        continue
+                    snapshot[child] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """
+        Wait for a change.
+
+        Args:
+            timeout: The maximum number of seconds to wait. If ``None``, wait
+                until there is a change.
+
+        Returns:
+            Whether there was a change.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._take_snapshot()
+            if snapshot != self._snapshot:
+                self._snapshot = snapshot
+                return True
+
+            if deadline is None:
+                sleep_seconds = self._interval_seconds
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                sleep_seconds = min(self._interval_seconds, remaining)
+            time.sleep(sleep_seconds)
+
+    def close(self) -> None:
+        """
+        Stop watching.
+        """
+
+
+def _watcher(
+    paths: List[Path],
+) -> Union[_InotifyWatcher, _PollingWatcher]:
+    """
+    Return a watcher which uses inotify if it is available.
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return _InotifyWatcher(paths=paths)
+        except (AttributeError, OSError):
+            # For example, the inotify watch limit may have been reached.
+            pass
+
+    return _PollingWatcher(paths=paths)
+
+
+def watch_for_changes(
+    paths: Iterable[Path],
+    debounce_seconds: float = 0.5,
+) -> Generator[None, None, None]:
+    """
+    Yield each time files in the given directories change.
+
+    Changes are batched: this yields only once no more changes have been
+    seen for ``debounce_seconds``.
+    Changes to Python and pytest cache files, and to editor temporary files,
+    are ignored.
+
+    Args:
+        paths: Directories to watch, recursively.
+        debounce_seconds: The number of seconds without changes to wait for
+            after a change.
+    """
+    watcher = _watcher(paths=list(paths))
+    try:
+        while True:
+            while not watcher.wait(timeout=None):
+                pass
+            while watcher.wait(timeout=debounce_seconds):
+                pass
+            yield
+    finally:
+        watcher.close()
@@ -9,9 +9,14 @@ import click
 from dcos_e2e_cli.common.arguments import dcos_checkout_dir_argument
 from dcos_e2e_cli.common.options import (
     existing_cluster_id_option,
+    sync_watch_option,
     verbosity_option,
 )
-from dcos_e2e_cli.common.sync import SYNC_HELP, sync_code_to_masters
+from dcos_e2e_cli.common.sync import (
+    SYNC_HELP,
+    sync_code_to_masters,
+    watch_and_sync_code_to_masters,
+)
 from dcos_e2e_cli.common.utils import check_cluster_id_exists
 
 from ._common import ClusterInstances, existing_cluster_ids
@@ -22,11 +27,13 @@ from ._options import aws_region_option
 @existing_cluster_id_option
 @dcos_checkout_dir_argument
 @aws_region_option
+@sync_watch_option
 @verbosity_option
 def sync_code(
     cluster_id: str,
     dcos_checkout_dir: Path,
     aws_region: str,
+    watch: bool,
 ) -> None:
     """
     Sync files from a DC/OS checkout to master nodes.
@@ -40,7 +47,11 @@ def sync_code(
         aws_region=aws_region,
     )
     cluster = cluster_instances.cluster
-    sync_code_to_masters(
+    sync_function = {
+        True: watch_and_sync_code_to_masters,
+        False: sync_code_to_masters,
+    }[watch]
+    sync_function(
         cluster=cluster,
         dcos_checkout_dir=dcos_checkout_dir,
         sudo=True,
@@ -20,6 +20,7 @@ from .commands.mac_network import destroy_mac_network, setup_mac_network
 from .commands.provision import provision
 from .commands.run_command import run
 from .commands.send_file import send_file
+from .commands.snapshot import destroy_snapshot, snapshot
 from .commands.sync import sync_code
 from .commands.upgrade import upgrade
 from .commands.wait import wait
@@ -40,6 +41,7 @@ dcos_docker.add_command(destroy)
 dcos_docker.add_command(destroy_list)
 dcos_docker.add_command(destroy_loopback_sidecar)
 dcos_docker.add_command(destroy_mac_network)
+dcos_docker.add_command(destroy_snapshot)
 dcos_docker.add_command(doctor)
 dcos_docker.add_command(download_installer)
 dcos_docker.add_command(inspect_cluster)
@@ -50,6 +52,7 @@ dcos_docker.add_command(provision)
 dcos_docker.add_command(run)
 dcos_docker.add_command(setup_mac_network)
 dcos_docker.add_command(send_file)
+dcos_docker.add_command(snapshot)
 dcos_docker.add_command(sync_code)
 dcos_docker.add_command(wait)
 dcos_docker.add_command(web)
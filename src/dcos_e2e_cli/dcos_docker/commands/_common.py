@@ -112,6 +112,7 @@ class ClusterContainers(ClusterRepresentation):
             default_user=self._ssh_default_user,
             ssh_key_path=self.ssh_key_path,
             default_transport=self._transport,
+            docker_container_id=container.id,
         )
 
     def to_dict(self, node_representation: Container) -> Dict[str, str]:
@@ -2,11 +2,12 @@
 Common options for ``minidcos docker`` commands.
 """
 
-from typing import Callable
+from typing import Callable, Optional, Union
 
 import click
 
 from dcos_e2e.backends import Docker
+from dcos_e2e.docker_snapshots import snapshot_names
 from dcos_e2e.node import Transport
 
 
@@ -17,6 +18,7 @@ def node_transport_option(command: Callable[..., None]) -> Callable[..., None]:
     transports = {
         'ssh': Transport.SSH,
         'docker-exec': Transport.DOCKER_EXEC,
+        'docker-api': Transport.DOCKER_API,
     }
 
     backend_default = Docker().transport
@@ -40,7 +42,10 @@ def node_transport_option(command: Callable[..., None]) -> Callable[..., None]:
             'This can be provided by setting the `MINIDCOS_DOCKER_TRANSPORT` '
             'environment variable. '
             'When using a TTY, different transports may use different line '
-            'endings.'
+            'endings. '
+            'The "docker-api" transport uses the Docker Engine API rather '
+            'than starting a "docker" process for each command, except when '
+            'using a TTY.'
         ),
     )(command)  # type: Callable[..., None]
     return function
@@ -59,8 +64,49 @@ def wait_for_dcos_option(command: Callable[..., None]) -> Callable[..., None]:
             'command. '
             '"minidcos docker wait" has various options available and so may '
             'be more appropriate for your use case. '
-            'If the chosen transport is "docker-exec", this will skip HTTP '
-            'checks and so the cluster may not be fully ready.'
+            'If the chosen transport is "docker-exec" or "docker-api", this '
+            'will skip HTTP checks and so the cluster may not be fully ready.'
+        ),
+    )(command)  # type: Callable[..., None]
+    return function
+
+
+def _validate_snapshot_name(
+    ctx: click.core.Context,
+    param: Union[click.core.Option, click.core.Parameter],
+    value: Optional[str],
+) -> Optional[str]:
+    """
+    Validate that a snapshot exists, if one is given.
+    """
+    # We "use" variables to satisfy linting tools.
+    for _ in (ctx, param):
+        pass
+
+    if value is not None and value not in snapshot_names():
+        message = 'Snapshot "{value}" does not exist.'.format(value=value)
+        raise click.BadParameter(message=message)
+
+    return value
+
+
+def snapshot_option(command: Callable[..., None]) -> Callable[..., None]:
+    """
+    An option decorator for creating a cluster from a snapshot.
+    """
+    function = click.option(
+        '--snapshot',
+        type=str,
+        callback=_validate_snapshot_name,
+        help=(
+            'The name of a snapshot, made with "minidcos docker snapshot", to '
+            'create the cluster from. '
+            'DC/OS is installed and started on a cluster created from a '
+            'snapshot. '
+            'The cluster must have the same number of each type of node as '
+            'the snapshotted cluster, and the same Docker version and '
+            'storage driver. '
+            'The Linux distribution is ignored.'
         ),
     )(command)  # type: Callable[..., None]
     return function
@@ -49,7 +49,7 @@ from ._docker_network import docker_network_option
 from ._docker_storage_driver import docker_storage_driver_option
 from ._docker_version import docker_version_option
 from ._linux_distribution import linux_distribution_option
-from ._options import node_transport_option
+from ._options import node_transport_option, snapshot_option
 from ._port_mapping import one_master_host_port_map_option
 from ._volume_options import (
     AGENT_VOLUME_OPTION,
@@ -77,6 +77,7 @@ from .doctor import doctor
 @docker_network_option
 @node_transport_option
 @one_master_host_port_map_option
+@snapshot_option
 @verbosity_option
 @enable_spinner_option
 @click.pass_context
@@ -98,6 +99,7 @@ def provision(
     network: Network,
     one_master_host_port_map: Dict[str, int],
     mount_sys_fs_cgroup: bool,
+    snapshot: Optional[str],
     enable_spinner: bool,
 ) -> None:
     """
@@ -147,6 +149,7 @@ def provision(
         network=network,
         one_master_host_port_map=one_master_host_port_map,
         mount_sys_fs_cgroup=mount_sys_fs_cgroup,
+        snapshot=snapshot,
     )
 
     cluster = create_cluster(
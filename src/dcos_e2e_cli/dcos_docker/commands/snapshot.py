@@ -0,0 +1,79 @@
+"""
+Tools for creating and destroying snapshots of clusters.
+"""
+
+import click
+from halo import Halo
+
+from dcos_e2e.docker_snapshots import (
+    create_snapshot,
+    remove_snapshot,
+    snapshot_names,
+)
+from dcos_e2e.node import Transport
+from dcos_e2e_cli.common.options import (
+    enable_spinner_option,
+    existing_cluster_id_option,
+    verbosity_option,
+)
+from dcos_e2e_cli.common.utils import check_cluster_id_exists
+
+from ._common import ClusterContainers, existing_cluster_ids
+from ._options import node_transport_option
+
+
+@click.command('snapshot')
+@existing_cluster_id_option
+@click.argument('name', type=str)
+@node_transport_option
+@verbosity_option
+@enable_spinner_option
+def snapshot(
+    cluster_id: str,
+    name: str,
+    transport: Transport,
+    enable_spinner: bool,
+) -> None:
+    """
+    Save the state of a cluster so that new clusters can be created from it.
+
+    This is useful after installing DC/OS, so that new clusters with DC/OS
+    installed can be made with "minidcos docker provision --snapshot".
+    The cluster is paused while the snapshot is made.
+    """
+    check_cluster_id_exists(
+        new_cluster_id=cluster_id,
+        existing_cluster_ids=existing_cluster_ids(),
+    )
+
+    if name in snapshot_names():
+        message = 'Snapshot "{name}" already exists.'.format(name=name)
+        raise click.BadParameter(message)
+
+    cluster_containers = ClusterContainers(
+        cluster_id=cluster_id,
+        transport=transport,
+    )
+
+    with Halo(enabled=enable_spinner):
+        try:
+            create_snapshot(cluster=cluster_containers.cluster, name=name)
+        except ValueError as exc:
+            raise click.BadParameter(str(exc))
+
+
+@click.command('destroy-snapshot')
+@click.argument('name', type=str)
+@enable_spinner_option
+def destroy_snapshot(name: str, enable_spinner: bool) -> None:
+    """
+    Destroy a snapshot.
+
+    Clusters created from the snapshot are not affected.
+    """
+    if name not in snapshot_names():
+        message = 'Snapshot "{name}" does not exist.'.format(name=name)
+        raise click.BadParameter(message)
+
+    with Halo(enabled=enable_spinner):
+        remove_snapshot(name=name)
@@ -10,9 +10,14 @@ from dcos_e2e.node import Transport
 from dcos_e2e_cli.common.arguments import dcos_checkout_dir_argument
 from dcos_e2e_cli.common.options import (
     existing_cluster_id_option,
+    sync_watch_option,
     verbosity_option,
 )
-from dcos_e2e_cli.common.sync import SYNC_HELP, sync_code_to_masters
+from dcos_e2e_cli.common.sync import (
+    SYNC_HELP,
+    sync_code_to_masters,
+    watch_and_sync_code_to_masters,
+)
 from dcos_e2e_cli.common.utils import check_cluster_id_exists
 
 from ._common import ClusterContainers, existing_cluster_ids
@@ -23,11 +28,13 @@ from ._options import node_transport_option
 @existing_cluster_id_option
 @dcos_checkout_dir_argument
 @node_transport_option
+@sync_watch_option
 @verbosity_option
 def sync_code(
     cluster_id: str,
     dcos_checkout_dir: Path,
     transport: Transport,
+    watch: bool,
 ) -> None:
     """
     Sync files from a DC/OS checkout to master nodes.
@@ -41,7 +48,11 @@ def sync_code(
         transport=transport,
     )
     cluster = cluster_containers.cluster
-    sync_code_to_masters(
+    sync_function = {
+        True: watch_and_sync_code_to_masters,
+        False: sync_code_to_masters,
+    }[watch]
+    sync_function(
         cluster=cluster,
         dcos_checkout_dir=dcos_checkout_dir,
         sudo=False,
@@ -9,9 +9,14 @@ import click
 from dcos_e2e_cli.common.arguments import dcos_checkout_dir_argument
 from dcos_e2e_cli.common.options import (
     existing_cluster_id_option,
+    sync_watch_option,
     verbosity_option,
 )
-from dcos_e2e_cli.common.sync import SYNC_HELP, sync_code_to_masters
+from dcos_e2e_cli.common.sync import (
+    SYNC_HELP,
+    sync_code_to_masters,
+    watch_and_sync_code_to_masters,
+)
 from dcos_e2e_cli.common.utils import check_cluster_id_exists
 
 from ._common import ClusterVMs, existing_cluster_ids
@@ -20,10 +25,12 @@ from ._common import ClusterVMs, existing_cluster_ids
 @click.command('sync', help=SYNC_HELP)
 @existing_cluster_id_option
 @dcos_checkout_dir_argument
+@sync_watch_option
 @verbosity_option
 def sync_code(
     cluster_id: str,
     dcos_checkout_dir: Path,
+    watch: bool,
 ) -> None:
     """
     Sync files from a DC/OS checkout to master nodes.
@@ -34,7 +41,11 @@ def sync_code(
     )
     cluster_vms = ClusterVMs(cluster_id=cluster_id)
     cluster = cluster_vms.cluster
-    sync_code_to_masters(
+    sync_function = {
+        True: watch_and_sync_code_to_masters,
+        False: sync_code_to_masters,
+    }[watch]
+    sync_function(
         cluster=cluster,
         dcos_checkout_dir=dcos_checkout_dir,
         sudo=True,
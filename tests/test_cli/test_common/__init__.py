@@ -0,0 +1,3 @@
+"""
+Tests for code which is shared by the CLIs.
+"""
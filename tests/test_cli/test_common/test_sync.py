@@ -0,0 +1,416 @@
+"""
+Tests for syncing files from a DC/OS checkout to masters.
+"""
+
+import io
+import os
+import subprocess
+import tarfile
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, List, Set
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from dcos_e2e.node import DCOSVariant
+from dcos_e2e_cli.common import sync
+
+
+class _LocalNode:
+    """
+    A node which runs commands on the host, so that a local directory stands
+    in for a directory on a master.
+    """
+
+    def __init__(self) -> None:
+        """
+        Attributes:
+            sent: The names of the files in each archive sent to the node.
+        """
+        self.sent = []  # type: List[Set[str]]
+
+    def run(self, args: List[str], sudo: bool) -> subprocess.CompletedProcess:
+        """
+        Run a command on the host.
+        """
+        return subprocess.run(
+            args=args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+
+    def popen(self, args: List[str], pipe_stdin: bool) -> '_Process':
+        """
+        Start a command on the host.
+        """
+        return _Process(node=self, args=args)
+
+
+class _Process:
+    """
+    A command started on a ``_LocalNode``.
+    """
+
+    def __init__(self, node: _LocalNode, args: List[str]) -> None:
+        """
+        Args:
+            node: The node which the command is run on.
+            args: The command to run.
+        """
+        self._node = node
+        self._args = args
+        self.returncode = None  # type: Any
+
+    def communicate(self, input: bytes) -> Any:
+        """
+        Run the command with the given input, recording the files which are
+        sent in it.
+        """
+        # pylint: disable=redefined-builtin
+        with tarfile.open(fileobj=io.BytesIO(input)) as tar:
+            self._node.sent.append(set(tar.getnames()))
+        result = subprocess.run(
+            args=self._args,
+            input=input,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self.returncode = result.returncode
+        return result.stdout, result.stderr
+
+
+class _Cluster:
+    """
+    A cluster with one master.
+    """
+
+    def __init__(self, master: _LocalNode) -> None:
+        """
+        Args:
+            master: The master node.
+        """
+        self.masters = {master}
+
+
+def _write_files(path: Path, files: Dict[str, str]) -> None:
+    """
+    Write files with the given relative paths and contents.
+    """
+    for relative_path, contents in files.items():
+        file_path = path / relative_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(contents)
+
+
+def _read_files(path: Path) -> Dict[str, str]:
+    """
+    Return the relative paths and contents of the files in a directory.
+    """
+    return {
+        file_path.relative_to(path).as_posix(): file_path.read_text()
+        for file_path in path.rglob('*') if file_path.is_file()
+    }
+
+
+@pytest.fixture(autouse=True)
+def hash_cache_path(tmp_path: Path, monkeypatch: MonkeyPatch) -> Path:
+    """
+    Cache hashes of local files in a temporary directory.
+    """
+    cache_dir = tmp_path / 'hash-cache'
+    cache_dir.mkdir()
+    cache_path = cache_dir / 'hashes.json'
+    monkeypatch.setattr(sync, '_HASH_CACHE_PATH', cache_path)
+    return cache_path
+
+
+class TestSyncFiles:
+    """
+    Tests for ``_sync_files``.
+    """
+
+    def _sync(
+        self,
+        node: _LocalNode,
+        local_dir: Path,
+        remote_dir: Path,
+    ) -> Dict[PurePosixPath, str]:
+        """
+        Sync Python files from ``local_dir`` to ``remote_dir``, removing
+        Python files which are not in ``local_dir``.
+        """
+        local_files = sync._local_files(path=local_dir)
+        return sync._sync_files(
+            node=node,  # type: ignore
+            local_files=local_files,
+            local_hashes=sync._local_hashes(paths=local_files.values()),
+            remote_hashes=sync._remote_hashes(
+                node=node,  # type: ignore
+                remote_path=remote_dir,
+                sudo=False,
+            ),
+            remote_path=remote_dir,
+            is_removable=lambda relative_path: relative_path.suffix == '.py',
+            sudo=False,
+        )
+
+    def test_delta(self, tmp_path: Path) -> None:
+        """
+        Only new and changed files are sent, and removable files which are
+        not in the local directory are removed.
+        """
+        local_dir = tmp_path / 'local'
+        remote_dir = tmp_path / 'remote'
+        _write_files(
+            path=local_dir,
+            files={
+                'same.py': 'same',
+                'changed.py': 'new',
+                'sub/new.py': 'new',
+                '__pycache__/ignored.pyc': 'cache',
+            },
+        )
+        _write_files(
+            path=remote_dir,
+            files={
+                'same.py': 'same',
+                'changed.py': 'old',
+                'removed.py': 'old',
+                'kept.txt': 'old',
+            },
+        )
+        node = _LocalNode()
+
+        remote_hashes = self._sync(
+            node=node,
+            local_dir=local_dir,
+            remote_dir=remote_dir,
+        )
+
+        assert node.sent == [{'changed.py', 'sub/new.py'}]
+        assert _read_files(path=remote_dir) == {
+            'same.py': 'same',
+            'changed.py': 'new',
+            'sub/new.py': 'new',
+            'kept.txt': 'old',
+        }
+        assert remote_hashes == sync._remote_hashes(
+            node=node,  # type: ignore
+            remote_path=remote_dir,
+            sudo=False,
+        )
+
+    def test_no_changes(self, tmp_path: Path) -> None:
+        """
+        Nothing is sent if the remote directory matches.
+        """
+        local_dir = tmp_path / 'local'
+        remote_dir = tmp_path / 'remote'
+        files = {'same.py': 'same', 'sub/other.py': 'other'}
+        _write_files(path=local_dir, files=files)
+        _write_files(path=remote_dir, files=files)
+        node = _LocalNode()
+
+        self._sync(node=node, local_dir=local_dir, remote_dir=remote_dir)
+
+        assert node.sent == []
+
+    def test_new_remote_directory(self, tmp_path: Path) -> None:
+        """
+        The remote directory is created if it does not exist.
+        """
+        local_dir = tmp_path / 'local'
+        remote_dir = tmp_path / 'remote' / 'nested'
+        _write_files(path=local_dir, files={'new.py': 'new'})
+        node = _LocalNode()
+
+        self._sync(node=node, local_dir=local_dir, remote_dir=remote_dir)
+
+        assert _read_files(path=remote_dir) == {'new.py': 'new'}
+
+
+class TestOSSToEnterprise:
+    """
+    Tests for syncing a DC/OS OSS checkout to a DC/OS Enterprise cluster.
+    """
+
+    def test_paths(self, tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+        """
+        OSS "util" files replace Enterprise "util" files, the OSS
+        "conftest.py" is not synced, other OSS files are synced to
+        "open_source_tests", and Enterprise tests are kept.
+        """
+        checkout_dir = tmp_path / 'dcos'
+        test_dir = checkout_dir / 'packages' / 'dcos-integration-test'
+        _write_files(
+            path=test_dir / 'extra',
+            files={
+                'conftest.py': 'oss',
+                'test_new.py': 'oss',
+                'util/helpers.py': 'oss',
+            },
+        )
+        remote_dir = tmp_path / 'remote'
+        _write_files(
+            path=remote_dir,
+            files={
+                'conftest.py': 'ee',
+                'test_ee.py': 'ee',
+                'util/helpers.py': 'ee',
+                'util/ee_only.py': 'ee',
+                'open_source_tests/test_removed.py': 'oss',
+                'open_source_tests/data/kept.py': 'oss',
+            },
+        )
+        monkeypatch.setattr(
+            sync,
+            'get_cluster_variant',
+            lambda cluster: DCOSVariant.ENTERPRISE,
+        )
+        node = _LocalNode()
+        cluster = _Cluster(master=node)
+
+        (target, ) = sync._sync_targets(
+            cluster=cluster,  # type: ignore
+            dcos_checkout_dir=checkout_dir,
+        )
+        target.remote_path = remote_dir
+        sync._sync_targets_to_masters(
+            masters=cluster.masters,  # type: ignore
+            targets=[target],
+            remote_hashes={},
+            sudo=False,
+        )
+
+        assert _read_files(path=remote_dir) == {
+            'conftest.py': 'ee',
+            'test_ee.py': 'ee',
+            'util/helpers.py': 'oss',
+            'open_source_tests/test_new.py': 'oss',
+            'open_source_tests/data/kept.py': 'oss',
+        }
+
+
+class TestLocalHashes:
+    """
+    Tests for ``_local_hashes``.
+    """
+
+    def test_cache(self, tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+        """
+        A file is read only if its modification time or size has changed
+        since it was last hashed.
+        """
+        hashed = []  # type: List[Path]
+        sha256 = sync._sha256
+
+        def record_sha256(path: Path) -> str:
+            hashed.append(path)
+            return sha256(path=path)
+
+        monkeypatch.setattr(sync, '_sha256', record_sha256)
+        first = tmp_path / 'first.py'
+        second = tmp_path / 'second.py'
+        first.write_text('a')
+        second.write_text('b')
+
+        hashes = sync._local_hashes(paths=[first, second])
+        assert set(hashed) == {first, second}
+
+        hashed.clear()
+        assert sync._local_hashes(paths=[first, second]) == hashes
+        assert hashed == []
+
+        second.write_text('longer')
+        stat = first.stat()
+        first.write_text('c')
+        os.utime(
+            str(first),
+            ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000),
+        )
+        new_hashes = sync._local_hashes(paths=[first, second])
+        assert set(hashed) == {first, second}
+        assert new_hashes[first] == sha256(path=first) != hashes[first]
+        assert new_hashes[second] == sha256(path=second) != hashes[second]
+
+
+class TestVanishingFiles:
+    """
+    Tests for syncing while local files are removed.
+    """
+
+    def test_removed_before_hashing(self, tmp_path: Path) -> None:
+        """
+        Files which are removed before they are hashed are left out.
+        """
+        present = tmp_path / 'present.py'
+        present.write_text('a')
+        removed = tmp_path / 'removed.py'
+
+        hashes = sync._local_hashes(paths=[present, removed])
+
+        assert set(hashes) == {present}
+
+    def test_removed_before_sending(self, tmp_path: Path) -> None:
+        """
+        Files which are removed after they are hashed are not sent, and are
+        not recorded as being on the node.
+        """
+        local_dir = tmp_path / 'local'
+        remote_dir = tmp_path / 'remote'
+        _write_files(path=local_dir, files={'a.py': 'a', 'b.py': 'b'})
+        local_files = sync._local_files(path=local_dir)
+        local_hashes = sync._local_hashes(paths=local_files.values())
+        (local_dir / 'b.py').unlink()
+        node = _LocalNode()
+
+        remote_hashes = sync._sync_files(
+            node=node,  # type: ignore
+            local_files=local_files,
+            local_hashes=local_hashes,
+            remote_hashes={},
+            remote_path=remote_dir,
+            is_removable=lambda relative_path: True,
+            sudo=False,
+        )
+
+        assert node.sent == [{'a.py'}]
+        assert set(remote_hashes) == {PurePosixPath('a.py')}
+        assert _read_files(path=remote_dir) == {'a.py': 'a'}
+
+    def test_watch_continues(self, monkeypatch: MonkeyPatch) -> None:
+        """
+        Watching continues after a sync fails because of a local file error,
+        and the files on masters are fetched again for the next sync.
+        """
+        hashes_seen = []  # type: List[int]
+
+        def sync_targets_to_masters(
+            remote_hashes: Dict,
+            **kwargs: Any,
+        ) -> None:
+            hashes_seen.append(len(remote_hashes))
+            remote_hashes['key'] = {}
+            if len(hashes_seen) == 2:
+                raise FileNotFoundError('removed.py')
+
+        monkeypatch.setattr(sync, '_sync_targets', lambda **kwargs: [])
+        monkeypatch.setattr(
+            sync,
+            '_sync_targets_to_masters',
+            sync_targets_to_masters,
+        )
+        monkeypatch.setattr(
+            sync,
+            'watch_for_changes',
+            lambda paths: iter([None, None]),
+        )
+
+        sync.watch_and_sync_code_to_masters(
+            cluster=_Cluster(master=_LocalNode()),  # type: ignore
+            dcos_checkout_dir=Path('/dcos'),
+            sudo=False,
+        )
+
+        assert hashes_seen == [0, 1, 0]
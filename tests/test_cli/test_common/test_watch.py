@@ -0,0 +1,134 @@
+"""
+Tests for watching directories for changes.
+"""
+
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from dcos_e2e_cli.common import watch
+
+
+class _ScriptedWatcher:
+    """
+    A watcher which reports changes in a given order.
+    """
+
+    def __init__(self, changes: List[bool]) -> None:
+        """
+        Args:
+            changes: Whether each call to ``wait`` sees a change.
+
+        Attributes:
+            timeouts: The timeout given to each call to ``wait``.
+            closed: Whether the watcher has been closed.
+        """
+        self._changes = changes
+        self.timeouts = []  # type: List[Optional[float]]
+        self.closed = False
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """
+        Return whether there was a change.
+        """
+        self.timeouts.append(timeout)
+        return self._changes.pop(0)
+
+    def close(self) -> None:
+        """
+        Record that the watcher has been closed.
+        """
+        self.closed = True
+
+
+class TestWatchForChanges:
+    """
+    Tests for ``watch_for_changes``.
+    """
+
+    def test_debounce(self, monkeypatch: MonkeyPatch) -> None:
+        """
+        Changes which are seen within ``debounce_seconds`` of each other are
+        yielded once.
+        """
+        watcher = _ScriptedWatcher(
+            changes=[True, True, True, False, False, True, False],
+        )
+        monkeypatch.setattr(watch, '_watcher', lambda paths: watcher)
+
+        changes = watch.watch_for_changes(paths=[], debounce_seconds=0.5)
+        next(changes)
+        assert watcher.timeouts == [None, 0.5, 0.5, 0.5]
+
+        next(changes)
+        assert watcher.timeouts[4:] == [None, None, 0.5]
+
+        changes.close()
+        assert watcher.closed
+
+
+class TestPollingWatcher:
+    """
+    Tests for ``_PollingWatcher``.
+    """
+
+    def test_change(self, tmp_path: Path) -> None:
+        """
+        Changes to files which are not ignored are seen.
+        """
+        watcher = watch._PollingWatcher(paths=[tmp_path], interval_seconds=0)
+        (tmp_path / 'test_example.py').write_text('a')
+        assert watcher.wait(timeout=0)
+        assert not watcher.wait(timeout=0)
+
+        (tmp_path / '.test_example.py.swp').write_text('a')
+        (tmp_path / '4913').write_text('a')
+        assert not watcher.wait(timeout=0)
+
+    def test_vanishing_directory(
+        self,
+        tmp_path: Path,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        """
+        Directories and files which are removed while a snapshot is taken are
+        left out of the snapshot.
+        """
+        (tmp_path / 'test_example.py').write_text('a')
+        directories = watch._directories
+
+        def directories_with_removed(path: Path) -> Iterator[Path]:
+            yield from directories(path=path)
+            yield path / 'removed'
+
+        monkeypatch.setattr(watch, '_directories', directories_with_removed)
+        watcher = watch._PollingWatcher(paths=[tmp_path], interval_seconds=0)
+        assert not watcher.wait(timeout=0)
+
+
+@pytest.mark.parametrize(
+    'name',
+    [
+        '__pycache__',
+        'example.pyc',
+        '.test_example.py.swp',
+        '.test_example.py.swx',
+        'test_example.py~',
+        '4913',
+        '.#test_example.py',
+    ],
+)
+def test_ignored(name: str) -> None:
+    """
+    Cache files and editor temporary files are ignored.
+    """
+    assert watch._is_ignored(name=name)
+
+
+def test_not_ignored() -> None:
+    """
+    Source files are not ignored.
+    """
+    assert not watch._is_ignored(name='test_example.py')
@@ -133,6 +133,38 @@ class TestDockerBackend:
                     result = node.run(args=args)
                     assert result.stdout.decode() == content
 
+    def test_failed_start_removes_containers(self, tmp_path: Path) -> None:
+        """
+        If a node container cannot be started, no containers for the cluster
+        are left behind.
+        """
+        # Docker cannot start a container with a bind mount of a path which
+        # does not exist.
+        missing_mount = Mount(
+            source=str(tmp_path / 'does_not_exist'),
+            target='/etc/missing.txt',
+            type='bind',
+        )
+        container_name_prefix = 'dcos-e2e-{random}'.format(
+            random=uuid.uuid4().hex,
+        )
+        backend = Docker(
+            container_name_prefix=container_name_prefix,
+            custom_agent_mounts=[missing_mount],
+        )
+
+        with pytest.raises(docker.errors.APIError):
+            Cluster(
+                cluster_backend=backend,
+                masters=1,
+                agents=2,
+                public_agents=1,
+            )
+
+        client = docker.from_env(version='auto')
+        filters = {'name': container_name_prefix}
+        assert client.containers.list(all=True, filters=filters) == []
+
     def test_install_dcos_from_url(self, oss_installer_url: str) -> None:
         """
         It is possible to install DC/OS on a cluster with a Docker backend.
@@ -148,6 +180,47 @@ class TestDockerBackend:
             cluster.wait_for_dcos_oss()
 
 
+class TestNodeCache:
+    """
+    Tests for keeping the nodes of a Docker cluster.
+    """
+
+    def test_same_nodes(self) -> None:
+        """
+        The same ``Node`` objects are returned each time the nodes of a
+        cluster are read.
+        """
+        with Cluster(
+            cluster_backend=Docker(),
+            masters=1,
+            agents=1,
+            public_agents=0,
+        ) as cluster:
+            (master, ) = cluster.masters
+            (same_master, ) = cluster.masters
+            assert same_master is master
+            assert cluster.agents != cluster.masters
+
+    def test_invalidate(self) -> None:
+        """
+        Nodes which are removed without ``destroy_node`` are kept until the
+        cache is invalidated.
+        """
+        with Cluster(
+            cluster_backend=Docker(),
+            masters=1,
+            agents=1,
+            public_agents=0,
+        ) as cluster:
+            (agent, ) = cluster.agents
+            container = _get_container_from_node(node=agent)
+            container.stop()
+            container.remove(v=True)
+            assert cluster.agents == {agent}
+            cluster.invalidate_node_cache()
+            assert not cluster.agents
+
+
 class TestDockerVersion:
     """
     Tests for setting the version of Docker on the nodes.
@@ -0,0 +1,157 @@
+"""
+Tests for reusing installer output between Docker clusters.
+"""
+
+import uuid
+from pathlib import Path
+
+import pytest
+
+from dcos_e2e.backends._docker._genconf_cache import cached_genconf_output
+
+
+def _genconf_dir(workspace: Path, config: str) -> Path:
+    """
+    Return a new ``genconf`` directory with the given ``config.yaml``, in
+    the layout which the Docker backend gives to the installer.
+    """
+    genconf_dir = workspace / uuid.uuid4().hex / 'genconf'
+    (genconf_dir / 'serve').mkdir(parents=True)
+    (genconf_dir / 'config.yaml').write_text(config)
+    (genconf_dir / 'ip-detect').write_text('echo 172.17.0.2')
+    return genconf_dir
+
+
+def _run_installer(genconf_dir: Path, contents: str) -> None:
+    """
+    Write ``genconf/serve`` as an installer would.
+    """
+    package_dir = genconf_dir / 'serve' / 'bootstrap'
+    package_dir.mkdir()
+    (package_dir / 'bootstrap.tar.xz').write_text(contents)
+
+
+class TestCachedGenconfOutput:
+    """
+    Tests for ``cached_genconf_output``.
+    """
+
+    @pytest.fixture()
+    def installer(self, tmp_path: Path) -> Path:
+        """
+        Return an installer which has no genconf image archive.
+        """
+        installer = tmp_path / 'dcos_generate_config.sh'
+        installer.write_text('exit 1')
+        return installer
+
+    def test_output_reused(self, tmp_path: Path, installer: Path) -> None:
+        """
+        The output of an installer run with the same files in ``genconf`` is
+        used instead of running the installer again.
+        """
+        cache_dir = tmp_path / 'cache'
+        first_genconf_dir = _genconf_dir(workspace=tmp_path, config='a: 1')
+        with cached_genconf_output(
+            installer=installer,
+            genconf_dir=first_genconf_dir,
+            cache_dir=cache_dir,
+        ) as cached:
+            assert not cached
+            _run_installer(genconf_dir=first_genconf_dir, contents='first')
+
+        second_genconf_dir = _genconf_dir(workspace=tmp_path, config='a: 1')
+        with cached_genconf_output(
+            installer=installer,
+            genconf_dir=second_genconf_dir,
+            cache_dir=cache_dir,
+        ) as cached:
+            assert cached
+
+        bootstrap = second_genconf_dir / 'serve' / 'bootstrap'
+        assert (bootstrap / 'bootstrap.tar.xz').read_text() == 'first'
+
+    def test_changed_inputs(self, tmp_path: Path, installer: Path) -> None:
+        """
+        The installer is run again if the files in ``genconf`` or the
+        installer change.
+        """
+        cache_dir = tmp_path / 'cache'
+        genconf_dir = _genconf_dir(workspace=tmp_path, config='a: 1')
+        with cached_genconf_output(
+            installer=installer,
+            genconf_dir=genconf_dir,
+            cache_dir=cache_dir,
+        ):
+            _run_installer(genconf_dir=genconf_dir, contents='first')
+
+        changed_genconf_dir = _genconf_dir(workspace=tmp_path, config='a: 2')
+        with cached_genconf_output(
+            installer=installer,
+            genconf_dir=changed_genconf_dir,
+            cache_dir=cache_dir,
+        ) as cached:
+            assert not cached
+
+        other_installer = tmp_path / 'other.sh'
+        other_installer.write_text('exit 2')
+        unchanged_genconf_dir = _genconf_dir(workspace=tmp_path, config='a: 1')
+        with cached_genconf_output(
+            installer=other_installer,
+            genconf_dir=unchanged_genconf_dir,
+            cache_dir=cache_dir,
+        ) as cached:
+            assert not cached
+
+    def test_failure_not_cached(
+        self,
+        tmp_path: Path,
+        installer: Path,
+    ) -> None:
+        """
+        Output is not cached if running the installer fails.
+        """
+        cache_dir = tmp_path / 'cache'
+        for _ in range(2):
+            genconf_dir = _genconf_dir(workspace=tmp_path, config='a: 1')
+            with pytest.raises(ValueError):
+                with cached_genconf_output(
+                    installer=installer,
+                    genconf_dir=genconf_dir,
+                    cache_dir=cache_dir,
+                ) as cached:
+                    assert not cached
+                    raise ValueError()
+
+    def test_least_recently_used_evicted(
+        self,
+        tmp_path: Path,
+        installer: Path,
+    ) -> None:
+        """
+        When more than ``max_entries`` outputs are cached, the least recently
+        used are removed.
+        """
+        cache_dir = tmp_path / 'cache'
+        for config in ('a: 1', 'a: 2'):
+            genconf_dir = _genconf_dir(workspace=tmp_path, config=config)
+            with cached_genconf_output(
+                installer=installer,
+                genconf_dir=genconf_dir,
+                cache_dir=cache_dir,
+                max_entries=1,
+            ):
+                _run_installer(genconf_dir=genconf_dir, contents=config)
+
+        results = []
+        for config in ('a: 2', 'a: 1'):
+            genconf_dir = _genconf_dir(workspace=tmp_path, config=config)
+            with cached_genconf_output(
+                installer=installer,
+                genconf_dir=genconf_dir,
+                cache_dir=cache_dir,
+                max_entries=1,
+            ) as cached:
+                results.append(cached)
+
+        assert results == [True, False]
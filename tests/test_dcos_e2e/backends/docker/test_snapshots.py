@@ -0,0 +1,142 @@
+"""
+Tests for snapshots of clusters on Docker.
+"""
+
+import uuid
+from pathlib import Path
+
+import pytest
+
+from dcos_e2e.backends import Docker
+from dcos_e2e.cluster import Cluster
+from dcos_e2e.docker_snapshots import (
+    create_snapshot,
+    remove_snapshot,
+    snapshot_names,
+)
+from dcos_e2e.node import Output
+
+
+class TestCreateSnapshot:
+    """
+    Tests for ``create_snapshot``.
+    """
+
+    @pytest.mark.parametrize('name', ['', '-start', 'with space', 'a' * 101])
+    def test_invalid_name(self, name: str) -> None:
+        """
+        A ``ValueError`` is raised if the name cannot be used in Docker image
+        tags.
+        """
+        cluster = Cluster.from_nodes(
+            masters=set(),
+            agents=set(),
+            public_agents=set(),
+        )
+        with pytest.raises(ValueError):
+            create_snapshot(cluster=cluster, name=name)
+
+    def test_create_cluster_from_snapshot(self, oss_installer: Path) -> None:
+        """
+        A cluster created from a snapshot has DC/OS running with the IP
+        addresses of its own nodes.
+        """
+        name = 'dcos-e2e-test-' + uuid.uuid4().hex
+        cluster_backend = Docker()
+        try:
+            with Cluster(
+                cluster_backend=cluster_backend,
+                masters=1,
+                agents=1,
+                public_agents=0,
+            ) as cluster:
+                cluster.install_dcos_from_path(
+                    dcos_installer=oss_installer,
+                    dcos_config=cluster.base_config,
+                    output=Output.LOG_AND_CAPTURE,
+                    ip_detect_path=cluster_backend.ip_detect_path,
+                )
+                cluster.wait_for_dcos_oss()
+                (original_master, ) = cluster.masters
+                create_snapshot(cluster=cluster, name=name)
+                assert name in snapshot_names()
+
+                with Cluster(
+                    cluster_backend=Docker(snapshot=name),
+                    masters=1,
+                    agents=1,
+                    public_agents=0,
+                ) as new_cluster:
+                    new_cluster.wait_for_dcos_oss()
+                    (master, ) = new_cluster.masters
+                    result = master.run(
+                        args=['cat', '/opt/mesosphere/etc/master_list'],
+                    )
+
+                # The snapshotted cluster is still usable.
+                cluster.wait_for_dcos_oss()
+        finally:
+            remove_snapshot(name=name)
+
+        master_list = result.stdout.decode()
+        assert str(master.private_ip_address) in master_list
+        assert str(original_master.private_ip_address) not in master_list
+        assert name not in snapshot_names()
+
+    def test_existing_name(self) -> None:
+        """
+        A ``ValueError`` is raised if a snapshot with the given name already
+        exists.
+        """
+        name = 'dcos-e2e-test-' + uuid.uuid4().hex
+        with Cluster(
+            cluster_backend=Docker(),
+            masters=1,
+            agents=0,
+            public_agents=0,
+        ) as cluster:
+            create_snapshot(cluster=cluster, name=name)
+            try:
+                with pytest.raises(ValueError):
+                    create_snapshot(cluster=cluster, name=name)
+            finally:
+                remove_snapshot(name=name)
+
+
+class TestSnapshotBackend:
+    """
+    Tests for the ``snapshot`` parameter of the Docker backend.
+    """
+
+    def test_missing_snapshot(self) -> None:
+        """
+        A ``ValueError`` is raised if the snapshot does not exist.
+        """
+        name = 'dcos-e2e-test-' + uuid.uuid4().hex
+        with pytest.raises(ValueError):
+            Cluster(cluster_backend=Docker(snapshot=name))
+
+    def test_wrong_size(self) -> None:
+        """
+        A ``ValueError`` is raised if the cluster does not have the same number
+        of each type of node as the snapshotted cluster.
+        """
+        name = 'dcos-e2e-test-' + uuid.uuid4().hex
+        with Cluster(
+            cluster_backend=Docker(),
+            masters=1,
+            agents=0,
+            public_agents=0,
+        ) as cluster:
+            create_snapshot(cluster=cluster, name=name)
+
+        try:
+            with pytest.raises(ValueError):
+                Cluster(
+                    cluster_backend=Docker(snapshot=name),
+                    masters=1,
+                    agents=1,
+                    public_agents=0,
+                )
+        finally:
+            remove_snapshot(name=name)
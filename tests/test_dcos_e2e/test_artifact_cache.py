@@ -0,0 +1,341 @@
+"""
+Tests for the artifact cache.
+"""
+
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pytest
+import requests
+from _pytest.monkeypatch import MonkeyPatch
+
+from dcos_e2e.artifact_cache import ArtifactCache
+
+
+class _Server:
+    """
+    An HTTP server for files in memory, which supports ``ETag`` and
+    ``Range`` headers and records the requests it gets.
+    """
+
+    def __init__(self) -> None:
+        """
+        Start the server.
+        """
+        self.files = {}  # type: Dict[str, bytes]
+        self.requests = []  # type: List[Dict[str, Optional[str]]]
+        # The number of bytes of the next response to send before closing
+        # the connection.
+        self.cut_after = None  # type: Optional[int]
+        # Whether to reject ``HEAD`` requests, as some servers do.
+        self.reject_head = False
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """
+            Serve ``server.files``.
+            """
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+            def do_HEAD(self) -> None:  # noqa: N802
+                if server.reject_head:
+                    self.send_error(405)
+                    return
+                self._respond(send_body=False)
+
+            def do_GET(self) -> None:  # noqa: N802
+                self._respond(send_body=True)
+
+            def _respond(self, send_body: bool) -> None:
+                server.requests.append(
+                    {
+                        'method': self.command,
+                        'path': self.path,
+                        'range': self.headers.get('Range'),
+                        'if_none_match': self.headers.get('If-None-Match'),
+                    },
+                )
+                content = server.files.get(self.path)
+                if content is None:
+                    self.send_error(404)
+                    return
+                etag = '"{}"'.format(hashlib.sha256(content).hexdigest())
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                start = 0
+                requested_range = self.headers.get('Range')
+                if requested_range and self.headers.get('If-Range') == etag:
+                    start = int(requested_range[len('bytes='):-1])
+                    self.send_response(206)
+                else:
+                    self.send_response(200)
+                body = content[start:]
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if send_body:
+                    if server.cut_after is not None:
+                        body = body[:server.cut_after]
+                        server.cut_after = None
+                        self.close_connection = True
+                    self.wfile.write(body)
+
+        self._server = HTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.start()
+
+    def url(self, path: str) -> str:
+        """
+        Return the URL of a path on the server.
+        """
+        host, port = self._server.server_address
+        return 'http://{host}:{port}{path}'.format(
+            host=host,
+            port=port,
+            path=path,
+        )
+
+    def gets(self) -> List[Dict[str, Optional[str]]]:
+        """
+        Return the ``GET`` requests which the server has received.
+        """
+        return [
+            request for request in self.requests if request['method'] == 'GET'
+        ]
+
+    def stop(self) -> None:
+        """
+        Stop the server.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+@pytest.fixture()
+def server() -> Iterator[_Server]:
+    """
+    Return a running HTTP server.
+    """
+    http_server = _Server()
+    yield http_server
+    http_server.stop()
+
+
+class TestArtifactCache:
+    """
+    Tests for ``ArtifactCache``.
+    """
+
+    def test_downloaded_once(self, server: _Server, tmp_path: Path) -> None:
+        """
+        A file is downloaded once and then used from the cache while it does
+        not change, and downloaded again when it changes.
+        """
+        cache = ArtifactCache(cache_dir=tmp_path)
+        url = server.url('/dcos_generate_config.sh')
+        server.files['/dcos_generate_config.sh'] = b'first'
+
+        first_path = cache.get(url=url)
+        second_path = cache.get(url=url)
+        assert first_path == second_path
+        assert first_path.read_bytes() == b'first'
+        assert len(server.gets()) == 1
+
+        server.files['/dcos_generate_config.sh'] = b'second'
+        changed_path = cache.get(url=url)
+        assert changed_path.read_bytes() == b'second'
+        assert len(server.gets()) == 2
+
+    def test_content_addressed(
+        self,
+        server: _Server,
+        tmp_path: Path,
+    ) -> None:
+        """
+        A file served at two URLs is stored once.
+        """
+        cache = ArtifactCache(cache_dir=tmp_path)
+        server.files['/a.sh'] = b'installer'
+        server.files['/b.sh'] = b'installer'
+
+        first_path = cache.get(url=server.url('/a.sh'))
+        second_path = cache.get(url=server.url('/b.sh'))
+        assert first_path == second_path
+        assert first_path.name == hashlib.sha256(b'installer').hexdigest()
+
+    def test_resume(self, server: _Server, tmp_path: Path) -> None:
+        """
+        An interrupted download is resumed from where it stopped.
+        """
+        cache = ArtifactCache(cache_dir=tmp_path)
+        url = server.url('/dcos_generate_config.sh')
+        content = bytes(range(256)) * 4096
+        server.files['/dcos_generate_config.sh'] = content
+        server.cut_after = len(content) // 2
+
+        with pytest.raises(requests.RequestException):
+            cache.get(url=url)
+
+        path = cache.get(url=url)
+        assert path.read_bytes() == content
+        resumed_range = server.gets()[-1]['range']
+        assert resumed_range is not None
+        assert resumed_range != 'bytes=0-'
+
+    def test_progress(self, server: _Server, tmp_path: Path) -> None:
+        """
+        Progress is reported while a file is downloaded.
+        """
+        cache = ArtifactCache(cache_dir=tmp_path)
+        server.files['/a.sh'] = b'installer'
+        reports = []  # type: List[Tuple[int, Optional[int]]]
+
+        cache.get(
+            url=server.url('/a.sh'),
+            progress=lambda downloaded, total: reports.append(
+                (downloaded, total),
+            ),
+        )
+        assert reports[-1] == (len(b'installer'), len(b'installer'))
+
+    def test_least_recently_used_evicted(
+        self,
+        server: _Server,
+        tmp_path: Path,
+    ) -> None:
+        """
+        When the cache is too large, the least recently used files are
+        removed.
+        """
+        cache = ArtifactCache(cache_dir=tmp_path, max_bytes=20)
+        for name in ('a', 'b', 'c'):
+            server.files['/' + name] = name.encode() * 10
+
+        first_path = cache.get(url=server.url('/a'))
+        second_path = cache.get(url=server.url('/b'))
+        # Use the first file so that the second is least recently used.
+        cache.get(url=server.url('/a'))
+        third_path = cache.get(url=server.url('/c'))
+
+        assert first_path.exists()
+        assert not second_path.exists()
+        assert third_path.exists()
+
+    def test_unreachable(self, server: _Server, tmp_path: Path) -> None:
+        """
+        A cached file is used if the server cannot be reached, and an error
+        is raised if there is no cached file.
+        """
+        cache = ArtifactCache(cache_dir=tmp_path)
+        url = server.url('/dcos_generate_config.sh')
+        server.files['/dcos_generate_config.sh'] = b'installer'
+        path = cache.get(url=url)
+        server.stop()
+
+        assert cache.get(url=url) == path
+        with pytest.raises(requests.ConnectionError):
+            cache.get(url=server.url('/other.sh'))
+
+    def test_head_rejected(self, server: _Server, tmp_path: Path) -> None:
+        """
+        If the server rejects ``HEAD`` requests, a conditional ``GET`` request
+        is used to find whether a cached file has changed.
+        """
+        cache = ArtifactCache(cache_dir=tmp_path)
+        url = server.url('/dcos_generate_config.sh')
+        server.files['/dcos_generate_config.sh'] = b'first'
+        server.reject_head = True
+
+        first_path = cache.get(url=url)
+        requests_before = len(server.gets())
+        second_path = cache.get(url=url)
+        assert first_path == second_path
+        [conditional_get] = server.gets()[requests_before:]
+        etag = '"{}"'.format(hashlib.sha256(b'first').hexdigest())
+        assert conditional_get['if_none_match'] == etag
+
+        server.files['/dcos_generate_config.sh'] = b'second'
+        changed_path = cache.get(url=url)
+        assert changed_path.read_bytes() == b'second'
+
+    def test_server_error(self, server: _Server, tmp_path: Path) -> None:
+        """
+        A cached file is used if the server returns an error.
+        """
+        cache = ArtifactCache(cache_dir=tmp_path)
+        url = server.url('/dcos_generate_config.sh')
+        server.files['/dcos_generate_config.sh'] = b'installer'
+        path = cache.get(url=url)
+        del server.files['/dcos_generate_config.sh']
+
+        assert cache.get(url=url) == path
+
+    def test_not_found(self, server: _Server, tmp_path: Path) -> None:
+        """
+        An error is raised if the server does not have the file.
+        """
+        cache = ArtifactCache(cache_dir=tmp_path)
+
+        with pytest.raises(requests.HTTPError):
+            cache.get(url=server.url('/missing.sh'))
+
+    def test_copy_kept(self, server: _Server, tmp_path: Path) -> None:
+        """
+        A copy is a hard link to the cached file, and it is kept when the
+        file is removed from the cache.
+        """
+        cache = ArtifactCache(cache_dir=tmp_path / 'cache', max_bytes=10)
+        server.files['/a'] = b'a' * 10
+        server.files['/b'] = b'b' * 10
+        copy_path = tmp_path / 'dcos_generate_config.sh'
+
+        cache.copy(url=server.url('/a'), path=copy_path)
+        cached_path = cache.get(url=server.url('/a'))
+        assert copy_path.stat().st_ino == cached_path.stat().st_ino
+
+        cache.get(url=server.url('/b'))
+        assert not cached_path.exists()
+        assert copy_path.read_bytes() == b'a' * 10
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            'cache',
+            'dcos_generate_config.sh',
+        ]
+
+    def test_copy_without_link(
+        self,
+        server: _Server,
+        tmp_path: Path,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        """
+        The cached file is copied if it cannot be hard linked.
+        """
+
+        def link(*args: object) -> None:
+            raise OSError('Invalid cross-device link')
+
+        monkeypatch.setattr(os, 'link', link)
+        cache = ArtifactCache(cache_dir=tmp_path / 'cache')
+        server.files['/a'] = b'installer'
+        copy_path = tmp_path / 'dcos_generate_config.sh'
+        copy_path.write_bytes(b'old')
+
+        cache.copy(url=server.url('/a'), path=copy_path)
+
+        assert copy_path.read_bytes() == b'installer'
+        cached_path = cache.get(url=server.url('/a'))
+        assert copy_path.stat().st_ino != cached_path.stat().st_ino
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            'cache',
+            'dcos_generate_config.sh',
+        ]
@@ -0,0 +1,118 @@
+"""
+Tests for installing and upgrading DC/OS from a bootstrap node, which do not
+need a cluster.
+"""
+
+import logging
+import subprocess
+from ipaddress import IPv4Address
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+from _pytest.logging import LogCaptureFixture
+from _pytest.monkeypatch import MonkeyPatch
+
+from dcos_e2e import _bootstrap
+from dcos_e2e.node import Output
+from dcos_e2e.rollout_policies import RolloutPolicy
+
+
+class _BootstrapNode:
+    """
+    A bootstrap node which records the commands run on it, and on which the
+    bootstrap server cannot be stopped.
+    """
+
+    def __init__(self) -> None:
+        """
+        Attributes:
+            private_ip_address: The private IP address of the node.
+            commands: The arguments of each command run on the node.
+        """
+        self.private_ip_address = IPv4Address('192.0.2.1')
+        self.commands = []  # type: List[List[str]]
+
+    def run(self, args: List[str], **kwargs: Any) -> Any:
+        """
+        Record a command, and fail if it stops a process.
+        """
+        self.commands.append(args)
+        if args[0] == 'kill':
+            raise subprocess.CalledProcessError(returncode=1, cmd=args)
+        url = 'http://192.0.2.1:8080/upgrade/abc/dcos_node_upgrade.sh'
+        return subprocess.CompletedProcess(
+            args=args,
+            returncode=0,
+            stdout=url.encode(),
+            stderr=b'',
+        )
+
+    def dcos_build_info(self) -> Any:
+        """
+        Return the version of DC/OS on the node.
+        """
+        return SimpleNamespace(version='2.0.0')
+
+
+class TestUpgradeFromBootstrapNode:
+    """
+    Tests for upgrading DC/OS with a node upgrade script served from a
+    bootstrap node.
+    """
+
+    def test_cleanup_on_failure(
+        self,
+        monkeypatch: MonkeyPatch,
+        caplog: LogCaptureFixture,
+    ) -> None:
+        """
+        If the upgrade fails, the bootstrap server is stopped and its files
+        are removed, and the upgrade error is raised rather than an error
+        from stopping the server.
+        """
+
+        def run_on_nodes(**kwargs: Any) -> None:
+            raise RuntimeError('upgrade failed')
+
+        monkeypatch.setattr(_bootstrap, '_find_open_port', lambda **_: 8080)
+        monkeypatch.setattr(_bootstrap, '_prepare_installer', lambda **_: None)
+        monkeypatch.setattr(
+            _bootstrap,
+            '_start_bootstrap_server',
+            lambda **_: 123,
+        )
+        monkeypatch.setattr(
+            _bootstrap,
+            '_wait_for_bootstrap_server',
+            lambda **_: None,
+        )
+        monkeypatch.setattr(_bootstrap._rollout, 'run_on_nodes', run_on_nodes)
+        bootstrap_node = _BootstrapNode()
+        workspace_dir = Path('/dcos-install-dir/abc')
+        remote_dcos_installer = workspace_dir / 'dcos_generate_config.sh'
+
+        with pytest.raises(RuntimeError):
+            _bootstrap._upgrade_dcos_from_bootstrap_node_path(
+                bootstrap_node=bootstrap_node,  # type: ignore
+                remote_dcos_installer=remote_dcos_installer,
+                masters=set(),
+                agents=set(),
+                public_agents=set(),
+                dcos_config={},
+                ip_detect_path=Path('/ip-detect'),
+                files_to_copy_to_genconf_dir=(),
+                output=Output.CAPTURE,
+                rollout_policy=RolloutPolicy.concurrent(),
+                user=None,
+                transport=None,
+            )
+
+        assert bootstrap_node.commands[-2:] == [
+            ['kill', '123'],
+            ['rm', '-rf', str(workspace_dir)],
+        ]
+        assert [record.levelno for record in caplog.records] == [
+            logging.WARNING,
+        ]
@@ -17,7 +17,9 @@ from _pytest.logging import LogCaptureFixture
 
 from dcos_e2e.base_classes import ClusterBackend
 from dcos_e2e.cluster import Cluster
+from dcos_e2e.exceptions import DCOSNotInstalledError
 from dcos_e2e.node import DCOSVariant, Output
+from dcos_e2e.rollout_policies import RolloutPolicy
 
 
 class TestIntegrationTests:
@@ -366,6 +368,52 @@ class TestClusterFromNodes:
                 assert build.commit
                 assert build.variant == DCOSVariant.OSS
 
+    def test_install_dcos_with_bootstrap_node(
+        self,
+        oss_installer: Path,
+        cluster_backend: ClusterBackend,
+    ) -> None:
+        """
+        DC/OS can be installed on an existing cluster with a given bootstrap
+        node which is not part of the cluster.
+        """
+        with Cluster(
+            cluster_backend=cluster_backend,
+            masters=1,
+            agents=1,
+            public_agents=0,
+        ) as original_cluster:
+            (bootstrap_node, ) = original_cluster.agents
+            cluster = Cluster.from_nodes(
+                masters=original_cluster.masters,
+                agents=set(),
+                public_agents=set(),
+                bootstrap_node=bootstrap_node,
+            )
+
+            cluster.install_dcos_from_path(
+                dcos_installer=oss_installer,
+                dcos_config={
+                    **cluster.base_config,
+                    **cluster_backend.base_config,
+                },
+                ip_detect_path=cluster_backend.ip_detect_path,
+            )
+            cluster.wait_for_dcos_oss()
+            (master, ) = cluster.masters
+            build = master.dcos_build_info()
+            assert build.variant == DCOSVariant.OSS
+
+            with pytest.raises(DCOSNotInstalledError):
+                bootstrap_node.dcos_build_info()
+
+            # The installation files are no longer served or kept on the
+            # bootstrap node once DC/OS has started.
+            with pytest.raises(CalledProcessError):
+                bootstrap_node.run(args=['pgrep', '--full', 'http.server'])
+            result = bootstrap_node.run(args=['ls', '/dcos-install-dir'])
+            assert result.stdout == b''
+
 
 class TestUpgrade:
     """
@@ -423,7 +471,8 @@ class TestUpgrade:
         oss_2_1_installer_url: str,
     ) -> None:
         """
-        DC/OS OSS can be upgraded from 2.0 to 2.1 from a URL.
+        DC/OS OSS can be upgraded from 2.0 to 2.1 from a URL, with agents
+        upgraded in parallel.
         """
         with Cluster(cluster_backend=cluster_backend) as cluster:
             cluster.install_dcos_from_path(
@@ -448,6 +497,7 @@ class TestUpgrade:
                 dcos_config=cluster.base_config,
                 ip_detect_path=cluster_backend.ip_detect_path,
                 output=Output.LOG_AND_CAPTURE,
+                rollout_policy=RolloutPolicy.rolling(agent_parallelism=2),
             )
 
             cluster.wait_for_dcos_oss()
@@ -564,3 +614,50 @@ class TestInstallDCOS:
                 )
 
         assert not self._two_masters_error_logged(log_records=caplog.records)
+
+
+class TestStreamOutput:
+    """
+    Tests for giving ``Output.STREAM`` to methods which do not support it.
+    """
+
+    def test_rejected(
+        self,
+        cluster_backend: ClusterBackend,
+        tmp_path: Path,
+    ) -> None:
+        """
+        ``Output.STREAM`` is rejected by methods which do not take an output
+        sink.
+        """
+        installer_url = 'https://example.com/dcos_generate_config.sh'
+        installer_path = tmp_path / 'dcos_generate_config.sh'
+        installer_path.write_text('exit 1')
+        ip_detect_path = tmp_path / 'ip-detect'
+        ip_detect_path.write_text('exit 1')
+
+        with Cluster(
+            cluster_backend=cluster_backend,
+            masters=1,
+            agents=0,
+            public_agents=0,
+        ) as cluster:
+            for method, dcos_installer in (
+                (cluster.install_dcos_from_url, installer_url),
+                (cluster.install_dcos_from_path, installer_path),
+                (cluster.upgrade_dcos_from_url, installer_url),
+                (cluster.upgrade_dcos_from_path, installer_path),
+            ):
+                with pytest.raises(ValueError):
+                    method(
+                        dcos_installer=dcos_installer,
+                        dcos_config=cluster.base_config,
+                        ip_detect_path=ip_detect_path,
+                        output=Output.STREAM,
+                    )
+
+            with pytest.raises(ValueError):
+                cluster.run_with_test_environment(
+                    args=['true'],
+                    output=Output.STREAM,
+                )
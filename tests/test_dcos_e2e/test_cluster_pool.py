@@ -0,0 +1,304 @@
+"""
+Tests for pools of clusters.
+"""
+
+import threading
+import uuid
+from concurrent import futures
+from pathlib import Path
+from typing import List
+
+import docker
+import pytest
+
+from dcos_e2e.backends import Docker
+from dcos_e2e.base_classes import ClusterBackend
+from dcos_e2e.cluster import Cluster
+from dcos_e2e.cluster_pool import ClusterPool, ReleasePolicy, _ClusterSet
+
+
+class TestInvalidPool:
+    """
+    Tests for invalid pool settings.
+    """
+
+    def test_size(self) -> None:
+        """
+        A ``ValueError`` is raised if the size of the pool is less than one.
+        """
+        with pytest.raises(ValueError):
+            ClusterPool(size=0)
+
+    def test_max_clusters(self) -> None:
+        """
+        A ``ValueError`` is raised if the maximum number of clusters is less
+        than one.
+        """
+        with pytest.raises(ValueError):
+            ClusterPool(max_clusters=0)
+
+    def test_reset_without_function(self) -> None:
+        """
+        A ``ValueError`` is raised if the release policy is to reset clusters
+        but no reset function is given.
+        """
+        with pytest.raises(ValueError):
+            ClusterPool(release_policy=ReleasePolicy.RESET)
+
+
+class TestLease:
+    """
+    Tests for leasing clusters.
+    """
+
+    def test_recycle(self, cluster_backend: ClusterBackend) -> None:
+        """
+        With ``ReleasePolicy.RECYCLE``, a released cluster is leased again,
+        and the pool's clusters are destroyed when the pool is closed.
+        """
+        with ClusterPool(release_policy=ReleasePolicy.RECYCLE) as pool:
+            with pool.lease(
+                cluster_backend=cluster_backend,
+                agents=0,
+                public_agents=0,
+            ) as cluster:
+                masters = cluster.masters
+
+            with pool.lease(
+                cluster_backend=cluster_backend,
+                agents=0,
+                public_agents=0,
+            ) as cluster:
+                assert cluster.masters == masters
+
+        (master, ) = masters
+        client = docker.from_env(version='auto')
+        with pytest.raises(docker.errors.NotFound):
+            client.containers.get(master.docker_container_id)
+
+    def test_destroy(self, cluster_backend: ClusterBackend) -> None:
+        """
+        With ``ReleasePolicy.DESTROY``, a released cluster is destroyed and
+        replaced.
+        """
+        with ClusterPool(release_policy=ReleasePolicy.DESTROY) as pool:
+            with pool.lease(
+                cluster_backend=cluster_backend,
+                agents=0,
+                public_agents=0,
+            ) as cluster:
+                (first_master, ) = cluster.masters
+
+            with pool.lease(
+                cluster_backend=cluster_backend,
+                agents=0,
+                public_agents=0,
+            ) as cluster:
+                (second_master, ) = cluster.masters
+                first_id = first_master.docker_container_id
+                assert second_master.docker_container_id != first_id
+                second_master.run(args=['true'])
+
+    def test_reset(self, cluster_backend: ClusterBackend) -> None:
+        """
+        With ``ReleasePolicy.RESET``, a released cluster is reset and leased
+        again.
+        """
+        reset_clusters = []  # type: List[Cluster]
+
+        with ClusterPool(
+            release_policy=ReleasePolicy.RESET,
+            reset=reset_clusters.append,
+        ) as pool:
+            with pool.lease(
+                cluster_backend=cluster_backend,
+                agents=0,
+                public_agents=0,
+            ) as first_cluster:
+                pass
+
+            with pool.lease(
+                cluster_backend=cluster_backend,
+                agents=0,
+                public_agents=0,
+            ) as second_cluster:
+                assert second_cluster is first_cluster
+
+        assert reset_clusters == [first_cluster]
+
+    def test_reset_error(self, cluster_backend: ClusterBackend) -> None:
+        """
+        A cluster which cannot be reset is replaced.
+        """
+
+        def reset(cluster: Cluster) -> None:
+            raise Exception(cluster)
+
+        with ClusterPool(
+            release_policy=ReleasePolicy.RESET,
+            reset=reset,
+        ) as pool:
+            with pool.lease(
+                cluster_backend=cluster_backend,
+                agents=0,
+                public_agents=0,
+            ) as first_cluster:
+                pass
+
+            with pool.lease(
+                cluster_backend=cluster_backend,
+                agents=0,
+                public_agents=0,
+            ) as second_cluster:
+                assert second_cluster is not first_cluster
+
+    def test_install(
+        self,
+        cluster_backend: ClusterBackend,
+        oss_installer: Path,
+    ) -> None:
+        """
+        DC/OS is installed and waited for on clusters which are created in
+        the background.
+        """
+        with ClusterPool() as pool:
+            with pool.lease(
+                cluster_backend=cluster_backend,
+                agents=0,
+                public_agents=0,
+                dcos_installer=oss_installer,
+            ) as cluster:
+                (master, ) = cluster.masters
+                version_path = '/opt/mesosphere/etc/dcos-version.json'
+                master.run(args=['test', '-f', version_path])
+                cluster.wait_for_dcos_oss()
+
+    def test_create_error(self) -> None:
+        """
+        An error raised when creating a cluster in the background is raised
+        when leasing a cluster.
+        """
+        missing_snapshot = 'dcos-e2e-test-' + uuid.uuid4().hex
+        with ClusterPool() as pool:
+            with pytest.raises(ValueError):
+                with pool.lease(
+                    cluster_backend=Docker(snapshot=missing_snapshot),
+                ):
+                    pass
+
+    def test_closed(self, cluster_backend: ClusterBackend) -> None:
+        """
+        A ``ValueError`` is raised when leasing a cluster from a closed pool.
+        """
+        pool = ClusterPool()
+        pool.close()
+        with pytest.raises(ValueError):
+            with pool.lease(cluster_backend=cluster_backend):
+                pass
+
+
+class _FakeCluster:
+    """
+    A cluster which records whether it has been destroyed.
+    """
+
+    def __init__(self) -> None:
+        """
+        Attributes:
+            destroyed: Whether the cluster has been destroyed.
+        """
+        self.destroyed = False
+
+    def destroy(self) -> None:
+        """
+        Record that the cluster has been destroyed.
+        """
+        self.destroyed = True
+
+
+class TestClose:
+    """
+    Tests for closing a pool.
+    """
+
+    def test_pending_creations(self) -> None:
+        """
+        Clusters which are waiting to be created when a pool is closed are
+        not created, and a cluster which is being created is destroyed once
+        it is created.
+        """
+        pool = ClusterPool(size=3)
+        # Only one cluster is created at a time, so the others wait.
+        pool._executor = futures.ThreadPoolExecutor(max_workers=1)
+        creating = threading.Event()
+        closing = threading.Event()
+        clusters = []  # type: List[_FakeCluster]
+
+        def create() -> Cluster:
+            creating.set()
+            closing.wait()
+            cluster = _FakeCluster()
+            clusters.append(cluster)
+            return cluster  # type: ignore
+
+        cluster_set = _ClusterSet(create=create)
+        with pool._condition:
+            pool._fill(cluster_set=cluster_set)
+
+        assert creating.wait(timeout=10)
+        close = threading.Thread(target=pool.close)
+        close.start()
+        while not pool._closed:
+            closing.wait(timeout=0.01)
+        closing.set()
+        close.join(timeout=10)
+
+        assert not close.is_alive()
+        assert len(clusters) == 1
+        assert clusters[0].destroyed
+        assert cluster_set.count == 1
+        assert not cluster_set.available
+
+
+class TestMaxClusters:
+    """
+    Tests for the maximum number of clusters shared between pools.
+    """
+
+    def test_shared(
+        self,
+        cluster_backend: ClusterBackend,
+        tmp_path: Path,
+    ) -> None:
+        """
+        Pools which share a lock directory do not create more than the maximum
+        number of clusters between them.
+        """
+        first_pool = ClusterPool(max_clusters=1, lock_dir=tmp_path)
+        second_pool = ClusterPool(max_clusters=1, lock_dir=tmp_path)
+
+        def lease_from_second_pool() -> None:
+            with second_pool.lease(
+                cluster_backend=cluster_backend,
+                agents=0,
+                public_agents=0,
+            ):
+                pass
+
+        executor = futures.ThreadPoolExecutor(max_workers=1)
+        with second_pool, executor:
+            with first_pool:
+                with first_pool.lease(
+                    cluster_backend=cluster_backend,
+                    agents=0,
+                    public_agents=0,
+                ):
+                    second_lease = executor.submit(lease_from_second_pool)
+                    # The second pool waits while the first pool's cluster
+                    # uses the only slot.
+                    with pytest.raises(futures.TimeoutError):
+                        second_lease.result(timeout=10)
+
+            # The first pool's cluster has been destroyed, so the second pool
+            # can create a cluster.
+            second_lease.result()
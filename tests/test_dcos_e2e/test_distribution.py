@@ -0,0 +1,104 @@
+"""
+Tests for sending a file to many nodes.
+"""
+
+import os
+from ipaddress import IPv4Address
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from dcos_e2e._distribution import _rounds
+from dcos_e2e.base_classes import ClusterBackend
+from dcos_e2e.cluster import Cluster
+from dcos_e2e.node import Node
+
+
+def _nodes(count: int) -> List[Node]:
+    """
+    Return ``count`` nodes which are never connected to.
+    """
+    return [
+        Node(
+            public_ip_address=IPv4Address('172.17.0.{}'.format(index + 2)),
+            private_ip_address=IPv4Address('172.17.0.{}'.format(index + 2)),
+            default_user='root',
+            ssh_key_path=Path('/dev/null'),
+        ) for index in range(count)
+    ]
+
+
+class TestRounds:
+    """
+    Tests for ``_rounds``.
+    """
+
+    @pytest.mark.parametrize(
+        'count, expected_rounds',
+        [(1, 0), (2, 1), (3, 2), (4, 2), (5, 3), (8, 3), (9, 4), (100, 7)],
+    )
+    def test_rounds(self, count: int, expected_rounds: int) -> None:
+        """
+        Every node gets the file once, from a node which had it in an
+        earlier round, and the number of nodes with the file doubles each
+        round.
+        """
+        nodes = _nodes(count=count)
+        rounds = _rounds(nodes=nodes)
+        assert len(rounds) == expected_rounds
+
+        holders = {nodes[0]}
+        for pairs in rounds:
+            sources = [source for source, _ in pairs]
+            targets = {target for _, target in pairs}
+            assert set(sources) <= holders
+            assert len(sources) == len(set(sources))
+            assert not targets & holders
+            holders |= targets
+
+        assert holders == set(nodes)
+
+
+class TestSendFile:
+    """
+    Tests for ``Cluster.send_file``.
+    """
+
+    def test_send_file(
+        self,
+        cluster_backend: ClusterBackend,
+        tmp_path: Path,
+    ) -> None:
+        """
+        The file is copied to every node, and no temporary directories are
+        left on any node.
+        """
+        content = os.urandom(1024 * 1024)
+        local_path = tmp_path / 'example.bin'
+        local_path.write_bytes(content)
+        remote_path = Path('/etc/dcos-e2e/example.bin')
+
+        with Cluster(
+            cluster_backend=cluster_backend,
+            masters=1,
+            agents=2,
+            public_agents=1,
+        ) as cluster:
+            cluster.send_file(local_path=local_path, remote_path=remote_path)
+            nodes = {*cluster.masters, *cluster.agents, *cluster.public_agents}
+            assert len(nodes) == 4
+            for node in nodes:
+                result = node.run(args=['cat', str(remote_path)])
+                assert result.stdout == content
+                result = node.run(
+                    args=[
+                        'find',
+                        '/tmp',
+                        '-maxdepth',
+                        '1',
+                        '-name',
+                        'dcos-e2e-distribute-*',
+                    ],
+                )
+                assert result.stdout == b''
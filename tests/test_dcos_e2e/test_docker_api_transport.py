@@ -0,0 +1,191 @@
+"""
+Tests for the Docker Engine API transport which do not need Docker.
+"""
+
+import io
+import tarfile
+from ipaddress import IPv4Address
+from pathlib import Path
+from typing import Any, Iterator, List, Tuple
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from dcos_e2e._node_transports import _docker_api_transport
+from dcos_e2e._node_transports._docker_api_transport import (
+    DockerAPITransport,
+)
+
+
+class _FakeAPI:
+    """
+    A Docker API client which returns a given archive for any path.
+    """
+
+    def __init__(self, archive: bytes) -> None:
+        """
+        Args:
+            archive: The archive to return.
+        """
+        self._archive = archive
+
+    def get_archive(
+        self,
+        container: str,
+        path: str,
+        chunk_size: int,
+    ) -> Tuple[Iterator[bytes], Any]:
+        """
+        Return the archive in chunks.
+        """
+        chunks = [
+            self._archive[offset:offset + chunk_size]
+            for offset in range(0, len(self._archive), chunk_size)
+        ]
+        return iter(chunks), {}
+
+
+class _FakeClient:
+    """
+    A Docker client with a fake API client.
+    """
+
+    def __init__(self, archive: bytes) -> None:
+        """
+        Args:
+            archive: The archive which the API client returns.
+        """
+        self.api = _FakeAPI(archive=archive)
+
+
+def _archive(members: List[Tuple[tarfile.TarInfo, bytes]]) -> bytes:
+    """
+    Return a tar archive with the given members and contents.
+    """
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode='w') as tar:
+        for member, contents in members:
+            member.size = len(contents)
+            tar.addfile(tarinfo=member, fileobj=io.BytesIO(contents))
+    return archive.getvalue()
+
+
+def _download(
+    monkeypatch: MonkeyPatch,
+    archive: bytes,
+    local_path: Path,
+) -> None:
+    """
+    Download a file which the Docker API returns as the given archive.
+    """
+    monkeypatch.setattr(
+        _docker_api_transport.CONTAINER_INDEX,
+        'client',
+        lambda: _FakeClient(archive=archive),
+    )
+    DockerAPITransport(container_id='example').download_file(
+        remote_path=Path('/etc/example.txt'),
+        local_path=local_path,
+        user='root',
+        ssh_key_path=Path('/dev/null'),
+        public_ip_address=IPv4Address('172.17.0.2'),
+    )
+
+
+class TestDownloadFile:
+    """
+    Tests for ``DockerAPITransport.download_file``.
+    """
+
+    def test_regular_file(
+        self,
+        tmp_path: Path,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        """
+        A regular file is written to the local path, whatever its name in
+        the archive.
+        """
+        local_path = tmp_path / 'local.txt'
+        archive = _archive(
+            members=[(tarfile.TarInfo(name='example.txt'), b'contents')],
+        )
+
+        _download(
+            monkeypatch=monkeypatch,
+            archive=archive,
+            local_path=local_path,
+        )
+
+        assert local_path.read_bytes() == b'contents'
+        assert [path.name for path in tmp_path.iterdir()] == ['local.txt']
+
+    def test_symlink(self, tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+        """
+        A symbolic link is not written.
+        """
+        member = tarfile.TarInfo(name='example.txt')
+        member.type = tarfile.SYMTYPE
+        member.linkname = '/etc/passwd'
+        archive = _archive(members=[(member, b'')])
+
+        with pytest.raises(ValueError):
+            _download(
+                monkeypatch=monkeypatch,
+                archive=archive,
+                local_path=tmp_path / 'local.txt',
+            )
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_directory(
+        self,
+        tmp_path: Path,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        """
+        A directory is not written, and nor are files outside the local path.
+        """
+        directory = tarfile.TarInfo(name='example')
+        directory.type = tarfile.DIRTYPE
+        archive = _archive(
+            members=[
+                (directory, b''),
+                (tarfile.TarInfo(name='../outside.txt'), b'contents'),
+            ],
+        )
+
+        with pytest.raises(ValueError):
+            _download(
+                monkeypatch=monkeypatch,
+                archive=archive,
+                local_path=tmp_path / 'local' / 'local.txt',
+            )
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_extra_member(
+        self,
+        tmp_path: Path,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        """
+        Nothing is left at the local path if the archive has members after
+        the file.
+        """
+        local_path = tmp_path / 'local.txt'
+        archive = _archive(
+            members=[
+                (tarfile.TarInfo(name='example.txt'), b'contents'),
+                (tarfile.TarInfo(name='../outside.txt'), b'contents'),
+            ],
+        )
+
+        with pytest.raises(ValueError):
+            _download(
+                monkeypatch=monkeypatch,
+                archive=archive,
+                local_path=local_path,
+            )
+
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,72 @@
+"""
+Tests for locks shared between processes.
+"""
+
+import multiprocessing
+import time
+from pathlib import Path
+
+from dcos_e2e._file_lock import FileLock, file_lock
+
+
+def _hold_lock(path: Path, events: multiprocessing.Queue) -> None:
+    """
+    Hold a lock for a short time, recording when it is taken and released.
+    """
+    with file_lock(path=path):
+        events.put('taken')
+        time.sleep(0.2)
+        events.put('released')
+
+
+class TestFileLock:
+    """
+    Tests for ``file_lock``.
+    """
+
+    def test_exclusive(self, tmp_path: Path) -> None:
+        """
+        Only one process holds a lock at a time.
+        """
+        path = tmp_path / 'locks' / 'lock'
+        events = multiprocessing.Queue()  # type: multiprocessing.Queue
+        processes = [
+            multiprocessing.Process(target=_hold_lock, args=(path, events))
+            for _ in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        results = [events.get() for _ in range(6)]
+        assert results == ['taken', 'released'] * 3
+
+    def test_released(self, tmp_path: Path) -> None:
+        """
+        A lock is released when the context manager exits.
+        """
+        path = tmp_path / 'lock'
+        with file_lock(path=path):
+            pass
+        with file_lock(path=path):
+            pass
+
+
+class TestNonBlocking:
+    """
+    Tests for taking a ``FileLock`` without waiting.
+    """
+
+    def test_held(self, tmp_path: Path) -> None:
+        """
+        A lock which is held cannot be taken until it is released.
+        """
+        path = tmp_path / 'lock'
+        first_lock = FileLock(path=path)
+        second_lock = FileLock(path=path)
+        assert first_lock.acquire(blocking=False)
+        assert not second_lock.acquire(blocking=False)
+        first_lock.release()
+        assert second_lock.acquire(blocking=False)
+        second_lock.release()
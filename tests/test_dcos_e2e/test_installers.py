@@ -0,0 +1,310 @@
+"""
+Tests for getting details of DC/OS installers.
+"""
+
+import io
+import json
+import os
+import shutil
+import subprocess
+import tarfile
+from pathlib import Path
+from textwrap import dedent
+from typing import Dict
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from dcos_e2e import installers
+from dcos_e2e.installers import get_installer_details, installer_sha256
+from dcos_e2e.node import DCOSVariant
+
+
+def _fake_installer(path: Path, variant: str, version: str) -> Path:
+    """
+    Write a script which acts like ``dcos_generate_config.sh --version``, and
+    which records each time it is run in ``runs`` next to the script.
+    """
+    runs = path.parent / 'runs'
+    script = dedent(
+        """\
+        echo run >> {runs}
+        echo '{{"variant": "{variant}", "version": "{version}"}}'
+        """,
+    ).format(runs=runs, variant=variant, version=version)
+    path.write_text(script)
+    return path
+
+
+def _tar(members: Dict[str, bytes]) -> bytes:
+    """
+    Return a tar archive with the given members.
+    """
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode='w') as tar:
+        for name, contents in members.items():
+            info = tarfile.TarInfo(name=name)
+            info.size = len(contents)
+            tar.addfile(info, io.BytesIO(contents))
+    return archive.getvalue()
+
+
+def _installer_with_payload(path: Path, variant: str, version: str) -> Path:
+    """
+    Write an installer with an archive of a genconf image appended, in the
+    layout of ``dcos_generate_config.sh``.
+    Running the installer records that it was run and then fails.
+    """
+    config = {'config': {'Env': ['BOOTSTRAP_VARIANT=' + variant]}}
+    calc = "entry = {{'must': {{'dcos_version': '{version}'}}}}\n".format(
+        version=version,
+    )
+    layers = {
+        'base/layer.tar': _tar({'usr/bin/python': b'\0' * 1024}),
+        'gen/layer.tar': _tar(
+            {'usr/lib/python3.6/site-packages/gen/calc.py': calc.encode()},
+        ),
+    }
+    manifest = [{'Config': 'config.json', 'Layers': sorted(layers)}]
+    image = _tar(
+        {
+            'manifest.json': json.dumps(manifest).encode(),
+            'config.json': json.dumps(config).encode(),
+            **layers,
+        },
+    )
+    runs = path.parent / 'runs'
+    script = 'echo run >> {runs}\nexit 1\n#EOF#\n'.format(runs=runs)
+    path.write_bytes(
+        script.encode() + _tar({'dcos-genconf.abc-def.tar': image}),
+    )
+    return path
+
+
+def _runs(installer: Path) -> int:
+    """
+    Return the number of times a fake installer has been run.
+    """
+    runs = installer.parent / 'runs'
+    if not runs.exists():
+        return 0
+    return len(runs.read_text().splitlines())
+
+
+class TestGetInstallerDetails:
+    """
+    Tests for ``get_installer_details``.
+    """
+
+    @pytest.mark.parametrize(
+        'variant_name, variant',
+        [
+            ('', DCOSVariant.OSS),
+            ('ee', DCOSVariant.ENTERPRISE),
+        ],
+    )
+    def test_details(
+        self,
+        tmp_path: Path,
+        variant_name: str,
+        variant: DCOSVariant,
+    ) -> None:
+        """
+        The variant and version printed by the installer are returned.
+        """
+        installer = _fake_installer(
+            path=tmp_path / 'dcos_generate_config.sh',
+            variant=variant_name,
+            version='2.1.0',
+        )
+
+        details = get_installer_details(
+            installer=installer,
+            workspace_dir=tmp_path,
+            cache_dir=tmp_path / 'cache',
+        )
+
+        assert details.variant == variant
+        assert details.version == '2.1.0'
+
+    @pytest.mark.parametrize(
+        'variant_name, variant',
+        [
+            ('', DCOSVariant.OSS),
+            ('ee', DCOSVariant.ENTERPRISE),
+        ],
+    )
+    def test_read_without_running(
+        self,
+        tmp_path: Path,
+        variant_name: str,
+        variant: DCOSVariant,
+    ) -> None:
+        """
+        Details are read from the genconf image in the installer without
+        running the installer.
+        """
+        installer = _installer_with_payload(
+            path=tmp_path / 'dcos_generate_config.sh',
+            variant=variant_name,
+            version='2.1.0',
+        )
+
+        details = get_installer_details(
+            installer=installer,
+            cache_dir=tmp_path / 'cache',
+        )
+
+        assert details.variant == variant
+        assert details.version == '2.1.0'
+        assert _runs(installer=installer) == 0
+
+    def test_cached(self, tmp_path: Path) -> None:
+        """
+        An installer is not run again to get details which are cached, even
+        if it has been copied to another path.
+        """
+        cache_dir = tmp_path / 'cache'
+        installer = _fake_installer(
+            path=tmp_path / 'dcos_generate_config.sh',
+            variant='ee',
+            version='2.1.0',
+        )
+        get_installer_details(installer=installer, cache_dir=cache_dir)
+        runs = _runs(installer=installer)
+        assert runs > 0
+
+        copied_installer = tmp_path / 'copy.sh'
+        shutil.copy(str(installer), str(copied_installer))
+        for path in (installer, copied_installer):
+            details = get_installer_details(
+                installer=path,
+                cache_dir=cache_dir,
+            )
+            assert details.variant == DCOSVariant.ENTERPRISE
+            assert details.version == '2.1.0'
+
+        assert _runs(installer=installer) == runs
+
+    def test_read_details_cached(
+        self,
+        tmp_path: Path,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        """
+        Details which are read from the genconf image in the installer are
+        cached, so the image is not read again.
+        """
+        cache_dir = tmp_path / 'cache'
+        installer = _installer_with_payload(
+            path=tmp_path / 'dcos_generate_config.sh',
+            variant='ee',
+            version='2.1.0',
+        )
+        get_installer_details(installer=installer, cache_dir=cache_dir)
+
+        def read_installer_details(installer: Path) -> None:
+            raise AssertionError('The installer payload was read again.')
+
+        monkeypatch.setattr(
+            installers,
+            'read_installer_details',
+            read_installer_details,
+        )
+        details = get_installer_details(
+            installer=installer,
+            cache_dir=cache_dir,
+        )
+
+        assert details.variant == DCOSVariant.ENTERPRISE
+        assert details.version == '2.1.0'
+        assert _runs(installer=installer) == 0
+
+    def test_changed_installer(self, tmp_path: Path) -> None:
+        """
+        Details are found again for an installer whose contents have changed.
+        """
+        cache_dir = tmp_path / 'cache'
+        installer_path = tmp_path / 'dcos_generate_config.sh'
+        installer = _fake_installer(
+            path=installer_path,
+            variant='',
+            version='2.1.0',
+        )
+        get_installer_details(installer=installer, cache_dir=cache_dir)
+
+        _fake_installer(path=installer_path, variant='ee', version='2.2.0')
+        details = get_installer_details(
+            installer=installer,
+            cache_dir=cache_dir,
+        )
+
+        assert details.variant == DCOSVariant.ENTERPRISE
+        assert details.version == '2.2.0'
+
+    def test_failing_installer(self, tmp_path: Path) -> None:
+        """
+        An error from the installer is raised and nothing is cached.
+        """
+        cache_dir = tmp_path / 'cache'
+        installer = tmp_path / 'dcos_generate_config.sh'
+        installer.write_text('exit 1')
+
+        for _ in range(2):
+            with pytest.raises(subprocess.CalledProcessError):
+                get_installer_details(installer=installer, cache_dir=cache_dir)
+
+    def test_space_in_path(self, tmp_path: Path) -> None:
+        """
+        An installer path cannot include a space.
+        """
+        installer = _fake_installer(
+            path=tmp_path / 'dcos generate config.sh',
+            variant='',
+            version='2.1.0',
+        )
+
+        with pytest.raises(ValueError):
+            get_installer_details(
+                installer=installer,
+                cache_dir=tmp_path / 'cache',
+            )
+
+
+class TestInstallerSHA256:
+    """
+    Tests for ``installer_sha256``.
+    """
+
+    def test_unchanged_file_not_read(self, tmp_path: Path) -> None:
+        """
+        A file whose inode, size and modification time are unchanged is not
+        read again.
+        """
+        cache_dir = tmp_path / 'cache'
+        installer = tmp_path / 'installer.sh'
+        installer.write_text('a')
+        first_hash = installer_sha256(installer=installer, cache_dir=cache_dir)
+
+        # Change the contents without changing the size or modification
+        # time, so that a cached hash is used.
+        stat = installer.stat()
+        installer.write_text('b')
+        os.utime(
+            str(installer),
+            ns=(stat.st_atime_ns, stat.st_mtime_ns),
+        )
+        assert installer_sha256(
+            installer=installer,
+            cache_dir=cache_dir,
+        ) == first_hash
+
+        # A changed modification time means that the file is read again.
+        os.utime(
+            str(installer),
+            ns=(stat.st_atime_ns, stat.st_mtime_ns + 1),
+        )
+        assert installer_sha256(
+            installer=installer,
+            cache_dir=cache_dir,
+        ) != first_hash
@@ -4,6 +4,7 @@ Tests for managing DC/OS cluster nodes.
 See ``test_node_install.py`` for more, related tests.
 """
 
+import getpass
 import logging
 import os
 import subprocess
@@ -13,17 +14,18 @@ import uuid
 from ipaddress import IPv4Address
 from pathlib import Path
 from subprocess import CalledProcessError, TimeoutExpired
-from typing import Iterator
+from typing import Any, Iterator, List
 
 import pytest
 from _pytest.capture import CaptureFixture
 from _pytest.fixtures import SubRequest
 from _pytest.logging import LogCaptureFixture
+from _pytest.monkeypatch import MonkeyPatch
 
 from dcos_e2e.backends import Docker
 from dcos_e2e.cluster import Cluster
 from dcos_e2e.exceptions import DCOSNotInstalledError
-from dcos_e2e.node import Node, Output, Transport
+from dcos_e2e.node import Node, Output, Role, Transport
 
 # We ignore this error because it conflicts with `pytest` standard usage.
 # pylint: disable=redefined-outer-name
@@ -137,6 +139,33 @@ class TestStringRepresentation:
         assert string == str(dcos_node)
 
 
+class TestDockerContainerID:
+    """
+    Tests for ``Node.docker_container_id``.
+    """
+
+    def test_docker_container_id(
+        self,
+        dcos_node: Node,
+        tmp_path: Path,
+    ) -> None:
+        """
+        The Docker exec transport uses the given container rather than
+        finding a container by the node's IP address.
+        """
+        assert dcos_node.docker_container_id is not None
+        node = Node(
+            public_ip_address=IPv4Address('172.0.0.1'),
+            private_ip_address=IPv4Address('172.0.0.1'),
+            default_user=dcos_node.default_user,
+            ssh_key_path=tmp_path / 'unused.key',
+            default_transport=Transport.DOCKER_EXEC,
+            docker_container_id=dcos_node.docker_container_id,
+        )
+        hostname = dcos_node.run(args=['hostname']).stdout
+        assert node.run(args=['hostname']).stdout == hostname
+
+
 class TestDownloadFile:
     """
     Tests for ``Node.download_file``.
@@ -448,6 +477,30 @@ class TestSendFile:
         # Implicitly asserts SSH connection closed by ``send_file``.
         dcos_node.run(args=['userdel', '-r', testuser])
 
+    def test_no_files_left_behind(
+        self,
+        dcos_node: Node,
+        tmp_path: Path,
+    ) -> None:
+        """
+        Sending a file does not leave temporary files in the destination
+        directory or in the user's home directory.
+        """
+        local_file = tmp_path / 'example_file.txt'
+        local_file.write_text(str(uuid.uuid4()))
+        master_destination_dir = Path('/etc/{random}'.format(
+            random=uuid.uuid4().hex,
+        ))
+        home_before = dcos_node.run(args=['ls', '-A', '$HOME'], shell=True)
+        dcos_node.send_file(
+            local_path=local_file,
+            remote_path=master_destination_dir / 'file.txt',
+        )
+        home_after = dcos_node.run(args=['ls', '-A', '$HOME'], shell=True)
+        result = dcos_node.run(args=['ls', '-A', str(master_destination_dir)])
+        assert result.stdout.decode().split() == ['file.txt']
+        assert home_after.stdout == home_before.stdout
+
     def test_send_symlink(self, dcos_node: Node, tmp_path: Path) -> None:
         """
         If sending the path to a symbolic link, the link's target is sent.
@@ -994,9 +1047,72 @@ class TestOutput:
         assert captured.out.strip() == stdout_message
         assert captured.err.strip() == stderr_message
 
+    def test_capture_tail(self, dcos_node: Node) -> None:
+        """
+        When given ``Output.CAPTURE_TAIL``, only the end of stdout and stderr
+        is captured.
+        """
+        args = ['seq', '100000', '&&', '>&2', 'seq', '100000']
+        result = dcos_node.run(
+            args=args,
+            shell=True,
+            output=Output.CAPTURE_TAIL,
+            output_max_bytes=13,
+        )
+        assert result.stdout == b'99999\n100000\n'[-13:]
+        assert result.stderr == b'99999\n100000\n'[-13:]
+
+    def test_capture_spooled(self, dcos_node: Node) -> None:
+        """
+        When given ``Output.CAPTURE_SPOOLED``, stdout and stderr are captured
+        in file objects.
+        """
+        stdout_message = uuid.uuid4().hex
+        stderr_message = uuid.uuid4().hex
+        args = ['echo', stdout_message, '&&', '>&2', 'echo', stderr_message]
+        result = dcos_node.run(
+            args=args,
+            shell=True,
+            output=Output.CAPTURE_SPOOLED,
+            output_max_bytes=10,
+        )
+        assert result.stdout.read().strip().decode() == stdout_message
+        assert result.stderr.read().strip().decode() == stderr_message
+
+    def test_stream(self, dcos_node: Node, tmp_path: Path) -> None:
+        """
+        When given ``Output.STREAM``, stdout and stderr are written to the
+        given sink and are not captured.
+        """
+        stdout_message = uuid.uuid4().hex
+        stderr_message = uuid.uuid4().hex
+        args = ['echo', stdout_message, '&&', '>&2', 'echo', stderr_message]
+        sink_path = tmp_path / 'output'
+        with sink_path.open('wb') as sink:
+            result = dcos_node.run(
+                args=args,
+                shell=True,
+                output=Output.STREAM,
+                output_sink=sink,
+            )
+
+        assert result.stdout is None
+        assert result.stderr is None
+        assert set(sink_path.read_text().split()) == {
+            stdout_message,
+            stderr_message,
+        }
+
+    def test_stream_no_sink(self, dcos_node: Node) -> None:
+        """
+        An error is raised if ``Output.STREAM`` is given without a sink.
+        """
+        with pytest.raises(ValueError):
+            dcos_node.run(args=['true'], output=Output.STREAM)
+
     @pytest.mark.parametrize(
         'output',
-        [Output.LOG_AND_CAPTURE, Output.CAPTURE],
+        [Output.LOG_AND_CAPTURE, Output.CAPTURE, Output.CAPTURE_TAIL],
     )
     def test_errors(self, dcos_node: Node, output: Output) -> None:
         """
@@ -1010,6 +1126,129 @@ class TestOutput:
         assert expected_message in excinfo.value.stderr
 
 
+class TestStreamOutput:
+    """
+    Tests for giving ``Output.STREAM`` to methods which do not support it.
+    """
+
+    def test_rejected(self, tmp_path: Path) -> None:
+        """
+        ``Output.STREAM`` is rejected before anything is run on the node.
+        """
+        # This address is reserved for documentation, so running anything on
+        # the node would fail with a different error.
+        node = Node(
+            public_ip_address=IPv4Address('192.0.2.1'),
+            private_ip_address=IPv4Address('192.0.2.1'),
+            default_user='root',
+            ssh_key_path=tmp_path / 'id_rsa',
+        )
+        installer_url = 'https://example.com/dcos_generate_config.sh'
+        installer_path = tmp_path / 'dcos_generate_config.sh'
+        installer_path.write_text('exit 1')
+        ip_detect_path = tmp_path / 'ip-detect'
+        ip_detect_path.write_text('exit 1')
+
+        for method, dcos_installer in (
+            (node.install_dcos_from_url, installer_url),
+            (node.install_dcos_from_path, installer_path),
+            (node.upgrade_dcos_from_url, installer_url),
+            (node.upgrade_dcos_from_path, installer_path),
+        ):
+            with pytest.raises(ValueError):
+                method(
+                    dcos_installer=dcos_installer,
+                    dcos_config={},
+                    ip_detect_path=ip_detect_path,
+                    role=Role.MASTER,
+                    output=Output.STREAM,
+                )
+
+
+class _LocalTransport:
+    """
+    A transport which runs commands on the host.
+    """
+
+    def popen(
+        self,
+        args: List[str],
+        pipe_stdin: bool,
+        **kwargs: Any,
+    ) -> subprocess.Popen:
+        """
+        Start a command on the host.
+        """
+        return subprocess.Popen(
+            args=args,
+            stdin=subprocess.PIPE if pipe_stdin else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+
+class TestSendFileErrors:
+    """
+    Tests for errors sending files, which do not need a node.
+    """
+
+    @pytest.fixture()
+    def local_node(self, tmp_path: Path, monkeypatch: MonkeyPatch) -> Node:
+        """
+        Return a node whose commands are run on the host.
+        """
+        monkeypatch.setattr(
+            Node,
+            '_get_node_transport',
+            lambda self, transport: _LocalTransport(),
+        )
+        return Node(
+            public_ip_address=IPv4Address('192.0.2.1'),
+            private_ip_address=IPv4Address('192.0.2.1'),
+            default_user=getpass.getuser(),
+            ssh_key_path=tmp_path / 'id_rsa',
+        )
+
+    def test_missing_local_path(
+        self,
+        local_node: Node,
+        tmp_path: Path,
+    ) -> None:
+        """
+        A ``FileNotFoundError`` is raised if the local path does not exist,
+        and nothing is placed on the node.
+        """
+        remote_path = tmp_path / 'remote' / 'example.txt'
+
+        with pytest.raises(FileNotFoundError):
+            local_node.send_file(
+                local_path=tmp_path / 'missing.txt',
+                remote_path=remote_path,
+            )
+
+        assert not remote_path.parent.exists()
+
+    def test_unreadable_file(self, local_node: Node, tmp_path: Path) -> None:
+        """
+        An error reading a file in a local directory is raised, and nothing
+        is left on the node.
+        """
+        local_dir = tmp_path / 'local'
+        local_dir.mkdir()
+        (local_dir / 'example.txt').write_text('example')
+        (local_dir / 'broken').symlink_to(tmp_path / 'missing.txt')
+        remote_dir = tmp_path / 'remote'
+        remote_dir.mkdir()
+
+        with pytest.raises(FileNotFoundError):
+            local_node.send_file(
+                local_path=local_dir,
+                remote_path=remote_dir / 'local',
+            )
+
+        assert list(remote_dir.iterdir()) == []
+
+
 class TestDcosBuildInfo:
     """
     Tests for ``Node.dcos_build_info``.
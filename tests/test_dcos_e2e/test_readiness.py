@@ -0,0 +1,419 @@
+"""
+Tests for waiting until nodes are ready.
+"""
+
+import subprocess
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from ipaddress import IPv4Address
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, List, Set
+
+import pytest
+import requests
+from _pytest.monkeypatch import MonkeyPatch
+
+from dcos_e2e import _wait_for_dcos
+from dcos_e2e._readiness import Phase, run_phases, wait_until_ready
+from dcos_e2e._vendor.dcos_test_utils.dcos_api import DcosUser
+from dcos_e2e._wait_for_dcos import wait_for_dcos_oss
+from dcos_e2e.exceptions import DCOSTimeoutError
+from dcos_e2e.node import Node
+from dcos_e2e.readiness import PhaseTiming, ReadinessReport
+
+
+def _nodes(count: int) -> list:
+    """
+    Return ``count`` nodes which are never connected to.
+    """
+    return [
+        Node(
+            public_ip_address=IPv4Address('172.17.0.{}'.format(index + 2)),
+            private_ip_address=IPv4Address('172.17.0.{}'.format(index + 2)),
+            default_user='root',
+            ssh_key_path=Path('/dev/null'),
+        ) for index in range(count)
+    ]
+
+
+class _NotReady(Exception):
+    """
+    Raised by probes on nodes which are not ready.
+    """
+
+
+class TestWaitUntilReady:
+    """
+    Tests for ``wait_until_ready``.
+    """
+
+    def test_no_nodes(self) -> None:
+        """
+        Waiting for no nodes returns without probing.
+        """
+
+        def probe(node: Node) -> None:
+            raise AssertionError(node)
+
+        wait_until_ready(nodes=[], probe=probe, exceptions=(_NotReady, ))
+
+    def test_probes_concurrently(self) -> None:
+        """
+        All nodes are probed at the same time.
+        """
+        nodes = _nodes(count=4)
+        barrier = threading.Barrier(len(nodes), timeout=5)
+
+        def probe(node: Node) -> None:
+            # This only passes if every node is being probed at once.
+            barrier.wait()
+
+        wait_until_ready(nodes=nodes, probe=probe, exceptions=(_NotReady, ))
+
+    def test_retries_until_ready(self) -> None:
+        """
+        Each node is probed until its probe succeeds.
+        """
+        nodes = _nodes(count=3)
+        attempts = Counter()  # type: Counter
+        lock = threading.Lock()
+
+        def probe(node: Node) -> None:
+            with lock:
+                attempts[node] += 1
+                attempt = attempts[node]
+            if attempt < 3:
+                raise _NotReady()
+
+        wait_until_ready(
+            nodes=nodes,
+            probe=probe,
+            exceptions=(_NotReady, ),
+            initial_delay_seconds=0.01,
+        )
+        assert attempts == {node: 3 for node in nodes}
+
+    def test_deadline(self) -> None:
+        """
+        The last error from a node which is not ready by the deadline is
+        raised.
+        """
+        nodes = _nodes(count=2)
+        ready, not_ready = nodes
+
+        def probe(node: Node) -> None:
+            if node is not_ready:
+                raise _NotReady(str(node))
+
+        start = time.monotonic()
+        with pytest.raises(_NotReady) as excinfo:
+            wait_until_ready(
+                nodes=nodes,
+                probe=probe,
+                exceptions=(_NotReady, ),
+                timeout_seconds=0.5,
+                initial_delay_seconds=0.05,
+                max_delay_seconds=0.1,
+            )
+        assert str(excinfo.value) == str(not_ready)
+        assert time.monotonic() - start < 5
+
+    def test_unexpected_error(self) -> None:
+        """
+        An error which is not one of the given exceptions is raised at once
+        and stops probes on other nodes.
+        """
+        nodes = _nodes(count=2)
+        failing, slow = nodes
+
+        def probe(node: Node) -> None:
+            if node is failing:
+                raise ValueError()
+            raise _NotReady()
+
+        start = time.monotonic()
+        with pytest.raises(ValueError):
+            wait_until_ready(
+                nodes=nodes,
+                probe=probe,
+                exceptions=(_NotReady, ),
+                initial_delay_seconds=60,
+                max_delay_seconds=60,
+            )
+        assert time.monotonic() - start < 30
+
+
+class TestRunPhases:
+    """
+    Tests for ``run_phases``.
+    """
+
+    def test_independent_phases_concurrent(self) -> None:
+        """
+        Phases which do not depend on each other are checked at the same
+        time.
+        """
+        barrier = threading.Barrier(3, timeout=5)
+
+        def check() -> None:
+            # This only passes if every phase is being checked at once.
+            barrier.wait()
+
+        phases = [
+            Phase(
+                name=name,
+                check=check,
+                exceptions=(_NotReady, ),
+            ) for name in ('first', 'second', 'third')
+        ]
+
+        timings = run_phases(phases=phases, start=time.monotonic())
+        assert [timing.name for timing in timings] == [
+            'first',
+            'second',
+            'third',
+        ]
+
+    def test_dependencies(self) -> None:
+        """
+        A phase starts only after the phases it depends on are ready, and the
+        number of attempts of each phase is recorded.
+        """
+        ready = set()  # type: Set[str]
+        attempts = Counter()  # type: Counter
+
+        def check(name: str, ready_after: int) -> None:
+            attempts[name] += 1
+            if attempts[name] < ready_after:
+                raise _NotReady()
+            ready.add(name)
+
+        def check_dependent() -> None:
+            assert ready == {'first', 'second'}
+
+        phases = [
+            Phase(
+                name='first',
+                check=lambda: check(name='first', ready_after=3),
+                exceptions=(_NotReady, ),
+            ),
+            Phase(
+                name='second',
+                check=lambda: check(name='second', ready_after=1),
+                exceptions=(_NotReady, ),
+            ),
+            Phase(
+                name='dependent',
+                check=check_dependent,
+                exceptions=(_NotReady, ),
+                depends_on=['first', 'second'],
+            ),
+        ]
+
+        start = time.monotonic()
+        timings = run_phases(
+            phases=phases,
+            start=start,
+            initial_delay_seconds=0.01,
+        )
+        first, second, dependent = timings
+        assert first.attempts == 3
+        assert second.attempts == 1
+        assert dependent.attempts == 1
+        assert dependent.started_after_seconds >= first.ready_after_seconds
+        assert 0 <= first.started_after_seconds <= first.ready_after_seconds
+
+    def test_unknown_dependency(self) -> None:
+        """
+        A phase cannot depend on a phase which does not come before it.
+        """
+        phases = [
+            Phase(
+                name='dependent',
+                check=lambda: None,
+                exceptions=(),
+                depends_on=['later'],
+            ),
+            Phase(name='later', check=lambda: None, exceptions=()),
+        ]
+
+        with pytest.raises(ValueError):
+            run_phases(phases=phases, start=time.monotonic())
+
+    def test_unexpected_error(self) -> None:
+        """
+        An error which is not one of a phase's exceptions is raised and stops
+        other phases.
+        """
+
+        def fail() -> None:
+            raise ValueError()
+
+        def never_ready() -> None:
+            raise _NotReady()
+
+        phases = [
+            Phase(name='slow', check=never_ready, exceptions=(_NotReady, )),
+            Phase(name='failing', check=fail, exceptions=(_NotReady, )),
+        ]
+
+        start = time.monotonic()
+        with pytest.raises(ValueError):
+            run_phases(
+                phases=phases,
+                start=start,
+                initial_delay_seconds=60,
+                max_delay_seconds=60,
+            )
+        assert time.monotonic() - start < 30
+
+    def test_deadline(self) -> None:
+        """
+        The last error of a phase which is not ready by the deadline is
+        raised.
+        """
+
+        def never_ready() -> None:
+            raise _NotReady()
+
+        phases = [
+            Phase(name='slow', check=never_ready, exceptions=(_NotReady, )),
+        ]
+
+        start = time.monotonic()
+        with pytest.raises(_NotReady):
+            run_phases(
+                phases=phases,
+                start=start,
+                deadline=start + 0.5,
+                initial_delay_seconds=0.01,
+            )
+        assert time.monotonic() - start < 30
+
+
+class _FailingNode:
+    """
+    A node on which every command fails.
+    """
+
+    def run(self, args: List[str], **kwargs: Any) -> None:
+        """
+        Raise ``subprocess.CalledProcessError``.
+        """
+        raise subprocess.CalledProcessError(returncode=1, cmd=args)
+
+
+class TestWaitForDCOS:
+    """
+    Tests for waiting for DC/OS with a timeout.
+    """
+
+    def test_thread(self) -> None:
+        """
+        DC/OS can be waited for outside of the main thread.
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                wait_for_dcos_oss,
+                masters=set(),
+                agents=set(),
+                public_agents=set(),
+                http_checks=False,
+            )
+            report = future.result()
+        assert [timing.name for timing in report.phases] == ['node-poststart']
+
+    def test_timeout(self, monkeypatch: MonkeyPatch) -> None:
+        """
+        A ``DCOSTimeoutError`` is raised if DC/OS is not ready within the
+        timeout.
+        """
+        monkeypatch.setattr(_wait_for_dcos, '_TIMEOUT_SECONDS', 0)
+        with pytest.raises(DCOSTimeoutError):
+            wait_for_dcos_oss(
+                masters={_FailingNode()},  # type: ignore
+                agents=set(),
+                public_agents=set(),
+                http_checks=False,
+            )
+
+
+def _rejecting_session() -> Any:
+    """
+    Return a session for which every login is rejected.
+    """
+    response = requests.Response()
+    response.status_code = 401
+    response._content = b'Unauthorized'
+    return SimpleNamespace(
+        auth_user=DcosUser(credentials={}),
+        post=lambda *args, **kwargs: response,
+    )
+
+
+class TestLogin:
+    """
+    Tests for logging in while waiting for DC/OS.
+    """
+
+    def test_rejected_briefly(self) -> None:
+        """
+        A login which is rejected soon after the first rejection is retried.
+        """
+        check = _wait_for_dcos._LoginCheck(session=_rejecting_session())
+        for _ in range(2):
+            with pytest.raises(_wait_for_dcos._NotReady):
+                check()
+
+    def test_rejected(self, monkeypatch: MonkeyPatch) -> None:
+        """
+        A login which keeps being rejected is not retried.
+        """
+        monkeypatch.setattr(_wait_for_dcos, '_LOGIN_REJECTED_SECONDS', 0)
+        check = _wait_for_dcos._LoginCheck(session=_rejecting_session())
+        with pytest.raises(_wait_for_dcos._LoginRejected) as excinfo:
+            check()
+        assert 'status code 401: Unauthorized' in str(excinfo.value)
+        assert not isinstance(excinfo.value, _wait_for_dcos._HTTP_NOT_READY)
+
+
+class TestReadinessReport:
+    """
+    Tests for ``ReadinessReport``.
+    """
+
+    def test_report(self) -> None:
+        """
+        A report gives the timing of each phase and the total time.
+        """
+        login = PhaseTiming(
+            name='login',
+            started_after_seconds=1,
+            ready_after_seconds=3,
+            attempts=2,
+        )
+        marathon = PhaseTiming(
+            name='marathon',
+            started_after_seconds=3,
+            ready_after_seconds=10,
+            attempts=4,
+        )
+        report = ReadinessReport(phases=[login, marathon])
+        assert report.phase('marathon') is marathon
+        assert marathon.duration_seconds == 7
+        assert report.total_seconds == 10
+        assert str(report).splitlines() == [
+            'login: ready after 3.0s (started after 1.0s, 2 attempts)',
+            'marathon: ready after 10.0s (started after 3.0s, 4 attempts)',
+        ]
+        with pytest.raises(KeyError):
+            report.phase('metronome')
+
+    def test_empty(self) -> None:
+        """
+        An empty report has a total time of zero.
+        """
+        assert ReadinessReport(phases=[]).total_seconds == 0
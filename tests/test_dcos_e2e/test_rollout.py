@@ -0,0 +1,194 @@
+"""
+Tests for running an operation on many nodes.
+"""
+
+import subprocess
+import threading
+import time
+from ipaddress import IPv4Address
+from pathlib import Path
+from typing import List, Set, Tuple
+
+import pytest
+
+from dcos_e2e._rollout import run_on_nodes
+from dcos_e2e.exceptions import MultiNodeCalledProcessError
+from dcos_e2e.node import Node, Role
+from dcos_e2e.rollout_policies import RolloutPolicy
+
+
+def _nodes(first: int, count: int) -> Set[Node]:
+    """
+    Return ``count`` nodes which are never connected to.
+    """
+    return {
+        Node(
+            public_ip_address=IPv4Address('172.17.0.{}'.format(index)),
+            private_ip_address=IPv4Address('172.17.0.{}'.format(index)),
+            default_user='root',
+            ssh_key_path=Path('/dev/null'),
+        )
+        for index in range(first, first + count)
+    }
+
+
+class _Recorder:
+    """
+    An operation which records the nodes it is run on, and the largest number
+    of nodes it was run on at the same time.
+    """
+
+    def __init__(self, seconds: float = 0) -> None:
+        """
+        Args:
+            seconds: How long each run of the operation takes.
+        """
+        self.calls = []  # type: List[Tuple[Node, Role]]
+        self.max_running = 0
+        self._running = 0
+        self._seconds = seconds
+        self._lock = threading.Lock()
+
+    def __call__(self, node: Node, role: Role) -> None:
+        with self._lock:
+            self.calls.append((node, role))
+            self._running += 1
+            self.max_running = max(self.max_running, self._running)
+        time.sleep(self._seconds)
+        with self._lock:
+            self._running -= 1
+
+
+class TestRunOnNodes:
+    """
+    Tests for ``run_on_nodes``.
+    """
+
+    def test_role_order(self) -> None:
+        """
+        Nodes in one group of roles are operated on only after every node in
+        the group before it.
+        """
+        masters = _nodes(first=2, count=2)
+        agents = _nodes(first=10, count=2)
+        public_agents = _nodes(first=20, count=2)
+        recorder = _Recorder(seconds=0.01)
+
+        run_on_nodes(
+            operation=recorder,
+            masters=masters,
+            agents=agents,
+            public_agents=public_agents,
+            rollout_policy=RolloutPolicy.rolling(agent_parallelism=2),
+        )
+
+        roles = [role for _, role in recorder.calls]
+        assert set(roles[:2]) == {Role.MASTER}
+        assert set(roles[2:]) == {Role.AGENT, Role.PUBLIC_AGENT}
+        assert {node for node, _ in recorder.calls} == {
+            *masters,
+            *agents,
+            *public_agents,
+        }
+
+    @pytest.mark.parametrize('parallelism', [1, 2, 3])
+    def test_parallelism(self, parallelism: int) -> None:
+        """
+        At most the given number of nodes with a role are operated on at the
+        same time.
+        """
+        recorder = _Recorder(seconds=0.05)
+
+        run_on_nodes(
+            operation=recorder,
+            masters=set(),
+            agents=_nodes(first=10, count=6),
+            public_agents=set(),
+            rollout_policy=RolloutPolicy(
+                parallelism={Role.AGENT: parallelism},
+            ),
+        )
+
+        assert len(recorder.calls) == 6
+        assert recorder.max_running == parallelism
+
+    def test_pending_cancelled(self) -> None:
+        """
+        After the operation fails on a node, it is not started on more nodes,
+        and later groups of roles are not operated on.
+        """
+        calls = []  # type: List[Node]
+
+        def fail(node: Node, role: Role) -> None:
+            calls.append(node)
+            raise subprocess.CalledProcessError(returncode=1, cmd=['false'])
+
+        with pytest.raises(MultiNodeCalledProcessError) as excinfo:
+            run_on_nodes(
+                operation=fail,
+                masters=_nodes(first=2, count=3),
+                agents=_nodes(first=10, count=2),
+                public_agents=set(),
+                rollout_policy=RolloutPolicy.serial(),
+            )
+
+        assert len(calls) == 1
+        assert set(excinfo.value.errors) == set(calls)
+
+    def test_output_labelled(self) -> None:
+        """
+        The output of every failed node is included in the error, labelled
+        by its node.
+        """
+        agents = _nodes(first=10, count=2)
+        (ok_node, ) = _nodes(first=20, count=1)
+
+        def operation(node: Node, role: Role) -> None:
+            if node == ok_node:
+                return
+            raise subprocess.CalledProcessError(
+                returncode=2,
+                cmd=['example'],
+                output='out {node}'.format(node=node).encode(),
+                stderr='err {node}'.format(node=node).encode(),
+            )
+
+        with pytest.raises(MultiNodeCalledProcessError) as excinfo:
+            run_on_nodes(
+                operation=operation,
+                masters=set(),
+                agents=agents,
+                public_agents={ok_node},
+                rollout_policy=RolloutPolicy.concurrent(),
+            )
+
+        error = excinfo.value
+        assert set(error.errors) == agents
+        assert error.returncode == 2
+        for node in agents:
+            label = '--- {node} ---\n'.format(node=node).encode()
+            assert label + 'out {node}\n'.format(node=node).encode() in (
+                error.stdout
+            )
+            assert label + 'err {node}\n'.format(node=node).encode() in (
+                error.stderr
+            )
+            assert str(node) in str(error)
+        assert str(ok_node).encode() not in error.stdout
+
+    def test_unexpected_error(self) -> None:
+        """
+        An error which is not a ``CalledProcessError`` is raised as it is.
+        """
+
+        def operation(node: Node, role: Role) -> None:
+            raise KeyError(node)
+
+        with pytest.raises(KeyError):
+            run_on_nodes(
+                operation=operation,
+                masters=_nodes(first=2, count=1),
+                agents=set(),
+                public_agents=set(),
+                rollout_policy=RolloutPolicy.concurrent(),
+            )
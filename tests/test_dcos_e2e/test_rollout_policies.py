@@ -0,0 +1,74 @@
+"""
+Tests for rollout policies.
+"""
+
+from typing import List
+
+import pytest
+
+from dcos_e2e.node import Role
+from dcos_e2e.rollout_policies import RolloutPolicy
+
+
+class TestRolloutPolicy:
+    """
+    Tests for ``RolloutPolicy``.
+    """
+
+    def test_default(self) -> None:
+        """
+        By default, all roles are in one group with no parallelism limit.
+        """
+        policy = RolloutPolicy()
+        assert len(policy.role_order) == 1
+        assert set(policy.role_order[0]) == set(Role)
+        assert policy.parallelism == {}
+
+    def test_serial(self) -> None:
+        """
+        The serial policy operates on one node at a time, masters first.
+        """
+        policy = RolloutPolicy.serial()
+        assert policy.role_order == (
+            (Role.MASTER, ),
+            (Role.AGENT, ),
+            (Role.PUBLIC_AGENT, ),
+        )
+        assert policy.parallelism == {role: 1 for role in Role}
+
+    def test_rolling(self) -> None:
+        """
+        The rolling policy operates on masters one at a time and then on
+        agents in parallel.
+        """
+        policy = RolloutPolicy.rolling(agent_parallelism=5)
+        assert policy.role_order == (
+            (Role.MASTER, ),
+            (Role.AGENT, Role.PUBLIC_AGENT),
+        )
+        assert policy.parallelism == {
+            Role.MASTER: 1,
+            Role.AGENT: 5,
+            Role.PUBLIC_AGENT: 5,
+        }
+
+    @pytest.mark.parametrize(
+        'role_order',
+        [
+            [[Role.MASTER]],
+            [[Role.MASTER, Role.AGENT], [Role.AGENT, Role.PUBLIC_AGENT]],
+        ],
+    )
+    def test_role_not_in_one_group(self, role_order: List[List[Role]]) -> None:
+        """
+        An error is raised if a role is not in exactly one group.
+        """
+        with pytest.raises(ValueError):
+            RolloutPolicy(role_order=role_order)
+
+    def test_parallelism_too_low(self) -> None:
+        """
+        An error is raised if a parallelism is less than one.
+        """
+        with pytest.raises(ValueError):
+            RolloutPolicy(parallelism={Role.AGENT: 0})
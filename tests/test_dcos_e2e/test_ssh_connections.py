@@ -0,0 +1,257 @@
+"""
+Tests for the pool of persistent SSH connections.
+"""
+
+from ipaddress import IPv4Address
+from pathlib import Path
+from typing import Any, Iterator, List
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from dcos_e2e._node_transports import _ssh_connections
+from dcos_e2e._node_transports._ssh_connections import (
+    SSHConnectionPool,
+    SSHSession,
+)
+
+
+class _FakeSSH:
+    """
+    A replacement for ``subprocess.run`` which records the hosts whose
+    master connections are asked to exit.
+    """
+
+    def __init__(self, pool: SSHConnectionPool) -> None:
+        """
+        Args:
+            pool: The pool whose lock must not be held while commands run.
+        """
+        self.exited = []  # type: List[str]
+        self._pool = pool
+
+    def __call__(self, args: List[str], **kwargs: Any) -> None:
+        # pylint: disable=protected-access
+        assert not self._pool._lock.locked()
+        assert args[-3:-1] == ['-O', 'exit']
+        self.exited.append(args[-1])
+
+
+class _Clock:
+    """
+    A replacement for ``time.monotonic`` which is moved forward by tests.
+    """
+
+    def __init__(self) -> None:
+        """
+        Start at zero.
+        """
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch: MonkeyPatch) -> _Clock:
+    """
+    Return a clock which the pool uses instead of the system clock.
+    """
+    fake_clock = _Clock()
+    monkeypatch.setattr(_ssh_connections.time, 'monotonic', fake_clock)
+    return fake_clock
+
+
+@pytest.fixture()
+def pool() -> Iterator[SSHConnectionPool]:
+    """
+    Return a pool with room for two idle connections.
+    """
+    connection_pool = SSHConnectionPool(
+        idle_timeout_seconds=60,
+        max_connections=2,
+    )
+    yield connection_pool
+    connection_pool.close()
+
+
+@pytest.fixture()
+def fake_ssh(monkeypatch: MonkeyPatch, pool: SSHConnectionPool) -> _FakeSSH:
+    """
+    Replace ``subprocess.run`` in the pool module.
+    """
+    ssh = _FakeSSH(pool=pool)
+    monkeypatch.setattr(_ssh_connections.subprocess, 'run', ssh)
+    return ssh
+
+
+def _acquire(pool: SSHConnectionPool, host: str) -> SSHSession:
+    """
+    Start a session of a connection to a host.
+    """
+    return pool.acquire(
+        public_ip_address=IPv4Address(host),
+        user='root',
+        ssh_key_path=Path('/dev/null'),
+    )
+
+
+def _control_path(session: SSHSession) -> str:
+    """
+    Return the ``ControlPath`` option of a session.
+    """
+    (option, ) = [
+        option for option in session.options
+        if option.startswith('ControlPath=')
+    ]
+    return option
+
+
+class TestSSHConnectionPool:
+    """
+    Tests for ``SSHConnectionPool``.
+    """
+
+    def test_reuse(
+        self,
+        pool: SSHConnectionPool,
+        fake_ssh: _FakeSSH,
+        clock: _Clock,
+    ) -> None:
+        """
+        Sessions for the same host, user and key use the same connection.
+        """
+        first = _acquire(pool=pool, host='10.0.0.1')
+        second = _acquire(pool=pool, host='10.0.0.1')
+        other = _acquire(pool=pool, host='10.0.0.2')
+        first.release()
+        second.release()
+        other.release()
+
+        assert _control_path(first) == _control_path(second)
+        assert _control_path(first) != _control_path(other)
+        assert 'ControlMaster=auto' in first.options
+        assert fake_ssh.exited == []
+
+    def test_idle_expiry(
+        self,
+        pool: SSHConnectionPool,
+        fake_ssh: _FakeSSH,
+        clock: _Clock,
+    ) -> None:
+        """
+        Connections which have been idle for longer than the idle timeout
+        are forgotten without being closed, as OpenSSH closes them itself.
+        """
+        _acquire(pool=pool, host='10.0.0.1').release()
+        _acquire(pool=pool, host='10.0.0.2').release()
+        clock.now += 61
+
+        _acquire(pool=pool, host='10.0.0.3').release()
+        _acquire(pool=pool, host='10.0.0.4').release()
+
+        assert fake_ssh.exited == []
+
+    def test_busy_not_expired(
+        self,
+        pool: SSHConnectionPool,
+        fake_ssh: _FakeSSH,
+        clock: _Clock,
+    ) -> None:
+        """
+        A connection is idle from when its last session is released, not
+        from when it was started.
+        """
+        session = _acquire(pool=pool, host='10.0.0.1')
+        clock.now += 61
+        session.release()
+        _acquire(pool=pool, host='10.0.0.2').release()
+
+        _acquire(pool=pool, host='10.0.0.3').release()
+
+        assert fake_ssh.exited == ['10.0.0.1']
+
+    def test_eviction(
+        self,
+        pool: SSHConnectionPool,
+        fake_ssh: _FakeSSH,
+        clock: _Clock,
+    ) -> None:
+        """
+        When there are too many connections, the least recently used idle
+        connection is closed.
+        """
+        _acquire(pool=pool, host='10.0.0.1').release()
+        clock.now += 1
+        _acquire(pool=pool, host='10.0.0.2').release()
+        clock.now += 1
+        # Using the first connection again makes the second least recently
+        # used.
+        _acquire(pool=pool, host='10.0.0.1').release()
+
+        _acquire(pool=pool, host='10.0.0.3').release()
+
+        assert fake_ssh.exited == ['10.0.0.2']
+
+    def test_busy_not_evicted(
+        self,
+        pool: SSHConnectionPool,
+        fake_ssh: _FakeSSH,
+        clock: _Clock,
+    ) -> None:
+        """
+        Connections with sessions which have not been released are not
+        closed to make room for others.
+        """
+        busy = _acquire(pool=pool, host='10.0.0.1')
+        clock.now += 1
+        _acquire(pool=pool, host='10.0.0.2').release()
+
+        _acquire(pool=pool, host='10.0.0.3').release()
+        assert fake_ssh.exited == ['10.0.0.2']
+
+        other_busy = _acquire(pool=pool, host='10.0.0.4')
+        _acquire(pool=pool, host='10.0.0.5')
+        assert fake_ssh.exited == ['10.0.0.2', '10.0.0.3']
+
+        busy.release()
+        other_busy.release()
+
+    def test_release_twice(
+        self,
+        pool: SSHConnectionPool,
+        fake_ssh: _FakeSSH,
+        clock: _Clock,
+    ) -> None:
+        """
+        Releasing a session twice does not release another session of the
+        same connection.
+        """
+        first = _acquire(pool=pool, host='10.0.0.1')
+        second = _acquire(pool=pool, host='10.0.0.1')
+        first.release()
+        first.release()
+        _acquire(pool=pool, host='10.0.0.2').release()
+
+        _acquire(pool=pool, host='10.0.0.3').release()
+
+        assert fake_ssh.exited == ['10.0.0.2']
+        second.release()
+
+    def test_close(
+        self,
+        pool: SSHConnectionPool,
+        fake_ssh: _FakeSSH,
+        clock: _Clock,
+    ) -> None:
+        """
+        Connections to one node, or all connections, can be closed.
+        """
+        _acquire(pool=pool, host='10.0.0.1').release()
+        _acquire(pool=pool, host='10.0.0.2').release()
+
+        pool.close(public_ip_address=IPv4Address('10.0.0.1'))
+        assert fake_ssh.exited == ['10.0.0.1']
+
+        pool.close()
+        assert fake_ssh.exited == ['10.0.0.1', '10.0.0.2']
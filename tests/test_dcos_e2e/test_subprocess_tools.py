@@ -0,0 +1,171 @@
+"""
+Tests for running subprocesses.
+"""
+
+import logging
+import subprocess
+import threading
+import time
+from io import BytesIO
+from typing import List
+
+import pytest
+from _pytest.logging import LogCaptureFixture
+
+from dcos_e2e._subprocess_tools import (
+    LineLogger,
+    SinkBuffer,
+    SpoolBuffer,
+    TailBuffer,
+    run_subprocess,
+)
+
+
+class TestRunSubprocess:
+    """
+    Tests for ``run_subprocess``.
+    """
+
+    def test_output(self) -> None:
+        """
+        stdout and stderr are captured separately.
+        """
+        result = run_subprocess(
+            args=['sh', '-c', 'echo stdout; echo stderr >&2'],
+            log_output_live=False,
+        )
+        assert result.returncode == 0
+        assert result.stdout == b'stdout\n'
+        assert result.stderr == b'stderr\n'
+
+    def test_log_output_live(self, caplog: LogCaptureFixture) -> None:
+        """
+        With ``log_output_live``, stdout is logged at the debug level and
+        stderr is logged at the warning level, line by line.
+        """
+        caplog.set_level(logging.DEBUG)
+        run_subprocess(
+            args=['sh', '-c', 'printf "a\\nb"; echo c >&2'],
+            log_output_live=True,
+        )
+        records = [
+            (record.levelno, record.message) for record in caplog.records
+        ]
+        assert (logging.DEBUG, 'a') in records
+        assert (logging.DEBUG, 'b') in records
+        assert (logging.WARNING, 'c') in records
+
+    def test_error(self) -> None:
+        """
+        A ``CalledProcessError`` with the output is raised if the command
+        fails.
+        """
+        with pytest.raises(subprocess.CalledProcessError) as excinfo:
+            run_subprocess(
+                args=['sh', '-c', 'echo output; exit 3'],
+                log_output_live=False,
+            )
+
+        assert excinfo.value.returncode == 3
+        assert excinfo.value.stdout == b'output\n'
+
+    def test_large_output(self) -> None:
+        """
+        Output larger than a pipe buffer is captured in full.
+        """
+        size = 5 * 1024 * 1024
+        result = run_subprocess(
+            args=['head', '-c', str(size), '/dev/zero'],
+            log_output_live=False,
+        )
+        assert len(result.stdout) == size
+
+    def test_returns_on_exit(self) -> None:
+        """
+        This returns when the command exits, even if a process it started
+        keeps its output pipes open.
+        """
+        start = time.monotonic()
+        result = run_subprocess(
+            args=['sh', '-c', 'sleep 5 & echo done'],
+            log_output_live=False,
+        )
+        assert result.stdout == b'done\n'
+        assert time.monotonic() - start < 5
+
+    def test_buffers(self) -> None:
+        """
+        Output is put in the given buffers.
+        """
+        result = run_subprocess(
+            args=['sh', '-c', 'echo stdout; echo stderr >&2'],
+            log_output_live=False,
+            stdout_buffer=TailBuffer(max_bytes=4),
+            stderr_buffer=SpoolBuffer(max_bytes=1),
+        )
+        assert result.stdout == b'out\n'
+        assert result.stderr.read() == b'stderr\n'
+
+
+class TestLineLogger:
+    """
+    Tests for ``LineLogger``.
+    """
+
+    def test_lines(self) -> None:
+        """
+        Full lines are logged, however the data is split.
+        """
+        lines = []  # type: List[str]
+        logger = LineLogger(lines.append)
+        logger.log(b'a')
+        logger.log(b'b\nc\n\nd')
+        assert lines == ['ab', 'c', '']
+        logger.flush()
+        assert lines == ['ab', 'c', '', 'd']
+
+    def test_long_line(self) -> None:
+        """
+        Lines longer than the maximum are logged in parts.
+        """
+        lines = []  # type: List[str]
+        logger = LineLogger(lines.append, max_line_bytes=3)
+        logger.log(b'abcdefg')
+        assert lines == ['abc', 'def']
+        logger.flush()
+        assert lines == ['abc', 'def', 'g']
+
+
+class TestTailBuffer:
+    """
+    Tests for ``TailBuffer``.
+    """
+
+    @pytest.mark.parametrize('max_bytes', [0, 1, 5, 100])
+    def test_tail(self, max_bytes: int) -> None:
+        """
+        Only the last ``max_bytes`` bytes are kept.
+        """
+        output_buffer = TailBuffer(max_bytes=max_bytes)
+        data = b''
+        for index in range(50):
+            chunk = str(index).encode()
+            output_buffer.write(chunk)
+            data += chunk
+        expected = data[max(len(data) - max_bytes, 0):]
+        assert output_buffer.value() == expected
+
+
+class TestSinkBuffer:
+    """
+    Tests for ``SinkBuffer``.
+    """
+
+    def test_sink(self) -> None:
+        """
+        Output is written to the sink.
+        """
+        sink = BytesIO()
+        output_buffer = SinkBuffer(sink=sink, lock=threading.Lock())
+        output_buffer.write(b'data')
+        assert sink.getvalue() == b'data'